@@ -0,0 +1,173 @@
+# En app/agrupador.py
+"""
+Group commit de las escrituras de una fila (GROUP_COMMIT=true).
+
+Cada alta, edición o baja de categorías y transacciones hacía su propio
+commit: en SQLite eso es un fsync y el lock de escritura por request.
+Con el agrupador, crud_async manda esas funciones de crud.py a una cola;
+la primera que llega abre una ventana de GROUP_COMMIT_VENTANA_MS (o hasta
+juntar GROUP_COMMIT_MAX_LOTE) y el lote se aplica en una sola transacción
+y un solo commit. Mientras un lote se confirma, el siguiente se sigue
+juntando.
+
+- Cada escritura corre dentro de su propio SAVEPOINT: si una falla, se
+  deshace solo ella y su request recibe la excepción; las demás del lote
+  se confirman igual.
+- Las funciones de crud.py no cambian: en la sesión del lote su
+  db.commit() solo hace flush, y el lote confirma una vez al final. No
+  sirve para funciones que llaman a db.rollback().
+- Un request recibe su resultado recién después del commit del lote, así
+  que sus lecturas siguientes ya ven lo que escribió.
+- Con SHARDS > 1 cada shard tiene su cola y sus lotes: un lote confirma en
+  un solo archivo y los shards siguen escribiendo en paralelo.
+"""
+import asyncio
+import contextvars
+import threading
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from . import config, database
+
+
+class SesionLote(database.SesionEnrutada):
+    """Sesión de un lote: commit() hace flush y confirmar_lote() confirma de verdad."""
+
+    def commit(self):
+        self.flush()
+
+    def confirmar_lote(self):
+        super().commit()
+
+
+_SesionLoteLocal = sessionmaker(
+    bind=database.engine, class_=SesionLote, autoflush=False, expire_on_commit=False
+)
+_AsyncSesionLoteLocal = None
+
+def _sesion_async():
+    global _AsyncSesionLoteLocal
+    if _AsyncSesionLoteLocal is None:
+        _AsyncSesionLoteLocal = async_sessionmaker(
+            database.get_async_engine(), sync_session_class=SesionLote, autoflush=False, expire_on_commit=False,
+            info={"async": True}
+        )
+    return _AsyncSesionLoteLocal()
+
+
+def _aplicar_lote(db: SesionLote, lote: list):
+    """
+    Corre cada (funcion, args, kwargs) del lote en su SAVEPOINT y confirma
+    todo junto. Devuelve una lista de (ok, resultado o excepción).
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        # pysqlite no abre la transacción antes de un SAVEPOINT: sin este
+        # BEGIN, cada RELEASE confirmaría su escritura por separado.
+        # IMMEDIATE toma el lock de escritura de entrada.
+        db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+    resultados = []
+    for funcion, args, kwargs in lote:
+        try:
+            with db.begin_nested():
+                resultados.append((True, funcion(db, *args, **kwargs)))
+        except Exception as e:
+            resultados.append((False, e))
+    db.confirmar_lote()
+    return resultados
+
+
+class _Cola:
+    """Escrituras pendientes de un shard."""
+
+    def __init__(self):
+        self.pendientes = [] # (funcion, args, kwargs, futuro)
+        self.lleno = None # asyncio.Event: se juntaron max_lote
+        self.tarea = None
+
+
+class AgrupadorEscrituras:
+    def __init__(self, ventana_ms: float, max_lote: int):
+        self.ventana = ventana_ms / 1000
+        self.max_lote = max_lote
+        self._colas = {} # shard -> _Cola
+        self._lock = threading.Lock()
+        self.lotes = 0
+        self.escrituras = 0
+        self.fallidas = 0
+        self.max_lote_visto = 0
+
+    async def ejecutar(self, shard: int, funcion, *args, **kwargs):
+        """
+        Encola funcion(db, *args, **kwargs) para el próximo lote del shard y
+        devuelve su resultado (o levanta su excepción) después del commit.
+        """
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        cola = self._colas.setdefault(shard, _Cola())
+        cola.pendientes.append((funcion, args, kwargs, futuro))
+        if cola.tarea is None or cola.tarea.done() or cola.tarea.get_loop() is not loop:
+            cola.lleno = asyncio.Event()
+            # Contexto vacío: las sentencias del lote no se cuentan en las
+            # métricas del request que lo disparó
+            cola.tarea = loop.create_task(self._procesar(shard, cola), context=contextvars.Context())
+        elif len(cola.pendientes) >= self.max_lote:
+            cola.lleno.set()
+        return await futuro
+
+    async def _procesar(self, shard: int, cola: _Cola):
+        while cola.pendientes:
+            if len(cola.pendientes) < self.max_lote and self.ventana > 0:
+                try:
+                    await asyncio.wait_for(cola.lleno.wait(), self.ventana)
+                except asyncio.TimeoutError:
+                    pass
+            cola.lleno.clear()
+            lote = cola.pendientes[:self.max_lote]
+            del cola.pendientes[:self.max_lote]
+            # Los requests cancelados mientras esperaban no se escriben
+            lote = [p for p in lote if not p[3].cancelled()]
+            if lote:
+                await self._aplicar(shard, lote)
+
+    async def _aplicar(self, shard: int, lote: list):
+        trabajos = [(funcion, args, kwargs) for funcion, args, kwargs, _ in lote]
+        try:
+            if config.DB_MODO == "async":
+                async with _sesion_async() as db:
+                    database.usar_shard(db, shard)
+                    resultados = await database.ejecutar(db, _aplicar_lote, trabajos)
+            else:
+                db = _SesionLoteLocal()
+                database.usar_shard(db, shard)
+                resultados = await database.ejecutar(db, _aplicar_lote, trabajos)
+        except Exception as e:
+            # Falló el commit (o el BEGIN): no se confirmó nada del lote
+            resultados = [(False, e)] * len(lote)
+
+        with self._lock:
+            self.lotes += 1
+            self.escrituras += len(lote)
+            self.fallidas += sum(1 for ok, _ in resultados if not ok)
+            self.max_lote_visto = max(self.max_lote_visto, len(lote))
+        for (_, _, _, futuro), (ok, valor) in zip(lote, resultados):
+            if futuro.done():
+                continue
+            if ok:
+                futuro.set_result(valor)
+            else:
+                futuro.set_exception(valor)
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "lotes": self.lotes,
+                "escrituras": self.escrituras,
+                "fallidas": self.fallidas,
+                "escrituras_por_lote": round(self.escrituras / self.lotes, 2) if self.lotes else 0,
+                "max_lote_visto": self.max_lote_visto,
+                "en_cola": sum(len(cola.pendientes) for cola in self._colas.values()),
+            }
+
+
+agrupador = AgrupadorEscrituras(config.GROUP_COMMIT_VENTANA_MS, config.GROUP_COMMIT_MAX_LOTE)
@@ -0,0 +1,418 @@
+# En app/analitica.py
+"""
+Analítica del historial de un usuario (GET /analytics/...): tendencias
+mensuales con promedios móviles, variación por categoría mes a mes,
+anomalías y proyección del mes en curso.
+
+- Carga: crud.get_libro trae todo el historial en una sola consulta, solo
+  con enteros, y se pasa de una vez a columnas de NumPy (Libro): día
+  (int64, días desde 1970-01-01), centavos con signo (los gastos en
+  negativo) y código de categoría. Ninguna cuenta recorre filas en Python
+  ni vuelve a la base: son sumas por mes con np.bincount, acumuladas,
+  ordenamientos y máscaras sobre esas columnas.
+- Cache: cada Libro queda en memoria (LRU de ANALITICA_CACHE_SIZE
+  usuarios) con la versión de datos con que se cargó (la del ETag). La
+  versión se lee antes de cargar: un cambio en el medio a lo sumo provoca
+  una carga de más, nunca un Libro viejo.
+- Las cuentas son funciones puras sobre un Libro y la fecha de hoy;
+  main.py las corre en el threadpool.
+- Los montos son centavos enteros hasta armar la respuesta. np.bincount
+  suma con pesos float64: exacto mientras un total no pase de 2**53
+  centavos.
+"""
+import threading
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from . import config, crud_async, models, schemas
+
+VENTANAS = (3, 6, 12) # Meses de los promedios móviles
+MESES_ANOMALIAS = 12 # Meses anteriores contra los que se compara el gasto de cada categoría
+MINIMO_MESES = 3 # Meses de historia de la categoría para marcar una anomalía mensual
+MINIMO_TRANSACCIONES = 5 # Gastos de la categoría para marcar una transacción atípica
+MAXIMO_ANOMALIAS = 50 # De cada tipo, las de mayor puntaje
+MESES_PROYECCION = 6 # Meses completos que se promedian para proyectar el actual
+
+# --- Historial en columnas ---
+
+def _primer_dia(meses):
+    """Meses desde 1970-01 -> día (desde 1970-01-01) en que empieza cada uno."""
+    return np.asarray(meses, dtype="datetime64[M]").astype("datetime64[D]").astype(np.int64)
+
+def _mes_de(dia: date):
+    return (dia.year - 1970) * 12 + dia.month - 1
+
+def _fecha_de_mes(mes: int):
+    return date(1970 + mes // 12, mes % 12 + 1, 1)
+
+def _monto(centavos):
+    # Los promedios caen entre centavos: se redondean al más cercano
+    return models.centavos_a_monto(int(np.rint(centavos)))
+
+
+class Libro:
+    """Historial completo de un usuario en columnas, ordenado por fecha."""
+
+    def __init__(self, filas, categorias: dict):
+        n = len(filas)
+        columnas = list(zip(*filas)) or [(), (), (), ()]
+        dias, centavos, categoria_ids, ids = (np.fromiter(c, dtype=np.int64, count=n) for c in columnas)
+        self.dias = dias
+        self.centavos = centavos
+        self.ids = ids
+        # Códigos 0..k-1 por transacción; categoria_ids[código] es el id (0 = sin categoría)
+        self.categoria_ids, self.codigos = np.unique(categoria_ids, return_inverse=True)
+        self.nombres = [categorias.get(int(c)) for c in self.categoria_ids]
+        self.meses = dias.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        self.dia_del_mes = dias - _primer_dia(self.meses) # 0 = el 1º
+        self.ingresos = np.where(centavos > 0, centavos, 0)
+        self.gastos = np.where(centavos < 0, -centavos, 0)
+
+    def __len__(self):
+        return len(self.dias)
+
+    @property
+    def categorias(self):
+        return len(self.categoria_ids)
+
+    @property
+    def primer_mes(self):
+        return int(self.meses[0]) if len(self) else None
+
+    def categoria(self, codigo: int):
+        """(categoria_id, nombre) de un código; (None, None) para las transacciones sin categoría."""
+        categoria_id = int(self.categoria_ids[codigo])
+        return (categoria_id, self.nombres[codigo]) if categoria_id else (None, None)
+
+    def totales(self, valores, desde: int, n: int, por_categoria: bool = False):
+        """
+        Suma de 'valores' (una columna por transacción) en cada uno de los
+        n meses a partir del mes 'desde': matriz (n, categorías) o vector (n,).
+        """
+        indice = self.meses - desde
+        dentro = (indice >= 0) & (indice < n)
+        k = self.categorias if por_categoria else 1
+        if por_categoria:
+            indice = indice * k + self.codigos
+        suma = np.bincount(indice[dentro], weights=valores[dentro], minlength=n * k)
+        suma = np.rint(suma).astype(np.int64)
+        return suma.reshape(n, k) if por_categoria else suma
+
+
+class CacheLibros:
+    """LRU en memoria de Libros por usuario, válidos para una versión de datos."""
+
+    def __init__(self, max_entradas: int):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict() # usuario_id -> (version, Libro)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.cargas = 0
+
+    def obtener(self, usuario_id: int, version: int):
+        with self._lock:
+            entrada = self._entradas.get(usuario_id)
+            if entrada is None or entrada[0] != version:
+                return None
+            self._entradas.move_to_end(usuario_id)
+            self.hits += 1
+            return entrada[1]
+
+    def guardar(self, usuario_id: int, version: int, libro: Libro):
+        if self.max_entradas <= 0:
+            return
+        with self._lock:
+            self._entradas[usuario_id] = (version, libro)
+            self._entradas.move_to_end(usuario_id)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def estadisticas(self):
+        with self._lock:
+            transacciones = sum(len(libro) for _, libro in self._entradas.values())
+            return {
+                "entradas": len(self._entradas), "max_entradas": self.max_entradas,
+                "transacciones": transacciones, "hits": self.hits, "cargas": self.cargas,
+            }
+
+cache = CacheLibros(config.ANALITICA_CACHE_SIZE)
+
+async def libro_de(db, usuario_id: int):
+    """El Libro del usuario: de la cache si sus datos no cambiaron o, si no, de la base."""
+    version = await crud_async.get_version_datos(db, usuario_id)
+    libro = cache.obtener(usuario_id, version)
+    if libro is None:
+        filas, categorias = await crud_async.get_libro(db, usuario_id)
+        libro = await run_in_threadpool(Libro, filas, categorias)
+        cache.cargas += 1
+        cache.guardar(usuario_id, version, libro)
+    return libro
+
+# --- Tendencias y promedios móviles ---
+
+def _promedio_movil(valores, ventana: int, primero: int):
+    """
+    Promedio de los últimos 'ventana' valores en cada posición, con sumas
+    acumuladas. NaN donde todavía no hay 'ventana' meses desde 'primero'
+    (la posición del primer mes con datos).
+    """
+    acumulado = np.concatenate(([0.0], np.cumsum(valores, dtype=np.float64)))
+    promedio = np.full(len(valores), np.nan)
+    promedio[ventana - 1:] = (acumulado[ventana:] - acumulado[:-ventana]) / ventana
+    promedio[:max(primero + ventana - 1, 0)] = np.nan
+    return promedio
+
+def _pendiente(valores):
+    """Pendiente de la recta de mínimos cuadrados (por posición); None con menos de dos puntos."""
+    if len(valores) < 2:
+        return None
+    x = np.arange(len(valores), dtype=np.float64)
+    x -= x.mean()
+    return float(np.dot(x, valores - np.mean(valores)) / np.dot(x, x))
+
+def _promedios(promedios: dict, i: int):
+    return schemas.PromediosMoviles(**{
+        f"meses_{ventana}": None if np.isnan(valores[i]) else _monto(valores[i])
+        for ventana, valores in promedios.items()
+    })
+
+def tendencias(libro: Libro, meses: int, hoy: date):
+    """
+    Ingresos, gastos y balance de los últimos 'meses' meses (el actual
+    incluido), con sus promedios móviles de VENTANAS meses y la tendencia
+    de ingresos y gastos sin contar el mes en curso.
+    """
+    actual = _mes_de(hoy)
+    desde = actual - meses + 1
+    base = desde - (max(VENTANAS) - 1) # Los promedios del primer punto necesitan meses anteriores
+    n = actual - base + 1
+    ingresos = libro.totales(libro.ingresos, base, n)
+    gastos = libro.totales(libro.gastos, base, n)
+    balance = ingresos - gastos
+    primero = libro.primer_mes - base if len(libro) else n
+
+    promedios_gastos = {v: _promedio_movil(gastos, v, primero) for v in VENTANAS}
+    promedios_balance = {v: _promedio_movil(balance, v, primero) for v in VENTANAS}
+
+    # Tendencia: meses completos desde el primero con datos
+    completos = slice(max(primero, n - meses), n - 1)
+    tendencia_ingresos = _pendiente(ingresos[completos])
+    tendencia_gastos = _pendiente(gastos[completos])
+
+    return schemas.AnaliticaTendencias(
+        desde=_fecha_de_mes(desde),
+        hasta=_fecha_de_mes(actual),
+        tendencia_ingresos=None if tendencia_ingresos is None else _monto(tendencia_ingresos),
+        tendencia_gastos=None if tendencia_gastos is None else _monto(tendencia_gastos),
+        puntos=[
+            schemas.PuntoTendencia(
+                periodo=_fecha_de_mes(base + i),
+                total_ingresos=models.centavos_a_monto(ingresos[i]),
+                total_gastos=models.centavos_a_monto(gastos[i]),
+                balance=models.centavos_a_monto(balance[i]),
+                promedio_gastos=_promedios(promedios_gastos, i),
+                promedio_balance=_promedios(promedios_balance, i),
+            )
+            for i in range(n - meses, n)
+        ],
+    )
+
+# --- Variación por categoría ---
+
+def categorias(libro: Libro, meses: int, hoy: date):
+    """
+    Gastos de cada categoría en los últimos 'meses' meses (el actual
+    incluido) contra el mes anterior. Cada mes trae las categorías con
+    gastos en él o en el anterior, de mayor a menor total.
+    """
+    actual = _mes_de(hoy)
+    desde = actual - meses + 1
+    matriz = libro.totales(libro.gastos, desde - 1, meses + 1, por_categoria=True)
+    total, anterior = matriz[1:], matriz[:-1]
+    diferencia = total - anterior
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variacion = np.where(anterior > 0, diferencia / anterior * 100, np.nan)
+
+    puntos = []
+    for i in range(meses):
+        presentes = np.flatnonzero((total[i] > 0) | (anterior[i] > 0))
+        presentes = presentes[np.argsort(-total[i, presentes], kind="stable")]
+        lista = []
+        for codigo in presentes:
+            categoria_id, nombre = libro.categoria(codigo)
+            lista.append(schemas.VariacionCategoria(
+                categoria_id=categoria_id,
+                nombre=nombre,
+                total=models.centavos_a_monto(total[i, codigo]),
+                anterior=models.centavos_a_monto(anterior[i, codigo]),
+                diferencia=models.centavos_a_monto(diferencia[i, codigo]),
+                variacion_pct=None if np.isnan(variacion[i, codigo]) else round(float(variacion[i, codigo]), 2),
+            ))
+        puntos.append(schemas.PuntoCategorias(periodo=_fecha_de_mes(desde + i), categorias=lista))
+    return schemas.AnaliticaCategorias(desde=_fecha_de_mes(desde), hasta=_fecha_de_mes(actual), puntos=puntos)
+
+# --- Anomalías ---
+
+def _escala(desvio, centro):
+    # Un gasto fijo (desvío 0) daría puntajes infinitos ante cualquier
+    # cambio: la escala nunca baja del 10% del valor típico ni de 1 peso
+    return np.maximum(np.maximum(desvio, centro * 0.1), 100)
+
+def _anomalias_mensuales(libro: Libro, desde: int, actual: int, umbral: float):
+    """
+    Meses en que el gasto de una categoría supera por más de 'umbral'
+    desvíos al promedio de sus MESES_ANOMALIAS meses anteriores (contados
+    desde el primer mes en que la categoría tuvo gastos).
+    """
+    primero = libro.primer_mes
+    n = actual - primero + 1
+    matriz = libro.totales(libro.gastos, primero, n, por_categoria=True).astype(np.float64)
+    acumulado = np.vstack((np.zeros(libro.categorias), np.cumsum(matriz, axis=0)))
+    acumulado_cuadrados = np.vstack((np.zeros(libro.categorias), np.cumsum(matriz ** 2, axis=0)))
+
+    # Ventana [inicio, i) de cada mes i y categoría: a lo sumo MESES_ANOMALIAS meses
+    filas = np.arange(n)[:, None]
+    columnas = np.arange(libro.categorias)[None, :]
+    primer_gasto = np.argmax(matriz > 0, axis=0)[None, :]
+    inicio = np.minimum(np.maximum(filas - MESES_ANOMALIAS, primer_gasto), filas)
+    cantidad = filas - inicio
+    with np.errstate(divide="ignore", invalid="ignore"):
+        promedio = (acumulado[filas, columnas] - acumulado[inicio, columnas]) / cantidad
+        varianza = (acumulado_cuadrados[filas, columnas] - acumulado_cuadrados[inicio, columnas]) / cantidad - promedio ** 2
+        desvio = np.sqrt(np.maximum(varianza, 0))
+        puntaje = (matriz - promedio) / _escala(desvio, promedio)
+    marcadas = (cantidad >= MINIMO_MESES) & (matriz > 0) & (filas >= desde - primero) & (puntaje > umbral)
+
+    mes, codigo = np.nonzero(marcadas)
+    orden = np.argsort(-puntaje[mes, codigo], kind="stable")[:MAXIMO_ANOMALIAS]
+    anomalias = []
+    for i, c in zip(mes[orden], codigo[orden]):
+        categoria_id, nombre = libro.categoria(c)
+        anomalias.append(schemas.AnomaliaMensual(
+            periodo=_fecha_de_mes(primero + i),
+            categoria_id=categoria_id,
+            nombre=nombre,
+            total=models.centavos_a_monto(matriz[i, c]),
+            promedio=_monto(promedio[i, c]),
+            desvio=_monto(desvio[i, c]),
+            puntaje=round(float(puntaje[i, c]), 2),
+        ))
+    return anomalias
+
+def _medianas(ordenados, inicio, cantidad):
+    """Mediana de cada grupo de 'ordenados' (ordenado por grupo y valor); NaN en los grupos vacíos."""
+    if not len(ordenados):
+        return np.full(len(cantidad), np.nan)
+    bajo = np.minimum(inicio + (cantidad - 1) // 2, len(ordenados) - 1)
+    alto = np.minimum(inicio + cantidad // 2, len(ordenados) - 1)
+    return np.where(cantidad > 0, (ordenados[bajo] + ordenados[alto]) / 2, np.nan)
+
+def _anomalias_transacciones(libro: Libro, desde_dia: int, umbral: float):
+    """
+    Gastos desde 'desde_dia' cuyo puntaje z robusto dentro de su categoría
+    (contra la mediana y la MAD de todos sus gastos) supera 'umbral'.
+    """
+    posiciones = np.flatnonzero(libro.gastos > 0)
+    montos = libro.gastos[posiciones].astype(np.float64)
+    codigos = libro.codigos[posiciones]
+    cantidad = np.bincount(codigos, minlength=libro.categorias)
+    inicio = np.concatenate(([0], np.cumsum(cantidad)[:-1]))
+
+    mediana = _medianas(montos[np.lexsort((montos, codigos))], inicio, cantidad)
+    desvios = np.abs(montos - mediana[codigos])
+    mad = _medianas(desvios[np.lexsort((desvios, codigos))], inicio, cantidad)
+    # 1.4826 * MAD estima el desvío estándar si los montos fueran normales
+    escala = _escala(1.4826 * mad, mediana)
+    puntaje = (montos - mediana[codigos]) / escala[codigos]
+    marcadas = np.flatnonzero(
+        (cantidad[codigos] >= MINIMO_TRANSACCIONES) & (libro.dias[posiciones] >= desde_dia) & (puntaje > umbral)
+    )
+
+    orden = marcadas[np.argsort(-puntaje[marcadas], kind="stable")][:MAXIMO_ANOMALIAS]
+    anomalias = []
+    for j in orden:
+        categoria_id, nombre = libro.categoria(codigos[j])
+        anomalias.append(schemas.AnomaliaTransaccion(
+            id=int(libro.ids[posiciones[j]]),
+            fecha=date.fromordinal(date(1970, 1, 1).toordinal() + int(libro.dias[posiciones[j]])),
+            categoria_id=categoria_id,
+            nombre=nombre,
+            monto=models.centavos_a_monto(montos[j]),
+            mediana_categoria=_monto(mediana[codigos[j]]),
+            puntaje=round(float(puntaje[j]), 2),
+        ))
+    return anomalias
+
+def anomalias(libro: Libro, meses: int, umbral: float, hoy: date):
+    """
+    Anomalías de los últimos 'meses' meses (el actual incluido): meses con
+    un gasto por categoría fuera de lo habitual y gastos atípicos dentro de
+    su categoría. Cada lista trae las MAXIMO_ANOMALIAS de mayor puntaje.
+    """
+    actual = _mes_de(hoy)
+    desde = actual - meses + 1
+    if not len(libro) or libro.primer_mes > actual:
+        return schemas.AnaliticaAnomalias(desde=_fecha_de_mes(desde), umbral=umbral, meses=[], transacciones=[])
+    return schemas.AnaliticaAnomalias(
+        desde=_fecha_de_mes(desde),
+        umbral=umbral,
+        meses=_anomalias_mensuales(libro, desde, actual, umbral),
+        transacciones=_anomalias_transacciones(libro, int(_primer_dia(desde)), umbral),
+    )
+
+# --- Proyección del mes en curso ---
+
+def _perfil_diario(libro: Libro, valores, desde: int, hasta: int):
+    """
+    Promedio de 'valores' en cada día del mes (0 a 30) en los meses
+    [desde, hasta), contando para cada día solo los meses que lo tienen.
+    """
+    meses = hasta - desde
+    indice = (libro.meses - desde) * 31 + libro.dia_del_mes
+    dentro = (libro.meses >= desde) & (libro.meses < hasta)
+    por_dia = np.bincount(indice[dentro], weights=valores[dentro], minlength=meses * 31).reshape(meses, 31)
+    largos = np.diff(_primer_dia(np.arange(desde, hasta + 1)))
+    meses_con_dia = (np.arange(31)[None, :] < largos[:, None]).sum(axis=0)
+    return por_dia.sum(axis=0) / np.maximum(meses_con_dia, 1)
+
+def proyeccion(libro: Libro, hoy: date):
+    """
+    Ingresos, gastos y balance del mes actual hasta hoy y proyectados al
+    fin de mes: a lo real se le suma, por cada día que falta, lo que en
+    promedio entró y salió ese mismo día del mes en los últimos
+    MESES_PROYECCION meses completos. Así los ingresos y gastos fijos (el
+    sueldo, el alquiler) se proyectan en el día en que suelen caer.
+    """
+    actual = _mes_de(hoy)
+    inicio_mes, inicio_siguiente = (int(d) for d in _primer_dia([actual, actual + 1]))
+    dia_hoy = (hoy - date(1970, 1, 1)).days
+    dias_del_mes = inicio_siguiente - inicio_mes
+    transcurridos = dia_hoy - inicio_mes + 1
+
+    en_curso = (libro.dias >= inicio_mes) & (libro.dias <= dia_hoy)
+    ingresos = int(libro.ingresos[en_curso].sum())
+    gastos = int(libro.gastos[en_curso].sum())
+
+    desde = max(actual - MESES_PROYECCION, libro.primer_mes) if len(libro) else actual
+    historia = max(actual - desde, 0)
+    ingresos_proyectados, gastos_proyectados = ingresos, gastos
+    if historia:
+        resto = slice(transcurridos, dias_del_mes)
+        ingresos_proyectados += _perfil_diario(libro, libro.ingresos, desde, actual)[resto].sum()
+        gastos_proyectados += _perfil_diario(libro, libro.gastos, desde, actual)[resto].sum()
+
+    return schemas.AnaliticaProyeccion(
+        periodo=_fecha_de_mes(actual),
+        dias_transcurridos=transcurridos,
+        dias_del_mes=dias_del_mes,
+        meses_de_historia=historia,
+        ingresos_a_la_fecha=models.centavos_a_monto(ingresos),
+        gastos_a_la_fecha=models.centavos_a_monto(gastos),
+        balance_a_la_fecha=models.centavos_a_monto(ingresos - gastos),
+        ingresos_proyectados=_monto(ingresos_proyectados),
+        gastos_proyectados=_monto(gastos_proyectados),
+        balance_proyectado=_monto(ingresos_proyectados) - _monto(gastos_proyectados),
+    )
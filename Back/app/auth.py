@@ -1,24 +1,48 @@
-from . import models, schemas, database
-from fastapi import Depends, HTTPException, status
+from . import models, schemas, database, config
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import asyncio
+import hashlib
+import secrets
+import threading
+import time
 
 # Importamos 'models' y 'schemas' al inicio
 from . import models, schemas
 
 # --- Configuración de Seguridad ---
-SECRET_KEY = "tu_clave_secreta_muy_larga_y_dificil"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30 # El token dura 30 minutos
+# Clave, algoritmo y vida de los tokens: ver config.py
+SECRET_KEY = config.JWT_SECRET
+ALGORITHM = config.JWT_ALGORITMO
+ACCESS_TOKEN_EXPIRE_MINUTES = config.ACCESS_TOKEN_MINUTOS
+REFRESH_TOKEN_EXPIRE_DAYS = config.REFRESH_TOKEN_DIAS
 
 # --- Contexto de Contraseña ÚNICO ---
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Los costos de Argon2 se configuran por entorno (ver config.py). Los hashes
+# con parámetros viejos se rehashean solos en el próximo login.
+_argon2_params = {
+    f"argon2__{nombre}": valor
+    for nombre, valor in (
+        ("time_cost", config.ARGON2_TIME_COST),
+        ("memory_cost", config.ARGON2_MEMORY_COST),
+        ("parallelism", config.ARGON2_PARALLELISM),
+    )
+    if valor is not None
+}
+pwd_context = CryptContext(schemes=["argon2"], deprecated="auto", **_argon2_params)
 
 # Esquema de OAuth2
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+# Igual, pero sin 401 automático: GET /dashboard/stream acepta también ?ticket=
+# (EventSource no puede mandar el header Authorization)
+oauth2_scheme_opcional = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
 
 # --- Funciones de Autenticación ---
 
@@ -26,6 +50,76 @@ def verify_password(plain_password, hashed_password):
     """Verifica la contraseña plana contra el hash usando argon2."""
     return pwd_context.verify(plain_password, hashed_password)
 
+# --- Executor dedicado para Argon2 ---
+# Hashear/verificar tarda decenas de ms de CPU: lo hacemos en un pool propio
+# (argon2-cffi libera el GIL) para no ocupar el event loop ni el threadpool
+# general de Starlette. Si hay demasiadas operaciones pendientes, 503.
+
+_hash_executor = ThreadPoolExecutor(max_workers=config.HASH_WORKERS, thread_name_prefix="argon2")
+_hash_lock = threading.Lock()
+_hash_stats = {"pendientes": 0, "en_curso": 0, "completadas": 0, "rechazadas": 0}
+
+def _medir_en_curso(funcion, *args):
+    with _hash_lock:
+        _hash_stats["en_curso"] += 1
+    try:
+        return funcion(*args)
+    finally:
+        with _hash_lock:
+            _hash_stats["en_curso"] -= 1
+
+def _hash_terminado(futuro):
+    # Corre cuando el executor termina el trabajo (o lo descarta sin
+    # empezarlo), no cuando el request deja de esperarlo: si no, un request
+    # cancelado liberaría su lugar con el hash todavía en el executor
+    with _hash_lock:
+        _hash_stats["pendientes"] -= 1
+        if not futuro.cancelled() and futuro.exception() is None:
+            _hash_stats["completadas"] += 1
+
+async def _ejecutar_hash(funcion, *args):
+    """
+    Corre 'funcion' en el executor de Argon2. Levanta 503 si ya hay
+    HASH_MAX_PENDIENTES operaciones en curso o en cola.
+    """
+    with _hash_lock:
+        if _hash_stats["pendientes"] >= config.HASH_MAX_PENDIENTES:
+            _hash_stats["rechazadas"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servidor ocupado, intentá de nuevo en unos segundos",
+                headers={"Retry-After": "1"},
+            )
+        _hash_stats["pendientes"] += 1
+    try:
+        futuro = _hash_executor.submit(_medir_en_curso, funcion, *args)
+    except BaseException:
+        with _hash_lock:
+            _hash_stats["pendientes"] -= 1
+        raise
+    futuro.add_done_callback(_hash_terminado)
+    return await asyncio.wrap_future(futuro)
+
+async def hash_password_async(plain_password: str):
+    """Hashea la contraseña en el executor de Argon2."""
+    return await _ejecutar_hash(pwd_context.hash, plain_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str):
+    """
+    Verifica la contraseña en el executor de Argon2. Devuelve (es_valida, nuevo_hash);
+    'nuevo_hash' no es None cuando el hash guardado usa parámetros viejos.
+    """
+    return await _ejecutar_hash(pwd_context.verify_and_update, plain_password, hashed_password)
+
+def estadisticas_hash():
+    """Profundidad de cola y contadores del executor de Argon2."""
+    with _hash_lock:
+        stats = dict(_hash_stats)
+    stats["workers"] = config.HASH_WORKERS
+    stats["en_cola"] = stats["pendientes"] - stats["en_curso"]
+    stats["max_pendientes"] = config.HASH_MAX_PENDIENTES
+    return stats
+
 def create_access_token(data: dict):
     """Crea un nuevo Token JWT."""
     to_encode = data.copy()
@@ -34,36 +128,206 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# --- Tickets del stream ---
+# EventSource no puede mandar headers, así que la credencial de
+# GET /dashboard/stream viaja en la URL, y las URLs quedan en los logs de
+# acceso (uvicorn, proxies). Por eso no va el token de acceso sino un
+# ticket: un JWT de pocos segundos con uso="stream", que solo sirve para
+# abrir esa conexión (no como Bearer en otras rutas).
+USO_STREAM = "stream"
+
+def create_stream_ticket(usuario: schemas.Usuario):
+    """Devuelve (ticket, segundos de vida) para abrir GET /dashboard/stream."""
+    expire = datetime.utcnow() + timedelta(seconds=config.STREAM_TICKET_SEGUNDOS)
+    ticket = jwt.encode(
+        {"sub": usuario.email, "uid": usuario.id, "uso": USO_STREAM, "exp": expire},
+        SECRET_KEY, algorithm=ALGORITHM
+    )
+    return ticket, config.STREAM_TICKET_SEGUNDOS
+
+# --- Refresh tokens ---
+# Son opacos (no JWT): 32 bytes aleatorios que el cliente guarda y cambia
+# por un token de acceso nuevo en POST /token/refresh, sin pasar por
+# Argon2. En la base solo queda su SHA-256 (alcanza: tienen 256 bits de
+# entropía, no hace falta un hash lento) con índice único, así validar o
+# revocar uno es una búsqueda por índice. Cada uso lo rota por uno nuevo
+# de la misma familia (la sesión que empezó con un login); presentar uno
+# ya usado revoca la familia entera (ver main.refrescar_token).
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode("ascii", "replace")).hexdigest()
+
+def nuevo_refresh_token():
+    """Devuelve (token, hash del token, vencimiento)."""
+    token = secrets.token_urlsafe(32)
+    vence_en = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    return token, hash_refresh_token(token), vence_en
+
+def nueva_familia_refresh() -> str:
+    return secrets.token_hex(16)
+
+# --- Cache de usuarios autenticados ---
+# Cada request protegido decodifica el JWT y buscaba al usuario en la DB.
+# Guardamos un registro liviano (schemas.Usuario, sin relaciones ni hash)
+# por 'sub' del token, con LRU + TTL acotado por el 'exp' del token.
+
+class CacheUsuarios:
+    def __init__(self, max_entradas: int, ttl: float):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._entradas = OrderedDict() # sub -> (usuario, vence_en)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidaciones = 0
+
+    def obtener(self, sub: str):
+        with self._lock:
+            entrada = self._entradas.get(sub)
+            if entrada is None or entrada[1] <= time.time():
+                if entrada is not None:
+                    del self._entradas[sub]
+                self.misses += 1
+                return None
+            self._entradas.move_to_end(sub)
+            self.hits += 1
+            return entrada[0]
+
+    def guardar(self, sub: str, usuario: schemas.Usuario, exp: float = None):
+        if self.max_entradas <= 0:
+            return
+        vence_en = time.time() + self.ttl
+        if exp is not None:
+            vence_en = min(vence_en, exp)
+        with self._lock:
+            self._entradas[sub] = (usuario, vence_en)
+            self._entradas.move_to_end(sub)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, sub: str):
+        with self._lock:
+            if self._entradas.pop(sub, None) is not None:
+                self.invalidaciones += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "max_entradas": self.max_entradas,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidaciones": self.invalidaciones,
+            }
+
+cache_usuarios = CacheUsuarios(max_entradas=config.USER_CACHE_SIZE, ttl=config.USER_CACHE_TTL)
+
+def invalidar_usuario(email: str):
+    """Hay que llamarla cada vez que se modifica un usuario."""
+    cache_usuarios.invalidar(email.lower())
+
 # --- Dependencia para obtener el usuario actual ---
 
-def get_current_user(
-    db: Session = Depends(database.get_db), 
-    token: str = Depends(oauth2_scheme)
-):
-    """
-    Dependencia de FastAPI para proteger rutas.
-    Decodifica el token, busca al usuario en la DB y lo devuelve.
-    """
-    
-    from . import crud 
-    
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudieron validar las credenciales",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def _decodificar_token(token: str, uso: Optional[str] = None):
+    """
+    Valida el JWT y devuelve su payload (levanta 401 si no es válido).
+    'uso' es el de los tickets (USO_STREAM); None = token de acceso.
+    """
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub") # "sub" es el "subject" del token
-        if email is None:
-            raise credentials_exception
-        token_data = schemas.TokenData(email=email)
+        if email is None or payload.get("uso") != uso:
+            raise _credentials_exception()
+        schemas.TokenData(email=email)
     except JWTError:
-        raise credentials_exception
-    
-    # Buscamos al usuario usando la función de crud
-    user = crud.get_user_by_email(db, email=token_data.email)
+        raise _credentials_exception()
+    return payload
+
+def _cargar_usuario(db: Session, payload: dict):
+    """
+    Busca en la DB al usuario del token y lo guarda en la cache.
+    Es sincrónica para poder usarla también con AsyncSession.run_sync.
+    """
+    from . import crud, shards
+
+    sub = payload["sub"].lower()
+    # Buscamos al usuario usando la función de crud (por id si el token lo trae)
+    usuario_id = payload.get("uid")
+    if usuario_id is not None:
+        db_user = crud.get_user(db, usuario_id=usuario_id)
+        if db_user is not None and db_user.email.lower() != sub:
+            db_user = None
+    else:
+        db_user = crud.get_user_by_email(db, email=payload["sub"])
+    if db_user is None:
+        raise _credentials_exception()
+
+    user = schemas.Usuario.model_validate(db_user)
+    shards.recordar(db_user.id, db_user.shard)
+    cache_usuarios.guardar(sub, user, exp=payload.get("exp"))
+    return user
+
+def get_current_user(
+    db: Session = Depends(database.get_db), 
+    token: str = Depends(oauth2_scheme)
+):
+    """
+    Dependencia de FastAPI para proteger rutas.
+    Decodifica el token y devuelve el usuario (schemas.Usuario), desde la
+    cache si está o buscándolo en la DB si no. Con SHARDS > 1 además deja
+    la sesión del request apuntando al shard del usuario.
+    """
+    from . import shards
+
+    payload = _decodificar_token(token)
+    user = cache_usuarios.obtener(payload["sub"].lower())
+    if user is None:
+        user = _cargar_usuario(db, payload)
+    if config.SHARDS > 1:
+        database.usar_shard(db, shards.shard_de(db, user.id))
+    return user
+
+async def get_current_user_async(
+    db: database.SesionDB = Depends(database.get_sesion),
+    token: str = Depends(oauth2_scheme)
+):
+    """
+    Igual que get_current_user, para las rutas async def: si hay que ir a
+    la DB usa la sesión del modo configurado (sync o async).
+    """
+    return await _usuario_async(db, _decodificar_token(token))
+
+async def _usuario_async(db: database.SesionDB, payload: dict):
+    from . import shards
+
+    user = cache_usuarios.obtener(payload["sub"].lower())
     if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+        user = await database.ejecutar(db, _cargar_usuario, payload)
+    await shards.enrutar(db, user.id)
+    return user
+
+async def get_current_user_stream(
+    db: database.SesionDB = Depends(database.get_sesion),
+    token: Optional[str] = Depends(oauth2_scheme_opcional),
+    ticket: Optional[str] = Query(None, description="Ticket de POST /dashboard/stream/ticket (para EventSource)")
+):
+    """
+    Como get_current_user_async, con el token de acceso en el header o un
+    ticket del stream en ?ticket=. Para conexiones largas (Server-Sent Events).
+    """
+    if token:
+        return await _usuario_async(db, _decodificar_token(token))
+    if ticket:
+        return await _usuario_async(db, _decodificar_token(ticket, USO_STREAM))
+    raise _credentials_exception()
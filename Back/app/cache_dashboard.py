@@ -0,0 +1,271 @@
+# En app/cache_dashboard.py
+"""
+Cache del resumen del dashboard (schemas.DashboardSummary) por usuario y
+período (año, mes).
+
+- Backend: LRU en memoria del proceso (por defecto) o Redis
+  (DASHBOARD_CACHE=redis, compartida entre workers; necesita
+  pip install redis). Un hash de Redis por usuario, con un campo por
+  período.
+- Invalidación: crud.py marca en la sesión qué usuarios/períodos cambió
+  (invalidar_al_confirmar) y se borran recién en el after_commit, así
+  nadie vuelve a cachear los datos viejos entre el borrado y el commit.
+  Un rollback descarta las marcas. El mismo after_commit avisa a los
+  dashboards abiertos (notificaciones.py).
+- Estampidas: si varios requests no encuentran la misma clave a la vez,
+  uno solo calcula y los demás esperan su resultado.
+- Un cálculo que empezó antes de una invalidación de ese usuario no se
+  guarda (generación por usuario). Con Redis eso vale dentro de cada
+  proceso; entre workers lo acota DASHBOARD_CACHE_TTL.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from . import config, notificaciones, schemas
+
+log = logging.getLogger(__name__)
+
+# --- Backends ---
+
+class CacheMemoria:
+    """LRU + TTL en memoria, igual que la cache de usuarios de auth.py."""
+    remoto = False
+
+    def __init__(self, max_entradas: int, ttl: float):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._entradas = OrderedDict() # (usuario_id, periodo) -> (resumen, vence_en)
+        self._periodos = {} # usuario_id -> períodos cacheados, para invalidar todos
+        self._lock = threading.Lock()
+
+    def obtener(self, usuario_id: int, periodo: tuple):
+        clave = (usuario_id, periodo)
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            if entrada[1] <= time.monotonic():
+                self._sacar(clave)
+                return None
+            self._entradas.move_to_end(clave)
+            return entrada[0]
+
+    def guardar(self, usuario_id: int, periodo: tuple, resumen: schemas.DashboardSummary):
+        if self.max_entradas <= 0:
+            return
+        clave = (usuario_id, periodo)
+        with self._lock:
+            self._entradas[clave] = (resumen, time.monotonic() + self.ttl)
+            self._entradas.move_to_end(clave)
+            self._periodos.setdefault(usuario_id, set()).add(periodo)
+            while len(self._entradas) > self.max_entradas:
+                self._sacar(next(iter(self._entradas)))
+
+    def borrar(self, usuario_id: int, periodos=None):
+        with self._lock:
+            if periodos is None:
+                periodos = list(self._periodos.get(usuario_id, ()))
+            for periodo in periodos:
+                self._sacar((usuario_id, periodo))
+
+    def _sacar(self, clave):
+        # Con el lock tomado
+        if self._entradas.pop(clave, None) is not None:
+            usuario_id, periodo = clave
+            periodos = self._periodos.get(usuario_id)
+            periodos.discard(periodo)
+            if not periodos:
+                del self._periodos[usuario_id]
+
+    def estadisticas(self):
+        with self._lock:
+            return {"entradas": len(self._entradas), "max_entradas": self.max_entradas}
+
+
+class CacheRedis:
+    """
+    Un hash por usuario (gastos:dashboard:<usuario_id>) con un campo por
+    período y el JSON del resumen. Si Redis no responde, se comporta como
+    una cache vacía: el dashboard se sigue calculando desde la base.
+    """
+    remoto = True
+
+    def __init__(self, url: str, ttl: float):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("DASHBOARD_CACHE=redis necesita el paquete redis (pip install redis)")
+        self.cliente = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.ttl = ttl
+        self.errores = 0
+
+    @staticmethod
+    def _clave(usuario_id: int):
+        return f"gastos:dashboard:{usuario_id}"
+
+    @staticmethod
+    def _campo(periodo: tuple):
+        return "%04d-%02d" % periodo
+
+    def obtener(self, usuario_id: int, periodo: tuple):
+        try:
+            datos = self.cliente.hget(self._clave(usuario_id), self._campo(periodo))
+        except Exception:
+            self._fallo("leer")
+            return None
+        return schemas.DashboardSummary.model_validate_json(datos) if datos is not None else None
+
+    def guardar(self, usuario_id: int, periodo: tuple, resumen: schemas.DashboardSummary):
+        clave = self._clave(usuario_id)
+        try:
+            with self.cliente.pipeline(transaction=False) as pipe:
+                pipe.hset(clave, self._campo(periodo), resumen.model_dump_json())
+                pipe.expire(clave, int(self.ttl))
+                pipe.execute()
+        except Exception:
+            self._fallo("guardar")
+
+    def borrar(self, usuario_id: int, periodos=None):
+        try:
+            if periodos is None:
+                self.cliente.delete(self._clave(usuario_id))
+            elif periodos:
+                self.cliente.hdel(self._clave(usuario_id), *(self._campo(p) for p in periodos))
+        except Exception:
+            # Lo que no se pudo borrar vence solo con el TTL
+            self._fallo("invalidar")
+
+    def _fallo(self, operacion: str):
+        self.errores += 1
+        log.warning("Error de Redis en la cache del dashboard", exc_info=True, extra={"operacion": operacion})
+
+    def estadisticas(self):
+        return {"errores": self.errores}
+
+# --- Cache con single-flight ---
+
+class CacheDashboard:
+    def __init__(self, backend):
+        self.backend = backend
+        self._en_curso = {} # (usuario_id, periodo) -> (Future del cálculo en curso, generación)
+        self._generaciones = {} # usuario_id -> invalidaciones vistas
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.esperas = 0
+        self.invalidaciones = 0
+
+    async def _llamar(self, funcion, *args):
+        # Redis es I/O de red: fuera del event loop
+        if self.backend.remoto:
+            return await run_in_threadpool(funcion, *args)
+        return funcion(*args)
+
+    async def obtener(self, usuario_id: int, periodo: tuple, calcular):
+        """
+        Devuelve el resumen cacheado o lo calcula con 'calcular' (una
+        corrutina sin argumentos) y lo guarda. Requests concurrentes que
+        piden la misma clave esperan ese mismo cálculo.
+        """
+        resumen = await self._llamar(self.backend.obtener, usuario_id, periodo)
+        if resumen is not None:
+            self.hits += 1
+            return resumen
+
+        clave = (usuario_id, periodo)
+        generacion = self._generacion(usuario_id)
+        en_curso, generacion_en_curso = self._en_curso.get(clave, (None, None))
+        # Un cálculo que empezó antes de la última invalidación puede traer
+        # datos viejos: en ese caso no nos colgamos de él
+        if en_curso is not None and generacion_en_curso == generacion:
+            self.esperas += 1
+            try:
+                return await asyncio.shield(en_curso)
+            except asyncio.CancelledError:
+                if not en_curso.cancelled():
+                    raise # Cancelaron este request, no el cálculo
+                # Cancelaron el request que calculaba: probamos de nuevo
+                return await self.obtener(usuario_id, periodo, calcular)
+
+        self.misses += 1
+        futuro = asyncio.get_running_loop().create_future()
+        self._en_curso[clave] = (futuro, generacion)
+        try:
+            resumen = await calcular()
+        except asyncio.CancelledError:
+            futuro.cancel()
+            raise
+        except Exception as e:
+            futuro.set_exception(e)
+            futuro.exception() # Marcada como leída aunque nadie esperara
+            raise
+        finally:
+            if self._en_curso.get(clave, (None,))[0] is futuro:
+                del self._en_curso[clave]
+        futuro.set_result(resumen)
+        if self._generacion(usuario_id) == generacion:
+            await self._llamar(self.backend.guardar, usuario_id, periodo, resumen)
+        return resumen
+
+    def _generacion(self, usuario_id: int):
+        with self._lock:
+            return self._generaciones.get(usuario_id, 0)
+
+    def invalidar(self, usuario_id: int, periodos=None):
+        """Borra los períodos indicados del usuario (todos si periodos es None)."""
+        with self._lock:
+            self._generaciones[usuario_id] = self._generaciones.get(usuario_id, 0) + 1
+            self.invalidaciones += 1
+        self.backend.borrar(usuario_id, periodos)
+
+    def estadisticas(self):
+        consultas = self.hits + self.misses + self.esperas
+        return {
+            **self.backend.estadisticas(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "esperas": self.esperas,
+            "invalidaciones": self.invalidaciones,
+            "hit_ratio": round((self.hits + self.esperas) / consultas, 4) if consultas else 0,
+        }
+
+
+def _crear_backend():
+    if config.DASHBOARD_CACHE == "redis":
+        return CacheRedis(config.REDIS_URL, config.DASHBOARD_CACHE_TTL)
+    return CacheMemoria(config.DASHBOARD_CACHE_SIZE, config.DASHBOARD_CACHE_TTL)
+
+cache = CacheDashboard(_crear_backend())
+
+# --- Invalidación al confirmar ---
+
+_PENDIENTES = "cache_dashboard_pendientes"
+
+def invalidar_al_confirmar(db: Session, usuario_id: int, fechas=None):
+    """
+    Marca el resumen del usuario para borrarlo cuando la sesión haga
+    commit: los períodos de 'fechas' o, sin fechas, todos los del usuario.
+    """
+    pendientes = db.info.setdefault(_PENDIENTES, {})
+    if fechas is None or (usuario_id in pendientes and pendientes[usuario_id] is None):
+        pendientes[usuario_id] = None
+    else:
+        pendientes.setdefault(usuario_id, set()).update((f.year, f.month) for f in fechas)
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_pendientes(session):
+    # Primero se invalida: quien reciba el aviso ya lee el resumen nuevo
+    for usuario_id, periodos in session.info.pop(_PENDIENTES, {}).items():
+        cache.invalidar(usuario_id, periodos)
+        notificaciones.publicar(usuario_id, periodos)
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_pendientes(session):
+    session.info.pop(_PENDIENTES, None)
@@ -0,0 +1,154 @@
+"""
+Comandos de mantenimiento de la base de datos.
+
+Uso (desde la carpeta Back):
+    python -m app.comandos migrar
+    python -m app.comandos reconstruir-resumenes [--usuario ID]
+    python -m app.comandos verificar-resumenes [--usuario ID]
+    python -m app.comandos reconstruir-busqueda
+    python -m app.comandos estado-shards
+    python -m app.comandos mover-usuario --usuario ID --shard N
+    python -m app.comandos rebalancear-shards [--shards N] [--simular]
+
+Con SHARDS > 1 los comandos de resúmenes y búsqueda recorren todos los
+shards (o solo el del usuario, con --usuario).
+"""
+import argparse
+import sys
+
+from . import config, crud, models, database, shards
+
+
+def _sesiones(usuario_id=None):
+    """Una sesión por shard, o solo la del shard del usuario."""
+    if usuario_id is not None:
+        return [shards.sesion_de_usuario(usuario_id)]
+    return [shards.sesion_de_shard(n) for n in range(config.SHARDS)]
+
+
+def migrar(args):
+    """Aplica las migraciones pendientes en todos los shards (también lo hace la app al arrancar)."""
+    from . import migraciones
+    for n, engine in enumerate(shards.engines()):
+        prefijo = f"Shard {n}: " if config.SHARDS > 1 else ""
+        aplicadas = migraciones.aplicar(engine)
+        if aplicadas:
+            print(f"{prefijo}Migraciones aplicadas: {', '.join(map(str, aplicadas))}")
+        else:
+            print(f"{prefijo}La base ya está al día.")
+    return 0
+
+
+def reconstruir_resumenes(args):
+    """Recalcula los resúmenes mensuales desde las transacciones."""
+    filas = 0
+    for db in _sesiones(args.usuario):
+        try:
+            filas += crud.reconstruir_resumenes(db, usuario_id=args.usuario)
+        finally:
+            db.close()
+    print(f"Resúmenes reconstruidos: {filas} filas.")
+    return 0
+
+
+def verificar_resumenes(args):
+    """Compara los resúmenes guardados contra las transacciones crudas."""
+    diferencias = []
+    for db in _sesiones(args.usuario):
+        try:
+            diferencias += crud.verificar_resumenes(db, usuario_id=args.usuario)
+        finally:
+            db.close()
+
+    if not diferencias:
+        print("Resúmenes consistentes.")
+        return 0
+
+    for d in diferencias:
+        print(f"Diferencia en {d['clave']}: esperado={d['esperado']} guardado={d['guardado']}")
+    print(f"{len(diferencias)} diferencias encontradas. Corré 'reconstruir-resumenes' para corregirlas.")
+    return 1
+
+
+def reconstruir_busqueda(args):
+    """Vuelve a indexar las descripciones para la búsqueda de texto."""
+    reconstruido = False
+    for db in _sesiones():
+        try:
+            reconstruido = crud.reconstruir_busqueda(db)
+        finally:
+            db.close()
+    print("Índice de búsqueda reconstruido." if reconstruido else "La búsqueda FTS5 solo existe en SQLite.")
+    return 0
+
+
+def estado_shards(args):
+    """Usuarios y transacciones de cada shard."""
+    for fila in shards.estado():
+        print(f"Shard {fila['shard']} ({fila['url']}): {fila['usuarios']} usuarios, "
+              f"{fila['transacciones']} transacciones")
+    return 0
+
+
+def mover_usuario(args):
+    """Mueve los datos de un usuario a otro shard. Con la app detenida."""
+    try:
+        movidas = shards.mover_usuario(args.usuario, args.shard)
+    except ValueError as e:
+        print(e)
+        return 1
+    print(f"Usuario {args.usuario} en el shard {args.shard} ({movidas} transacciones movidas).")
+    return 0
+
+
+def rebalancear_shards(args):
+    """Reparte los usuarios según usuario_id % N. Con la app detenida."""
+    movimientos = shards.rebalancear(args.shards, simular=args.simular)
+    for usuario_id, origen, destino in movimientos:
+        print(f"Usuario {usuario_id}: shard {origen} -> {destino}")
+    if args.simular:
+        print(f"{len(movimientos)} usuarios a mover (simulación, no se movió nada).")
+    else:
+        print(f"{len(movimientos)} usuarios movidos.")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.comandos")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    p = subparsers.add_parser("migrar", help="Aplica las migraciones pendientes")
+    p.set_defaults(func=migrar, sin_migrar=True)
+
+    p = subparsers.add_parser("reconstruir-resumenes", help="Recalcula la tabla resumenes_mensuales")
+    p.add_argument("--usuario", type=int, default=None, help="Solo este usuario_id")
+    p.set_defaults(func=reconstruir_resumenes)
+
+    p = subparsers.add_parser("verificar-resumenes", help="Chequea la consistencia de resumenes_mensuales")
+    p.add_argument("--usuario", type=int, default=None, help="Solo este usuario_id")
+    p.set_defaults(func=verificar_resumenes)
+
+    p = subparsers.add_parser("reconstruir-busqueda", help="Reindexa transacciones_fts (búsqueda de texto)")
+    p.set_defaults(func=reconstruir_busqueda)
+
+    p = subparsers.add_parser("estado-shards", help="Usuarios y transacciones por shard")
+    p.set_defaults(func=estado_shards)
+
+    p = subparsers.add_parser("mover-usuario", help="Mueve los datos de un usuario a otro shard")
+    p.add_argument("--usuario", type=int, required=True, help="usuario_id")
+    p.add_argument("--shard", type=int, required=True, help="Shard de destino")
+    p.set_defaults(func=mover_usuario)
+
+    p = subparsers.add_parser("rebalancear-shards", help="Reparte los usuarios entre los shards (usuario_id %% N)")
+    p.add_argument("--shards", type=int, default=None, help="Cantidad de shards (por defecto SHARDS)")
+    p.add_argument("--simular", action="store_true", help="Solo lista los movimientos")
+    p.set_defaults(func=rebalancear_shards)
+
+    args = parser.parse_args(argv)
+    if not getattr(args, "sin_migrar", False):
+        models.crear_db()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# En app/config.py
+"""
+Configuración leída de variables de entorno (o de un archivo .env en la
+carpeta Back). Todas tienen un valor por defecto pensado para desarrollo.
+"""
+import os
+
+from environs import Env
+
+env = Env()
+env.read_env()
+
+# --- Hashing de contraseñas (Argon2) ---
+# Si no se definen, se usan los valores por defecto de passlib.
+ARGON2_TIME_COST = env.int("ARGON2_TIME_COST", None)
+ARGON2_MEMORY_COST = env.int("ARGON2_MEMORY_COST", None) # En KiB
+ARGON2_PARALLELISM = env.int("ARGON2_PARALLELISM", None)
+
+# Hilos dedicados a hashear/verificar contraseñas
+HASH_WORKERS = env.int("HASH_WORKERS", min(4, os.cpu_count() or 1))
+# Máximo de operaciones de hash en curso + en cola; por encima se responde 503
+HASH_MAX_PENDIENTES = env.int("HASH_MAX_PENDIENTES", 64)
+
+# --- Tokens ---
+# Clave y algoritmo con que se firman los JWT de acceso (cambiá la clave en
+# producción: quien la conozca puede emitir tokens de cualquier usuario)
+JWT_SECRET = env.str("JWT_SECRET", "tu_clave_secreta_muy_larga_y_dificil")
+JWT_ALGORITMO = env.str("JWT_ALGORITMO", "HS256")
+# Vida del token de acceso (minutos) y del refresh token (días). El refresh
+# token rota en cada uso; al vencer hay que volver a loguearse.
+ACCESS_TOKEN_MINUTOS = env.int("ACCESS_TOKEN_MINUTOS", 30)
+REFRESH_TOKEN_DIAS = env.float("REFRESH_TOKEN_DIAS", 30.0)
+
+# --- Cache de usuarios autenticados ---
+# Entradas máximas (0 desactiva la cache) y segundos de vida de cada una.
+# Una entrada nunca vive más que el 'exp' del token que la cargó.
+USER_CACHE_SIZE = env.int("USER_CACHE_SIZE", 1024)
+USER_CACHE_TTL = env.float("USER_CACHE_TTL", 60.0)
+
+# --- Base de datos ---
+DATABASE_URL = env.str("DATABASE_URL", "sqlite:///./gastos.db")
+# Pool de conexiones (no aplica a SQLite en memoria)
+DB_POOL_SIZE = env.int("DB_POOL_SIZE", 5)
+DB_MAX_OVERFLOW = env.int("DB_MAX_OVERFLOW", 10)
+DB_POOL_TIMEOUT = env.float("DB_POOL_TIMEOUT", 30.0)
+DB_POOL_PRE_PING = env.bool("DB_POOL_PRE_PING", True)
+DB_POOL_RECYCLE = env.int("DB_POOL_RECYCLE", 1800) # Segundos; -1 = nunca
+
+# PRAGMAs que se aplican a cada conexión cuando la URL es SQLite
+SQLITE_JOURNAL_MODE = env.str("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = env.str("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = env.int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+SQLITE_CACHE_SIZE = env.int("SQLITE_CACHE_SIZE", -64000) # Negativo = KiB (64 MB)
+SQLITE_MMAP_SIZE = env.int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)
+
+# --- Shards por usuario ---
+# Con SHARDS > 1 los datos de cada usuario (categorías, transacciones,
+# resúmenes) viven en uno de SHARDS archivos, cada uno con su propio lock
+# de escritura. El shard 0 es DATABASE_URL, que además guarda el
+# directorio global (usuarios y refresh tokens). Los demás usan SHARD_URL
+# con {n} = número de shard.
+SHARDS = env.int("SHARDS", 1)
+SHARD_URL = env.str("SHARD_URL", "sqlite:///./gastos_shard{n}.db")
+
+# --- Modo de acceso a la base ---
+# "sync" (por defecto): Session común; cada consulta corre en el threadpool.
+# "async": AsyncSession (aiosqlite / asyncpg), sin ocupar hilos.
+DB_MODO = env.str("DB_MODO", "sync")
+# URL para el engine async; si no se define se deriva de DATABASE_URL
+ASYNC_DATABASE_URL = env.str("ASYNC_DATABASE_URL", None)
+
+# --- Group commit de escrituras ---
+# Con GROUP_COMMIT=true las altas, ediciones y bajas de categorías y
+# transacciones de requests concurrentes se juntan (hasta
+# GROUP_COMMIT_MAX_LOTE, esperando a lo sumo GROUP_COMMIT_VENTANA_MS desde
+# la primera) y se confirman en un solo commit.
+GROUP_COMMIT = env.bool("GROUP_COMMIT", False)
+GROUP_COMMIT_VENTANA_MS = env.float("GROUP_COMMIT_VENTANA_MS", 2.0)
+GROUP_COMMIT_MAX_LOTE = env.int("GROUP_COMMIT_MAX_LOTE", 64)
+
+# --- Alta masiva de transacciones ---
+# Máximo de ítems aceptados por POST /transacciones/bulk
+BULK_MAX_ITEMS = env.int("BULK_MAX_ITEMS", 5000)
+
+# --- Importación de resúmenes bancarios (CSV / OFX) ---
+# Filas por lote (un INSERT y un commit por lote) y rechazos detallados
+# que se devuelven en el resumen final
+IMPORT_LOTE = env.int("IMPORT_LOTE", 5000)
+IMPORT_MAX_RECHAZOS = env.int("IMPORT_MAX_RECHAZOS", 100)
+
+# --- Exportación y compresión ---
+# Filas que se leen de la base por vez al exportar (yield_per)
+EXPORT_LOTE = env.int("EXPORT_LOTE", 1000)
+# Respuestas de al menos estos bytes se comprimen con gzip si el cliente lo acepta
+GZIP_MINIMO = env.int("GZIP_MINIMO", 1024)
+
+# --- Logs y métricas ---
+# Nivel de los logs de la app (DEBUG, INFO, WARNING...) y formato:
+# "json" (una línea JSON por evento) o "texto"
+LOG_LEVEL = env.str("LOG_LEVEL", "INFO").upper()
+LOG_FORMATO = env.str("LOG_FORMATO", "json")
+# Las sentencias SQL que tardan más que esto se loguean como WARNING (0 = nunca)
+SLOW_QUERY_MS = env.float("SLOW_QUERY_MS", 200.0)
+# GET /metrics expone rutas, volúmenes y tiempos internos. Con METRICAS_TOKEN
+# solo responde a "Authorization: Bearer <token>"; sin él, solo a pedidos
+# desde la misma máquina (loopback). METRICAS=false la desactiva (404).
+METRICAS = env.bool("METRICAS", True)
+METRICAS_TOKEN = env.str("METRICAS_TOKEN", None)
+
+# --- Cache del resumen del dashboard ---
+# "memoria" (LRU en el proceso) o "redis" (compartida entre workers; pip install redis)
+DASHBOARD_CACHE = env.str("DASHBOARD_CACHE", "memoria")
+# Entradas máximas de la cache en memoria (0 desactiva la cache) y segundos de vida
+DASHBOARD_CACHE_SIZE = env.int("DASHBOARD_CACHE_SIZE", 10000)
+DASHBOARD_CACHE_TTL = env.float("DASHBOARD_CACHE_TTL", 300.0)
+REDIS_URL = env.str("REDIS_URL", "redis://localhost:6379/0")
+
+# --- Dashboard en vivo (GET /dashboard/stream) ---
+# Cómo llegan los cambios confirmados a las conexiones abiertas: "memoria"
+# (solo las del mismo proceso) o "redis" (pub/sub entre workers; usa REDIS_URL)
+NOTIFICACIONES_BROKER = env.str("NOTIFICACIONES_BROKER", "memoria")
+# Conexiones abiertas como máximo por proceso (las de más reciben 503) y
+# segundos entre pings, para que los proxies no corten las conexiones quietas
+NOTIFICACIONES_MAX_CONEXIONES = env.int("NOTIFICACIONES_MAX_CONEXIONES", 10000)
+NOTIFICACIONES_PING_SEGUNDOS = env.float("NOTIFICACIONES_PING_SEGUNDOS", 15.0)
+# Segundos de vida del ticket con que EventSource abre la conexión (va en
+# la URL: no se usa el token de acceso para que no quede en los logs)
+STREAM_TICKET_SEGUNDOS = env.int("STREAM_TICKET_SEGUNDOS", 30)
+
+# --- Analítica (GET /analytics/...) ---
+# Historiales de usuarios (como arrays de NumPy) que quedan en memoria
+# entre requests mientras sus datos no cambien (0 = se cargan siempre)
+ANALITICA_CACHE_SIZE = env.int("ANALITICA_CACHE_SIZE", 256)
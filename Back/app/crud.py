@@ -1,51 +1,209 @@
-from sqlalchemy.orm import Session
-from passlib.context import CryptContext  # Importante para hashear passwords
-from sqlalchemy import func, extract, or_
-from datetime import datetime
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, extract, and_, or_, tuple_, literal_column, text, case, cast, select, BigInteger
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+import base64
+import json
+import logging
+import re
 from . import models, schemas
-from . import auth
+from . import auth, cache_dashboard, shards
+
+log = logging.getLogger(__name__)
 
 # Configuración para hashear contraseñas
 pwd_context = auth.pwd_context
 
 # --- CRUD de Usuarios ---
 
+def get_user(db: Session, usuario_id: int):
+    return db.query(models.Usuario).filter(models.Usuario.id == usuario_id).first()
+
 def get_user_by_email(db: Session, email: str):
     return db.query(models.Usuario).filter(func.lower(models.Usuario.email) == email.lower()).first()
 
+def get_usuario_detalle(db: Session, usuario_id: int, incluir: set):
+    """
+    Obtiene el usuario con las partes pedidas en 'incluir'
+    ("transacciones", "categorias", "conteos"). Las relaciones se cargan
+    con un único selectinload cada una, nunca con lazy loads.
+    """
+    query = db.query(models.Usuario).filter(models.Usuario.id == usuario_id)
+    if "transacciones" in incluir:
+        query = query.options(selectinload(models.Usuario.transacciones))
+    if "categorias" in incluir:
+        query = query.options(selectinload(models.Usuario.categorias))
+    db_user = query.first()
+    if db_user is None:
+        return None
+
+    detalle = {"id": db_user.id, "email": db_user.email, "nombre": db_user.nombre, "moneda": db_user.moneda}
+    if "transacciones" in incluir:
+        detalle["transacciones"] = db_user.transacciones
+    if "categorias" in incluir:
+        detalle["categorias"] = db_user.categorias
+    if "conteos" in incluir:
+        detalle["conteos"] = {
+            "transacciones": db.query(func.count(models.Transaccion.id)).filter(
+                models.Transaccion.usuario_id == usuario_id
+            ).scalar(),
+            "categorias": db.query(func.count(models.Categoria.id)).filter(
+                models.Categoria.usuario_id == usuario_id
+            ).scalar(),
+        }
+    return detalle
+
 def hash_password(password: str):
     return pwd_context.hash(password)
 
-def create_user(db: Session, user: schemas.UsuarioCreate):
-    hashed_password = hash_password(user.password)
-    # --- DEBUGGING ---
-    print("\n--- REGISTRANDO USUARIO ---")
-    print(f"Email Original: {user.email} -> Guardado como: {user.email.lower()}")
-    print(f"Nombre Original: {user.nombre} -> Guardado como: {user.nombre.lower()}")
-    print("--------------------------")
-    # --- FIN DEBUGGING ---
+def create_user(db: Session, user: schemas.UsuarioCreate, hashed_password: str = None):
+    # Si no viene el hash ya calculado (p. ej. en el executor de Argon2), lo calculamos acá
+    if hashed_password is None:
+        hashed_password = hash_password(user.password)
+    log.debug("Registrando usuario", extra={"email": user.email.lower(), "nombre": user.nombre.lower()})
     db_user = models.Usuario(
         email=user.email.lower(),       
         nombre=user.nombre.lower(),    
-        hashed_password=hashed_password
+        hashed_password=hashed_password,
+        moneda=user.moneda
     )
     db.add(db_user)
+    db.flush() # El shard sale del id
+    db_user.shard = shards.shard_nuevo(db_user.id)
     db.commit()
-    db.refresh(db_user)
     return db_user
 
+# --- Cursores para paginación keyset ---
+
+def codificar_cursor(*valores):
+    """
+    Arma un cursor opaco (base64 url-safe) con los valores de la última fila
+    de la página. Las fechas se guardan en formato ISO.
+    """
+    datos = [v.isoformat() if isinstance(v, datetime) else v for v in valores]
+    return base64.urlsafe_b64encode(json.dumps(datos).encode()).decode().rstrip("=")
+
+def decodificar_cursor(cursor: str):
+    """
+    Inversa de codificar_cursor. Levanta ValueError si el cursor es inválido.
+    """
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Cursor inválido") from e
+    if not isinstance(datos, list):
+        raise ValueError("Cursor inválido")
+    return datos
+
+def update_user_password_hash(db: Session, db_user: models.Usuario, hashed_password: str):
+    """
+    Guarda un nuevo hash de contraseña (rehash al loguearse cuando cambian
+    los parámetros de Argon2).
+    """
+    db_user.hashed_password = hashed_password
+    db.add(db_user)
+    db.commit()
+    auth.invalidar_usuario(db_user.email)
+    return db_user
+
+# --- Refresh tokens ---
+
+def crear_refresh_token(db: Session, usuario_id: int, token_hash: str, familia: str, vence_en: datetime):
+    """
+    Guarda el refresh token de un login nuevo. De paso borra los vencidos
+    del usuario (los revocados se conservan hasta vencer, para detectar
+    su reuso).
+    """
+    db.query(models.RefreshToken).filter(
+        models.RefreshToken.usuario_id == usuario_id,
+        models.RefreshToken.vence_en <= datetime.utcnow()
+    ).delete(synchronize_session=False)
+    db.add(models.RefreshToken(usuario_id=usuario_id, token_hash=token_hash, familia=familia, vence_en=vence_en))
+    db.commit()
+
+def get_refresh_token(db: Session, token_hash: str):
+    """
+    Busca un refresh token por su hash (índice único) junto con el email
+    del usuario. Devuelve una fila (id, usuario_id, email, familia,
+    vence_en, revocado_en) o None.
+    """
+    return db.query(
+        models.RefreshToken.id, models.RefreshToken.usuario_id, models.Usuario.email,
+        models.RefreshToken.familia, models.RefreshToken.vence_en, models.RefreshToken.revocado_en
+    ).join(
+        models.Usuario, models.Usuario.id == models.RefreshToken.usuario_id
+    ).filter(models.RefreshToken.token_hash == token_hash).first()
+
+def rotar_refresh_token(db: Session, token_id: int, usuario_id: int, familia: str, nuevo_hash: str, vence_en: datetime):
+    """
+    Revoca el refresh token 'token_id' y guarda su reemplazo en la misma
+    familia, en un solo commit. El UPDATE es condicional: si otro request
+    ya lo rotó (dos usos del mismo token), no toca nada y devuelve False.
+    """
+    rotados = db.query(models.RefreshToken).filter(
+        models.RefreshToken.id == token_id,
+        models.RefreshToken.revocado_en.is_(None)
+    ).update({models.RefreshToken.revocado_en: datetime.utcnow()}, synchronize_session=False)
+    if not rotados:
+        db.rollback()
+        return False
+    db.add(models.RefreshToken(usuario_id=usuario_id, token_hash=nuevo_hash, familia=familia, vence_en=vence_en))
+    db.commit()
+    return True
+
+def revocar_familia_refresh(db: Session, familia: str):
+    """Revoca todos los refresh tokens vigentes de la familia. Devuelve cuántos."""
+    revocados = db.query(models.RefreshToken).filter(
+        models.RefreshToken.familia == familia,
+        models.RefreshToken.revocado_en.is_(None)
+    ).update({models.RefreshToken.revocado_en: datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+    return revocados
+
 # --- CRUD de Categorías ---
 
-def get_categorias(db: Session, usuario_id: int, skip: int = 0, limit: int = 100):
-    return db.query(models.Categoria).filter(
+def _consulta_categorias(db: Session, entidades: tuple, usuario_id: int, skip: int, limit: int, cursor: str):
+    query = db.query(*entidades).filter(
         models.Categoria.usuario_id == usuario_id
-    ).offset(skip).limit(limit).all()
+    ).order_by(models.Categoria.id)
+    if cursor is not None:
+        datos = decodificar_cursor(cursor)
+        if len(datos) != 1 or not isinstance(datos[0], int):
+            raise ValueError("Cursor inválido")
+        query = query.filter(models.Categoria.id > datos[0])
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+def get_categorias(db: Session, usuario_id: int, skip: int = 0, limit: int = 100, cursor: str = None):
+    """
+    Lista las categorías del usuario ordenadas por id. Con 'cursor' pagina
+    por keyset (id > último id) en lugar de usar OFFSET.
+    """
+    return _consulta_categorias(db, (models.Categoria,), usuario_id, skip, limit, cursor)
+
+def get_categorias_json(db: Session, usuario_id: int, skip: int = 0, limit: int = 100, cursor: str = None):
+    """
+    Como get_categorias, pero lee tuplas de columnas (sin objetos del ORM)
+    y devuelve dicts con las claves y el orden de schemas.Categoria, listos
+    para ORJSONResponse sin volver a validarlos.
+    """
+    filas = _consulta_categorias(
+        db, (models.Categoria.nombre, models.Categoria.tipo, models.Categoria.id, models.Categoria.usuario_id),
+        usuario_id, skip, limit, cursor
+    )
+    return [
+        {"nombre": nombre, "tipo": tipo, "id": id_, "usuario_id": usuario_id}
+        for nombre, tipo, id_, usuario_id in filas
+    ]
 
 def create_user_categoria(db: Session, categoria: schemas.CategoriaCreate, usuario_id: int):
     db_categoria = models.Categoria(**categoria.dict(), usuario_id=usuario_id)
     db.add(db_categoria)
+    incrementar_version_datos(db, usuario_id)
     db.commit()
-    db.refresh(db_categoria)
     return db_categoria
 
 def get_categoria(db: Session, categoria_id: int, usuario_id: int):
@@ -65,13 +223,17 @@ def update_categoria(db: Session, categoria_id: int, categoria: schemas.Categori
     if not db_categoria:
         return None
     
+    # El resumen del dashboard muestra el nombre: si cambia, se invalida entero
+    if db_categoria.nombre != categoria.nombre:
+        cache_dashboard.invalidar_al_confirmar(db, usuario_id)
+
     # Actualizamos los campos
     db_categoria.nombre = categoria.nombre
     db_categoria.tipo = categoria.tipo
     
     db.add(db_categoria)
+    incrementar_version_datos(db, usuario_id)
     db.commit()
-    db.refresh(db_categoria)
     return db_categoria
 
 def delete_categoria(db: Session, categoria_id: int, usuario_id: int):
@@ -91,16 +253,332 @@ def delete_categoria(db: Session, categoria_id: int, usuario_id: int):
         # No podemos borrarla, levantamos un error
         return "EN_USO"
 
+    # Sin transacciones sus resúmenes quedaron en cero, pero siguen
+    # apuntando a la categoría (FK): se borran antes que ella
+    db.query(models.ResumenMensual).filter(
+        models.ResumenMensual.usuario_id == usuario_id,
+        models.ResumenMensual.categoria_id == categoria_id
+    ).delete(synchronize_session=False)
     db.delete(db_categoria)
+    incrementar_version_datos(db, usuario_id)
     db.commit()
     return db_categoria
 
+def merge_categoria(db: Session, categoria_id: int, destino_id: int, usuario_id: int):
+    """
+    Fusiona la categoría 'categoria_id' con 'destino_id': pasa todas sus
+    transacciones con un solo UPDATE, suma sus resúmenes mensuales a los de
+    destino y la borra, todo en un commit. Devuelve cuántas transacciones
+    se movieron, None si alguna de las dos no es del usuario, "MISMA" u
+    "OTRO_TIPO" si la categoría o alguna de sus transacciones no es del
+    tipo de destino (un gasto no puede terminar en una de ingresos).
+    """
+    if categoria_id == destino_id:
+        return "MISMA"
+    tipos = dict(db.query(models.Categoria.id, models.Categoria.tipo).filter(
+        models.Categoria.usuario_id == usuario_id,
+        models.Categoria.id.in_((categoria_id, destino_id))
+    ).all())
+    if len(tipos) != 2:
+        return None
+    if tipos[categoria_id] != tipos[destino_id]:
+        return "OTRO_TIPO"
+
+    # Primero la versión: en SQLite esa escritura toma el lock, así nadie
+    # agrega transacciones a la categoría entre los resúmenes y el UPDATE
+    incrementar_version_datos(db, usuario_id)
+    resumenes = db.query(
+        models.ResumenMensual.anio, models.ResumenMensual.mes, models.ResumenMensual.tipo,
+        models.ResumenMensual.total_centavos, models.ResumenMensual.cantidad
+    ).filter(
+        models.ResumenMensual.usuario_id == usuario_id,
+        models.ResumenMensual.categoria_id == categoria_id
+    ).all()
+    if any(cantidad and tipo != tipos[destino_id] for _, _, tipo, _, cantidad in resumenes):
+        db.rollback()
+        return "OTRO_TIPO"
+
+    movidas = db.query(models.Transaccion).filter(
+        models.Transaccion.usuario_id == usuario_id,
+        models.Transaccion.categoria_id == categoria_id
+    ).update({models.Transaccion.categoria_id: destino_id}, synchronize_session=False)
+
+    _ajustar_resumenes(db, [
+        {"usuario_id": usuario_id, "anio": anio, "mes": mes, "categoria_id": destino_id,
+         "tipo": tipo, "total_centavos": centavos, "cantidad": cantidad}
+        for anio, mes, tipo, centavos, cantidad in resumenes if cantidad
+    ])
+    db.query(models.ResumenMensual).filter(
+        models.ResumenMensual.usuario_id == usuario_id,
+        models.ResumenMensual.categoria_id == categoria_id
+    ).delete(synchronize_session=False)
+    db.query(models.Categoria).filter(
+        models.Categoria.id == categoria_id,
+        models.Categoria.usuario_id == usuario_id
+    ).delete(synchronize_session=False)
+
+    cache_dashboard.invalidar_al_confirmar(db, usuario_id, [date(anio, mes, 1) for anio, mes, *_ in resumenes])
+    db.commit()
+    return movidas
+
+# --- Versión de los datos por usuario (ETag de los GET) ---
+
+def _insert_para(db: Session):
+    """
+    Devuelve la función insert() del dialecto en uso, que soporta
+    ON CONFLICT DO UPDATE (SQLite y PostgreSQL).
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+def get_id_movido(db: Session, usuario_id: int, tabla: str, id_viejo: int):
+    """
+    Id actual de una categoría o transacción ('tabla') del usuario que
+    cambió de id al moverse de shard, o None. Una lectura por PK.
+    """
+    return db.query(models.IdMovido.id_nuevo).filter(
+        models.IdMovido.usuario_id == usuario_id,
+        models.IdMovido.tabla == tabla,
+        models.IdMovido.id_viejo == id_viejo
+    ).scalar()
+
+def get_version_datos(db: Session, usuario_id: int):
+    """Versión actual de los datos del usuario (0 si nunca cambiaron). Una lectura por PK."""
+    version = db.query(models.VersionDatos.version).filter(
+        models.VersionDatos.usuario_id == usuario_id
+    ).scalar()
+    return version or 0
+
+def incrementar_version_datos(db: Session, *usuario_ids: int):
+    """
+    Suma 1 a la versión de cada usuario con un upsert. Hay que llamarla en
+    toda función que modifique categorías o transacciones, antes del
+    commit: así la versión nueva se confirma junto con el cambio.
+    """
+    if not usuario_ids:
+        return
+    insert = _insert_para(db)
+    stmt = insert(models.VersionDatos)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["usuario_id"],
+        set_={"version": models.VersionDatos.version + 1},
+    )
+    db.execute(stmt, [{"usuario_id": u, "version": 1} for u in usuario_ids])
+
+# --- Resúmenes mensuales (rollup del dashboard) ---
+
+def _ajustar_resumenes(db: Session, ajustes: list):
+    """
+    Suma 'total_centavos' y 'cantidad' (pueden ser negativos) a las filas
+    del resumen indicadas por cada dict de 'ajustes' (usuario_id, anio, mes,
+    categoria_id, tipo, total_centavos, cantidad), con un solo upsert ejecutado
+    como executemany. No hace commit: se confirma junto con la transacción.
+    """
+    if not ajustes:
+        return
+    insert = _insert_para(db)
+    stmt = insert(models.ResumenMensual)
+    stmt = stmt.on_conflict_do_update(
+        # Las mismas expresiones del índice único uq_resumen_mensual
+        index_elements=["usuario_id", "anio", "mes", text("coalesce(categoria_id, 0)"), "tipo"],
+        set_={
+            "total_centavos": models.ResumenMensual.total_centavos + stmt.excluded.total_centavos,
+            "cantidad": models.ResumenMensual.cantidad + stmt.excluded.cantidad,
+        }
+    )
+    db.execute(stmt, ajustes)
+
+def _ajustar_resumen(db: Session, usuario_id: int, fecha: datetime, categoria_id: int, tipo: str, centavos: int, cantidad: int):
+    """
+    Suma 'centavos' y 'cantidad' (pueden ser negativos) a la fila del resumen
+    correspondiente. No hace commit: se confirma junto con la transacción.
+    """
+    _ajustar_resumenes(db, [{
+        "usuario_id": usuario_id,
+        "anio": fecha.year,
+        "mes": fecha.month,
+        "categoria_id": categoria_id,
+        "tipo": tipo,
+        "total_centavos": centavos,
+        "cantidad": cantidad,
+    }])
+
+def _sumar_al_resumen(db: Session, db_transaccion: models.Transaccion, signo: int):
+    """
+    Aplica (signo=1) o quita (signo=-1) una transacción de los resúmenes.
+    """
+    _ajustar_resumen(
+        db,
+        usuario_id=db_transaccion.usuario_id,
+        fecha=db_transaccion.fecha,
+        categoria_id=db_transaccion.categoria_id,
+        tipo=db_transaccion.tipo,
+        centavos=signo * db_transaccion.monto_centavos,
+        cantidad=signo
+    )
+
+def _resumenes_desde_transacciones(db: Session, usuario_id: int = None):
+    """
+    Recalcula los resúmenes a partir de las filas crudas de 'transacciones'.
+    """
+    anio = extract('year', models.Transaccion.fecha)
+    mes = extract('month', models.Transaccion.fecha)
+
+    query = db.query(
+        models.Transaccion.usuario_id,
+        anio.label('anio'),
+        mes.label('mes'),
+        models.Transaccion.categoria_id,
+        models.Transaccion.tipo,
+        func.sum(models.Transaccion.monto_centavos).label('total_centavos'),
+        func.count(models.Transaccion.id).label('cantidad')
+    )
+    if usuario_id is not None:
+        query = query.filter(models.Transaccion.usuario_id == usuario_id)
+    return query.group_by(
+        models.Transaccion.usuario_id, anio, mes,
+        models.Transaccion.categoria_id, models.Transaccion.tipo
+    ).all()
+
+def reconstruir_resumenes(db: Session, usuario_id: int = None):
+    """
+    Borra y vuelve a calcular los resúmenes mensuales (de un usuario o de todos).
+    Devuelve la cantidad de filas de resumen generadas.
+    """
+    borrar = db.query(models.ResumenMensual)
+    if usuario_id is not None:
+        borrar = borrar.filter(models.ResumenMensual.usuario_id == usuario_id)
+    borrar.delete(synchronize_session=False)
+
+    filas = _resumenes_desde_transacciones(db, usuario_id)
+    db.add_all([
+        models.ResumenMensual(
+            usuario_id=fila.usuario_id,
+            anio=fila.anio,
+            mes=fila.mes,
+            categoria_id=fila.categoria_id,
+            tipo=fila.tipo,
+            total_centavos=fila.total_centavos,
+            cantidad=fila.cantidad
+        )
+        for fila in filas
+    ])
+    db.commit()
+    return len(filas)
+
+def verificar_resumenes(db: Session, usuario_id: int = None):
+    """
+    Compara los resúmenes guardados con los recalculados desde las filas crudas.
+    Devuelve una lista de diferencias (vacía si todo está consistente). Los
+    totales son enteros (centavos): tienen que coincidir exactamente.
+    """
+    clave = lambda f: (f.usuario_id, f.anio, f.mes, f.categoria_id, f.tipo)
+
+    esperados = {clave(f): (f.total_centavos, f.cantidad) for f in _resumenes_desde_transacciones(db, usuario_id)}
+
+    guardados_query = db.query(models.ResumenMensual)
+    if usuario_id is not None:
+        guardados_query = guardados_query.filter(models.ResumenMensual.usuario_id == usuario_id)
+    # Las filas que quedaron en cero (por bajas) equivalen a no tener fila
+    guardados = {
+        clave(f): (f.total_centavos, f.cantidad) for f in guardados_query.all() if f.cantidad != 0
+    }
+
+    diferencias = []
+    for k in sorted(set(esperados) | set(guardados), key=str):
+        esperado = esperados.get(k, (0, 0))
+        guardado = guardados.get(k, (0, 0))
+        if esperado != guardado:
+            diferencias.append({"clave": k, "esperado": esperado, "guardado": guardado})
+    return diferencias
+
 # --- CRUD de Transacciones ---
 
-def get_transacciones(db: Session, usuario_id: int, skip: int = 0, limit: int = 100):
-    return db.query(models.Transaccion).filter(
+def _consulta_transacciones(db: Session, entidades: tuple, usuario_id: int, skip: int, limit: int, cursor: str):
+    query = db.query(*entidades).filter(
         models.Transaccion.usuario_id == usuario_id
-    ).order_by(models.Transaccion.fecha.desc()).offset(skip).limit(limit).all()
+    ).order_by(models.Transaccion.fecha.desc(), models.Transaccion.id.desc())
+    if cursor is not None:
+        datos = decodificar_cursor(cursor)
+        try:
+            fecha, ultimo_id = datetime.fromisoformat(datos[0]), int(datos[1])
+        except (IndexError, TypeError, ValueError) as e:
+            raise ValueError("Cursor inválido") from e
+        query = query.filter(
+            tuple_(models.Transaccion.fecha, models.Transaccion.id) < tuple_(fecha, ultimo_id)
+        )
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+def get_transacciones(db: Session, usuario_id: int, skip: int = 0, limit: int = 100, cursor: str = None):
+    """
+    Lista las transacciones del usuario de la más nueva a la más vieja.
+    Con 'cursor' (fecha, id de la última fila vista) pagina por keyset
+    sobre el índice (usuario_id, fecha DESC, id DESC) en lugar de usar OFFSET.
+    """
+    return _consulta_transacciones(db, (models.Transaccion,), usuario_id, skip, limit, cursor)
+
+def get_transacciones_json(db: Session, usuario_id: int, skip: int = 0, limit: int = 100, cursor: str = None):
+    """
+    Como get_transacciones, pero lee tuplas de columnas (sin objetos del
+    ORM) y devuelve dicts con las claves y el orden de schemas.Transaccion,
+    listos para ORJSONResponse sin volver a validarlos. El monto sale como
+    float, igual que lo serializa schemas.Monto (centavos / 100 es el
+    double más cercano al decimal exacto).
+    """
+    filas = _consulta_transacciones(
+        db, (
+            models.Transaccion.monto_centavos, models.Transaccion.descripcion, models.Transaccion.tipo,
+            models.Transaccion.categoria_id, models.Transaccion.id, models.Transaccion.fecha,
+            models.Transaccion.usuario_id,
+        ),
+        usuario_id, skip, limit, cursor
+    )
+    return [
+        {"monto": centavos / 100, "descripcion": descripcion, "tipo": tipo, "categoria_id": categoria_id,
+         "id": id_, "fecha": fecha, "usuario_id": usuario_id}
+        for centavos, descripcion, tipo, categoria_id, id_, fecha, usuario_id in filas
+    ]
+
+# Columnas de la exportación, en el orden de las filas que devuelve exportar_transacciones
+COLUMNAS_EXPORTACION = ("id", "fecha", "monto", "descripcion", "tipo", "categoria_id", "categoria")
+
+def exportar_transacciones(db: Session, usuario_id: int, desde: date = None, hasta: date = None, tamanio_lote: int = 1000):
+    """
+    Recorre todas las transacciones del usuario en [desde, hasta), de la
+    más vieja a la más nueva, sin armar objetos del ORM: devuelve listas de
+    hasta 'tamanio_lote' tuplas (ver COLUMNAS_EXPORTACION) leídas con
+    yield_per y stream_results, así la memoria no depende del total.
+    """
+    query = db.query(
+        models.Transaccion.id,
+        models.Transaccion.fecha,
+        models.Transaccion.monto_centavos,
+        models.Transaccion.descripcion,
+        models.Transaccion.tipo,
+        models.Transaccion.categoria_id,
+        models.Categoria.nombre
+    ).outerjoin(
+        models.Categoria, models.Transaccion.categoria_id == models.Categoria.id
+    ).filter(
+        models.Transaccion.usuario_id == usuario_id
+    )
+    if desde is not None:
+        query = query.filter(models.Transaccion.fecha >= datetime.combine(desde, datetime.min.time()))
+    if hasta is not None:
+        query = query.filter(models.Transaccion.fecha < datetime.combine(hasta, datetime.min.time()))
+    query = query.order_by(models.Transaccion.fecha, models.Transaccion.id)
+
+    resultado = db.execute(
+        query.statement.execution_options(yield_per=tamanio_lote, stream_results=True)
+    )
+    for lote in resultado.partitions():
+        yield [
+            (id_, fecha, models.centavos_a_monto(centavos), descripcion, tipo, categoria_id, categoria)
+            for id_, fecha, centavos, descripcion, tipo, categoria_id, categoria in lote
+        ]
 
 def create_user_transaccion(db: Session, transaccion: schemas.TransaccionCreate, usuario_id: int):
     # Verificación de seguridad: que la categoría pertenezca al usuario
@@ -113,14 +591,92 @@ def create_user_transaccion(db: Session, transaccion: schemas.TransaccionCreate,
         return None # O lanzar una excepción
 
     db_transaccion = models.Transaccion(
-        **transaccion.dict(), 
+        **transaccion.dict(), # 'monto' pasa a monto_centavos (ver models.Transaccion)
         usuario_id=usuario_id
     )
     db.add(db_transaccion)
+    db.flush() # Para que la fecha por defecto ya esté asignada
+    _sumar_al_resumen(db, db_transaccion, 1)
+    incrementar_version_datos(db, usuario_id)
+    cache_dashboard.invalidar_al_confirmar(db, usuario_id, [db_transaccion.fecha])
     db.commit()
-    db.refresh(db_transaccion)
+    # Sin refresh(): id y fecha ya se asignaron en el flush y las sesiones de
+    # las rutas no expiran los objetos al confirmar (expire_on_commit=False)
     return db_transaccion
 
+def insertar_transacciones(db: Session, usuario_id: int, filas: list, devolver_ids: bool = False):
+    """
+    Inserta 'filas' (dicts con las columnas de Transaccion, ya validadas,
+    con el monto en 'monto_centavos')
+    con un solo executemany y suma al resumen mensual una fila por
+    (mes, categoría, tipo) en lugar de una por transacción. No hace commit.
+    Con devolver_ids=True devuelve los ids nuevos en el orden de 'filas'.
+    """
+    insert = _insert_para(db)
+    stmt = insert(models.Transaccion)
+    if devolver_ids:
+        stmt = stmt.returning(models.Transaccion.id, sort_by_parameter_order=True)
+    resultado = db.execute(stmt, filas)
+
+    totales = {}
+    for fila in filas:
+        clave = (fila["fecha"].year, fila["fecha"].month, fila["categoria_id"], fila["tipo"])
+        centavos, cantidad = totales.get(clave, (0, 0))
+        totales[clave] = (centavos + fila["monto_centavos"], cantidad + 1)
+    _ajustar_resumenes(db, [
+        {"usuario_id": usuario_id, "anio": anio, "mes": mes, "categoria_id": categoria_id,
+         "tipo": tipo, "total_centavos": centavos, "cantidad": cantidad}
+        for (anio, mes, categoria_id, tipo), (centavos, cantidad) in totales.items()
+    ])
+    incrementar_version_datos(db, usuario_id)
+    cache_dashboard.invalidar_al_confirmar(db, usuario_id, [date(anio, mes, 1) for anio, mes, _, _ in totales])
+
+    return resultado.scalars().all() if devolver_ids else None
+
+def create_user_transacciones_bulk(db: Session, transacciones: list, usuario_id: int):
+    """
+    Alta masiva: valida todas las categorías con un solo IN, inserta las
+    filas válidas con insertar_transacciones y confirma todo en un solo
+    commit.
+
+    Devuelve (ids, errores): 'ids' tiene una posición por ítem recibido
+    (None si el ítem falló) y 'errores' es una lista de {indice, detalle}.
+    """
+    categorias_pedidas = {t.categoria_id for t in transacciones}
+    categorias_validas = set()
+    if categorias_pedidas:
+        categorias_validas = {
+            fila.id for fila in db.query(models.Categoria.id).filter(
+                models.Categoria.usuario_id == usuario_id,
+                models.Categoria.id.in_(categorias_pedidas)
+            )
+        }
+
+    # Todas las filas del lote comparten la misma fecha (la del alta)
+    fecha = datetime.utcnow()
+    filas, indices, errores = [], [], []
+    for indice, t in enumerate(transacciones):
+        if t.categoria_id not in categorias_validas:
+            errores.append({"indice": indice, "detalle": "Categoría no encontrada o no pertenece al usuario"})
+            continue
+        filas.append({
+            "monto_centavos": models.monto_a_centavos(t.monto),
+            "descripcion": t.descripcion,
+            "tipo": t.tipo,
+            "categoria_id": t.categoria_id,
+            "usuario_id": usuario_id,
+            "fecha": fecha,
+        })
+        indices.append(indice)
+
+    ids = [None] * len(transacciones)
+    if filas:
+        nuevos = insertar_transacciones(db, usuario_id, filas, devolver_ids=True)
+        for indice, nuevo_id in zip(indices, nuevos):
+            ids[indice] = nuevo_id
+        db.commit()
+    return ids, errores
+
 def get_transaccion(db: Session, transaccion_id: int, usuario_id: int):
     """
     Helper: Obtiene una sola transacción, verificando que pertenezca al usuario.
@@ -141,13 +697,19 @@ def update_transaccion(db: Session, transaccion_id: int, transaccion: schemas.Tr
     # Obtenemos los datos del schema
     transaccion_data = transaccion.dict()
     
+    # Sacamos la versión anterior del resumen antes de modificarla
+    _sumar_al_resumen(db, db_transaccion, -1)
+    fecha_anterior = db_transaccion.fecha
+
     # Actualizamos los campos
     for key, value in transaccion_data.items():
         setattr(db_transaccion, key, value)
     
     db.add(db_transaccion)
+    _sumar_al_resumen(db, db_transaccion, 1)
+    incrementar_version_datos(db, usuario_id)
+    cache_dashboard.invalidar_al_confirmar(db, usuario_id, [fecha_anterior, db_transaccion.fecha])
     db.commit()
-    db.refresh(db_transaccion)
     return db_transaccion
 
 def delete_transaccion(db: Session, transaccion_id: int, usuario_id: int):
@@ -158,50 +720,191 @@ def delete_transaccion(db: Session, transaccion_id: int, usuario_id: int):
     if not db_transaccion:
         return None
     
+    _sumar_al_resumen(db, db_transaccion, -1)
     db.delete(db_transaccion)
+    incrementar_version_datos(db, usuario_id)
+    cache_dashboard.invalidar_al_confirmar(db, usuario_id, [db_transaccion.fecha])
     db.commit()
     return db_transaccion # Devolvemos el objeto borrado (opcional)
 
-def get_dashboard_summary(db: Session, usuario_id: int):
-    # 1. Obtener mes y año actual
-    now = datetime.utcnow()
-    current_month = now.month
-    current_year = now.year
+def recategorizar_transacciones(db: Session, usuario_id: int, categoria_id: int, desde: date = None,
+                                hasta: date = None, q: str = None, categoria_origen_id: int = None,
+                                tipo: str = None):
+    """
+    Pasa a 'categoria_id' las transacciones del usuario que cumplen todos
+    los filtros: fechas [desde, hasta), palabras de la descripción (como en
+    buscar_transacciones), categoría de origen y tipo. Hace falta al menos
+    uno. Un solo UPDATE y un ajuste de los resúmenes por (mes, categoría,
+    tipo) tocado, en un commit. Devuelve cuántas cambiaron de categoría, o
+    None si la categoría no es del usuario. Si alguna de las elegidas no es
+    del tipo de la categoría nueva levanta ValueError y no cambia nada.
+    """
+    condiciones = []
+    if desde is not None:
+        condiciones.append(models.Transaccion.fecha >= datetime.combine(desde, datetime.min.time()))
+    if hasta is not None:
+        condiciones.append(models.Transaccion.fecha < datetime.combine(hasta, datetime.min.time()))
+    if q is not None:
+        condiciones.append(_condicion_texto(db, q, usuario_id))
+    if categoria_origen_id is not None:
+        condiciones.append(models.Transaccion.categoria_id == categoria_origen_id)
+    if tipo is not None:
+        condiciones.append(models.Transaccion.tipo == tipo)
+    if not condiciones:
+        raise ValueError("Indicá al menos un filtro")
+    destino = get_categoria(db, categoria_id, usuario_id)
+    if not destino:
+        return None
+    condiciones += [models.Transaccion.usuario_id == usuario_id, models.Transaccion.categoria_id != categoria_id]
 
-    # 2. Calcular Total Ingresos (RF-010)
-    total_ingresos = db.query(func.sum(models.Transaccion.monto)).filter(
-        models.Transaccion.usuario_id == usuario_id,
-        models.Transaccion.tipo == 'ingreso',
-        extract('month', models.Transaccion.fecha) == current_month,
-        extract('year', models.Transaccion.fecha) == current_year
-    ).scalar() or 0.0 # .scalar() devuelve un solo valor, or 0.0 si es None
+    # Como en merge_categoria: la versión primero, para tener el lock
+    # antes de leer los totales que se van a mover
+    incrementar_version_datos(db, usuario_id)
+    anio = extract('year', models.Transaccion.fecha)
+    mes = extract('month', models.Transaccion.fecha)
+    grupos = db.query(
+        anio, mes, models.Transaccion.categoria_id, models.Transaccion.tipo,
+        func.sum(models.Transaccion.monto_centavos), func.count(models.Transaccion.id)
+    ).filter(*condiciones).group_by(
+        anio, mes, models.Transaccion.categoria_id, models.Transaccion.tipo
+    ).all()
+    if not grupos:
+        db.rollback()
+        return 0
+    if any(tipo != destino.tipo for _, _, _, tipo, _, _ in grupos):
+        mensaje = f"Hay transacciones que no son de tipo '{destino.tipo}' como la categoría"
+        db.rollback()
+        raise ValueError(mensaje)
 
-    # 3. Calcular Total Gastos (RF-010)
-    total_gastos = db.query(func.sum(models.Transaccion.monto)).filter(
-        models.Transaccion.usuario_id == usuario_id,
-        models.Transaccion.tipo == 'gasto',
-        extract('month', models.Transaccion.fecha) == current_month,
-        extract('year', models.Transaccion.fecha) == current_year
-    ).scalar() or 0.0
-
-    # 4. Calcular Gastos por Categoría (RF-011)
-    gastos_categoria_query = db.query(
-        models.Categoria.nombre, # Queremos el nombre de la categoría
-        func.sum(models.Transaccion.monto).label('total') # La suma
-    ).join(
-        models.Categoria, models.Transaccion.categoria_id == models.Categoria.id
+    movidas = db.query(models.Transaccion).filter(*condiciones).update(
+        {models.Transaccion.categoria_id: categoria_id}, synchronize_session=False
+    )
+    ajustes = []
+    for anio, mes, origen, tipo, centavos, cantidad in grupos:
+        base = {"usuario_id": usuario_id, "anio": anio, "mes": mes, "tipo": tipo}
+        ajustes.append({**base, "categoria_id": origen, "total_centavos": -centavos, "cantidad": -cantidad})
+        ajustes.append({**base, "categoria_id": categoria_id, "total_centavos": centavos, "cantidad": cantidad})
+    _ajustar_resumenes(db, ajustes)
+
+    cache_dashboard.invalidar_al_confirmar(db, usuario_id, [date(anio, mes, 1) for anio, mes, *_ in grupos])
+    db.commit()
+    return movidas
+
+# --- Búsqueda de texto en las descripciones ---
+
+def _consulta_fts(q: str, usuario_id: int):
+    """
+    Arma la expresión MATCH de FTS5: cada palabra de 'q' como prefijo
+    entre comillas (así los caracteres especiales de FTS5 no se
+    interpretan) y el usuario como un término más del índice.
+    """
+    palabras = re.findall(r"\w+", q)
+    if not palabras:
+        raise ValueError("La búsqueda no tiene palabras")
+    terminos = " ".join(f'"{p}"*' for p in palabras)
+    return f'descripcion : ({terminos}) AND usuario_id : "{int(usuario_id)}"'
+
+def _condicion_texto(db: Session, q: str, usuario_id: int):
+    """
+    Condición "la descripción tiene todas las palabras de 'q'" para un
+    WHERE: en SQLite, los ids que encuentra transacciones_fts; en otros
+    motores, un ILIKE por palabra.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        fts = models.transacciones_fts
+        return models.Transaccion.id.in_(
+            select(fts.c.rowid).where(literal_column("transacciones_fts").op("MATCH")(_consulta_fts(q, usuario_id)))
+        )
+    palabras = re.findall(r"\w+", q)
+    if not palabras:
+        raise ValueError("La búsqueda no tiene palabras")
+    return and_(*(models.Transaccion.descripcion.ilike(f"%{palabra}%") for palabra in palabras))
+
+def buscar_transacciones(db: Session, usuario_id: int, q: str, desde: date = None, hasta: date = None,
+                         categoria_id: int = None, tipo: str = None, monto_min: Decimal = None,
+                         monto_max: Decimal = None, skip: int = 0, limit: int = 50):
+    """
+    Busca transacciones del usuario cuya descripción tenga todas las
+    palabras de 'q' (como prefijo: "super" encuentra "supermercado"),
+    ordenadas por relevancia (bm25) y después por fecha. Se combina con
+    los filtros de fecha [desde, hasta), categoría, tipo y monto.
+
+    En SQLite usa la tabla FTS5 transacciones_fts; en otros motores cae a
+    un ILIKE por palabra (sin ranking).
+    """
+    query = db.query(models.Transaccion).filter(models.Transaccion.usuario_id == usuario_id)
+    if db.get_bind().dialect.name == "sqlite":
+        fts = models.transacciones_fts
+        tabla_fts = literal_column("transacciones_fts")
+        query = query.join(fts, fts.c.rowid == models.Transaccion.id).filter(
+            tabla_fts.op("MATCH")(_consulta_fts(q, usuario_id))
+        ).order_by(
+            func.bm25(tabla_fts, 1.0, 0.0), # La columna usuario_id no suma al ranking
+            models.Transaccion.fecha.desc()
+        )
+    else:
+        query = query.filter(_condicion_texto(db, q, usuario_id)).order_by(models.Transaccion.fecha.desc())
+
+    if desde is not None:
+        query = query.filter(models.Transaccion.fecha >= datetime.combine(desde, datetime.min.time()))
+    if hasta is not None:
+        query = query.filter(models.Transaccion.fecha < datetime.combine(hasta, datetime.min.time()))
+    if categoria_id is not None:
+        query = query.filter(models.Transaccion.categoria_id == categoria_id)
+    if tipo is not None:
+        query = query.filter(models.Transaccion.tipo == tipo)
+    if monto_min is not None:
+        query = query.filter(models.Transaccion.monto_centavos >= models.monto_a_centavos(monto_min))
+    if monto_max is not None:
+        query = query.filter(models.Transaccion.monto_centavos <= models.monto_a_centavos(monto_max))
+    return query.offset(skip).limit(limit).all()
+
+def reconstruir_busqueda(db: Session):
+    """Vuelve a indexar todas las descripciones en transacciones_fts (solo SQLite)."""
+    if db.get_bind().dialect.name != "sqlite":
+        return False
+    db.execute(text("INSERT INTO transacciones_fts(transacciones_fts) VALUES ('rebuild')"))
+    db.commit()
+    return True
+
+def get_dashboard_summary(db: Session, usuario_id: int, anio: int = None, mes: int = None):
+    # 1. Mes y año pedidos (por defecto, el actual)
+    now = datetime.utcnow()
+    current_month = mes or now.month
+    current_year = anio or now.year
+
+    # 2. Leer los resúmenes ya sumados del mes (una fila por categoría y tipo)
+    filas = db.query(
+        models.ResumenMensual.tipo,
+        models.Categoria.nombre,
+        models.ResumenMensual.total_centavos
+    ).outerjoin(
+        models.Categoria, models.ResumenMensual.categoria_id == models.Categoria.id
     ).filter(
-        models.Transaccion.usuario_id == usuario_id,
-        models.Transaccion.tipo == 'gasto',
-        extract('month', models.Transaccion.fecha) == current_month,
-        extract('year', models.Transaccion.fecha) == current_year
-    ).group_by(
-        models.Categoria.nombre # Agrupamos por nombre
+        models.ResumenMensual.usuario_id == usuario_id,
+        models.ResumenMensual.anio == current_year,
+        models.ResumenMensual.mes == current_month,
+        models.ResumenMensual.cantidad > 0
     ).all()
 
+    # 3. Calcular Totales (RF-010) y Gastos por Categoría (RF-011), en centavos
+    total_ingresos = 0
+    total_gastos = 0
+    totales_categoria = {}
+    for tipo, nombre, total in filas:
+        if tipo == 'ingreso':
+            total_ingresos += total
+        elif tipo == 'gasto':
+            total_gastos += total
+            # Agrupamos por nombre, igual que antes
+            totales_categoria[nombre] = totales_categoria.get(nombre, 0) + total
+    gastos_categoria_query = [
+        (nombre, total) for nombre, total in totales_categoria.items() if nombre is not None
+    ]
+
     # 5. Formatear los datos para el schema (y para Recharts)
     gastos_por_categoria = [
-        {"name": nombre, "value": total} for nombre, total in gastos_categoria_query
+        {"name": nombre, "value": models.centavos_a_monto(total)} for nombre, total in gastos_categoria_query
     ]
     
     # 6. Calcular Balance (RF-010)
@@ -209,23 +912,141 @@ def get_dashboard_summary(db: Session, usuario_id: int):
 
     # Devolvemos el objeto que definimos en el schema
     return schemas.DashboardSummary(
-        total_ingresos=total_ingresos,
-        total_gastos=total_gastos,
-        balance=balance,
+        total_ingresos=models.centavos_a_monto(total_ingresos),
+        total_gastos=models.centavos_a_monto(total_gastos),
+        balance=models.centavos_a_monto(balance),
         gastos_por_categoria=gastos_por_categoria
     )
 
+def _inicio_periodo(dia: date, granularidad: str):
+    """Primer día del bucket al que pertenece 'dia'."""
+    if granularidad == "week":
+        return dia - timedelta(days=dia.weekday()) # Semanas de lunes a domingo
+    if granularidad == "month":
+        return dia.replace(day=1)
+    return dia
+
+def _siguiente_periodo(inicio: date, granularidad: str):
+    if granularidad == "week":
+        return inicio + timedelta(days=7)
+    if granularidad == "month":
+        return (inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return inicio + timedelta(days=1)
+
+def _expresion_periodo(db: Session, granularidad: str):
+    """
+    Expresión SQL que lleva 'fecha' al primer día de su bucket, como texto 'YYYY-MM-DD'.
+    Solo se usa en el SELECT/GROUP BY; el filtro va por rango sobre 'fecha'.
+    """
+    fecha = models.Transaccion.fecha
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_char(func.date_trunc(granularidad, fecha), 'YYYY-MM-DD')
+    if granularidad == "week":
+        return func.date(fecha, 'weekday 0', '-6 days')
+    if granularidad == "month":
+        return func.strftime('%Y-%m-01', fecha)
+    return func.date(fecha)
+
+def get_dashboard_series(db: Session, usuario_id: int, desde: date, hasta: date, granularidad: str = "month"):
+    """
+    Ingresos, gastos, balance y gastos por categoría para cada bucket del
+    rango [desde, hasta), calculados en una sola consulta agrupada.
+    """
+    periodo = _expresion_periodo(db, granularidad).label('periodo')
+
+    filas = db.query(
+        periodo,
+        models.Transaccion.tipo,
+        models.Categoria.nombre,
+        func.sum(models.Transaccion.monto_centavos).label('total')
+    ).outerjoin(
+        models.Categoria, models.Transaccion.categoria_id == models.Categoria.id
+    ).filter(
+        models.Transaccion.usuario_id == usuario_id,
+        # Rango semiabierto sobre la columna "cruda": puede usar el índice
+        models.Transaccion.fecha >= datetime.combine(desde, datetime.min.time()),
+        models.Transaccion.fecha < datetime.combine(hasta, datetime.min.time())
+    ).group_by(
+        periodo, models.Transaccion.tipo, models.Transaccion.categoria_id, models.Categoria.nombre
+    ).all()
+
+    # Armamos todos los buckets del rango (también los vacíos, para los gráficos)
+    puntos = {}
+    inicio = _inicio_periodo(desde, granularidad)
+    while inicio < hasta:
+        puntos[inicio] = {"total_ingresos": 0, "total_gastos": 0, "categorias": {}} # En centavos
+        inicio = _siguiente_periodo(inicio, granularidad)
+
+    for periodo_texto, tipo, nombre, total in filas:
+        punto = puntos[date.fromisoformat(periodo_texto)]
+        if tipo == 'ingreso':
+            punto["total_ingresos"] += total
+        elif tipo == 'gasto':
+            punto["total_gastos"] += total
+            if nombre is not None:
+                punto["categorias"][nombre] = punto["categorias"].get(nombre, 0) + total
+
+    return schemas.DashboardSeries(
+        granularidad=granularidad,
+        desde=desde,
+        hasta=hasta,
+        puntos=[
+            schemas.PuntoSerie(
+                periodo=inicio,
+                total_ingresos=models.centavos_a_monto(punto["total_ingresos"]),
+                total_gastos=models.centavos_a_monto(punto["total_gastos"]),
+                balance=models.centavos_a_monto(punto["total_ingresos"] - punto["total_gastos"]),
+                gastos_por_categoria=[
+                    {"name": nombre, "value": models.centavos_a_monto(total)}
+                    for nombre, total in punto["categorias"].items()
+                ]
+            )
+            for inicio, punto in puntos.items()
+        ]
+    )
+
+# --- Analítica ---
+
+def _expresion_dia(db: Session):
+    """Días desde 1970-01-01 de 'fecha', como entero (sin armar un datetime por fila en Python)."""
+    fecha = models.Transaccion.fecha
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.floor(extract("epoch", fecha) / 86400), BigInteger)
+    return cast(func.strftime('%s', fecha), BigInteger) // 86400
+
+def get_libro(db: Session, usuario_id: int):
+    """
+    Todo el historial del usuario para analitica.py, en una sola consulta y
+    solo con enteros: filas (día, centavos con signo, categoria_id o 0, id)
+    ordenadas por fecha (los gastos van en negativo) y {categoria_id: nombre}.
+    """
+    consulta = select(
+        _expresion_dia(db),
+        case((models.Transaccion.tipo == 'gasto', -models.Transaccion.monto_centavos),
+             else_=models.Transaccion.monto_centavos),
+        func.coalesce(models.Transaccion.categoria_id, 0),
+        models.Transaccion.id
+    ).where(
+        models.Transaccion.usuario_id == usuario_id
+    ).order_by(
+        models.Transaccion.fecha, models.Transaccion.id
+    )
+    # Por la conexión (Core) y no por la Session: con decenas de miles de
+    # filas la capa de carga del ORM es más de la mitad del tiempo
+    conexion = db.connection(bind_arguments={"mapper": models.Transaccion.__mapper__})
+    filas = conexion.execute(consulta).all()
+    categorias = dict(db.query(models.Categoria.id, models.Categoria.nombre).filter(
+        models.Categoria.usuario_id == usuario_id
+    ))
+    return filas, categorias
+
 def get_user_by_email_or_username(db: Session, username_or_email: str):
     """
     Busca un usuario por su email O por su nombre de usuario (nombre),
     de forma case-insensitive.
     """
     search_term = username_or_email.lower() # Convertimos el input a minúsculas
-    # --- DEBUGGING ---
-    print("\n--- BUSCANDO USUARIO ---")
-    print(f"Término de búsqueda (original): {username_or_email}")
-    print(f"Término de búsqueda (lowercase): {search_term}")
-    # --- FIN DEBUGGING ---
+    log.debug("Buscando usuario", extra={"termino": search_term})
     return db.query(models.Usuario).filter(
         or_(
             # Comparamos la columna de email en minúsculas con el input en minúsculas
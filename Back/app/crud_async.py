@@ -0,0 +1,85 @@
+"""
+Versiones async (async def) de las funciones de crud.py.
+
+Reciben la sesión que entrega database.get_sesion: con una AsyncSession
+(DB_MODO=async) la consulta corre sobre el driver async mediante
+run_sync, sin ocupar hilos; con una Session común corre en el threadpool.
+Así la lógica de cada consulta vive en un solo lugar (crud.py) y las
+rutas pueden ser async def en los dos modos.
+"""
+import functools
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import config, crud
+from .agrupador import agrupador
+from .database import ejecutar, shard_de_sesion
+
+
+def _async(funcion):
+    @functools.wraps(funcion)
+    async def envoltorio(db, *args, **kwargs):
+        return await ejecutar(db, funcion, *args, **kwargs)
+    return envoltorio
+
+def _escritura(funcion):
+    """
+    Como _async, pero con GROUP_COMMIT la escritura se confirma en un lote
+    junto con las de otros requests (ver agrupador.py), en una sesión
+    propia del lote en lugar de 'db'.
+    """
+    @functools.wraps(funcion)
+    async def envoltorio(db, *args, **kwargs):
+        if config.GROUP_COMMIT:
+            # Mientras espera el lote, el request no retiene una conexión
+            # del pool (la sesión sync ya la devuelve después de cada llamada)
+            shard = shard_de_sesion(db)
+            if isinstance(db, AsyncSession):
+                await db.close()
+            return await agrupador.ejecutar(shard, funcion, *args, **kwargs)
+        return await ejecutar(db, funcion, *args, **kwargs)
+    return envoltorio
+
+
+# --- Usuarios ---
+get_user = _async(crud.get_user)
+get_user_by_email = _async(crud.get_user_by_email)
+get_user_by_email_or_username = _async(crud.get_user_by_email_or_username)
+get_usuario_detalle = _async(crud.get_usuario_detalle)
+create_user = _async(crud.create_user)
+update_user_password_hash = _async(crud.update_user_password_hash)
+get_version_datos = _async(crud.get_version_datos)
+
+# --- Refresh tokens ---
+crear_refresh_token = _async(crud.crear_refresh_token)
+get_refresh_token = _async(crud.get_refresh_token)
+rotar_refresh_token = _async(crud.rotar_refresh_token)
+revocar_familia_refresh = _async(crud.revocar_familia_refresh)
+
+# --- Categorías ---
+get_categorias = _async(crud.get_categorias)
+get_categorias_json = _async(crud.get_categorias_json)
+get_categoria = _async(crud.get_categoria)
+create_user_categoria = _escritura(crud.create_user_categoria)
+update_categoria = _escritura(crud.update_categoria)
+delete_categoria = _escritura(crud.delete_categoria)
+merge_categoria = _async(crud.merge_categoria)
+get_id_movido = _async(crud.get_id_movido)
+
+# --- Transacciones ---
+get_transacciones = _async(crud.get_transacciones)
+get_transacciones_json = _async(crud.get_transacciones_json)
+get_transaccion = _async(crud.get_transaccion)
+create_user_transaccion = _escritura(crud.create_user_transaccion)
+create_user_transacciones_bulk = _async(crud.create_user_transacciones_bulk)
+update_transaccion = _escritura(crud.update_transaccion)
+delete_transaccion = _escritura(crud.delete_transaccion)
+recategorizar_transacciones = _async(crud.recategorizar_transacciones)
+buscar_transacciones = _async(crud.buscar_transacciones)
+
+# --- Dashboard ---
+get_dashboard_summary = _async(crud.get_dashboard_summary)
+get_dashboard_series = _async(crud.get_dashboard_series)
+
+# --- Analítica ---
+get_libro = _async(crud.get_libro)
@@ -1,14 +1,143 @@
 # En app/database.py
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from starlette.concurrency import run_in_threadpool
+import threading
+from typing import Union
+from contextlib import asynccontextmanager
 
-DATABASE_URL = "sqlite:///./gastos.db"
+from . import config
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+DATABASE_URL = config.DATABASE_URL
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _es_sqlite(url: str):
+    return make_url(url).get_backend_name() == "sqlite"
+
+def _es_sqlite_en_memoria(url: str):
+    return _es_sqlite(url) and make_url(url).database in (None, "", ":memory:")
+
+def _opciones_engine(url: str):
+    """Parámetros de create_engine/create_async_engine según la configuración."""
+    opciones = {"pool_pre_ping": config.DB_POOL_PRE_PING}
+    if _es_sqlite(url):
+        opciones["connect_args"] = {"check_same_thread": False}
+    if _es_sqlite_en_memoria(url):
+        # Una sola conexión compartida: si no, cada hilo vería una base vacía distinta
+        opciones["poolclass"] = StaticPool
+    else:
+        opciones.update(
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT,
+            pool_recycle=config.DB_POOL_RECYCLE,
+        )
+    return opciones
+
+def _configurar_sqlite(dbapi_connection, connection_record):
+    """
+    PRAGMAs por conexión: WAL para que los lectores no esperen a los
+    escritores, busy_timeout para esperar el lock en lugar de fallar con
+    'database is locked', y cache/mmap más grandes.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={config.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(config.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA cache_size={int(config.SQLITE_CACHE_SIZE)}")
+    cursor.execute(f"PRAGMA mmap_size={int(config.SQLITE_MMAP_SIZE)}")
+    cursor.close()
+
+_ESCRITURAS = ("INSERT", "UPDATE", "DELETE", "REPLACE", "BEGIN IMMEDIATE")
+
+def _serializar_escrituras(nuevo):
+    """
+    Los escritores de un mismo proceso esperan su turno en un lock de
+    Python, que los despierta apenas se libera, y no en el busy handler de
+    SQLite: ese reintenta con esperas de hasta 100 ms y, con muchos
+    escritores a la vez, puede dejar a uno sin turno más allá de
+    busy_timeout ('database is locked'). El lock se toma con la primera
+    escritura de la transacción y se suelta en el commit o el rollback.
+    Entre procesos (varios workers) sigue valiendo busy_timeout.
+    """
+    lock = threading.Lock()
+    espera = config.SQLITE_BUSY_TIMEOUT_MS / 1000
+
+    def tomar(conn, cursor, statement, parameters, context, executemany):
+        if "escritura" not in conn.info and statement.lstrip().upper().startswith(_ESCRITURAS):
+            # Si no llega en busy_timeout sigue sin el lock, y decide SQLite
+            conn.info["escritura"] = lock.acquire(timeout=espera)
+
+    def soltar(conn):
+        if conn.info.pop("escritura", False):
+            lock.release()
+
+    def soltar_al_devolver(dbapi_connection, connection_record, reset_state):
+        # Por si la conexión vuelve al pool sin pasar por commit/rollback
+        soltar(connection_record)
+
+    event.listen(nuevo, "before_cursor_execute", tomar)
+    event.listen(nuevo, "commit", soltar)
+    event.listen(nuevo, "rollback", soltar)
+    event.listen(nuevo, "reset", soltar_al_devolver)
+
+def _crear_engine(url: str):
+    nuevo = create_engine(url, **_opciones_engine(url))
+    if _es_sqlite(url):
+        event.listen(nuevo, "connect", _configurar_sqlite)
+        if not _es_sqlite_en_memoria(url):
+            _serializar_escrituras(nuevo)
+    return nuevo
+
+engine = _crear_engine(DATABASE_URL)
+
+# --- Shards (SHARDS > 1) ---
+# El shard 0 es 'engine' (DATABASE_URL), que también guarda el directorio
+# global: las tablas de TABLAS_DIRECTORIO van siempre ahí. Las demás tablas
+# van al shard que se eligió para la sesión con usar_shard() (el del
+# usuario autenticado; ver app/shards.py). Los engines de los otros shards
+# se crean la primera vez que se usan.
+TABLAS_DIRECTORIO = {"usuarios", "refresh_tokens"}
+
+def url_shard(n: int):
+    return DATABASE_URL if n == 0 else config.SHARD_URL.format(n=n)
+
+_engines_shard = {0: engine}
+
+def engine_shard(n: int):
+    if n not in _engines_shard:
+        _engines_shard.setdefault(n, _crear_engine(url_shard(n)))
+    return _engines_shard[n]
+
+class SesionEnrutada(Session):
+    """
+    Session que elige el engine por tabla: el directorio en el shard 0 y
+    los datos en el shard de info["shard"] (0 si no se eligió ninguno).
+    También es la sync_session de las AsyncSession (info["async"]).
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        shard = self.info.get("shard", 0)
+        if shard and (mapper is None or mapper.local_table.name not in TABLAS_DIRECTORIO):
+            if self.info.get("async"):
+                return async_engine_shard(shard).sync_engine
+            return engine_shard(shard)
+        return super().get_bind(mapper, clause=clause, **kw)
+
+def usar_shard(db, shard: int):
+    """Manda las consultas de datos de 'db' (Session o AsyncSession) al shard indicado."""
+    sesion = db.sync_session if isinstance(db, AsyncSession) else db
+    sesion.info["shard"] = shard
+
+def shard_de_sesion(db):
+    sesion = db.sync_session if isinstance(db, AsyncSession) else db
+    return sesion.info.get("shard", 0)
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=SesionEnrutada)
 
 Base = declarative_base()
 
@@ -18,4 +147,151 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def describir_configuracion():
+    """
+    Configuración efectiva de la base (la URL sin contraseña, el pool y,
+    en SQLite, los PRAGMAs tal como quedaron en una conexión real).
+    """
+    descripcion = {
+        "url": engine.url.render_as_string(hide_password=True),
+        "modo": config.DB_MODO,
+        "pool": engine.pool.status(),
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+    }
+    if config.SHARDS > 1:
+        descripcion["shards"] = [
+            make_url(url_shard(n)).render_as_string(hide_password=True) for n in range(config.SHARDS)
+        ]
+    if _es_sqlite(DATABASE_URL):
+        with engine.connect() as conn:
+            descripcion["pragmas"] = {
+                pragma: conn.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+                for pragma in ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size")
+            }
+    return descripcion
+
+# --- Modo async (opcional, DB_MODO=async) ---
+
+def url_async(url: str):
+    """Pasa una URL sync al driver async equivalente (aiosqlite / asyncpg)."""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith(("postgresql:", "postgres:")):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    return url
+
+ASYNC_DATABASE_URL = config.ASYNC_DATABASE_URL or url_async(DATABASE_URL)
+
+# El engine async se crea solo si se usa: así aiosqlite/asyncpg no son
+# obligatorios en modo sync
+async_engine = None
+AsyncSessionLocal = None
+
+def _crear_async_engine(url: str):
+    nuevo = create_async_engine(url, **_opciones_engine(url))
+    if _es_sqlite(url):
+        event.listen(nuevo.sync_engine, "connect", _configurar_sqlite)
+    return nuevo
+
+def get_async_engine():
+    global async_engine, AsyncSessionLocal
+    if async_engine is None:
+        async_engine = _crear_async_engine(ASYNC_DATABASE_URL)
+        # expire_on_commit=False: después del commit no se puede hacer lazy load
+        AsyncSessionLocal = async_sessionmaker(
+            async_engine, autoflush=False, expire_on_commit=False,
+            sync_session_class=SesionEnrutada, info={"async": True}
+        )
+    return async_engine
+
+_async_engines_shard = {}
+
+def async_engine_shard(n: int):
+    if n == 0:
+        return get_async_engine()
+    if n not in _async_engines_shard:
+        _async_engines_shard.setdefault(n, _crear_async_engine(url_async(url_shard(n))))
+    return _async_engines_shard[n]
+
+async def cerrar_async_engine():
+    """Cierra las conexiones de los engines async (los hilos de aiosqlite)."""
+    for motor in [async_engine, *_async_engines_shard.values()]:
+        if motor is not None:
+            await motor.dispose()
+
+async def get_async_db():
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# --- Sesión según el modo (la usan las rutas de main.py) ---
+
+SesionDB = Union[Session, AsyncSession]
+
+async def get_sesion():
+    """
+    Dependencia de las rutas: una AsyncSession en modo async o una
+    Session común en modo sync (cerrada en el threadpool).
+    """
+    if config.DB_MODO == "async":
+        # La sesión se abre acá y no con 'async for' sobre get_async_db():
+        # si la ruta lanza una excepción (un 404, un 401), ese generador
+        # interno no se cerraba y la conexión volvía al pool recién cuando
+        # lo finalizaba el recolector
+        get_async_engine()
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    db = SessionRutas()
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+async def liberar(db: SesionDB):
+    """Devuelve la conexión de 'db' al pool (la sesión se puede seguir usando)."""
+    if isinstance(db, AsyncSession):
+        await db.close()
+    else:
+        await run_in_threadpool(db.close)
+
+@asynccontextmanager
+async def abrir_sesion():
+    """
+    Como get_sesion, pero fuera de las dependencias: para conexiones largas
+    (GET /dashboard/stream) que no deben retener la sesión del request
+    mientras esperan.
+    """
+    sesiones = get_sesion()
+    try:
+        yield await sesiones.__anext__()
+    finally:
+        await sesiones.aclose()
+
+# Sesiones de las rutas en modo sync. Entre una llamada a ejecutar() y la
+# siguiente el request no ocupa ningún hilo, así que tampoco debe retener
+# una conexión del pool: ejecutar() cierra la sesión después de cada
+# llamada. Sin expire_on_commit los objetos devueltos siguen legibles.
+SessionRutas = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine, expire_on_commit=False, class_=SesionEnrutada
+)
+
+def _llamar_y_liberar(funcion, db: Session, *args, **kwargs):
+    try:
+        return funcion(db, *args, **kwargs)
+    finally:
+        db.close() # Devuelve la conexión al pool; la sesión se puede seguir usando
+
+async def ejecutar(db: SesionDB, funcion, *args, **kwargs):
+    """
+    Corre una función sincrónica de crud que recibe la sesión como primer
+    argumento, sin bloquear el event loop: con AsyncSession vía run_sync
+    (el I/O lo hace el driver async) y con Session en el threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(funcion, *args, **kwargs)
+    return await run_in_threadpool(_llamar_y_liberar, funcion, db, *args, **kwargs)
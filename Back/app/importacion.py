@@ -0,0 +1,359 @@
+# En app/importacion.py
+"""
+Importación de resúmenes bancarios (CSV u OFX) en streaming.
+
+El archivo pasa por una cadena de generadores, así nunca hay más de un
+lote en memoria sin importar el tamaño del archivo:
+
+    leer_csv / leer_ofx  ->  normalizar  ->  en_lotes  ->  importar
+    (filas crudas)           (validadas)     (listas)     (categorías,
+                                                           duplicados,
+                                                           INSERT + commit)
+
+Cada lote se inserta con crud.insertar_transacciones (un executemany y el
+resumen mensual actualizado por grupo) y se confirma con su propio commit;
+importar() emite un evento de progreso por lote y uno de resumen al final.
+
+CSV: encabezado con las columnas fecha, monto y opcionalmente descripcion,
+categoria y tipo (separador ',', ';' o tabulación). Sin columna tipo, un
+monto negativo es un gasto y uno positivo un ingreso.
+"""
+import codecs
+import csv
+import io
+import itertools
+import json
+import re
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy.orm import Session
+
+from . import config, crud, models
+
+FORMATOS = ("csv", "ofx")
+TIPOS = ("ingreso", "gasto")
+# Mismo límite que schemas.TransaccionBase (15 dígitos con 2 decimales)
+MONTO_MAXIMO = Decimal("1e13")
+
+def detectar_formato(nombre_archivo: str):
+    """Devuelve 'csv' u 'ofx' según la extensión del archivo (o None)."""
+    extension = (nombre_archivo or "").rsplit(".", 1)[-1].lower()
+    if extension in ("csv", "txt"):
+        return "csv"
+    if extension in ("ofx", "qfx"):
+        return "ofx"
+    return None
+
+# --- Lectores: archivo -> (línea, fila cruda) ---
+
+def leer_csv(archivo):
+    """
+    Recorre un CSV (archivo binario) y devuelve (número de línea, dict)
+    con las claves del encabezado en minúscula.
+    """
+    texto = io.TextIOWrapper(archivo, encoding="utf-8-sig", errors="replace", newline="")
+    encabezado = texto.readline()
+    # Del encabezado solo se deduce el separador; las comillas son las estándar
+    try:
+        separador = csv.Sniffer().sniff(encabezado, delimiters=",;\t").delimiter
+    except csv.Error:
+        separador = ","
+    columnas = [c.strip().lower() for c in next(csv.reader([encabezado], delimiter=separador))]
+    for numero, valores in enumerate(csv.reader(texto, delimiter=separador), start=2):
+        if not any(v.strip() for v in valores):
+            continue
+        yield numero, dict(zip(columnas, valores))
+
+_TAG_OFX = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+def leer_ofx(archivo, tamanio_bloque: int = 64 * 1024):
+    """
+    Recorre los movimientos (<STMTTRN>) de un OFX, en SGML o XML, leyendo
+    de a bloques. Devuelve (número de movimiento, dict con los tags).
+    """
+    decodificador = codecs.getincrementaldecoder("latin-1")(errors="replace")
+    pendiente = ""
+    movimiento = None
+    numero = 0
+    while True:
+        bloque = archivo.read(tamanio_bloque)
+        pendiente += decodificador.decode(bloque, final=not bloque)
+        # Lo que viene después del último '<' puede ser un tag cortado
+        corte = len(pendiente) if not bloque else pendiente.rfind("<")
+        for abre_cierra, tag, valor in _TAG_OFX.findall(pendiente[:max(corte, 0)]):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if abre_cierra:
+                    if movimiento is not None:
+                        numero += 1
+                        yield numero, movimiento
+                    movimiento = None
+                else:
+                    movimiento = {}
+            elif movimiento is not None and not abre_cierra and valor.strip():
+                movimiento[tag] = valor.strip()
+        pendiente = pendiente[max(corte, 0):]
+        if not bloque:
+            break
+
+def _fila_ofx(movimiento: dict):
+    """Pasa los tags de un <STMTTRN> a las columnas del CSV."""
+    return {
+        "fecha": movimiento.get("DTPOSTED", ""),
+        "monto": movimiento.get("TRNAMT", ""),
+        "descripcion": movimiento.get("NAME") or movimiento.get("MEMO") or "",
+        # Id del movimiento en el banco: distingue dos compras iguales del mismo día
+        "fitid": movimiento.get("FITID", ""),
+    }
+
+# --- Normalización: fila cruda -> fila validada ---
+
+_FORMATOS_FECHA = ("%d/%m/%Y", "%d/%m/%Y %H:%M:%S", "%Y%m%d", "%Y%m%d%H%M%S")
+
+def parsear_fecha(texto: str):
+    texto = texto.strip()
+    try:
+        # ISO (AAAA-MM-DD[ HH:MM:SS]): el caso común y el más rápido
+        fecha = datetime.fromisoformat(texto)
+        if fecha.tzinfo is not None:
+            # Las fechas se guardan en UTC sin zona, como datetime.utcnow()
+            fecha = fecha.astimezone(timezone.utc).replace(tzinfo=None)
+        return fecha
+    except ValueError:
+        pass
+    if re.fullmatch(r"\d{8,14}(\.\d+)?(\[.*\])?", texto):
+        # Fecha OFX: AAAAMMDD[HHMMSS[.XXX]][[zona]]; la zona se ignora
+        texto = texto.split("[")[0].split(".")[0]
+    for formato in _FORMATOS_FECHA:
+        try:
+            return datetime.strptime(texto, formato)
+        except ValueError:
+            continue
+    raise ValueError(texto)
+
+def parsear_monto(texto: str):
+    """
+    Acepta '1234.56', '-1,234.56' y el formato local '1.234,56'. Devuelve
+    Decimal (sin pasar por float) para que los centavos sean exactos.
+    """
+    texto = texto.strip().replace("$", "").replace(" ", "")
+    if "," in texto and texto.rfind(",") > texto.rfind("."):
+        texto = texto.replace(".", "").replace(",", ".")
+    else:
+        texto = texto.replace(",", "")
+    try:
+        monto = Decimal(texto)
+    except InvalidOperation:
+        raise ValueError(texto)
+    if not monto.is_finite():
+        raise ValueError(texto)
+    return monto
+
+class ResumenImportacion:
+    """
+    Contadores de la importación. De los rechazos guarda solo los primeros
+    IMPORT_MAX_RECHAZOS (línea y motivo) para no crecer con el archivo.
+    """
+
+    def __init__(self, max_rechazos: int = None):
+        self.max_rechazos = config.IMPORT_MAX_RECHAZOS if max_rechazos is None else max_rechazos
+        self.procesadas = 0
+        self.importadas = 0
+        self.duplicadas = 0
+        self.rechazadas = 0
+        self.rechazos = []
+        self.categorias_creadas = []
+        self.inicio = time.perf_counter()
+
+    def rechazar(self, linea: int, motivo: str):
+        self.rechazadas += 1
+        if len(self.rechazos) < self.max_rechazos:
+            self.rechazos.append({"linea": linea, "motivo": motivo})
+
+    def progreso(self):
+        return {
+            "evento": "progreso",
+            "procesadas": self.procesadas,
+            "importadas": self.importadas,
+            "duplicadas": self.duplicadas,
+            "rechazadas": self.rechazadas,
+        }
+
+    def final(self):
+        return {
+            **self.progreso(),
+            "evento": "resumen",
+            "segundos": round(time.perf_counter() - self.inicio, 3),
+            "categorias_creadas": self.categorias_creadas,
+            "rechazos": self.rechazos,
+        }
+
+def normalizar(filas, resumen: ResumenImportacion):
+    """
+    Valida fecha, monto y tipo de cada fila cruda. Las inválidas se anotan
+    en el resumen y no siguen; las válidas salen como (línea, dict).
+    """
+    for linea, fila in filas:
+        resumen.procesadas += 1
+        try:
+            fecha = parsear_fecha(fila.get("fecha") or "")
+        except ValueError:
+            resumen.rechazar(linea, "Fecha inválida")
+            continue
+        try:
+            monto = parsear_monto(fila.get("monto") or "")
+        except ValueError:
+            resumen.rechazar(linea, "Monto inválido")
+            continue
+        if monto.normalize().as_tuple().exponent < -2:
+            # Como schemas.TransaccionBase: redondear '1.234' o '1,234' (mil
+            # doscientos treinta y cuatro con otro separador) daría 1.23
+            resumen.rechazar(linea, "Monto con más de dos decimales")
+            continue
+        if abs(monto) >= MONTO_MAXIMO:
+            resumen.rechazar(linea, "Monto fuera de rango")
+            continue
+
+        tipo = (fila.get("tipo") or "").strip().lower()
+        if not tipo:
+            tipo = "gasto" if monto < 0 else "ingreso"
+        if tipo not in TIPOS:
+            resumen.rechazar(linea, f"Tipo inválido: {tipo}")
+            continue
+
+        yield linea, {
+            "fecha": fecha,
+            "monto_centavos": models.monto_a_centavos(abs(monto)),
+            "descripcion": (fila.get("descripcion") or "").strip() or None,
+            "tipo": tipo,
+            "categoria": (fila.get("categoria") or "").strip(),
+            "fitid": (fila.get("fitid") or "").strip() or None,
+        }
+
+def en_lotes(filas, tamanio: int):
+    """Agrupa un iterable en listas de hasta 'tamanio' elementos."""
+    iterador = iter(filas)
+    while True:
+        lote = list(itertools.islice(iterador, tamanio))
+        if not lote:
+            return
+        yield lote
+
+# --- Importación por lotes ---
+
+def _clave(fila: dict):
+    return (fila["fecha"], fila["monto_centavos"], fila["descripcion"], fila["tipo"])
+
+def _claves_existentes(db: Session, usuario_id: int, fechas: set):
+    """
+    Cuántas transacciones ya guardadas hay en esas fechas por cada
+    (fecha, monto_centavos, descripcion, tipo).
+    """
+    filas = db.query(
+        models.Transaccion.fecha, models.Transaccion.monto_centavos,
+        models.Transaccion.descripcion, models.Transaccion.tipo
+    ).filter(
+        models.Transaccion.usuario_id == usuario_id,
+        models.Transaccion.fecha.in_(fechas)
+    )
+    return Counter(tuple(f) for f in filas)
+
+def importar(db: Session, archivo, formato: str, usuario_id: int, crear_categorias: bool = True,
+             categoria_por_defecto: str = "Sin categoría", tamanio_lote: int = None):
+    """
+    Importa un archivo CSV u OFX (binario) para el usuario. Es un generador:
+    devuelve un dict de progreso por lote confirmado y el resumen al final.
+
+    Las categorías se buscan por nombre (sin distinguir mayúsculas); si no
+    existen se crean (o, con crear_categorias=False, la fila se rechaza).
+    Una fila es duplicada si repite una transacción que el usuario ya tenía
+    antes de importar (misma fecha, monto, descripción y tipo): cada una de
+    la base cubre una sola fila, así dos compras iguales del mismo día se
+    importan las dos aunque una ya estuviera. Dentro del archivo solo se
+    descartan los movimientos OFX con un FITID repetido; para eso guarda los
+    FITID vistos y los conteos de la base por fecha (no las filas).
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato}")
+    resumen = ResumenImportacion()
+    if formato == "csv":
+        crudas = leer_csv(archivo)
+    else:
+        crudas = ((linea, _fila_ofx(m)) for linea, m in leer_ofx(archivo))
+
+    categorias = {
+        c.nombre.lower(): c.id
+        for c in db.query(models.Categoria).filter(models.Categoria.usuario_id == usuario_id)
+    }
+
+    # Transacciones de la base que todavía no repitió ninguna fila, cargadas
+    # la primera vez que aparece cada fecha (así las que inserta esta misma
+    # importación nunca cuentan como existentes)
+    existentes = Counter()
+    fechas_cargadas = set()
+    fitids = set()
+
+    for lote in en_lotes(normalizar(crudas, resumen), tamanio_lote or config.IMPORT_LOTE):
+        fechas = {fila["fecha"] for _, fila in lote} - fechas_cargadas
+        if fechas:
+            existentes.update(_claves_existentes(db, usuario_id, fechas))
+            fechas_cargadas |= fechas
+        filas = []
+        for linea, fila in lote:
+            fitid = fila.pop("fitid")
+            if fitid is not None:
+                if fitid in fitids:
+                    resumen.duplicadas += 1
+                    continue
+                fitids.add(fitid)
+            clave = _clave(fila)
+            if existentes[clave] > 0:
+                existentes[clave] -= 1
+                resumen.duplicadas += 1
+                continue
+
+            nombre = fila.pop("categoria") or categoria_por_defecto
+            categoria_id = categorias.get(nombre.lower())
+            if categoria_id is None:
+                if not crear_categorias:
+                    resumen.rechazar(linea, f"Categoría desconocida: {nombre}")
+                    continue
+                categoria = models.Categoria(nombre=nombre, tipo=fila["tipo"], usuario_id=usuario_id)
+                db.add(categoria)
+                db.flush()
+                categoria_id = categorias[nombre.lower()] = categoria.id
+                resumen.categorias_creadas.append(nombre)
+                crud.incrementar_version_datos(db, usuario_id)
+
+            filas.append({**fila, "categoria_id": categoria_id, "usuario_id": usuario_id})
+
+        if filas:
+            crud.insertar_transacciones(db, usuario_id, filas)
+        db.commit()
+        resumen.importadas += len(filas)
+        yield resumen.progreso()
+
+    yield resumen.final()
+
+def importar_ndjson(archivo, formato: str, usuario_id: int, **opciones):
+    """
+    Versión para StreamingResponse: usa su propia sesión sync (la importación
+    es un trabajo largo que corre en el threadpool en los dos DB_MODO) y
+    devuelve cada evento como una línea JSON. Si algo falla, los lotes ya
+    confirmados quedan y el último evento es de error.
+    """
+    from .shards import sesion_de_usuario
+
+    db = sesion_de_usuario(usuario_id)
+    try:
+        for evento in importar(db, archivo, formato, usuario_id, **opciones):
+            yield json.dumps(evento, ensure_ascii=False) + "\n"
+    except Exception as e:
+        db.rollback()
+        yield json.dumps({"evento": "error", "detalle": str(e)}, ensure_ascii=False) + "\n"
+    finally:
+        db.close()
+        archivo.close()
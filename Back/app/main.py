@@ -1,16 +1,30 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Body, Depends, File, HTTPException, Query, Request, UploadFile, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from typing import List
-from starlette.responses import Response 
-from . import crud, models, schemas, auth, database
-from starlette import status             
+from typing import List, Optional
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from . import crud, crud_async, models, schemas, analitica, auth, cache_dashboard, config, database, exportacion, importacion, metricas, notificaciones, registro, shards
+import logging
 
-from . import crud, models, schemas, auth
+registro.configurar()
+log = logging.getLogger(__name__)
 
 # --- Configuración de la App y Base de Datos ---
-app = FastAPI(title="Gestor de Gastos API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Al arrancar: logueamos la configuración efectiva de la base
+    log.info("Configuración de la base de datos", extra={"db": database.describir_configuracion()})
+    yield
+    # Al apagar: cerramos el engine async (si se usó en DB_MODO=async)
+    await database.cerrar_async_engine()
+
+app = FastAPI(title="Gestor de Gastos API", lifespan=lifespan)
 
 # --- Configuración de CORS ---
 origins = [
@@ -24,206 +38,669 @@ app.add_middleware(
     allow_credentials=True,    # Permite credenciales
     allow_methods=["*"],         # Permite todos los métodos (POST, GET, etc.)
     allow_headers=["*"],         # Permite todos los headers
+    expose_headers=["X-Next-Cursor", "ETag"], # Cursor de la página siguiente (paginación keyset) y validador de cache
 )
 
+class GZipSinStreams(GZipMiddleware):
+    """
+    GZipMiddleware arma un compresor por request antes de ver la respuesta
+    (unos 250 KiB que duran lo que dure la conexión). Los event-stream no se
+    comprimen igual: los pedidos de EventSource (Accept: text/event-stream)
+    pasan de largo. Tampoco las rutas de RUTAS_SIN_GZIP, que mandan progreso
+    de a una línea: el compresor no vacía su buffer entre chunks y el
+    cliente lo vería todo junto al final.
+    """
+    RUTAS_SIN_GZIP = {"/transacciones/importar"}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and (
+            b"text/event-stream" in dict(scope["headers"]).get(b"accept", b"")
+            or scope["path"] in self.RUTAS_SIN_GZIP
+        ):
+            return await self.app(scope, receive, send)
+        await super().__call__(scope, receive, send)
+
+# Compresión gzip de las respuestas grandes (exportaciones, listados)
+app.add_middleware(GZipSinStreams, minimum_size=config.GZIP_MINIMO)
+# Último en agregarse = el más externo: mide también CORS y la compresión
+app.add_middleware(metricas.MiddlewareMetricas)
+
 # Llama a la función de models.py para crear las tablas
 models.crear_db() 
 
+# --- GET condicionales (ETag / If-None-Match) ---
+
+def _etag_coincide(if_none_match: str, etag: str):
+    # Puede traer varios ETag separados por coma, o '*'. Comparación débil (sin W/)
+    candidatos = [c.strip().removeprefix("W/") for c in if_none_match.split(",")]
+    return "*" in candidatos or etag.removeprefix("W/") in candidatos
+
+def etag_de_datos(por_dia: bool = False):
+    """
+    Dependencia para los GET cuya respuesta depende solo de los datos del
+    usuario: el ETag sale de su versión de datos (crud.get_version_datos,
+    una lectura por PK) y, si el cliente ya tiene esa versión, se responde
+    304 antes de la consulta principal. Con por_dia=True el ETag incluye la
+    fecha de hoy (rutas cuyo resultado por defecto depende del día).
+    """
+    async def dependencia(
+        request: Request,
+        response: Response,
+        db: database.SesionDB = Depends(database.get_sesion),
+        current_user: schemas.Usuario = Depends(auth.get_current_user_async)
+    ):
+        version = await crud_async.get_version_datos(db, current_user.id)
+        partes = [current_user.id, version]
+        if por_dia:
+            partes.append(datetime.utcnow().date().isoformat())
+        # Débil: GZipMiddleware puede cambiar los bytes, no el contenido
+        etag = 'W/"' + "-".join(str(p) for p in partes) + '"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_coincide(if_none_match, etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+    return dependencia
+
+
+# --- Ids de usuarios movidos de shard ---
+
+async def _no_encontrado(db, request: Request, usuario_id: int, tabla: str, id_: int, detalle: str):
+    """
+    404, salvo que el id sea de antes de mover al usuario de shard
+    (shards.mover_usuario): entonces 308 a la misma URL con el id nuevo,
+    que repite el método y el cuerpo.
+    """
+    nuevo = await crud_async.get_id_movido(db, usuario_id=usuario_id, tabla=tabla, id_viejo=id_)
+    if nuevo is not None:
+        ruta = request.url.path.replace(f"/{tabla}/{id_}", f"/{tabla}/{nuevo}", 1)
+        raise HTTPException(
+            status_code=status.HTTP_308_PERMANENT_REDIRECT,
+            detail=f"El id cambió a {nuevo}",
+            headers={"Location": str(request.url.replace(path=ruta))},
+        )
+    raise HTTPException(status_code=404, detail=detalle)
+
 
 # --- Endpoints de Autenticación y Usuarios ---
 
 @app.post("/usuarios/", response_model=schemas.Usuario, tags=["Usuarios"])
-def crear_usuario(user: schemas.UsuarioCreate, db: Session = Depends(database.get_db)):
+async def crear_usuario(user: schemas.UsuarioCreate, db: database.SesionDB = Depends(database.get_sesion)):
     """
     Registra un nuevo usuario en la base de datos.
+    El hash de la contraseña se calcula en el executor de Argon2.
     """
-    db_user = crud.get_user_by_email(db, email=user.email)
+    db_user = await crud_async.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="El email ya está registrado")
-    return crud.create_user(db=db, user=user)
+    hashed_password = await auth.hash_password_async(user.password)
+    return await crud_async.create_user(db=db, user=user, hashed_password=hashed_password)
 
 @app.post("/token", response_model=schemas.Token, tags=["Usuarios"])
-def login_para_access_token(
-    db: Session = Depends(database.get_db), 
+async def login_para_access_token(
+    db: database.SesionDB = Depends(database.get_sesion), 
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
-    # --- DEBUGGING ---
-    print("\n--- INTENTANDO LOGIN ---")
-    print(f"Dato recibido (form_data.username): {form_data.username}")
-    print(f"Password recibido: {form_data.password}")
-    # --- FIN DEBUGGING ---
+    user = await crud_async.get_user_by_email_or_username(db, username_or_email=form_data.username)
 
-    user = crud.get_user_by_email_or_username(db, username_or_email=form_data.username)
-
-    # --- DEBUGGING ---
+    # Una sola verificación de Argon2, en su executor dedicado
+    es_valido, nuevo_hash = (False, None)
     if user:
-        print(f"Usuario encontrado en DB: {user.nombre} (Email: {user.email})")
-        es_valido = auth.verify_password(form_data.password, user.hashed_password)
-        print(f"Verificación de contraseña: {es_valido}")
-    else:
-        print("Resultado de la búsqueda: Usuario NO encontrado.")
-    print("------------------------\n")
-    # --- FIN DEBUGGING ---
-
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+        es_valido, nuevo_hash = await auth.verify_and_update_password_async(
+            form_data.password, user.hashed_password
+        )
+
+    if not es_valido:
+        log.info("Login fallido", extra={"usuario": form_data.username, "existe": user is not None})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email/Usuario o contraseña incorrectos",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # El hash guardado usa parámetros de Argon2 viejos: lo reemplazamos
+    if nuevo_hash:
+        await crud_async.update_user_password_hash(db, user, nuevo_hash)
     
+    # Empieza una familia de refresh tokens nueva (una por login)
+    refresh_token, refresh_hash, vence_en = auth.nuevo_refresh_token()
+    await crud_async.crear_refresh_token(db, user.id, refresh_hash, auth.nueva_familia_refresh(), vence_en)
+    return _respuesta_tokens(user.email, user.id, refresh_token)
+
+def _respuesta_tokens(email: str, usuario_id: int, refresh_token: str):
     access_token = auth.create_access_token(
-        data={"sub": user.email}
+        data={"sub": email, "uid": usuario_id}
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+        "expires_in": auth.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+def _refresh_token_invalido():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Refresh token inválido o vencido",
+        headers={"WWW-Authenticate": "Bearer"},
     )
-    return {"access_token": access_token, "token_type": "bearer"}
 
-@app.get("/usuarios/me/", response_model=schemas.Usuario, tags=["Usuarios"])
-def leer_usuario_actual(
-    current_user: models.Usuario = Depends(auth.get_current_user)
+@app.post("/token/refresh", response_model=schemas.Token, tags=["Usuarios"])
+async def refrescar_token(
+    datos: schemas.RefreshTokenRequest,
+    db: database.SesionDB = Depends(database.get_sesion)
+):
+    """
+    Cambia un refresh token vigente por un token de acceso nuevo y el
+    siguiente refresh token de su familia, sin verificar la contraseña.
+    Cada refresh token sirve una sola vez: si llega uno ya usado (alguien
+    lo copió, o el cliente lo reenvió), se revoca la familia entera y hay
+    que volver a loguearse.
+    """
+    registro = await crud_async.get_refresh_token(db, auth.hash_refresh_token(datos.refresh_token))
+    if registro is None or registro.vence_en <= datetime.utcnow():
+        raise _refresh_token_invalido()
+
+    refresh_token, refresh_hash, vence_en = auth.nuevo_refresh_token()
+    rotado = registro.revocado_en is None and await crud_async.rotar_refresh_token(
+        db, registro.id, registro.usuario_id, registro.familia, refresh_hash, vence_en
+    )
+    if not rotado:
+        revocados = await crud_async.revocar_familia_refresh(db, registro.familia)
+        log.warning("Reuso de refresh token", extra={"usuario_id": registro.usuario_id, "revocados": revocados})
+        raise _refresh_token_invalido()
+    return _respuesta_tokens(registro.email, registro.usuario_id, refresh_token)
+
+@app.post("/token/revoke", status_code=status.HTTP_204_NO_CONTENT, tags=["Usuarios"])
+async def revocar_refresh_token(
+    datos: schemas.RefreshTokenRequest,
+    db: database.SesionDB = Depends(database.get_sesion)
+):
+    """
+    Cierra la sesión del refresh token: revoca su familia. Los tokens de
+    acceso ya emitidos siguen valiendo hasta su 'exp'.
+    """
+    registro = await crud_async.get_refresh_token(db, auth.hash_refresh_token(datos.refresh_token))
+    if registro is not None:
+        await crud_async.revocar_familia_refresh(db, registro.familia)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+INCLUDES_USUARIO = {"transacciones", "categorias", "conteos"}
+
+@app.get(
+    "/usuarios/me/",
+    response_model=schemas.UsuarioDetalle,
+    response_model_exclude_unset=True,
+    tags=["Usuarios"]
+)
+async def leer_usuario_actual(
+    include: Optional[str] = Query(
+        None, description="Partes extra separadas por coma: transacciones, categorias, conteos"
+    ),
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
 ):
     """
     Devuelve la información del usuario que está logueado (autenticado).
+    Por defecto solo el perfil; las transacciones, categorías o conteos
+    se piden explícitamente con ?include=.
     """
-    return current_user
+    incluir = {parte.strip() for parte in include.split(",") if parte.strip()} if include else set()
+    if not incluir <= INCLUDES_USUARIO:
+        raise HTTPException(
+            status_code=400,
+            detail=f"include inválido. Opciones: {', '.join(sorted(INCLUDES_USUARIO))}"
+        )
+    if not incluir:
+        return current_user
+    return await crud_async.get_usuario_detalle(db, usuario_id=current_user.id, incluir=incluir)
 
 # --- Endpoints de Categorías ---
 
 @app.post("/categorias/", response_model=schemas.Categoria, tags=["Categorías"])
-def crear_categoria(
+async def crear_categoria(
     categoria: schemas.CategoriaCreate, 
-    db: Session = Depends(database.get_db),
-    current_user: models.Usuario = Depends(auth.get_current_user)
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
 ):
     """
     Crea una nueva categoría para el usuario logueado.
     """
-    return crud.create_user_categoria(db=db, categoria=categoria, usuario_id=current_user.id)
+    return await crud_async.create_user_categoria(db=db, categoria=categoria, usuario_id=current_user.id)
 
-@app.get("/categorias/", response_model=List[schemas.Categoria], tags=["Categorías"])
-def leer_categorias_usuario(
+@app.get("/categorias/", response_model=List[schemas.Categoria], tags=["Categorías"],
+         dependencies=[Depends(etag_de_datos())])
+async def leer_categorias_usuario(
+    response: Response,
     skip: int = 0, limit: int = 100,
-    db: Session = Depends(database.get_db),
-    current_user: models.Usuario = Depends(auth.get_current_user)
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor de la página anterior"),
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
 ):
     """
     Obtiene la lista de categorías creadas por el usuario logueado.
+    Si hay más páginas, el header X-Next-Cursor trae el cursor para pedir la siguiente.
     """
-    categorias = crud.get_categorias(db, usuario_id=current_user.id, skip=skip, limit=limit)
-    return categorias
+    try:
+        categorias = await crud_async.get_categorias_json(db, usuario_id=current_user.id, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if categorias and len(categorias) == limit:
+        response.headers["X-Next-Cursor"] = crud.codificar_cursor(categorias[-1]["id"])
+    # Los dicts ya tienen la forma de schemas.Categoria: sin revalidar
+    return ORJSONResponse(categorias, headers=response.headers)
 
 @app.put("/categorias/{categoria_id}", response_model=schemas.Categoria, tags=["Categorías"])
-def actualizar_categoria(
+async def actualizar_categoria(
     categoria_id: int,
     categoria: schemas.CategoriaCreate,
-    db: Session = Depends(database.get_db),
-    current_user: models.Usuario = Depends(auth.get_current_user)
+    request: Request,
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
 ):
     """
     Actualiza una categoría existente.
     """
-    db_categoria = crud.update_categoria(
+    db_categoria = await crud_async.update_categoria(
         db, 
         categoria_id=categoria_id, 
         categoria=categoria, 
         usuario_id=current_user.id
     )
     if db_categoria is None:
-        raise HTTPException(status_code=404, detail="Categoría no encontrada")
+        await _no_encontrado(db, request, current_user.id, "categorias", categoria_id, "Categoría no encontrada")
     return db_categoria
 
 
 @app.delete("/categorias/{categoria_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Categorías"])
-def eliminar_categoria(
+async def eliminar_categoria(
     categoria_id: int,
-    db: Session = Depends(database.get_db),
-    current_user: models.Usuario = Depends(auth.get_current_user)
+    request: Request,
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
 ):
     """
     Borra una categoría.
     """
-    db_categoria = crud.delete_categoria(db, categoria_id=categoria_id, usuario_id=current_user.id)
+    db_categoria = await crud_async.delete_categoria(db, categoria_id=categoria_id, usuario_id=current_user.id)
     
     if db_categoria is None:
-        raise HTTPException(status_code=404, detail="Categoría no encontrada")
+        await _no_encontrado(db, request, current_user.id, "categorias", categoria_id, "Categoría no encontrada")
     
     if db_categoria == "EN_USO":
         # Error 400 (Bad Request) porque el usuario intentó algo inválido
-        raise HTTPException(status_code=400, detail="No se puede borrar la categoría porque tiene transacciones asociadas.")
+        raise HTTPException(
+            status_code=400,
+            detail="No se puede borrar la categoría porque tiene transacciones asociadas. "
+                   "Podés fusionarla con otra (POST /categorias/{id}/merge?into=...)."
+        )
         
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
+@app.post("/categorias/{categoria_id}/merge", response_model=schemas.ResultadoRecategorizacion, tags=["Categorías"])
+async def fusionar_categoria(
+    categoria_id: int,
+    request: Request,
+    destino_id: int = Query(..., alias="into", description="Categoría que recibe las transacciones"),
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
+):
+    """
+    Fusiona una categoría con otra: todas sus transacciones pasan a 'into'
+    (con un solo UPDATE, tenga las que tenga) y la categoría se borra.
+    """
+    movidas = await crud_async.merge_categoria(
+        db, categoria_id=categoria_id, destino_id=destino_id, usuario_id=current_user.id
+    )
+    if movidas == "MISMA":
+        raise HTTPException(status_code=400, detail="Una categoría no se puede fusionar consigo misma")
+    if movidas == "OTRO_TIPO":
+        raise HTTPException(status_code=400, detail="Solo se puede fusionar con una categoría del mismo tipo")
+    if movidas is None:
+        await _no_encontrado(db, request, current_user.id, "categorias", categoria_id, "Categoría no encontrada")
+    return {"categoria_id": destino_id, "transacciones": movidas}
+
 # --- Endpoints de Transacciones ---
 
 @app.post("/transacciones/", response_model=schemas.Transaccion, tags=["Transacciones"])
-def crear_transaccion(
+async def crear_transaccion(
     transaccion: schemas.TransaccionCreate,
-    db: Session = Depends(database.get_db),
-    current_user: models.Usuario = Depends(auth.get_current_user)
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
 ):
     """
     Crea una nueva transacción (gasto o ingreso) para el usuario logueado.
     """
-    db_transaccion = crud.create_user_transaccion(db=db, transaccion=transaccion, usuario_id=current_user.id)
+    db_transaccion = await crud_async.create_user_transaccion(db=db, transaccion=transaccion, usuario_id=current_user.id)
     if db_transaccion is None:
         raise HTTPException(status_code=404, detail="Categoría no encontrada o no pertenece al usuario")
     return db_transaccion
 
-@app.get("/transacciones/", response_model=List[schemas.Transaccion], tags=["Transacciones"])
-def leer_transacciones_usuario(
+@app.post("/transacciones/bulk", response_model=schemas.ResultadoBulk, tags=["Transacciones"])
+async def crear_transacciones_bulk(
+    transacciones: List[schemas.TransaccionCreate] = Body(..., max_length=config.BULK_MAX_ITEMS),
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
+):
+    """
+    Crea muchas transacciones en un solo pedido (por ejemplo, un mes de
+    movimientos del banco). Los ítems válidos se guardan en una sola
+    transacción; los que fallan se informan en 'errores' con su posición.
+    """
+    ids, errores = await crud_async.create_user_transacciones_bulk(db, transacciones=transacciones, usuario_id=current_user.id)
+    return {
+        "creadas": sum(1 for i in ids if i is not None),
+        "ids": ids,
+        "errores": errores,
+    }
+
+@app.post("/transacciones/recategorizar", response_model=schemas.ResultadoRecategorizacion, tags=["Transacciones"])
+async def recategorizar_transacciones(
+    filtro: schemas.Recategorizacion,
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
+):
+    """
+    Cambia de categoría todas las transacciones que cumplen los filtros
+    (fechas [desde, hasta), palabras de la descripción, categoría de
+    origen y tipo) con un solo UPDATE.
+    """
+    if filtro.desde is not None and filtro.hasta is not None and filtro.desde >= filtro.hasta:
+        raise HTTPException(status_code=400, detail="'desde' debe ser anterior a 'hasta'")
+    try:
+        movidas = await crud_async.recategorizar_transacciones(
+            db, usuario_id=current_user.id, **filtro.model_dump()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if movidas is None:
+        raise HTTPException(status_code=404, detail="Categoría no encontrada o no pertenece al usuario")
+    return {"categoria_id": filtro.categoria_id, "transacciones": movidas}
+
+@app.post("/transacciones/importar", tags=["Transacciones"])
+async def importar_transacciones(
+    archivo: UploadFile = File(..., description="Resumen bancario en CSV u OFX"),
+    formato: Optional[str] = Query(None, description="csv u ofx; por defecto según la extensión"),
+    crear_categorias: bool = Query(True, description="Crear las categorías que no existan"),
+    categoria_por_defecto: str = Query("Sin categoría", description="Categoría de las filas que no traen una"),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
+):
+    """
+    Importa un resumen bancario completo en streaming, por lotes. La
+    respuesta es NDJSON: una línea de progreso por lote guardado y una
+    línea final con el resumen (importadas, duplicadas y filas rechazadas).
+    """
+    formato = formato or importacion.detectar_formato(archivo.filename)
+    if formato not in importacion.FORMATOS:
+        raise HTTPException(status_code=400, detail="Formato no soportado: usá un archivo .csv u .ofx")
+    eventos = importacion.importar_ndjson(
+        archivo.file, formato, current_user.id,
+        crear_categorias=crear_categorias,
+        categoria_por_defecto=categoria_por_defecto,
+    )
+    return StreamingResponse(eventos, media_type="application/x-ndjson")
+
+@app.get("/transacciones/export", tags=["Transacciones"])
+async def exportar_transacciones(
+    formato: str = Query("csv", alias="format", pattern="^(csv|ndjson|parquet)$"),
+    desde: Optional[date] = Query(None, alias="from", description="Fecha inicial (inclusive). Por defecto, desde la primera"),
+    hasta: Optional[date] = Query(None, alias="to", description="Fecha final (exclusive). Por defecto, hasta la última"),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
+):
+    """
+    Descarga todas las transacciones del usuario en el rango [from, to),
+    de la más vieja a la más nueva, en streaming y con memoria constante.
+    """
+    if desde is not None and hasta is not None and desde >= hasta:
+        raise HTTPException(status_code=400, detail="'from' debe ser anterior a 'to'")
+    if formato == "parquet" and not exportacion.parquet_disponible():
+        raise HTTPException(status_code=501, detail="La exportación a Parquet requiere pyarrow en el servidor")
+
+    tipo_contenido, extension = exportacion.FORMATOS[formato]
+    return StreamingResponse(
+        exportacion.exportar(formato, current_user.id, desde, hasta),
+        media_type=tipo_contenido,
+        headers={"Content-Disposition": f'attachment; filename="transacciones.{extension}"'},
+    )
+
+@app.get("/transacciones/search", response_model=List[schemas.Transaccion], tags=["Transacciones"],
+         dependencies=[Depends(etag_de_datos())])
+async def buscar_transacciones(
+    q: str = Query(..., min_length=1, description="Palabras a buscar en la descripción (también como prefijo)"),
+    desde: Optional[date] = Query(None, alias="from", description="Fecha inicial (inclusive)"),
+    hasta: Optional[date] = Query(None, alias="to", description="Fecha final (exclusive)"),
+    categoria_id: Optional[int] = None,
+    tipo: Optional[str] = Query(None, pattern="^(ingreso|gasto)$"),
+    monto_min: Optional[Decimal] = None,
+    monto_max: Optional[Decimal] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
+):
+    """
+    Busca en las descripciones de las transacciones del usuario, de la más
+    relevante a la menos relevante. Se puede combinar con filtros de fecha,
+    categoría, tipo y monto.
+    """
+    try:
+        return await crud_async.buscar_transacciones(
+            db, usuario_id=current_user.id, q=q, desde=desde, hasta=hasta,
+            categoria_id=categoria_id, tipo=tipo, monto_min=monto_min, monto_max=monto_max,
+            skip=skip, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/transacciones/", response_model=List[schemas.Transaccion], tags=["Transacciones"],
+         dependencies=[Depends(etag_de_datos())])
+async def leer_transacciones_usuario(
+    response: Response,
     skip: int = 0, limit: int = 100,
-    db: Session = Depends(database.get_db),
-    current_user: models.Usuario = Depends(auth.get_current_user)
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor de la página anterior"),
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
 ):
     """
     Obtiene la lista de transacciones del usuario logueado, ordenadas por fecha.
+    Si hay más páginas, el header X-Next-Cursor trae el cursor para pedir la siguiente.
     """
-    transacciones = crud.get_transacciones(db, usuario_id=current_user.id, skip=skip, limit=limit)
-    return transacciones
+    try:
+        transacciones = await crud_async.get_transacciones_json(db, usuario_id=current_user.id, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if transacciones and len(transacciones) == limit:
+        ultima = transacciones[-1]
+        response.headers["X-Next-Cursor"] = crud.codificar_cursor(ultima["fecha"], ultima["id"])
+    # Los dicts ya tienen la forma de schemas.Transaccion: sin revalidar
+    return ORJSONResponse(transacciones, headers=response.headers)
 
 @app.put("/transacciones/{transaccion_id}", response_model=schemas.Transaccion, tags=["Transacciones"])
-def actualizar_transaccion(
+async def actualizar_transaccion(
     transaccion_id: int,
     transaccion: schemas.TransaccionCreate,
-    db: Session = Depends(database.get_db),
-    current_user: models.Usuario = Depends(auth.get_current_user)
+    request: Request,
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
 ):
     """
     Actualiza una transacción existente (RF-006).
     """
-    db_transaccion = crud.update_transaccion(
+    db_transaccion = await crud_async.update_transaccion(
         db, 
         transaccion_id=transaccion_id, 
         transaccion=transaccion, 
         usuario_id=current_user.id
     )
     if db_transaccion is None:
-        raise HTTPException(status_code=404, detail="Transacción no encontrada o no pertenece al usuario")
+        await _no_encontrado(db, request, current_user.id, "transacciones", transaccion_id,
+                             "Transacción no encontrada o no pertenece al usuario")
     return db_transaccion
 
 
 @app.delete("/transacciones/{transaccion_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Transacciones"])
-def eliminar_transaccion(
+async def eliminar_transaccion(
     transaccion_id: int,
-    db: Session = Depends(database.get_db),
-    current_user: models.Usuario = Depends(auth.get_current_user)
+    request: Request,
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
 ):
     """
     Borra una transacción (RF-007).
     """
-    db_transaccion = crud.delete_transaccion(db, transaccion_id=transaccion_id, usuario_id=current_user.id)
+    db_transaccion = await crud_async.delete_transaccion(db, transaccion_id=transaccion_id, usuario_id=current_user.id)
     if db_transaccion is None:
-        raise HTTPException(status_code=404, detail="Transacción no encontrada o no pertenece al usuario")
+        await _no_encontrado(db, request, current_user.id, "transacciones", transaccion_id,
+                             "Transacción no encontrada o no pertenece al usuario")
 
     # HTTP 204 significa "OK, lo borré, no devuelvo contenido"
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 # --- Endpoint de Dashboard ---
-@app.get("/dashboard/summary", response_model=schemas.DashboardSummary, tags=["Dashboard"])
-def get_summary(
-    db: Session = Depends(database.get_db),
-    current_user: models.Usuario = Depends(auth.get_current_user)
+@app.get("/dashboard/summary", response_model=schemas.DashboardSummary, tags=["Dashboard"],
+         dependencies=[Depends(etag_de_datos(por_dia=True))])
+async def get_summary(
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
 ):
     """
     Obtiene el resumen del dashboard para el mes actual (RF-010, RF-011).
+    Sale de cache_dashboard mientras el usuario no cambie sus transacciones.
     """
-    return crud.get_dashboard_summary(db=db, usuario_id=current_user.id)
\ No newline at end of file
+    hoy = datetime.utcnow()
+    return await cache_dashboard.cache.obtener(
+        current_user.id, (hoy.year, hoy.month),
+        lambda: crud_async.get_dashboard_summary(db=db, usuario_id=current_user.id, anio=hoy.year, mes=hoy.month)
+    )
+
+@app.get("/dashboard/series", response_model=schemas.DashboardSeries, tags=["Dashboard"],
+         dependencies=[Depends(etag_de_datos(por_dia=True))])
+async def get_series(
+    desde: Optional[date] = Query(None, alias="from", description="Fecha inicial (inclusive). Por defecto, 11 meses antes del mes actual"),
+    hasta: Optional[date] = Query(None, alias="to", description="Fecha final (exclusive). Por defecto, el primer día del mes siguiente"),
+    granularidad: str = Query("month", alias="granularity", pattern="^(day|week|month)$"),
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
+):
+    """
+    Obtiene ingresos, gastos, balance y gastos por categoría para cada
+    día/semana/mes del rango [from, to).
+    """
+    if hasta is None:
+        hoy = datetime.utcnow().date()
+        hasta = (hoy.replace(day=28) + timedelta(days=4)).replace(day=1)
+    if desde is None:
+        desde = hasta
+        for _ in range(12):
+            desde = (desde - timedelta(days=1)).replace(day=1)
+    if desde >= hasta:
+        raise HTTPException(status_code=400, detail="'from' debe ser anterior a 'to'")
+
+    return await crud_async.get_dashboard_series(
+        db=db, usuario_id=current_user.id, desde=desde, hasta=hasta, granularidad=granularidad
+    )
+
+@app.post("/dashboard/stream/ticket", response_model=schemas.TicketStream, tags=["Dashboard"])
+async def crear_ticket_stream(current_user: schemas.Usuario = Depends(auth.get_current_user_async)):
+    """
+    Ticket de pocos segundos para abrir GET /dashboard/stream?ticket= desde
+    EventSource, que no puede mandar el header Authorization. Solo sirve
+    para esa ruta: así el token de acceso no viaja en la URL.
+    """
+    ticket, segundos = auth.create_stream_ticket(current_user)
+    return {"ticket": ticket, "expires_in": segundos}
+
+@app.get("/dashboard/stream", tags=["Dashboard"], response_class=StreamingResponse)
+async def stream_dashboard(
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_stream)
+):
+    """
+    Server-Sent Events con los cambios del dashboard del mes actual: un
+    evento "resumen" al conectarse y un evento "cambios" (solo lo que
+    cambió) cada vez que el usuario confirma altas, ediciones o bajas.
+    El token de acceso va en el header Authorization; desde EventSource,
+    un ticket de POST /dashboard/stream/ticket en ?ticket=.
+    """
+    if not notificaciones.hay_lugar():
+        raise HTTPException(status_code=503, detail="Demasiadas conexiones abiertas, probá más tarde")
+    # La conexión puede quedar abierta horas: no retiene la sesión del request
+    await database.liberar(db)
+    usuario_id = current_user.id
+
+    async def calcular_resumen(periodo):
+        async with database.abrir_sesion() as sesion:
+            await shards.enrutar(sesion, usuario_id)
+            return await cache_dashboard.cache.obtener(
+                usuario_id, periodo,
+                lambda: crud_async.get_dashboard_summary(db=sesion, usuario_id=usuario_id, anio=periodo[0], mes=periodo[1])
+            )
+
+    return StreamingResponse(
+        notificaciones.stream_dashboard(usuario_id, calcular_resumen),
+        media_type="text/event-stream",
+        # Sin buffering en proxies (nginx) ni caches intermedias
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# --- Endpoints de Analítica ---
+# Salen del historial del usuario cargado una vez en columnas de NumPy
+# (analitica.py); las cuentas corren en el threadpool.
+
+@app.get("/analytics/tendencias", response_model=schemas.AnaliticaTendencias, tags=["Analítica"],
+         dependencies=[Depends(etag_de_datos(por_dia=True))])
+async def analitica_tendencias(
+    meses: int = Query(12, ge=1, le=240, description="Meses a mostrar, terminando en el actual"),
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
+):
+    """
+    Ingresos, gastos y balance por mes, con promedios móviles de 3, 6 y 12
+    meses y la tendencia (pendiente por mes) de ingresos y gastos.
+    """
+    libro = await analitica.libro_de(db, current_user.id)
+    return await run_in_threadpool(analitica.tendencias, libro, meses, datetime.utcnow().date())
+
+@app.get("/analytics/categorias", response_model=schemas.AnaliticaCategorias, tags=["Analítica"],
+         dependencies=[Depends(etag_de_datos(por_dia=True))])
+async def analitica_categorias(
+    meses: int = Query(6, ge=1, le=120, description="Meses a mostrar, terminando en el actual"),
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
+):
+    """Gastos de cada categoría por mes y su variación contra el mes anterior."""
+    libro = await analitica.libro_de(db, current_user.id)
+    return await run_in_threadpool(analitica.categorias, libro, meses, datetime.utcnow().date())
+
+@app.get("/analytics/anomalias", response_model=schemas.AnaliticaAnomalias, tags=["Analítica"],
+         dependencies=[Depends(etag_de_datos(por_dia=True))])
+async def analitica_anomalias(
+    meses: int = Query(3, ge=1, le=120, description="Meses en que se buscan anomalías, terminando en el actual"),
+    umbral: float = Query(3.0, gt=0, description="Desvíos por encima de lo habitual a partir de los cuales se marca"),
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
+):
+    """
+    Meses en que una categoría gastó mucho más que en sus 12 meses
+    anteriores y gastos muy por encima de los habituales de su categoría.
+    """
+    libro = await analitica.libro_de(db, current_user.id)
+    return await run_in_threadpool(analitica.anomalias, libro, meses, umbral, datetime.utcnow().date())
+
+@app.get("/analytics/proyeccion", response_model=schemas.AnaliticaProyeccion, tags=["Analítica"],
+         dependencies=[Depends(etag_de_datos(por_dia=True))])
+async def analitica_proyeccion(
+    db: database.SesionDB = Depends(database.get_sesion),
+    current_user: schemas.Usuario = Depends(auth.get_current_user_async)
+):
+    """Ingresos, gastos y balance del mes actual hasta hoy y proyectados a fin de mes."""
+    libro = await analitica.libro_de(db, current_user.id)
+    return await run_in_threadpool(analitica.proyeccion, libro, datetime.utcnow().date())
+
+# --- Métricas ---
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False,
+         dependencies=[Depends(metricas.autorizar)])
+def exponer_metricas():
+    """Latencias por ruta, SQL por request, executor de Argon2 y cache de usuarios (formato Prometheus)."""
+    return PlainTextResponse(metricas.exponer(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,265 @@
+# En app/metricas.py
+"""
+Métricas de rendimiento por request, expuestas en GET /metrics en el
+formato de texto de Prometheus.
+
+- MiddlewareMetricas mide cada request (incluido el cuerpo de las
+  respuestas en streaming) y lo etiqueta con el template de la ruta
+  ("/transacciones/{transaccion_id}"), no con la URL, para que la
+  cantidad de series no crezca con los ids.
+- Los eventos before/after_cursor_execute de SQLAlchemy cuentan las
+  sentencias SQL y el tiempo en la base de cada request (sirven para
+  cualquier Engine: el sync, el async y los de las sesiones propias de
+  importación/exportación). Las más lentas que SLOW_QUERY_MS se loguean.
+
+Implementación propia y mínima (sin prometheus_client): contadores e
+histogramas en memoria del proceso, protegidos con un lock. Con varios
+workers de uvicorn cada uno expone los suyos.
+
+GET /metrics no es público: ver autorizar().
+"""
+import ipaddress
+import logging
+import secrets
+import threading
+import time
+from contextvars import ContextVar
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from . import agrupador, analitica, auth, cache_dashboard, config, notificaciones
+
+log = logging.getLogger(__name__)
+
+BUCKETS_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_SENTENCIAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# --- Contadores e histogramas ---
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _etiquetas(nombres, valores):
+    if not nombres:
+        return ""
+    return "{" + ",".join(f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)) + "}"
+
+class Contador:
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre, self.ayuda, self.etiquetas = nombre, ayuda, tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *valores, cantidad=1):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def exponer(self):
+        with self._lock:
+            valores = dict(self._valores)
+        if not self.etiquetas and not valores:
+            valores[()] = 0 # Sin etiquetas la serie existe desde el arranque
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} counter"]
+        lineas += [f"{self.nombre}{_etiquetas(self.etiquetas, k)} {v}" for k, v in sorted(valores.items())]
+        return lineas
+
+class Histograma:
+    def __init__(self, nombre, ayuda, buckets, etiquetas=()):
+        self.nombre, self.ayuda, self.etiquetas = nombre, ayuda, tuple(etiquetas)
+        self.buckets = tuple(buckets)
+        self._series = {} # etiquetas -> [cuentas por bucket..., suma, cantidad]
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *valores):
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [0] * len(self.buckets) + [0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[i] += 1
+                    break
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def exponer(self):
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        for valores, serie in sorted(series.items()):
+            acumulado = 0
+            for limite, cuenta in zip(self.buckets, serie):
+                acumulado += cuenta
+                lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas + ('le',), valores + (limite,))} {acumulado}")
+            lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas + ('le',), valores + ('+Inf',))} {serie[-1]}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {serie[-2]}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {serie[-1]}")
+        return lineas
+
+requests_total = Contador(
+    "gastos_http_requests_total", "Requests atendidos.", ("method", "route", "status"))
+duracion_request = Histograma(
+    "gastos_http_request_duration_seconds", "Duración de cada request, cuerpo incluido.",
+    BUCKETS_SEGUNDOS, ("method", "route"))
+sentencias_request = Histograma(
+    "gastos_http_request_sql_statements", "Sentencias SQL ejecutadas por request.",
+    BUCKETS_SENTENCIAS, ("method", "route"))
+tiempo_db_request = Histograma(
+    "gastos_http_request_db_seconds", "Tiempo total en la base por request.",
+    BUCKETS_SEGUNDOS, ("method", "route"))
+duracion_sentencia = Histograma(
+    "gastos_db_statement_duration_seconds", "Duración de cada sentencia SQL (dentro o fuera de un request).",
+    BUCKETS_SEGUNDOS)
+consultas_lentas = Contador(
+    "gastos_db_slow_queries_total", "Sentencias SQL más lentas que SLOW_QUERY_MS.")
+
+# --- Sentencias SQL por request ---
+
+class ConsultasRequest:
+    """Acumulador del request en curso; lo comparten los hilos del threadpool."""
+    __slots__ = ("sentencias", "segundos", "scope")
+
+    def __init__(self, scope):
+        self.sentencias = 0
+        self.segundos = 0.0
+        self.scope = scope
+
+# Starlette copia el contexto al threadpool: el objeto es el mismo y los
+# incrementos de crud.py (sync) y de run_sync (async) llegan al request
+_request_actual: ContextVar = ContextVar("request_actual", default=None)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("inicios_sentencia", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    duracion = time.perf_counter() - conn.info["inicios_sentencia"].pop()
+    duracion_sentencia.observar(duracion)
+    actual = _request_actual.get()
+    if actual is not None:
+        actual.sentencias += 1
+        actual.segundos += duracion
+    if config.SLOW_QUERY_MS and duracion * 1000 > config.SLOW_QUERY_MS:
+        consultas_lentas.inc()
+        # Los parámetros no se loguean: pueden traer hashes o datos del usuario
+        log.warning("Consulta lenta", extra={
+            "duracion_ms": round(duracion * 1000, 1),
+            "sentencia": " ".join(statement.split())[:1000],
+            "executemany": executemany,
+            "ruta": _nombre_ruta(actual.scope) if actual is not None else None,
+        })
+
+@event.listens_for(Engine, "handle_error")
+def _error_al_ejecutar(contexto):
+    # Si la sentencia falló no hay after_cursor_execute: sacamos su inicio
+    conn = contexto.connection
+    if conn is not None and conn.info.get("inicios_sentencia"):
+        conn.info["inicios_sentencia"].pop()
+
+# --- Middleware ---
+
+class MiddlewareMetricas:
+    """Middleware ASGI puro (no BaseHTTPMiddleware, que corta el streaming)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        consultas = ConsultasRequest(scope)
+        token = _request_actual.set(consultas)
+        estado = 500
+        inicio = time.perf_counter()
+
+        async def send_con_estado(mensaje):
+            nonlocal estado
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, send_con_estado)
+        finally:
+            duracion = time.perf_counter() - inicio
+            _request_actual.reset(token)
+            metodo, ruta = scope["method"], _nombre_ruta(scope)
+            requests_total.inc(metodo, ruta, str(estado))
+            duracion_request.observar(duracion, metodo, ruta)
+            sentencias_request.observar(consultas.sentencias, metodo, ruta)
+            tiempo_db_request.observar(consultas.segundos, metodo, ruta)
+            log.debug("Request", extra={
+                "method": metodo, "ruta": ruta, "status": estado,
+                "duracion_ms": round(duracion * 1000, 1),
+                "sentencias_sql": consultas.sentencias,
+                "db_ms": round(consultas.segundos * 1000, 1),
+            })
+
+def _nombre_ruta(scope):
+    # FastAPI deja la ruta que matcheó en el scope; sin ruta (404) se agrupa todo
+    ruta = scope.get("route")
+    return getattr(ruta, "path", None) or "sin_ruta"
+
+# --- Exposición ---
+
+def _gauges(prefijo, ayuda, valores, contadores=()):
+    lineas = []
+    for clave, valor in valores.items():
+        tipo = "counter" if clave in contadores else "gauge"
+        nombre = f"{prefijo}_{clave}" + ("_total" if tipo == "counter" else "")
+        lineas += [f"# HELP {nombre} {ayuda} ({clave}).", f"# TYPE {nombre} {tipo}", f"{nombre} {valor}"]
+    return lineas
+
+def _es_local(host) -> bool:
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except (TypeError, ValueError):
+        return False
+
+def autorizar(request: Request):
+    """
+    Dependencia de GET /metrics: con METRICAS_TOKEN exige ese Bearer; sin
+    él, solo atiende pedidos locales (detrás de un proxy, uvicorn con
+    --proxy-headers pone como cliente la IP original, no la del proxy).
+    """
+    if not config.METRICAS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if config.METRICAS_TOKEN:
+        esquema, _, token = request.headers.get("authorization", "").partition(" ")
+        if esquema.lower() != "bearer" or not secrets.compare_digest(
+            token.encode("utf-8", "replace"), config.METRICAS_TOKEN.encode()
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token de métricas inválido",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+    elif not _es_local(request.client.host if request.client else None):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Las métricas solo se sirven a pedidos locales (o definí METRICAS_TOKEN)",
+        )
+
+def exponer():
+    """Texto para GET /metrics (formato de exposición 0.0.4 de Prometheus)."""
+    lineas = []
+    for metrica in (requests_total, duracion_request, sentencias_request, tiempo_db_request,
+                    duracion_sentencia, consultas_lentas):
+        lineas += metrica.exponer()
+    lineas += _gauges("gastos_hash", "Executor de Argon2", auth.estadisticas_hash(),
+                      contadores=("completadas", "rechazadas"))
+    lineas += _gauges("gastos_cache_usuarios", "Cache de usuarios autenticados", auth.cache_usuarios.estadisticas(),
+                      contadores=("hits", "misses", "invalidaciones"))
+    lineas += _gauges("gastos_cache_dashboard", "Cache del resumen del dashboard", cache_dashboard.cache.estadisticas(),
+                      contadores=("hits", "misses", "esperas", "invalidaciones", "errores"))
+    lineas += _gauges("gastos_group_commit", "Group commit de escrituras", agrupador.agrupador.estadisticas(),
+                      contadores=("lotes", "escrituras", "fallidas"))
+    lineas += _gauges("gastos_dashboard_stream", "Dashboard en vivo (SSE)", notificaciones.broker.estadisticas(),
+                      contadores=("publicados", "entregados", "errores"))
+    lineas += _gauges("gastos_analitica", "Historiales en memoria de la analítica", analitica.cache.estadisticas(),
+                      contadores=("hits", "cargas"))
+    return "\n".join(lineas) + "\n"
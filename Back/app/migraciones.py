@@ -0,0 +1,380 @@
+"""
+Migraciones del esquema de la base de datos.
+
+Cada migración tiene un número de versión, una descripción y una función
+que recibe una conexión abierta dentro de una transacción. Las versiones
+aplicadas se guardan en la tabla 'migraciones', así que cada una corre
+una sola vez por base. Para cambiar el esquema, agregá una migración
+nueva al final de MIGRACIONES (nunca edites una que ya se aplicó).
+
+Uso (desde la carpeta Back):
+    python -m app.comandos migrar
+"""
+import datetime
+from decimal import Decimal, ROUND_HALF_UP
+
+from sqlalchemy import Table, Column, Integer, String, DateTime, MetaData, select, inspect, text
+
+
+# Tabla de control (fuera de Base: no es un modelo de la aplicación)
+_metadata = MetaData()
+migraciones_aplicadas = Table(
+    "migraciones", _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("descripcion", String, nullable=False),
+    Column("aplicada_en", DateTime, nullable=False),
+)
+
+
+# Cada migración es SQL contra el esquema tal como estaba en su versión:
+# no usa models.py ni crud.py, que siguen al esquema actual.
+
+def _tipos(conn):
+    """Lo que cambia entre SQLite y PostgreSQL en los CREATE TABLE."""
+    if conn.dialect.name == "sqlite":
+        return {"pk": "INTEGER NOT NULL", "fecha": "DATETIME"}
+    return {"pk": "SERIAL", "fecha": "TIMESTAMP WITHOUT TIME ZONE"}
+
+
+def _ejecutar(conn, sentencias):
+    for sentencia in sentencias:
+        conn.exec_driver_sql(sentencia)
+
+
+def _columnas(conn, nombre_tabla: str):
+    return {c["name"] for c in inspect(conn).get_columns(nombre_tabla)}
+
+
+def _anio_mes(conn):
+    if conn.dialect.name == "sqlite":
+        return "CAST(strftime('%Y', fecha) AS INTEGER)", "CAST(strftime('%m', fecha) AS INTEGER)"
+    return "CAST(EXTRACT(YEAR FROM fecha) AS INTEGER)", "CAST(EXTRACT(MONTH FROM fecha) AS INTEGER)"
+
+
+# --- Migraciones ---
+
+def _esquema_inicial(conn):
+    """
+    Las tablas de la versión anterior a las migraciones (bases nuevas; en
+    las que ya las tenían no cambia nada) y resumenes_mensuales.
+    """
+    t = _tipos(conn)
+    _ejecutar(conn, [
+        f"""
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id {t["pk"]},
+            email VARCHAR NOT NULL,
+            nombre VARCHAR,
+            hashed_password VARCHAR NOT NULL,
+            PRIMARY KEY (id)
+        )
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_usuarios_email ON usuarios (email)",
+        "CREATE INDEX IF NOT EXISTS ix_usuarios_id ON usuarios (id)",
+        f"""
+        CREATE TABLE IF NOT EXISTS categorias (
+            id {t["pk"]},
+            nombre VARCHAR NOT NULL,
+            tipo VARCHAR NOT NULL,
+            usuario_id INTEGER,
+            PRIMARY KEY (id),
+            FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_categorias_nombre ON categorias (nombre)",
+        "CREATE INDEX IF NOT EXISTS ix_categorias_id ON categorias (id)",
+        f"""
+        CREATE TABLE IF NOT EXISTS transacciones (
+            id {t["pk"]},
+            monto FLOAT NOT NULL,
+            fecha {t["fecha"]},
+            descripcion VARCHAR,
+            tipo VARCHAR NOT NULL,
+            categoria_id INTEGER,
+            usuario_id INTEGER,
+            PRIMARY KEY (id),
+            FOREIGN KEY (categoria_id) REFERENCES categorias (id),
+            FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_transacciones_id ON transacciones (id)",
+        "CREATE INDEX IF NOT EXISTS ix_transacciones_descripcion ON transacciones (descripcion)",
+        f"""
+        CREATE TABLE IF NOT EXISTS resumenes_mensuales (
+            id {t["pk"]},
+            usuario_id INTEGER NOT NULL,
+            anio INTEGER NOT NULL,
+            mes INTEGER NOT NULL,
+            categoria_id INTEGER,
+            tipo VARCHAR NOT NULL,
+            total FLOAT NOT NULL,
+            cantidad INTEGER NOT NULL,
+            PRIMARY KEY (id),
+            CONSTRAINT uq_resumen_mensual UNIQUE (usuario_id, anio, mes, categoria_id, tipo),
+            FOREIGN KEY (usuario_id) REFERENCES usuarios (id),
+            FOREIGN KEY (categoria_id) REFERENCES categorias (id)
+        )
+        """,
+    ])
+
+
+def _completar_resumenes(conn):
+    """Llena resumenes_mensuales (todavía con 'total' en float) para bases que ya tenían transacciones."""
+    anio, mes = _anio_mes(conn)
+    conn.exec_driver_sql("DELETE FROM resumenes_mensuales")
+    conn.exec_driver_sql(f"""
+        INSERT INTO resumenes_mensuales (usuario_id, anio, mes, categoria_id, tipo, total, cantidad)
+        SELECT usuario_id, {anio}, {mes}, categoria_id, tipo, SUM(monto), COUNT(id)
+        FROM transacciones
+        WHERE usuario_id IS NOT NULL
+        GROUP BY usuario_id, {anio}, {mes}, categoria_id, tipo
+    """)
+
+
+def _indices_de_acceso(conn):
+    """Índices compuestos y funcionales para cada consulta de crud.py."""
+    _ejecutar(conn, [
+        # Listado por cursor (usuario_id, fecha DESC, id DESC) y rangos de fechas
+        "CREATE INDEX IF NOT EXISTS ix_transacciones_usuario_fecha_id ON transacciones (usuario_id, fecha DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS ix_transacciones_usuario_tipo_fecha ON transacciones (usuario_id, tipo, fecha)",
+        "CREATE INDEX IF NOT EXISTS ix_transacciones_categoria ON transacciones (categoria_id)",
+        "CREATE INDEX IF NOT EXISTS ix_categorias_usuario ON categorias (usuario_id)",
+        # El login busca con lower(email) / lower(nombre)
+        "CREATE INDEX IF NOT EXISTS ix_usuarios_email_lower ON usuarios (lower(email))",
+        "CREATE INDEX IF NOT EXISTS ix_usuarios_nombre_lower ON usuarios (lower(nombre))",
+    ])
+
+
+# Índice FTS5 de las descripciones. 'usuario_id' se indexa como un token
+# más, así la búsqueda filtra por usuario dentro del índice de texto.
+# Los triggers lo mantienen al día con cualquier INSERT/UPDATE/DELETE
+# (incluidos los executemany del alta masiva y la importación).
+_SQL_FTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS transacciones_fts USING fts5(
+        descripcion, usuario_id,
+        content='transacciones', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transacciones_fts_ai AFTER INSERT ON transacciones BEGIN
+        INSERT INTO transacciones_fts(rowid, descripcion, usuario_id)
+        VALUES (new.id, new.descripcion, new.usuario_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transacciones_fts_ad AFTER DELETE ON transacciones BEGIN
+        INSERT INTO transacciones_fts(transacciones_fts, rowid, descripcion, usuario_id)
+        VALUES ('delete', old.id, old.descripcion, old.usuario_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transacciones_fts_au AFTER UPDATE OF descripcion, usuario_id ON transacciones BEGIN
+        INSERT INTO transacciones_fts(transacciones_fts, rowid, descripcion, usuario_id)
+        VALUES ('delete', old.id, old.descripcion, old.usuario_id);
+        INSERT INTO transacciones_fts(rowid, descripcion, usuario_id)
+        VALUES (new.id, new.descripcion, new.usuario_id);
+    END
+    """,
+    # Indexa las transacciones que ya existían
+    "INSERT INTO transacciones_fts(transacciones_fts) VALUES ('rebuild')",
+]
+
+
+def _busqueda_de_texto(conn):
+    """Tabla FTS5 y triggers para buscar en las descripciones (solo SQLite)."""
+    if conn.dialect.name != "sqlite":
+        return
+    _ejecutar(conn, _SQL_FTS)
+
+
+def _a_centavos(monto) -> int:
+    # str y no monto * 100: 0.285 * 100 en float es 28.4999..., pero el monto que se cargó era 0.285
+    return int(Decimal(str(monto)).scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def _tabla_resumenes_en_centavos(conn, unico: str):
+    """resumenes_mensuales con total_centavos; 'unico' es el UNIQUE de esa versión."""
+    conn.exec_driver_sql(f"""
+        CREATE TABLE resumenes_mensuales (
+            id {_tipos(conn)["pk"]},
+            usuario_id INTEGER NOT NULL,
+            anio INTEGER NOT NULL,
+            mes INTEGER NOT NULL,
+            categoria_id INTEGER,
+            tipo VARCHAR NOT NULL,
+            total_centavos BIGINT NOT NULL,
+            cantidad INTEGER NOT NULL,
+            PRIMARY KEY (id),
+            {unico}
+            FOREIGN KEY (usuario_id) REFERENCES usuarios (id),
+            FOREIGN KEY (categoria_id) REFERENCES categorias (id)
+        )
+    """)
+
+
+def _montos_en_centavos(conn):
+    """
+    Pasa transacciones.monto (Float) a monto_centavos (BIGINT), agrega
+    usuarios.moneda y rehace resumenes_mensuales en centavos.
+    """
+    if "moneda" not in _columnas(conn, "usuarios"):
+        conn.exec_driver_sql("ALTER TABLE usuarios ADD COLUMN moneda VARCHAR(3) NOT NULL DEFAULT 'ARS'")
+
+    if "monto" in _columnas(conn, "transacciones"):
+        # SQLite no permite agregar una columna NOT NULL sin valor por defecto
+        conn.exec_driver_sql("ALTER TABLE transacciones ADD COLUMN monto_centavos BIGINT NOT NULL DEFAULT 0")
+        # La conversión se hace en Python (str + Decimal) y no con ROUND(monto * 100)
+        actualizar = text("UPDATE transacciones SET monto_centavos = :centavos WHERE id = :id")
+        ultimo_id = 0
+        while True:
+            filas = conn.execute(text(
+                "SELECT id, monto FROM transacciones WHERE id > :ultimo ORDER BY id LIMIT 10000"
+            ), {"ultimo": ultimo_id}).fetchall()
+            if not filas:
+                break
+            conn.execute(actualizar, [{"id": id_, "centavos": _a_centavos(monto)} for id_, monto in filas])
+            ultimo_id = filas[-1][0]
+        conn.exec_driver_sql("ALTER TABLE transacciones DROP COLUMN monto")
+        if conn.dialect.name != "sqlite":
+            conn.exec_driver_sql("ALTER TABLE transacciones ALTER COLUMN monto_centavos DROP DEFAULT")
+
+    if "total" in _columnas(conn, "resumenes_mensuales"):
+        # Es una tabla derivada: se vuelve a crear y a calcular desde las transacciones
+        conn.exec_driver_sql("DROP TABLE resumenes_mensuales")
+        _tabla_resumenes_en_centavos(conn, "CONSTRAINT uq_resumen_mensual UNIQUE (usuario_id, anio, mes, categoria_id, tipo),")
+        _recalcular_resumenes(conn)
+
+
+def _versiones_de_datos(conn):
+    """Tabla versiones_datos para los ETag de los GET."""
+    conn.exec_driver_sql("""
+        CREATE TABLE IF NOT EXISTS versiones_datos (
+            usuario_id INTEGER NOT NULL,
+            version BIGINT NOT NULL,
+            PRIMARY KEY (usuario_id),
+            FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+        )
+    """)
+
+
+def _refresh_tokens(conn):
+    """Tabla refresh_tokens."""
+    fecha = _tipos(conn)["fecha"]
+    _ejecutar(conn, [
+        f"""
+        CREATE TABLE IF NOT EXISTS refresh_tokens (
+            id {_tipos(conn)["pk"]},
+            usuario_id INTEGER NOT NULL,
+            token_hash VARCHAR(64) NOT NULL,
+            familia VARCHAR(32) NOT NULL,
+            creado_en {fecha} NOT NULL,
+            vence_en {fecha} NOT NULL,
+            revocado_en {fecha},
+            PRIMARY KEY (id),
+            UNIQUE (token_hash),
+            FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_refresh_tokens_usuario_id ON refresh_tokens (usuario_id)",
+        "CREATE INDEX IF NOT EXISTS ix_refresh_tokens_familia ON refresh_tokens (familia)",
+    ])
+
+
+def _shard_por_usuario(conn):
+    """usuarios.shard: los usuarios que ya existían quedan en el shard 0."""
+    if "shard" not in _columnas(conn, "usuarios"):
+        conn.exec_driver_sql("ALTER TABLE usuarios ADD COLUMN shard INTEGER NOT NULL DEFAULT 0")
+
+
+def _recalcular_resumenes(conn):
+    """
+    Vuelve a calcular resumenes_mensuales desde transacciones.monto_centavos.
+    Como migración, arregla las bases que pasaron por versiones anteriores
+    de la 2 y la 5, que podían dejarlas sin resúmenes. Borra y recalcula
+    todo, así que se puede correr de nuevo.
+    """
+    anio, mes = _anio_mes(conn)
+    conn.exec_driver_sql("DELETE FROM resumenes_mensuales")
+    conn.exec_driver_sql(f"""
+        INSERT INTO resumenes_mensuales (usuario_id, anio, mes, categoria_id, tipo, total_centavos, cantidad)
+        SELECT usuario_id, {anio}, {mes}, categoria_id, tipo, SUM(monto_centavos), COUNT(id)
+        FROM transacciones
+        WHERE usuario_id IS NOT NULL
+        GROUP BY usuario_id, {anio}, {mes}, categoria_id, tipo
+    """)
+
+
+def _resumenes_sin_categoria_unicos(conn):
+    """
+    Cambia el UNIQUE de resumenes_mensuales por el índice único sobre
+    coalesce(categoria_id, 0): con el anterior, cada alta sin categoría
+    insertaba una fila nueva. SQLite no puede quitar un constraint, así que
+    se recrea la tabla y se recalcula (junta los duplicados).
+    """
+    conn.exec_driver_sql("DROP TABLE resumenes_mensuales")
+    _tabla_resumenes_en_centavos(conn, "")
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX uq_resumen_mensual ON resumenes_mensuales"
+        " (usuario_id, anio, mes, coalesce(categoria_id, 0), tipo)"
+    )
+    _recalcular_resumenes(conn)
+
+
+def _ids_movidos(conn):
+    """Tabla ids_movidos."""
+    conn.exec_driver_sql("""
+        CREATE TABLE IF NOT EXISTS ids_movidos (
+            usuario_id INTEGER NOT NULL,
+            tabla VARCHAR NOT NULL,
+            id_viejo INTEGER NOT NULL,
+            id_nuevo INTEGER NOT NULL,
+            PRIMARY KEY (usuario_id, tabla, id_viejo),
+            FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+        )
+    """)
+
+
+MIGRACIONES = [
+    (1, "Esquema inicial", _esquema_inicial),
+    (2, "Completar resúmenes mensuales", _completar_resumenes),
+    (3, "Índices compuestos y funcionales", _indices_de_acceso),
+    (4, "Búsqueda de texto en descripciones (FTS5)", _busqueda_de_texto),
+    (5, "Montos en centavos (enteros) y moneda por usuario", _montos_en_centavos),
+    (6, "Versión de los datos por usuario (ETag)", _versiones_de_datos),
+    (7, "Refresh tokens", _refresh_tokens),
+    (8, "Shard de cada usuario", _shard_por_usuario),
+    (9, "Recalcular resúmenes mensuales en centavos", _recalcular_resumenes),
+    (10, "Resúmenes únicos también sin categoría", _resumenes_sin_categoria_unicos),
+    (11, "Ids viejos de los usuarios movidos de shard", _ids_movidos),
+]
+
+
+# --- Ejecución ---
+
+def versiones_aplicadas(engine):
+    _metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        return set(conn.execute(select(migraciones_aplicadas.c.version)).scalars())
+
+
+def aplicar(engine):
+    """
+    Aplica en orden las migraciones pendientes, cada una en su propia
+    transacción. Devuelve la lista de versiones aplicadas.
+    """
+    ya_aplicadas = versiones_aplicadas(engine)
+    aplicadas = []
+    for version, descripcion, migracion in MIGRACIONES:
+        if version in ya_aplicadas:
+            continue
+        with engine.begin() as conn:
+            migracion(conn)
+            conn.execute(migraciones_aplicadas.insert().values(
+                version=version,
+                descripcion=descripcion,
+                aplicada_en=datetime.datetime.utcnow()
+            ))
+        aplicadas.append(version)
+    return aplicadas
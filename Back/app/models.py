@@ -1,11 +1,28 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import create_engine, Column, Integer, BigInteger, String, Float, DateTime, ForeignKey, Index
+from sqlalchemy import text, func, table, column
 from sqlalchemy.orm import relationship, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from .database import Base
 from .database import engine
 import datetime
+from decimal import Decimal, ROUND_HALF_UP
 
 
+# --- Montos en centavos ---
+# Los montos se guardan como enteros de 64 bits en la unidad mínima de la
+# moneda (centavos): las sumas son exactas y asociativas, así un total
+# parcial o precalculado coincide siempre con la suma de las filas.
+
+def monto_a_centavos(monto) -> int:
+    """Decimal/float/str -> centavos, redondeando al centavo (mitad hacia arriba)."""
+    if not isinstance(monto, Decimal):
+        monto = Decimal(str(monto)) # str: 0.285 es '0.285', no 0.28499999...
+    return int(monto.scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+def centavos_a_monto(centavos: int) -> Decimal:
+    """Centavos -> Decimal con dos decimales (1250 -> Decimal('12.50'))."""
+    return Decimal(int(centavos or 0)).scaleb(-2)
+
 # --- Modelos SQLAlchemy (Representación de las tablas) ---
 
 class Usuario(Base):
@@ -15,6 +32,8 @@ class Usuario(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     nombre = Column(String)
     hashed_password = Column(String, nullable=False)
+    moneda = Column(String(3), nullable=False, default="ARS", server_default="ARS") # Código ISO 4217
+    shard = Column(Integer, nullable=False, default=0, server_default="0") # Dónde están sus datos (ver app/shards.py)
 
     # Relaciones
     transacciones = relationship("Transaccion", back_populates="propietario")
@@ -22,6 +41,9 @@ class Usuario(Base):
 
 class Categoria(Base):
     __tablename__ = "categorias"
+    __table_args__ = (
+        Index("ix_categorias_usuario", "usuario_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String, index=True, nullable=False)
@@ -33,9 +55,18 @@ class Categoria(Base):
 
 class Transaccion(Base):
     __tablename__ = "transacciones"
+    __table_args__ = (
+        # Listado paginado por cursor: WHERE usuario_id = ? ORDER BY fecha DESC, id DESC
+        # También cubre los rangos (usuario_id, fecha) del dashboard y las series
+        Index("ix_transacciones_usuario_fecha_id", "usuario_id", text("fecha DESC"), text("id DESC")),
+        # Totales por tipo (ingreso/gasto) en un rango de fechas
+        Index("ix_transacciones_usuario_tipo_fecha", "usuario_id", "tipo", "fecha"),
+        # delete_categoria pregunta si la categoría está en uso
+        Index("ix_transacciones_categoria", "categoria_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    monto = Column(Float, nullable=False)
+    monto_centavos = Column(BigInteger, nullable=False)
     fecha = Column(DateTime, default=datetime.datetime.utcnow)
     descripcion = Column(String, index=True)
     tipo = Column(String, nullable=False) # "ingreso" o "gasto"
@@ -46,6 +77,101 @@ class Transaccion(Base):
     # Relaciones
     propietario = relationship("Usuario", back_populates="transacciones")
 
+    # Los schemas (y crud.update_transaccion) trabajan con 'monto' en Decimal
+    @property
+    def monto(self) -> Decimal:
+        return centavos_a_monto(self.monto_centavos)
+
+    @monto.setter
+    def monto(self, valor):
+        self.monto_centavos = monto_a_centavos(valor)
+
+class ResumenMensual(Base):
+    """
+    Tabla de agregados (rollup) por usuario, mes, categoría y tipo.
+    La mantiene crud.py en el mismo commit que cada alta/edición/baja de
+    transacciones, así el dashboard lee unas pocas filas ya sumadas.
+    """
+    __tablename__ = "resumenes_mensuales"
+    __table_args__ = (
+        # coalesce: en un UNIQUE común dos NULL son distintos, y las
+        # transacciones sin categoría sumarían una fila nueva en cada alta
+        Index("uq_resumen_mensual", "usuario_id", "anio", "mes", text("coalesce(categoria_id, 0)"), "tipo", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
+    anio = Column(Integer, nullable=False)
+    mes = Column(Integer, nullable=False)
+    categoria_id = Column(Integer, ForeignKey("categorias.id"))
+    tipo = Column(String, nullable=False) # "ingreso" o "gasto"
+    total_centavos = Column(BigInteger, nullable=False, default=0)
+    cantidad = Column(Integer, nullable=False, default=0)
+
+class VersionDatos(Base):
+    """
+    Contador por usuario que crud.py incrementa en el mismo commit que
+    cualquier cambio en sus categorías o transacciones. Los GET derivan su
+    ETag de este número: si no cambió, responden 304 sin leer el resto.
+    Sin fila, la versión es 0.
+    """
+    __tablename__ = "versiones_datos"
+
+    usuario_id = Column(Integer, ForeignKey("usuarios.id"), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+class IdMovido(Base):
+    """
+    Ids viejos de las categorías y transacciones de un usuario que cambió
+    de shard: cada shard numera sus filas, así que shards.mover_usuario les
+    da ids nuevos en el destino. Las rutas con un id en la URL que no
+    encuentran el recurso buscan acá y responden 308 al id nuevo.
+    """
+    __tablename__ = "ids_movidos"
+
+    usuario_id = Column(Integer, ForeignKey("usuarios.id"), primary_key=True)
+    tabla = Column(String, primary_key=True) # "categorias" o "transacciones"
+    id_viejo = Column(Integer, primary_key=True)
+    id_nuevo = Column(Integer, nullable=False)
+
+class RefreshToken(Base):
+    """
+    Refresh tokens emitidos (solo el SHA-256 del token). Una familia es
+    la cadena de rotaciones que arranca en un login: si aparece un token
+    ya rotado o revocado, se revoca la familia completa.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    familia = Column(String(32), nullable=False, index=True)
+    creado_en = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
+    vence_en = Column(DateTime, nullable=False)
+    revocado_en = Column(DateTime, nullable=True) # Al rotarlo, revocarlo o detectar reuso
+
+# --- Índices funcionales ---
+# El login busca con lower(email) / lower(nombre): sin estos índices es un SCAN de usuarios
+Index("ix_usuarios_email_lower", func.lower(Usuario.email))
+Index("ix_usuarios_nombre_lower", func.lower(Usuario.nombre))
+
+# --- Búsqueda de texto (SQLite FTS5) ---
+# Tabla virtual con el texto de 'transacciones' (external content): no es un
+# modelo del ORM ni la crea create_all, sino la migración 4, junto con los
+# triggers que la mantienen al día. Se declara acá solo para armar consultas.
+transacciones_fts = table(
+    "transacciones_fts",
+    column("rowid", Integer),
+    column("descripcion", String),
+    column("rank"),
+)
+
 # --- Función para crear la base de datos y las tablas ---
 def crear_db():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    """
+    Crea o actualiza el esquema aplicando las migraciones pendientes
+    (ver app/migraciones.py) en la base principal y en cada shard.
+    """
+    from . import migraciones, shards
+    for motor in shards.engines():
+        migraciones.aplicar(motor)
\ No newline at end of file
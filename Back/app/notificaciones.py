@@ -0,0 +1,277 @@
+# En app/notificaciones.py
+"""
+Dashboard en vivo: GET /dashboard/stream (Server-Sent Events).
+
+- Publicación: el mismo after_commit que invalida la cache del dashboard
+  (cache_dashboard.invalidar_al_confirmar) publica acá qué períodos del
+  usuario cambiaron. Así cualquier alta, edición o baja confirmada (también
+  las del group commit, las masivas y las importaciones) llega a las
+  pestañas abiertas de ese usuario, y los rollbacks no avisan nada.
+- Broker: "memoria" reparte a las conexiones del mismo proceso; "redis"
+  (NOTIFICACIONES_BROKER=redis, pip install redis) publica en un canal de
+  pub/sub y cada worker reparte lo que recibe a sus conexiones.
+- Cada conexión es una Suscripcion: un set de períodos pendientes y un
+  asyncio.Event. Una conexión quieta no cuesta más que eso y una tarea
+  dormida (con un ping cada NOTIFICACIONES_PING_SEGUNDOS); los cambios que
+  llegan mientras un cliente no leyó se juntan en uno solo.
+- Cada aviso que toca el mes que muestra el dashboard se manda como un
+  delta del resumen (solo los totales y las categorías que cambiaron),
+  calculado con la cache del dashboard: las pestañas de un mismo usuario
+  comparten un solo cálculo.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+
+from . import config
+
+log = logging.getLogger(__name__)
+
+# --- Suscripciones y brokers ---
+
+class Suscripcion:
+    """Una conexión abierta de un usuario. Se usa desde su event loop."""
+
+    def __init__(self, usuario_id: int, loop: asyncio.AbstractEventLoop):
+        self.usuario_id = usuario_id
+        self.loop = loop
+        self.periodos = set()
+        self.todos = False
+        self._evento = asyncio.Event()
+
+    def marcar(self, periodos):
+        if periodos is None:
+            self.todos = True
+        else:
+            self.periodos.update(periodos)
+        self._evento.set()
+
+    async def esperar(self, timeout: float):
+        """
+        Espera cambios hasta 'timeout' segundos. Devuelve los períodos
+        cambiados desde la última llamada (None si cambió todo), o False si
+        no hubo cambios.
+        """
+        try:
+            await asyncio.wait_for(self._evento.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._evento.clear()
+        periodos = None if self.todos else self.periodos
+        self.periodos, self.todos = set(), False
+        return periodos
+
+
+class BrokerMemoria:
+    """Reparte los cambios entre las conexiones de este proceso."""
+
+    def __init__(self):
+        self._suscripciones = {} # usuario_id -> set de Suscripcion
+        self._lock = threading.Lock()
+        self.conexiones = 0
+        self.publicados = 0
+        self.entregados = 0
+
+    def suscribir(self, usuario_id: int):
+        suscripcion = Suscripcion(usuario_id, asyncio.get_running_loop())
+        with self._lock:
+            self._suscripciones.setdefault(usuario_id, set()).add(suscripcion)
+            self.conexiones += 1
+        return suscripcion
+
+    def desuscribir(self, suscripcion: Suscripcion):
+        with self._lock:
+            suscripciones = self._suscripciones.get(suscripcion.usuario_id)
+            if suscripciones is not None and suscripcion in suscripciones:
+                suscripciones.discard(suscripcion)
+                if not suscripciones:
+                    del self._suscripciones[suscripcion.usuario_id]
+                self.conexiones -= 1
+
+    def publicar(self, usuario_id: int, periodos):
+        self.publicados += 1
+        self.entregar(usuario_id, periodos)
+
+    def entregar(self, usuario_id: int, periodos):
+        """
+        Avisa a las conexiones del usuario en este proceso. Se puede llamar
+        desde cualquier hilo (el after_commit corre en el threadpool en modo
+        sync): la marca se hace en el event loop de cada conexión.
+        """
+        with self._lock:
+            suscripciones = list(self._suscripciones.get(usuario_id, ()))
+        if not suscripciones:
+            return
+        por_loop = {}
+        for suscripcion in suscripciones:
+            por_loop.setdefault(suscripcion.loop, []).append(suscripcion)
+        for loop, lista in por_loop.items():
+            try:
+                loop.call_soon_threadsafe(_marcar_todas, lista, periodos)
+            except RuntimeError:
+                pass # El loop ya se cerró
+        self.entregados += len(suscripciones)
+
+    def estadisticas(self):
+        with self._lock:
+            usuarios = len(self._suscripciones)
+        return {
+            "conexiones": self.conexiones,
+            "usuarios": usuarios,
+            "publicados": self.publicados,
+            "entregados": self.entregados,
+        }
+
+
+def _marcar_todas(suscripciones: list, periodos):
+    for suscripcion in suscripciones:
+        suscripcion.marcar(periodos)
+
+
+class BrokerRedis(BrokerMemoria):
+    """
+    Publica en el canal gastos:dashboard:cambios de Redis. Un hilo por
+    proceso (se arranca con la primera conexión) escucha el canal y reparte
+    a las conexiones locales, incluidas las del worker que publicó. Si Redis
+    no responde, el cambio se entrega solo a las conexiones de este proceso.
+    """
+    CANAL = "gastos:dashboard:cambios"
+
+    def __init__(self, url: str):
+        super().__init__()
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("NOTIFICACIONES_BROKER=redis necesita el paquete redis (pip install redis)")
+        self.cliente = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        # Sin socket_timeout: el listener se queda esperando mensajes
+        self._cliente_listener = redis.Redis.from_url(url, socket_connect_timeout=0.5)
+        self._listener = None
+        self.errores = 0
+
+    def suscribir(self, usuario_id: int):
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    self._listener = threading.Thread(target=self._escuchar, name="notificaciones-redis", daemon=True)
+                    self._listener.start()
+        return super().suscribir(usuario_id)
+
+    def publicar(self, usuario_id: int, periodos):
+        self.publicados += 1
+        mensaje = json.dumps({"usuario_id": usuario_id, "periodos": None if periodos is None else sorted(periodos)})
+        try:
+            self.cliente.publish(self.CANAL, mensaje)
+        except Exception:
+            self._fallo("publicar")
+            self.entregar(usuario_id, periodos)
+
+    def _escuchar(self):
+        while True:
+            try:
+                pubsub = self._cliente_listener.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.CANAL)
+                for mensaje in pubsub.listen():
+                    datos = json.loads(mensaje["data"])
+                    periodos = datos["periodos"]
+                    self.entregar(datos["usuario_id"], None if periodos is None else {tuple(p) for p in periodos})
+            except Exception:
+                self._fallo("escuchar")
+                time.sleep(1)
+
+    def _fallo(self, operacion: str):
+        self.errores += 1
+        log.warning("Error de Redis en las notificaciones del dashboard", exc_info=True, extra={"operacion": operacion})
+
+    def estadisticas(self):
+        return {**super().estadisticas(), "errores": self.errores}
+
+
+def _crear_broker():
+    if config.NOTIFICACIONES_BROKER == "redis":
+        return BrokerRedis(config.REDIS_URL)
+    return BrokerMemoria()
+
+broker = _crear_broker()
+
+def publicar(usuario_id: int, periodos=None):
+    """Avisa que cambiaron los 'periodos' (año, mes) del usuario (todos si es None)."""
+    broker.publicar(usuario_id, periodos)
+
+def hay_lugar():
+    return broker.conexiones < config.NOTIFICACIONES_MAX_CONEXIONES
+
+# --- Stream SSE ---
+
+def _evento(nombre: str, datos: dict):
+    return f"event: {nombre}\ndata: {json.dumps(datos, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+def _periodo_actual():
+    hoy = datetime.utcnow()
+    return (hoy.year, hoy.month)
+
+def _como_dict(resumen):
+    datos = resumen.model_dump(mode="json")
+    datos["gastos_por_categoria"] = {c["name"]: c["value"] for c in datos["gastos_por_categoria"]}
+    return datos
+
+def _diferencia(anterior: dict, actual: dict):
+    """Solo los totales y las categorías que cambiaron entre dos resúmenes."""
+    delta = {
+        campo: actual[campo] for campo in ("total_ingresos", "total_gastos", "balance")
+        if actual[campo] != anterior[campo]
+    }
+    antes, ahora = anterior["gastos_por_categoria"], actual["gastos_por_categoria"]
+    categorias = [{"name": nombre, "value": valor} for nombre, valor in ahora.items() if antes.get(nombre) != valor]
+    borradas = [nombre for nombre in antes if nombre not in ahora]
+    if categorias:
+        delta["categorias"] = categorias
+    if borradas:
+        delta["categorias_borradas"] = borradas
+    return delta
+
+def _resumen_completo(periodo: tuple, datos: dict):
+    gastos = [{"name": nombre, "value": valor} for nombre, valor in datos["gastos_por_categoria"].items()]
+    return {"periodo": "%04d-%02d" % periodo, **datos, "gastos_por_categoria": gastos}
+
+async def stream_dashboard(usuario_id: int, calcular_resumen):
+    """
+    Generador del cuerpo de GET /dashboard/stream. 'calcular_resumen' es
+    una corrutina que recibe el período (año, mes) y devuelve el
+    schemas.DashboardSummary. Se suscribe antes del primer resumen, así no
+    se pierde ningún cambio. Eventos:
+
+    - "resumen": el resumen completo del mes actual, al conectarse y
+      cuando empieza un mes nuevo.
+    - "cambios": {"periodos": ["AAAA-MM", ...] o null si cambió todo} y, si
+      tocaron el mes actual, solo los totales que cambiaron y las
+      categorías nuevas o modificadas ("categorias") o que ya no tienen
+      gastos ("categorias_borradas").
+    """
+    suscripcion = broker.suscribir(usuario_id)
+    try:
+        yield "retry: 5000\n\n"
+        periodo = _periodo_actual()
+        resumen = _como_dict(await calcular_resumen(periodo))
+        yield _evento("resumen", _resumen_completo(periodo, resumen))
+        while True:
+            periodos = await suscripcion.esperar(config.NOTIFICACIONES_PING_SEGUNDOS)
+            if _periodo_actual() != periodo:
+                periodo = _periodo_actual()
+                resumen = _como_dict(await calcular_resumen(periodo))
+                yield _evento("resumen", _resumen_completo(periodo, resumen))
+                continue
+            if periodos is False:
+                yield ": ping\n\n"
+                continue
+            cambios = {"periodos": None if periodos is None else ["%04d-%02d" % p for p in sorted(periodos)]}
+            if periodos is None or periodo in periodos:
+                nuevo = _como_dict(await calcular_resumen(periodo))
+                cambios.update(_diferencia(resumen, nuevo))
+                resumen = nuevo
+            yield _evento("cambios", cambios)
+    finally:
+        broker.desuscribir(suscripcion)
@@ -0,0 +1,76 @@
+# En app/registro.py
+"""
+Logs de la app con niveles y campos estructurados.
+
+Todos los módulos usan logging.getLogger(__name__), que cuelga del logger
+"app": configurar() le pone un único handler a stdout, en formato JSON (un
+objeto por línea, fácil de filtrar en producción) o texto. Los campos
+extra van en extra={...}:
+
+    log.info("Login fallido", extra={"usuario": form_data.username})
+
+Nunca se loguean contraseñas, hashes ni tokens (tampoco el query string
+en el log de acceso de uvicorn).
+"""
+import json
+import logging
+import sys
+from datetime import datetime, timezone
+
+from . import config
+
+# Atributos que todo LogRecord trae; el resto vino en extra={...}
+_ATRIBUTOS_ESTANDAR = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+class FormatoJSON(logging.Formatter):
+    def format(self, record):
+        evento = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+        }
+        evento.update({k: v for k, v in vars(record).items() if k not in _ATRIBUTOS_ESTANDAR})
+        if record.exc_info:
+            evento["excepcion"] = self.formatException(record.exc_info)
+        return json.dumps(evento, ensure_ascii=False, default=str)
+
+class FormatoTexto(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record):
+        linea = super().format(record)
+        extra = {k: v for k, v in vars(record).items() if k not in _ATRIBUTOS_ESTANDAR}
+        if extra:
+            linea += " " + " ".join(f"{k}={v}" for k, v in extra.items())
+        return linea
+
+class SinQueryString(logging.Filter):
+    """
+    Saca el query string de la ruta en el log de acceso de uvicorn: ahí
+    llegan credenciales que solo pueden ir en la URL (?ticket= del stream).
+    """
+    def filter(self, record):
+        # uvicorn.access: '%s - "%s %s HTTP/%s" %d' (cliente, método, ruta, versión, status)
+        if isinstance(record.args, tuple) and len(record.args) == 5:
+            args = list(record.args)
+            args[2] = str(args[2]).split("?", 1)[0]
+            record.args = tuple(args)
+        return True
+
+def configurar():
+    """Idempotente: se puede llamar más de una vez (tests, recargas)."""
+    acceso = logging.getLogger("uvicorn.access")
+    if not any(isinstance(f, SinQueryString) for f in acceso.filters):
+        acceso.addFilter(SinQueryString())
+
+    logger = logging.getLogger("app")
+    logger.setLevel(config.LOG_LEVEL)
+    logger.propagate = False
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(FormatoJSON() if config.LOG_FORMATO == "json" else FormatoTexto())
+    logger.addHandler(handler)
+    return logger
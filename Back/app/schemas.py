@@ -1,11 +1,18 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field, PlainSerializer
+from typing import Annotated, List, Optional
+from decimal import Decimal
 import datetime
 
+# Montos: se manejan como Decimal (exactos, como los centavos de la base)
+# y en el JSON salen como número, igual que antes
+Monto = Annotated[Decimal, PlainSerializer(float, return_type=float, when_used="json")]
+
 # --- Esquemas para Transacciones ---
 
 class TransaccionBase(BaseModel):
-    monto: float
+    # Número o texto decimal con hasta 2 decimales. 15 dígitos en total:
+    # así el número del JSON representa el monto exacto
+    monto: Monto = Field(..., max_digits=15, decimal_places=2)
     descripcion: Optional[str] = None
     tipo: str # "ingreso" o "gasto"
     categoria_id: int
@@ -21,6 +28,30 @@ class Transaccion(TransaccionBase):
     class Config:
         from_attributes = True 
 
+class ErrorBulk(BaseModel):
+    indice: int # Posición del ítem en la lista recibida
+    detalle: str
+
+class ResultadoBulk(BaseModel):
+    creadas: int
+    # Un id por ítem recibido, en el mismo orden (None si el ítem falló)
+    ids: List[Optional[int]]
+    errores: List[ErrorBulk]
+
+class Recategorizacion(BaseModel):
+    # Categoría nueva de las transacciones que cumplen todos los filtros
+    # (hace falta al menos uno)
+    categoria_id: int
+    desde: Optional[datetime.date] = None # Inclusive
+    hasta: Optional[datetime.date] = None # Exclusive
+    q: Optional[str] = Field(None, min_length=1) # Palabras de la descripción, como en /transacciones/search
+    categoria_origen_id: Optional[int] = None
+    tipo: Optional[str] = Field(None, pattern="^(ingreso|gasto)$")
+
+class ResultadoRecategorizacion(BaseModel):
+    categoria_id: int # La que recibió las transacciones
+    transacciones: int # Cuántas cambiaron de categoría
+
 # --- Esquemas para Categorías ---
 
 class CategoriaBase(BaseModel):
@@ -45,20 +76,40 @@ class UsuarioBase(BaseModel):
 
 class UsuarioCreate(UsuarioBase):
     password: str
+    moneda: str = Field("ARS", pattern="^[A-Z]{3}$") # Código ISO 4217
 
 class Usuario(UsuarioBase):
+    # Perfil liviano: no incluye las transacciones ni las categorías
     id: int
-    transacciones: List[Transaccion] = []
-    categorias: List[Categoria] = []
+    moneda: str = "ARS"
 
     class Config:
         from_attributes = True 
 
+class UsuarioConteos(BaseModel):
+    transacciones: int
+    categorias: int
+
+class UsuarioDetalle(Usuario):
+    # Solo se completan las partes pedidas con ?include=
+    transacciones: Optional[List[Transaccion]] = None
+    categorias: Optional[List[Categoria]] = None
+    conteos: Optional[UsuarioConteos] = None
+
 # --- Esquemas para Autenticación (Tokens) ---
 
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None # Segundos de vida del access_token
+
+class TicketStream(BaseModel):
+    ticket: str # Para GET /dashboard/stream?ticket=
+    expires_in: int # Segundos de vida del ticket
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     email: Optional[str] = None
@@ -66,13 +117,108 @@ class TokenData(BaseModel):
 class GastoCategoria(BaseModel):
     # Recharts espera 'name' y 'value' para el PieChart
     name: str
-    value: float
+    value: Monto
 
 class DashboardSummary(BaseModel):
-    total_ingresos: float
-    total_gastos: float
-    balance: float
+    total_ingresos: Monto
+    total_gastos: Monto
+    balance: Monto
     gastos_por_categoria: List[GastoCategoria]
 
     class Config:
-        from_attributes = True # (Era orm_mode, lo actualizamos)
\ No newline at end of file
+        from_attributes = True # (Era orm_mode, lo actualizamos)
+
+class PuntoSerie(BaseModel):
+    # Un "bucket" (día, semana o mes) de la serie del dashboard
+    periodo: datetime.date # Primer día del bucket
+    total_ingresos: Monto
+    total_gastos: Monto
+    balance: Monto
+    gastos_por_categoria: List[GastoCategoria]
+
+class DashboardSeries(BaseModel):
+    granularidad: str # "day", "week" o "month"
+    desde: datetime.date # Inclusive
+    hasta: datetime.date # Exclusive
+    puntos: List[PuntoSerie]
+
+# --- Esquemas para Analítica (GET /analytics/...) ---
+
+class PromediosMoviles(BaseModel):
+    # Promedio de los últimos 3, 6 y 12 meses (incluido el del punto).
+    # None si el historial del usuario todavía no tiene tantos meses
+    meses_3: Optional[Monto] = None
+    meses_6: Optional[Monto] = None
+    meses_12: Optional[Monto] = None
+
+class PuntoTendencia(BaseModel):
+    periodo: datetime.date # Primer día del mes
+    total_ingresos: Monto
+    total_gastos: Monto
+    balance: Monto
+    promedio_gastos: PromediosMoviles
+    promedio_balance: PromediosMoviles
+
+class AnaliticaTendencias(BaseModel):
+    desde: datetime.date # Primer mes (inclusive)
+    hasta: datetime.date # Último mes (inclusive)
+    # Pendiente de la recta de mínimos cuadrados: cuánto suben (o bajan)
+    # por mes, sin contar el mes en curso. None con menos de dos meses
+    tendencia_ingresos: Optional[Monto] = None
+    tendencia_gastos: Optional[Monto] = None
+    puntos: List[PuntoTendencia]
+
+class VariacionCategoria(BaseModel):
+    categoria_id: Optional[int] = None # None = sin categoría
+    nombre: Optional[str] = None
+    total: Monto
+    anterior: Monto # Total del mes anterior
+    diferencia: Monto
+    variacion_pct: Optional[float] = None # None si el mes anterior no tuvo gastos
+
+class PuntoCategorias(BaseModel):
+    periodo: datetime.date
+    categorias: List[VariacionCategoria]
+
+class AnaliticaCategorias(BaseModel):
+    desde: datetime.date
+    hasta: datetime.date
+    puntos: List[PuntoCategorias]
+
+class AnomaliaMensual(BaseModel):
+    # Gasto de una categoría en un mes muy por encima de sus 12 meses anteriores
+    periodo: datetime.date
+    categoria_id: Optional[int] = None
+    nombre: Optional[str] = None
+    total: Monto
+    promedio: Monto
+    desvio: Monto
+    puntaje: float # Desvíos por encima del promedio
+
+class AnomaliaTransaccion(BaseModel):
+    # Gasto muy por encima de los habituales de su categoría
+    id: int
+    fecha: datetime.date
+    categoria_id: Optional[int] = None
+    nombre: Optional[str] = None
+    monto: Monto
+    mediana_categoria: Monto
+    puntaje: float # Puntaje z robusto (mediana y MAD)
+
+class AnaliticaAnomalias(BaseModel):
+    desde: datetime.date
+    umbral: float
+    meses: List[AnomaliaMensual]
+    transacciones: List[AnomaliaTransaccion]
+
+class AnaliticaProyeccion(BaseModel):
+    periodo: datetime.date
+    dias_transcurridos: int # Incluido hoy
+    dias_del_mes: int
+    meses_de_historia: int # Meses completos en que se basa la proyección
+    ingresos_a_la_fecha: Monto
+    gastos_a_la_fecha: Monto
+    balance_a_la_fecha: Monto
+    ingresos_proyectados: Monto # Estimados para el mes entero
+    gastos_proyectados: Monto
+    balance_proyectado: Monto
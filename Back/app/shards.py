@@ -0,0 +1,289 @@
+# En app/shards.py
+"""
+Router de shards por usuario (SHARDS > 1).
+
+Los datos de un usuario (categorías, transacciones, resúmenes y versión de
+datos) viven enteros en un solo shard y ninguna consulta de crud.py cruza
+usuarios: cada archivo SQLite tiene su propio lock de escritura, así que
+los usuarios de shards distintos escriben en paralelo. El directorio
+(usuarios.shard, en la base principal) dice dónde está cada uno; los
+usuarios nuevos van al shard usuario_id % SHARDS.
+
+- auth elige el shard de la sesión del request (database.usar_shard)
+  apenas autentica: las rutas y crud.py no cambian.
+- mover_usuario / rebalancear mueven usuarios entre shards (por ejemplo
+  después de subir SHARDS, para repartir los que ya existían). Hay que
+  correrlas con la app detenida: cada proceso recuerda en memoria el
+  shard de los usuarios que ya vio.
+
+Cada shard numera sus filas, así que los ids de un usuario casi siempre
+ya están ocupados en el destino: al moverse, sus categorías y
+transacciones reciben ids nuevos, todos mayores que cualquiera que haya
+tenido. Los viejos quedan en ids_movidos y las rutas con un id en la URL
+responden 308 a la URL con el id nuevo (una URL guardada o un id en la
+cache del cliente siguen funcionando); la versión de datos sube, así que
+los listados cacheados se vuelven a pedir con los ids nuevos.
+"""
+import threading
+
+from sqlalchemy import func, text
+
+from . import config, database, migraciones, models
+
+_directorio = {} # usuario_id -> shard, de los usuarios ya vistos por este proceso
+_lock = threading.Lock()
+
+def engines():
+    """Engines sync de todos los shards configurados (el 0 es la base principal)."""
+    return [database.engine_shard(n) for n in range(config.SHARDS)]
+
+def shard_nuevo(usuario_id: int):
+    return usuario_id % config.SHARDS
+
+def recordar(usuario_id: int, shard: int):
+    with _lock:
+        _directorio[usuario_id] = shard
+
+def shard_de(db, usuario_id: int):
+    """Shard del usuario según el directorio. Sincrónica (se puede usar con database.ejecutar)."""
+    shard = _directorio.get(usuario_id)
+    if shard is None:
+        shard = db.query(models.Usuario.shard).filter(models.Usuario.id == usuario_id).scalar() or 0
+        recordar(usuario_id, shard)
+    return shard
+
+async def enrutar(db: database.SesionDB, usuario_id: int):
+    """Manda las consultas de datos de 'db' al shard del usuario. Con un solo shard no hace nada."""
+    if config.SHARDS <= 1:
+        return
+    shard = _directorio.get(usuario_id)
+    if shard is None:
+        shard = await database.ejecutar(db, shard_de, usuario_id)
+    database.usar_shard(db, shard)
+
+def sesion_de_usuario(usuario_id: int):
+    """SessionLocal con los datos en el shard del usuario (importación, exportación, comandos)."""
+    db = database.SessionLocal()
+    if config.SHARDS > 1:
+        database.usar_shard(db, shard_de(db, usuario_id))
+    return db
+
+def sesion_de_shard(shard: int):
+    db = database.SessionLocal()
+    database.usar_shard(db, shard)
+    return db
+
+# --- Herramientas: mover y rebalancear ---
+
+_TABLAS_DE_DATOS = (models.Transaccion, models.Categoria, models.ResumenMensual, models.VersionDatos, models.IdMovido)
+
+def _borrar_datos(db, usuario_id: int):
+    for modelo in _TABLAS_DE_DATOS:
+        db.query(modelo).filter(modelo.usuario_id == usuario_id).delete(synchronize_session=False)
+
+def _primer_id_libre(src, dst, modelo, usuario_id: int):
+    """
+    Primer id para las filas de 'modelo' del usuario en el destino: mayor
+    que los del destino y que cualquier id (actual o viejo) del usuario,
+    así un id viejo nunca apunta a otra fila suya.
+    """
+    return max(
+        dst.query(func.max(modelo.id)).scalar() or 0,
+        src.query(func.max(modelo.id)).filter(modelo.usuario_id == usuario_id).scalar() or 0,
+        src.query(func.max(models.IdMovido.id_viejo)).filter(
+            models.IdMovido.usuario_id == usuario_id, models.IdMovido.tabla == modelo.__tablename__
+        ).scalar() or 0,
+    ) + 1
+
+def _anotar_ids(dst, usuario_id: int, tabla: str, pares):
+    """Guarda (id viejo, id nuevo) en ids_movidos del destino; si el id viejo ya estaba, queda el primero."""
+    from . import crud
+
+    filas = [{"usuario_id": usuario_id, "tabla": tabla, "id_viejo": viejo, "id_nuevo": nuevo} for viejo, nuevo in pares]
+    if filas:
+        dst.execute(crud._insert_para(dst)(models.IdMovido).on_conflict_do_nothing(), filas)
+
+def _copiar_ids_viejos(src, dst, usuario_id: int, lote: int):
+    """
+    Trae los ids_movidos que el usuario ya tenía (de movimientos anteriores)
+    y los apunta a los ids de este movimiento: así un id de hace dos
+    movimientos lleva directo a la fila actual.
+    """
+    consulta = src.query(
+        models.IdMovido.tabla, models.IdMovido.id_viejo, models.IdMovido.id_nuevo
+    ).filter(models.IdMovido.usuario_id == usuario_id)
+    resultado = src.execute(consulta.statement.execution_options(yield_per=lote, stream_results=True))
+    for filas in resultado.partitions():
+        for tabla in ("categorias", "transacciones"):
+            _anotar_ids(dst, usuario_id, tabla, [(viejo, nuevo) for t, viejo, nuevo in filas if t == tabla])
+    # Las recién copiadas apuntan a un id del origen, que ahora es un id viejo
+    dst.execute(text("""
+        UPDATE ids_movidos SET id_nuevo = (
+            SELECT m.id_nuevo FROM ids_movidos m
+            WHERE m.usuario_id = ids_movidos.usuario_id AND m.tabla = ids_movidos.tabla
+              AND m.id_viejo = ids_movidos.id_nuevo
+        )
+        WHERE usuario_id = :usuario_id AND EXISTS (
+            SELECT 1 FROM ids_movidos m
+            WHERE m.usuario_id = ids_movidos.usuario_id AND m.tabla = ids_movidos.tabla
+              AND m.id_viejo = ids_movidos.id_nuevo
+        )
+    """), {"usuario_id": usuario_id})
+
+def _ajustar_secuencias(dst):
+    # Fuera de SQLite (que usa max(id) + 1) las secuencias no ven los ids explícitos
+    if dst.get_bind().dialect.name != "sqlite":
+        for tabla in ("categorias", "transacciones"):
+            dst.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{tabla}', 'id'), (SELECT COALESCE(MAX(id), 1) FROM {tabla}))"
+            ))
+
+def mover_usuario(usuario_id: int, destino: int, lote: int = 5000):
+    """
+    Copia los datos del usuario al shard 'destino', lo apunta ahí en el
+    directorio y recién entonces borra los del shard de origen. Si se corta
+    a mitad de camino se puede volver a correr: la copia parcial en el
+    destino se descarta, y los restos en el origen los borra
+    limpiar_huerfanos(). Las categorías y transacciones reciben ids nuevos
+    (ver el docstring del módulo). Devuelve la cantidad de transacciones movidas.
+    """
+    from . import crud
+
+    directorio = database.SessionLocal()
+    try:
+        origen = directorio.query(models.Usuario.shard).filter(models.Usuario.id == usuario_id).scalar()
+        if origen is None:
+            raise ValueError(f"No existe el usuario {usuario_id}")
+        if origen == destino:
+            return 0
+        migraciones.aplicar(database.engine_shard(destino))
+
+        src, dst = sesion_de_shard(origen), sesion_de_shard(destino)
+        try:
+            _borrar_datos(dst, usuario_id)
+
+            categorias = src.query(models.Categoria).filter(
+                models.Categoria.usuario_id == usuario_id
+            ).order_by(models.Categoria.id).all()
+            primero = _primer_id_libre(src, dst, models.Categoria, usuario_id)
+            ids_categorias = {c.id: primero + i for i, c in enumerate(categorias)}
+            dst.add_all([
+                models.Categoria(id=ids_categorias[c.id], nombre=c.nombre, tipo=c.tipo, usuario_id=usuario_id)
+                for c in categorias
+            ])
+            dst.flush()
+            _anotar_ids(dst, usuario_id, "categorias", ids_categorias.items())
+
+            # En orden de id y con ids nuevos consecutivos, así se mantiene el
+            # desempate del orden (fecha, id)
+            siguiente = _primer_id_libre(src, dst, models.Transaccion, usuario_id)
+            consulta = src.query(
+                models.Transaccion.id, models.Transaccion.fecha, models.Transaccion.monto_centavos,
+                models.Transaccion.descripcion, models.Transaccion.tipo, models.Transaccion.categoria_id
+            ).filter(models.Transaccion.usuario_id == usuario_id).order_by(models.Transaccion.id)
+            movidas = 0
+            resultado = src.execute(consulta.statement.execution_options(yield_per=lote, stream_results=True))
+            for filas in resultado.partitions():
+                ids = [(fila.id, siguiente + i) for i, fila in enumerate(filas)]
+                siguiente += len(filas)
+                crud.insertar_transacciones(dst, usuario_id, [
+                    {"id": nuevo, "fecha": fecha, "monto_centavos": centavos, "descripcion": descripcion,
+                     "tipo": tipo, "categoria_id": ids_categorias.get(categoria_id), "usuario_id": usuario_id}
+                    for (_, nuevo), (_, fecha, centavos, descripcion, tipo, categoria_id) in zip(ids, filas)
+                ])
+                _anotar_ids(dst, usuario_id, "transacciones", ids)
+                movidas += len(filas)
+            _copiar_ids_viejos(src, dst, usuario_id, lote)
+            _ajustar_secuencias(dst)
+
+            # La versión sigue subiendo (los ids cambiaron): ningún ETag viejo vuelve a coincidir
+            version = crud.get_version_datos(src, usuario_id)
+            dst.query(models.VersionDatos).filter(models.VersionDatos.usuario_id == usuario_id).delete()
+            dst.add(models.VersionDatos(usuario_id=usuario_id, version=version + 1))
+            dst.commit()
+
+            directorio.query(models.Usuario).filter(models.Usuario.id == usuario_id).update(
+                {models.Usuario.shard: destino}, synchronize_session=False
+            )
+            directorio.commit()
+            recordar(usuario_id, destino)
+
+            _borrar_datos(src, usuario_id)
+            src.commit()
+        finally:
+            src.close()
+            dst.close()
+        return movidas
+    finally:
+        directorio.close()
+
+def limpiar_huerfanos(shards: int = None):
+    """
+    Borra de cada shard los datos de usuarios que según el directorio
+    están en otro (restos de un movimiento cortado). Devuelve {shard: usuarios}.
+    """
+    shards = shards or config.SHARDS
+    directorio = database.SessionLocal()
+    try:
+        ubicacion = dict(directorio.query(models.Usuario.id, models.Usuario.shard))
+    finally:
+        directorio.close()
+    limpiados = {}
+    for n in range(shards):
+        migraciones.aplicar(database.engine_shard(n))
+        db = sesion_de_shard(n)
+        try:
+            presentes = {u for (u,) in db.query(models.Categoria.usuario_id).distinct()}
+            presentes |= {u for (u,) in db.query(models.VersionDatos.usuario_id)}
+            huerfanos = [u for u in presentes if ubicacion.get(u, 0) != n]
+            for usuario_id in huerfanos:
+                _borrar_datos(db, usuario_id)
+            db.commit()
+            limpiados[n] = len(huerfanos)
+        finally:
+            db.close()
+    return limpiados
+
+def rebalancear(shards: int = None, simular: bool = False):
+    """
+    Mueve cada usuario al shard que le toca con 'shards' shards
+    (usuario_id % shards). Sirve para repartir los usuarios existentes
+    después de subir SHARDS, o para vaciar los shards de más antes de
+    bajarlo. Devuelve la lista de movimientos (usuario_id, origen, destino).
+    """
+    shards = shards or config.SHARDS
+    directorio = database.SessionLocal()
+    try:
+        usuarios = directorio.query(models.Usuario.id, models.Usuario.shard).order_by(models.Usuario.id).all()
+    finally:
+        directorio.close()
+    movimientos = [(u, origen, u % shards) for u, origen in usuarios if origen != u % shards]
+    if not simular:
+        for usuario_id, _, destino in movimientos:
+            mover_usuario(usuario_id, destino)
+        limpiar_huerfanos(max([shards, config.SHARDS] + [origen + 1 for _, origen, _ in movimientos]))
+    return movimientos
+
+def estado(shards: int = None):
+    """Usuarios y transacciones por shard."""
+    shards = shards or config.SHARDS
+    directorio = database.SessionLocal()
+    try:
+        usuarios = dict(
+            directorio.query(models.Usuario.shard, func.count(models.Usuario.id)).group_by(models.Usuario.shard)
+        )
+    finally:
+        directorio.close()
+    resultado = []
+    for n in range(max([shards] + [s + 1 for s in usuarios])):
+        migraciones.aplicar(database.engine_shard(n))
+        db = sesion_de_shard(n)
+        try:
+            transacciones = db.query(func.count(models.Transaccion.id)).scalar()
+        finally:
+            db.close()
+        resultado.append({
+            "shard": n, "url": database.engine_shard(n).url.render_as_string(hide_password=True),
+            "usuarios": usuarios.get(n, 0), "transacciones": transacciones,
+        })
+    return resultado
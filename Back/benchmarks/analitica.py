@@ -0,0 +1,346 @@
+"""
+Benchmark de la analítica (app/analitica.py): columnas de NumPy contra
+Python fila por fila y contra SQL repetido.
+
+Carga un usuario con 10 años de transacciones diarias sintéticas (varios
+gastos por día en categorías con montos distintos, sueldo a principio de
+mes, alquiler el 10 y algunos gastos fuera de escala) y mide, con la
+mediana de varias repeticiones:
+
+- la carga del historial (crud.get_libro + analitica.Libro), que se hace
+  una vez por versión de datos;
+- cada cuenta (tendencias, categorias, anomalias, proyeccion) sobre el
+  Libro ya cargado;
+- las mismas cuentas en Python puro, recorriendo las filas (fecha como
+  datetime, como las devuelve el ORM);
+- las tendencias con una consulta por mes (crud.get_dashboard_summary),
+  que es lo que haría un cliente con la API anterior.
+
+Los resultados de NumPy y de Python puro se comparan: tienen que dar lo
+mismo (los promedios, hasta el centavo).
+
+Uso (desde la carpeta Back):
+    python -m benchmarks.analitica --anios 10 --por-dia 5
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+CATEGORIAS = {"Sueldo": "ingreso", "Alquiler": "gasto", "Supermercado": "gasto", "Transporte": "gasto",
+              "Salidas": "gasto", "Farmacia": "gasto", "Servicios": "gasto", "Ropa": "gasto"}
+# Mediana de cada gasto diario, en centavos
+MONTO_TIPICO = {"Supermercado": 1_500_000, "Transporte": 120_000, "Salidas": 800_000,
+                "Farmacia": 400_000, "Servicios": 900_000, "Ropa": 2_500_000}
+
+
+def sembrar(db, anios, por_dia, semilla=1, lote=20000):
+    """Un usuario con 'anios' años de historia hasta hoy. Devuelve su id."""
+    from app import crud, models
+
+    azar = random.Random(semilla)
+    usuario = models.Usuario(email="analitica@example.com", nombre="analitica", hashed_password="-")
+    db.add(usuario)
+    db.flush()
+    categorias = {nombre: models.Categoria(nombre=nombre, tipo=tipo, usuario_id=usuario.id)
+                  for nombre, tipo in CATEGORIAS.items()}
+    db.add_all(categorias.values())
+    db.flush()
+
+    def fila(fecha, nombre, centavos, descripcion):
+        return {"fecha": fecha, "monto_centavos": centavos, "descripcion": descripcion,
+                "tipo": CATEGORIAS[nombre], "categoria_id": categorias[nombre].id, "usuario_id": usuario.id}
+
+    hoy = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+    dia = hoy - timedelta(days=round(anios * 365.25))
+    variables = [n for n in MONTO_TIPICO]
+    filas = []
+    while dia <= hoy:
+        if dia.day == 1 + azar.randrange(3):
+            filas.append(fila(dia, "Sueldo", 250_000_00 + azar.randrange(-5_000_00, 5_000_00), "Sueldo"))
+        if dia.day == 10:
+            filas.append(fila(dia, "Alquiler", 80_000_00, "Alquiler"))
+        for _ in range(por_dia):
+            nombre = azar.choice(variables)
+            centavos = int(MONTO_TIPICO[nombre] * azar.lognormvariate(0, 0.4))
+            if azar.random() < 0.002:
+                centavos *= 20 # Fuera de escala
+            filas.append(fila(dia + timedelta(minutes=azar.randrange(600)), nombre, centavos, nombre))
+        if len(filas) >= lote:
+            crud.insertar_transacciones(db, usuario.id, filas)
+            filas = []
+        dia += timedelta(days=1)
+    crud.insertar_transacciones(db, usuario.id, filas)
+    db.commit()
+    return usuario.id
+
+# --- Las mismas cuentas en Python puro, fila por fila ---
+
+def _mes(fecha):
+    return (fecha.year - 1970) * 12 + fecha.month - 1
+
+def _fecha_mes(mes):
+    return date(1970 + mes // 12, mes % 12 + 1, 1)
+
+def py_tendencias(filas, meses, hoy):
+    from app.analitica import VENTANAS
+    ingresos, gastos = defaultdict(int), defaultdict(int)
+    for fecha, centavos, categoria_id, id_ in filas:
+        if centavos > 0:
+            ingresos[_mes(fecha)] += centavos
+        else:
+            gastos[_mes(fecha)] -= centavos
+    actual = _mes(hoy)
+    primero = min(_mes(f) for f, _, _, _ in filas)
+    puntos = {}
+    for m in range(actual - meses + 1, actual + 1):
+        promedios = {}
+        for v in VENTANAS:
+            if m - v + 1 >= primero:
+                ventana = range(m - v + 1, m + 1)
+                promedios[v] = (sum(gastos[x] for x in ventana) / v,
+                                sum(ingresos[x] - gastos[x] for x in ventana) / v)
+        puntos[_fecha_mes(m)] = (ingresos[m], gastos[m], promedios)
+    completos = range(max(primero, actual - meses + 1), actual)
+    pendientes = [statistics.linear_regression(range(len(completos)), [serie[m] for m in completos]).slope
+                  for serie in (ingresos, gastos)]
+    return puntos, pendientes
+
+def py_categorias(filas, meses, hoy):
+    gastos = defaultdict(int)
+    for fecha, centavos, categoria_id, id_ in filas:
+        if centavos < 0:
+            gastos[_mes(fecha), categoria_id] -= centavos
+    actual = _mes(hoy)
+    categorias = {c for _, c in gastos}
+    resultado = {}
+    for m in range(actual - meses + 1, actual + 1):
+        for c in categorias:
+            total, anterior = gastos.get((m, c), 0), gastos.get((m - 1, c), 0)
+            if total or anterior:
+                resultado[_fecha_mes(m), c] = (total, anterior)
+    return resultado
+
+def py_anomalias(filas, meses, umbral, hoy):
+    from app.analitica import MESES_ANOMALIAS, MINIMO_MESES, MINIMO_TRANSACCIONES
+    actual = _mes(hoy)
+    desde = actual - meses + 1
+    primero = min(_mes(f) for f, _, _, _ in filas)
+    gastos, por_categoria = defaultdict(int), defaultdict(list)
+    for fecha, centavos, categoria_id, id_ in filas:
+        if centavos < 0:
+            gastos[_mes(fecha), categoria_id] -= centavos
+            por_categoria[categoria_id].append((-centavos, fecha, id_))
+
+    mensuales = set()
+    for c in por_categoria:
+        primer_gasto = next(m for m in range(primero, actual + 1) if gastos.get((m, c), 0) > 0)
+        for m in range(max(desde, primero), actual + 1):
+            ventana = [gastos.get((x, c), 0) for x in range(max(m - MESES_ANOMALIAS, primer_gasto), m)]
+            total = gastos.get((m, c), 0)
+            if len(ventana) < MINIMO_MESES or total <= 0:
+                continue
+            promedio = sum(ventana) / len(ventana)
+            escala = max(statistics.pstdev(ventana), promedio * 0.1, 100)
+            if (total - promedio) / escala > umbral:
+                mensuales.add((_fecha_mes(m), c))
+
+    transacciones = set()
+    inicio = datetime.combine(_fecha_mes(desde), datetime.min.time())
+    for c, gastos_categoria in por_categoria.items():
+        if len(gastos_categoria) < MINIMO_TRANSACCIONES:
+            continue
+        montos = [monto for monto, _, _ in gastos_categoria]
+        mediana = statistics.median(montos)
+        mad = statistics.median(abs(monto - mediana) for monto in montos)
+        escala = max(1.4826 * mad, mediana * 0.1, 100)
+        for monto, fecha, id_ in gastos_categoria:
+            if fecha >= inicio and (monto - mediana) / escala > umbral:
+                transacciones.add(id_)
+    return mensuales, transacciones
+
+def py_proyeccion(filas, hoy):
+    from app.analitica import MESES_PROYECCION
+    actual = _mes(hoy)
+    primero = min(_mes(f) for f, _, _, _ in filas)
+    desde = max(actual - MESES_PROYECCION, primero)
+    ultimo_dia = (_fecha_mes(actual + 1) - timedelta(days=1)).day
+    real, perfil = [0, 0], defaultdict(lambda: [0, 0])
+    for fecha, centavos, categoria_id, id_ in filas:
+        lado = 0 if centavos > 0 else 1
+        m = _mes(fecha)
+        if m == actual and fecha.date() <= hoy:
+            real[lado] += abs(centavos)
+        elif desde <= m < actual:
+            perfil[fecha.day][lado] += abs(centavos)
+    proyectados = list(real)
+    for dia in range(hoy.day + 1, ultimo_dia + 1):
+        # Meses de la historia que tienen ese día
+        con_dia = sum(1 for m in range(desde, actual) if (_fecha_mes(m + 1) - timedelta(days=1)).day >= dia)
+        for lado in (0, 1):
+            proyectados[lado] += perfil[dia][lado] / max(con_dia, 1)
+    return real, proyectados
+
+# --- Comparación ---
+
+def _centavos(monto):
+    return round(float(monto) * 100)
+
+def _comparar(resultados, referencia):
+    """Lista de diferencias entre lo de NumPy y lo de Python puro (vacía si coinciden)."""
+    diferencias = []
+
+    puntos, pendientes = referencia["tendencias"]
+    tendencias = resultados["tendencias"]
+    for punto in tendencias.puntos:
+        ingresos, gastos, promedios = puntos[punto.periodo]
+        if (_centavos(punto.total_ingresos), _centavos(punto.total_gastos)) != (ingresos, gastos):
+            diferencias.append(f"tendencias: totales de {punto.periodo}")
+        for v in (3, 6, 12):
+            g, b = getattr(punto.promedio_gastos, f"meses_{v}"), getattr(punto.promedio_balance, f"meses_{v}")
+            esperado = promedios.get(v)
+            obtenido = None if g is None else (_centavos(g), _centavos(b))
+            if (esperado is None) != (obtenido is None) or (
+                    esperado and any(abs(o - e) > 1 for o, e in zip(obtenido, esperado))):
+                diferencias.append(f"tendencias: promedio de {v} meses de {punto.periodo}")
+    for nombre, esperado in zip(("tendencia_ingresos", "tendencia_gastos"), pendientes):
+        if abs(_centavos(getattr(tendencias, nombre)) - esperado) > 1:
+            diferencias.append(f"tendencias: {nombre}")
+
+    obtenido = {(p.periodo, c.categoria_id): (_centavos(c.total), _centavos(c.anterior))
+                for p in resultados["categorias"].puntos for c in p.categorias}
+    if obtenido != referencia["categorias"]:
+        diferencias.append("categorias")
+
+    # NumPy devuelve solo las MAXIMO_ANOMALIAS de mayor puntaje de cada tipo
+    from app.analitica import MAXIMO_ANOMALIAS
+    anomalias = resultados["anomalias"]
+    for nombre, obtenidas, esperadas in zip(
+            ("meses", "transacciones"),
+            ({(a.periodo, a.categoria_id) for a in anomalias.meses}, {a.id for a in anomalias.transacciones}),
+            referencia["anomalias"]):
+        if not obtenidas <= esperadas or len(obtenidas) != min(len(esperadas), MAXIMO_ANOMALIAS):
+            diferencias.append(f"anomalias: {nombre}")
+
+    real, proyectados = referencia["proyeccion"]
+    proyeccion = resultados["proyeccion"]
+    if [_centavos(proyeccion.ingresos_a_la_fecha), _centavos(proyeccion.gastos_a_la_fecha)] != real:
+        diferencias.append("proyeccion: a la fecha")
+    if any(abs(_centavos(o) - e) > 1 for o, e in zip(
+            (proyeccion.ingresos_proyectados, proyeccion.gastos_proyectados), proyectados)):
+        diferencias.append("proyeccion: proyectados")
+    return diferencias
+
+# --- Medición ---
+
+def _mediana_ms(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return round(statistics.median(tiempos) * 1000, 3), resultado
+
+
+def correr(args):
+    from app import analitica, crud, database, models
+
+    models.crear_db()
+    db = database.SessionLocal()
+    usuario_id = sembrar(db, args.anios, args.por_dia, args.semilla)
+    hoy = datetime.utcnow().date()
+    r = args.repeticiones
+
+    consulta_ms, (filas_sql, categorias) = _mediana_ms(lambda: crud.get_libro(db, usuario_id), r)
+    libro_ms, libro = _mediana_ms(lambda: analitica.Libro(filas_sql, categorias), r)
+    carga_ms = consulta_ms + libro_ms
+    cuentas = {
+        "tendencias": lambda: analitica.tendencias(libro, args.meses, hoy),
+        "categorias": lambda: analitica.categorias(libro, args.meses, hoy),
+        "anomalias": lambda: analitica.anomalias(libro, args.meses, args.umbral, hoy),
+        "proyeccion": lambda: analitica.proyeccion(libro, hoy),
+    }
+
+    # Python puro: las filas como las devuelve el ORM (fecha como datetime)
+    t = models.Transaccion
+    def filas_orm():
+        return [
+            (fecha, -centavos if tipo == "gasto" else centavos, categoria_id or 0, id_)
+            for fecha, centavos, tipo, categoria_id, id_ in db.query(
+                t.fecha, t.monto_centavos, t.tipo, t.categoria_id, t.id
+            ).filter(t.usuario_id == usuario_id).order_by(t.fecha, t.id)
+        ]
+    filas_ms, filas = _mediana_ms(filas_orm, r)
+    en_python = {
+        "tendencias": lambda: py_tendencias(filas, args.meses, hoy),
+        "categorias": lambda: py_categorias(filas, args.meses, hoy),
+        "anomalias": lambda: py_anomalias(filas, args.meses, args.umbral, hoy),
+        "proyeccion": lambda: py_proyeccion(filas, hoy),
+    }
+
+    resultados, referencia, tiempos = {}, {}, {}
+    for nombre in cuentas:
+        numpy_ms, resultados[nombre] = _mediana_ms(cuentas[nombre], r)
+        python_ms, referencia[nombre] = _mediana_ms(en_python[nombre], max(r // 5, 1))
+        tiempos[nombre] = {"numpy_ms": numpy_ms, "python_ms": python_ms,
+                           "aceleracion": round(python_ms / numpy_ms, 1) if numpy_ms else None}
+
+    # Tendencias con la API anterior: un resumen por mes (rollup), con los
+    # 11 meses anteriores que necesitan los promedios de 12
+    actual = _mes(hoy)
+    def por_mes():
+        return [crud.get_dashboard_summary(db, usuario_id, _fecha_mes(m).year, _fecha_mes(m).month)
+                for m in range(actual - args.meses - 10, actual + 1)]
+    sql_ms, _ = _mediana_ms(por_mes, max(r // 5, 1))
+    tiempos["tendencias"]["sql_por_mes_ms"] = sql_ms
+    db.close()
+
+    total_numpy = sum(t["numpy_ms"] for t in tiempos.values())
+    total_python = sum(t["python_ms"] for t in tiempos.values())
+    return {
+        "transacciones": len(libro),
+        "meses_de_historia": actual - libro.primer_mes + 1,
+        "carga": {
+            "consulta_ms": consulta_ms,
+            "libro_ms": libro_ms,
+            "total_ms": round(carga_ms, 3),
+            "filas_orm_ms": filas_ms,
+            "memoria_kib": round(sum(a.nbytes for a in vars(libro).values() if hasattr(a, "nbytes")) / 1024, 1),
+        },
+        "cuentas": tiempos,
+        "las_cuatro": {
+            "numpy_ms": round(total_numpy, 3),
+            "numpy_con_carga_ms": round(total_numpy + carga_ms, 3),
+            "python_ms": round(total_python, 3),
+            "python_con_filas_ms": round(total_python + filas_ms, 3),
+        },
+        "anomalias_encontradas": {"meses": len(resultados["anomalias"].meses),
+                                  "transacciones": len(resultados["anomalias"].transacciones)},
+        "diferencias_con_python": _comparar(resultados, referencia),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.analitica")
+    parser.add_argument("--anios", type=float, default=10, help="Años de historia hasta hoy")
+    parser.add_argument("--por-dia", type=int, default=5, help="Gastos por día (además del sueldo y el alquiler)")
+    parser.add_argument("--meses", type=int, default=12, help="Meses que muestra cada cuenta")
+    parser.add_argument("--umbral", type=float, default=3.0)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--semilla", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.chdir(tempfile.mkdtemp(prefix="bench_analitica_"))
+    print(json.dumps(correr(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
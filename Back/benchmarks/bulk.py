@@ -0,0 +1,79 @@
+"""
+Benchmark de alta de transacciones: N pedidos a POST /transacciones/
+contra un solo POST /transacciones/bulk con los mismos N ítems.
+
+Corre la app en el mismo proceso (httpx + ASGITransport) sobre una base
+temporal y compara el tiempo por fila de cada camino.
+
+Uso (desde la carpeta Back):
+    python -m benchmarks.bulk --filas 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+
+async def correr(args):
+    import httpx
+    from app.main import app
+    from app import crud, database
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await client.post("/usuarios/", json={"email": "bulk@example.com", "nombre": "bulk", "password": "secreto"})
+        r = await client.post("/token", data={"username": "bulk", "password": "secreto"})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        categorias = [
+            (await client.post("/categorias/", json={"nombre": nombre, "tipo": "gasto"}, headers=headers)).json()["id"]
+            for nombre in ("Comida", "Transporte", "Servicios")
+        ]
+        items = [
+            {"monto": 10 + i, "descripcion": f"compra {i}", "tipo": "gasto", "categoria_id": categorias[i % len(categorias)]}
+            for i in range(args.filas)
+        ]
+
+        inicio = time.perf_counter()
+        for item in items:
+            r = await client.post("/transacciones/", json=item, headers=headers)
+            r.raise_for_status()
+        individual = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        r = await client.post("/transacciones/bulk", json=items, headers=headers)
+        r.raise_for_status()
+        masivo = time.perf_counter() - inicio
+        resultado = r.json()
+
+    await database.cerrar_async_engine()
+
+    db = database.SessionLocal()
+    diferencias = crud.verificar_resumenes(db)
+    db.close()
+
+    return {
+        "filas": args.filas,
+        "individual": {"segundos": round(individual, 3), "ms_por_fila": round(individual / args.filas * 1000, 3)},
+        "bulk": {"segundos": round(masivo, 3), "ms_por_fila": round(masivo / args.filas * 1000, 3)},
+        "aceleracion": round(individual / masivo, 1),
+        "bulk_creadas": resultado["creadas"],
+        "bulk_errores": len(resultado["errores"]),
+        "resumenes_consistentes": not diferencias,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bulk")
+    parser.add_argument("--filas", type=int, default=2000, help="Transacciones a crear por camino")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="bench_bulk_"))
+    print(json.dumps(asyncio.run(correr(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
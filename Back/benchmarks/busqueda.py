@@ -0,0 +1,112 @@
+"""
+Benchmark de la búsqueda de texto: FTS5 (crud.buscar_transacciones)
+contra la consulta LIKE '%…%' que se usaría sin el índice.
+
+Carga N transacciones sintéticas de un usuario (1 millón por defecto) con
+crud.insertar_transacciones, con los triggers de FTS5 activos, y mide la
+mediana de cada búsqueda (primeros 50 resultados) con los dos métodos.
+
+Uso (desde la carpeta Back):
+    python -m benchmarks.busqueda --filas 1000000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+COMERCIOS = ["Supermercado Coto", "Supermercado Día", "Farmacia", "Farmacity", "Carnicería", "Verdulería",
+             "Kiosco", "Estación de servicio", "Restaurante", "Café", "Librería", "Ferretería"]
+DETALLES = ["compra", "pago", "débito automático", "cuota", "transferencia", "reintegro", "promoción"]
+
+CONSULTAS = {
+    "frecuente": {"q": "supermercado"},
+    "prefijo": {"q": "farma"},
+    "dos_palabras": {"q": "cafe cuota"},
+    "rara": {"q": "ref123457"},
+    "con_filtros": {"q": "supermercado", "monto_min": 40000, "tipo": "gasto"},
+}
+
+
+def sembrar(db, crud, models, usuario_id, filas, lote=10000, semilla=1):
+    azar = random.Random(semilla)
+    inicio = datetime(2015, 1, 1)
+    categoria = models.Categoria(nombre="General", tipo="gasto", usuario_id=usuario_id)
+    db.add(categoria)
+    db.flush()
+    for desde in range(0, filas, lote):
+        crud.insertar_transacciones(db, usuario_id, [
+            {
+                "fecha": inicio + timedelta(seconds=azar.randrange(10 * 365 * 86400)),
+                "monto_centavos": azar.randrange(100, 5_000_000),
+                "descripcion": f"{azar.choice(COMERCIOS)} {azar.choice(DETALLES)} ref{i}",
+                "tipo": "gasto",
+                "categoria_id": categoria.id,
+                "usuario_id": usuario_id,
+            }
+            for i in range(desde, min(desde + lote, filas))
+        ])
+        db.commit()
+
+
+def buscar_con_like(db, models, usuario_id, q, monto_min=None, tipo=None, limit=50):
+    """La alternativa sin FTS: LIKE '%palabra%' por cada palabra."""
+    query = db.query(models.Transaccion).filter(models.Transaccion.usuario_id == usuario_id)
+    for palabra in q.split():
+        query = query.filter(models.Transaccion.descripcion.like(f"%{palabra}%"))
+    if monto_min is not None:
+        query = query.filter(models.Transaccion.monto_centavos >= monto_min * 100)
+    if tipo is not None:
+        query = query.filter(models.Transaccion.tipo == tipo)
+    return query.order_by(models.Transaccion.fecha.desc()).limit(limit).all()
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return round(statistics.median(tiempos) * 1000, 2), len(resultado)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.busqueda")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="bench_busqueda_"))
+
+    from app import crud, database, models, schemas
+
+    models.crear_db()
+    db = database.SessionLocal()
+    usuario_id = crud.create_user(db, schemas.UsuarioCreate(email="fts@example.com", nombre="fts", password="x")).id
+    inicio = time.perf_counter()
+    sembrar(db, crud, models, usuario_id, args.filas)
+    carga = time.perf_counter() - inicio
+
+    resultados = {"filas": args.filas, "carga_segundos": round(carga, 1), "consultas": {}}
+    for nombre, parametros in CONSULTAS.items():
+        like_ms, like_filas = medir(lambda: buscar_con_like(db, models, usuario_id, **parametros), args.repeticiones)
+        fts_ms, fts_filas = medir(lambda: crud.buscar_transacciones(db, usuario_id, **parametros), args.repeticiones)
+        db.expunge_all() # Que los objetos cargados no se acumulen entre consultas
+        resultados["consultas"][nombre] = {
+            **parametros,
+            "like_ms": like_ms,
+            "fts_ms": fts_ms,
+            "like_resultados": like_filas,
+            "fts_resultados": fts_filas,
+        }
+    db.close()
+    print(json.dumps(resultados, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
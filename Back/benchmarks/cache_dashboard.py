@@ -0,0 +1,66 @@
+"""
+Benchmark de la cache del resumen del dashboard (app/cache_dashboard.py).
+
+Carga datos sintéticos y corre C clientes pidiendo GET /dashboard/summary
+(sin ETag, así cada request llega hasta el resumen) con la cache
+desactivada y activada, usando el mismo motor que benchmarks.suite. Al
+final reporta las estadísticas de la cache (hits, misses, esperas).
+
+Uso (desde la carpeta Back):
+    python -m benchmarks.cache_dashboard --usuarios 10 --transacciones 20000 --clientes 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+from .suite import BACK, ObjetivoASGI, correr_escenario
+
+
+async def resumen(cliente):
+    await cliente.pedir("GET", "/dashboard/summary", headers=cliente.headers)
+
+
+async def correr(args):
+    from app import cache_dashboard, database, models
+    from .datos import generar
+
+    models.crear_db()
+    db = database.SessionLocal()
+    usuarios = generar(db, args.usuarios, args.categorias, args.transacciones, args.semilla)
+    db.close()
+
+    backend = cache_dashboard.cache.backend
+    resultados = {}
+    async with ObjetivoASGI() as objetivo:
+        for nombre, max_entradas in (("sin_cache", 0), ("con_cache", backend.max_entradas or 10000)):
+            backend.max_entradas = max_entradas
+            for u in usuarios:
+                backend.borrar(u["id"])
+            resultados[nombre] = await correr_escenario(objetivo, resumen, usuarios, args)
+    resultados["estadisticas_cache"] = cache_dashboard.cache.estadisticas()
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.cache_dashboard")
+    parser.add_argument("--usuarios", type=int, default=10)
+    parser.add_argument("--categorias", type=int, default=8)
+    parser.add_argument("--transacciones", type=int, default=20000, help="Transacciones por usuario")
+    parser.add_argument("--clientes", type=int, default=32)
+    parser.add_argument("--segundos", type=float, default=5)
+    parser.add_argument("--calentamiento", type=float, default=1)
+    parser.add_argument("--semilla", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    os.environ["DASHBOARD_CACHE"] = "memoria"
+    sys.path.insert(0, BACK)
+    os.chdir(tempfile.mkdtemp(prefix="bench_cache_dashboard_"))
+    print(json.dumps(asyncio.run(correr(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
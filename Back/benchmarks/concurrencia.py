@@ -0,0 +1,107 @@
+"""
+Benchmark de concurrencia: modo sync (Session en el threadpool) contra
+modo async (AsyncSession + aiosqlite), de 100 a 1000 clientes simultáneos.
+
+Cada combinación modo/clientes corre en un subproceso propio (DB_MODO se
+lee al importar la app) sobre una base temporal. Cada cliente hace
+--requests pedidos alternando GET /transacciones/ y GET /dashboard/series.
+
+Uso (desde la carpeta Back):
+    python -m benchmarks.concurrencia --clientes 100 250 500 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from .login import percentil
+
+
+async def correr_worker(args):
+    import httpx
+    from app.main import app
+    from app import database
+
+    transport = httpx.ASGITransport(app=app)
+    limites = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limites, timeout=None) as client:
+        await client.post("/usuarios/", json={"email": "conc@example.com", "nombre": "conc", "password": "secreto"})
+        r = await client.post("/token", data={"username": "conc", "password": "secreto"})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        categoria = (await client.post("/categorias/", json={"nombre": "Comida", "tipo": "gasto"}, headers=headers)).json()
+        for i in range(200):
+            await client.post("/transacciones/", headers=headers, json={
+                "monto": 10 + i, "descripcion": f"compra {i}", "tipo": "gasto", "categoria_id": categoria["id"]
+            })
+
+        rutas = ["/transacciones/?limit=50", "/dashboard/series"]
+        latencias = []
+        errores = 0
+
+        async def cliente(n):
+            nonlocal errores
+            for i in range(args.requests):
+                inicio = time.perf_counter()
+                r = await client.get(rutas[(n + i) % len(rutas)], headers=headers)
+                latencias.append(time.perf_counter() - inicio)
+                if r.status_code != 200:
+                    errores += 1
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente(n) for n in range(args.clientes)))
+        duracion = time.perf_counter() - inicio
+
+    # ASGITransport no corre el lifespan: cerramos el engine async a mano
+    await database.cerrar_async_engine()
+
+    return {
+        "modo": os.environ.get("DB_MODO", "sync"),
+        "clientes": args.clientes,
+        "requests": len(latencias),
+        "errores": errores,
+        "requests_por_segundo": round(len(latencias) / duracion, 1),
+        "p50_ms": round(percentil(latencias, 50) * 1000, 1),
+        "p95_ms": round(percentil(latencias, 95) * 1000, 1),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 1),
+    }
+
+
+def worker(args):
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="bench_concurrencia_"))
+    print(json.dumps(asyncio.run(correr_worker(args))))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.concurrencia")
+    parser.add_argument("--clientes", type=int, nargs="+", default=[100, 250, 500, 1000])
+    parser.add_argument("--requests", type=int, default=5, help="Requests por cliente")
+    parser.add_argument("--modos", nargs="+", default=["sync", "async"], choices=["sync", "async"])
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        args.clientes = args.clientes[0]
+        return worker(args)
+
+    resultados = []
+    for clientes in args.clientes:
+        for modo in args.modos:
+            salida = subprocess.run(
+                [sys.executable, "-m", "benchmarks.concurrencia", "--worker",
+                 "--clientes", str(clientes), "--requests", str(args.requests)],
+                env={**os.environ, "DB_MODO": modo},
+                capture_output=True, text=True, check=True,
+            )
+            resultado = json.loads(salida.stdout.strip().splitlines()[-1])
+            print(json.dumps(resultado), file=sys.stderr)
+            resultados.append(resultado)
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == "__main__":
+    main()
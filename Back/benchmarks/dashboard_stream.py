@@ -0,0 +1,185 @@
+"""
+Benchmark del dashboard en vivo (GET /dashboard/stream, Server-Sent
+Events) contra el polling de GET /dashboard/summary.
+
+Levanta un uvicorn local (HTTP real: el streaming no se puede medir con
+ASGITransport) sobre datos sintéticos y abre N conexiones SSE repartidas
+entre U usuarios. Reporta:
+
+- memoria del servidor por conexión abierta (RSS antes y después, con
+  las caches ya calientes);
+- CPU del servidor durante una ventana sin cambios, con las N conexiones
+  quietas y con N clientes haciendo polling cada --intervalo segundos
+  (GET condicional con ETag, que igual consulta la versión en la base);
+- latencia de entrega: desde que termina un POST /transacciones/ hasta que
+  todas las conexiones del usuario recibieron el evento "cambios".
+
+Solo Linux (lee /proc del proceso del servidor).
+
+Uso (desde la carpeta Back):
+    python -m benchmarks.dashboard_stream --conexiones 2000 --usuarios 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from .login import percentil
+from .suite import BACK, ObjetivoUvicorn
+
+
+def _rss_kib(pid):
+    with open(f"/proc/{pid}/status") as f:
+        return next(int(linea.split()[1]) for linea in f if linea.startswith("VmRSS:"))
+
+def _cpu_segundos(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        campos = f.read().rsplit(")", 1)[1].split()
+    return (int(campos[11]) + int(campos[12])) / os.sysconf("SC_CLK_TCK")
+
+
+class Conexion:
+    """Una conexión SSE: anota cuándo llega cada evento 'cambios'."""
+
+    def __init__(self, http, token):
+        self.http = http
+        self.token = token
+        self.conectada = asyncio.Event()
+        self.cambios = asyncio.Event()
+        self.recibido_en = None
+
+    async def correr(self):
+        # Como EventSource en el navegador: ticket y después la conexión
+        r = await self.http.post("/dashboard/stream/ticket", headers={"Authorization": f"Bearer {self.token}"})
+        r.raise_for_status()
+        params = {"ticket": r.json()["ticket"]}
+        headers = {"Accept": "text/event-stream"}
+        async with self.http.stream("GET", "/dashboard/stream", params=params, headers=headers) as r:
+            r.raise_for_status()
+            buffer = ""
+            async for texto in r.aiter_text():
+                buffer += texto
+                while "\n\n" in buffer:
+                    evento, buffer = buffer.split("\n\n", 1)
+                    if evento.startswith("event: resumen"):
+                        self.conectada.set()
+                    elif evento.startswith("event: cambios"):
+                        self.recibido_en = time.perf_counter()
+                        self.cambios.set()
+
+
+async def correr(args):
+    import httpx
+    from app import database, models
+    from .datos import CONTRASENIA, generar
+
+    models.crear_db()
+    db = database.SessionLocal()
+    usuarios = generar(db, args.usuarios, 4, args.transacciones)
+    db.close()
+
+    resultados = {"conexiones": args.conexiones, "usuarios": args.usuarios}
+    async with ObjetivoUvicorn() as objetivo:
+        pid = objetivo.proceso.pid
+        limites = httpx.Limits(max_connections=args.conexiones + 16, max_keepalive_connections=args.conexiones + 16)
+        async with objetivo.cliente_http(limites) as http:
+            http.timeout = httpx.Timeout(None)
+            tokens = []
+            for u in usuarios:
+                r = await http.post("/token", data={"username": u["nombre"], "password": CONTRASENIA})
+                tokens.append(r.json()["access_token"])
+
+            # 1. Memoria por conexión. Las primeras conexiones (una por
+            # usuario) calientan la cache de páginas de SQLite y la del
+            # dashboard: no se cuentan
+            conexiones = [Conexion(http, tokens[n % len(tokens)]) for n in range(args.conexiones)]
+            calentamiento = conexiones[:len(tokens)]
+            tareas = [asyncio.create_task(c.correr()) for c in calentamiento]
+            await asyncio.gather(*(c.conectada.wait() for c in calentamiento))
+            await asyncio.sleep(1)
+            rss_antes = _rss_kib(pid)
+            resto = conexiones[len(tokens):]
+            tareas += [asyncio.create_task(c.correr()) for c in resto]
+            inicio = time.perf_counter()
+            await asyncio.gather(*(c.conectada.wait() for c in resto))
+            resultados["segundos_para_conectar"] = round(time.perf_counter() - inicio, 2)
+            await asyncio.sleep(1)
+            rss_despues = _rss_kib(pid)
+            resultados["rss_servidor_mib"] = {"antes": round(rss_antes / 1024, 1), "despues": round(rss_despues / 1024, 1)}
+            resultados["kib_por_conexion"] = round((rss_despues - rss_antes) / max(len(resto), 1), 1)
+
+            # 2. CPU del servidor sin cambios: conexiones quietas
+            cpu = _cpu_segundos(pid)
+            await asyncio.sleep(args.ventana)
+            resultados["cpu_ms_por_segundo_quieto"] = {"sse": round((_cpu_segundos(pid) - cpu) / args.ventana * 1000, 1)}
+
+            # 3. Latencia de entrega de un cambio a todas las pestañas del usuario
+            latencias = []
+            for n in range(args.escrituras):
+                usuario = n % len(usuarios)
+                propias = [c for i, c in enumerate(conexiones) if i % len(tokens) == usuario]
+                for c in propias:
+                    c.cambios.clear()
+                r = await http.post("/transacciones/", headers={"Authorization": f"Bearer {tokens[usuario]}"}, json={
+                    "monto": 10, "descripcion": "bench stream", "tipo": "gasto",
+                    "categoria_id": usuarios[usuario]["categorias"][1],
+                })
+                r.raise_for_status()
+                fin_post = time.perf_counter()
+                await asyncio.gather(*(c.cambios.wait() for c in propias))
+                latencias.append(max(c.recibido_en for c in propias) - fin_post)
+            ms = lambda s: round(s * 1000, 2)
+            resultados["entrega_ms"] = {
+                "p50": ms(percentil(latencias, 50)), "p95": ms(percentil(latencias, 95)),
+                "media": ms(statistics.mean(latencias)),
+            }
+
+            for tarea in tareas:
+                tarea.cancel()
+            await asyncio.gather(*tareas, return_exceptions=True)
+
+            # 2b. La misma ventana con polling (GET condicional cada 'intervalo')
+            async def encuestar(n, fin):
+                token, etag = tokens[n % len(tokens)], None
+                await asyncio.sleep(args.intervalo * n / args.conexiones) # Repartidos en el intervalo
+                while time.perf_counter() < fin:
+                    headers = {"Authorization": f"Bearer {token}"}
+                    if etag:
+                        headers["If-None-Match"] = etag
+                    r = await http.get("/dashboard/summary", headers=headers)
+                    etag = r.headers.get("etag", etag)
+                    await asyncio.sleep(args.intervalo)
+
+            await asyncio.sleep(1)
+            cpu = _cpu_segundos(pid)
+            fin = time.perf_counter() + args.ventana
+            await asyncio.gather(*(encuestar(n, fin) for n in range(args.conexiones)))
+            duracion = args.ventana + (time.perf_counter() - fin)
+            resultados["cpu_ms_por_segundo_quieto"][f"polling_cada_{args.intervalo:g}s"] = round(
+                (_cpu_segundos(pid) - cpu) / duracion * 1000, 1
+            )
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.dashboard_stream")
+    parser.add_argument("--conexiones", type=int, default=2000, help="Conexiones SSE abiertas a la vez")
+    parser.add_argument("--usuarios", type=int, default=50)
+    parser.add_argument("--transacciones", type=int, default=200, help="Transacciones por usuario")
+    parser.add_argument("--ventana", type=float, default=10, help="Segundos sin cambios en que se mide la CPU")
+    parser.add_argument("--intervalo", type=float, default=5, help="Segundos entre pedidos del polling")
+    parser.add_argument("--escrituras", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    sys.path.insert(0, BACK)
+    os.chdir(tempfile.mkdtemp(prefix="bench_dashboard_stream_"))
+    print(json.dumps(asyncio.run(correr(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
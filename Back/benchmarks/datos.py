@@ -0,0 +1,102 @@
+"""
+Generador de datos sintéticos para los benchmarks: N usuarios × M
+categorías × K transacciones por usuario, cargados en bloque con los
+modelos (sin pasar por la API, que sería mucho más lento).
+
+Las transacciones entran con crud.insertar_transacciones, así que los
+resúmenes mensuales y el índice de búsqueda quedan consistentes, igual
+que si se hubieran cargado por la API. Todos los usuarios comparten la
+contraseña CONTRASENIA (se hashea una sola vez). Con SHARDS > 1 cada
+usuario se carga en su shard, como si se hubiera registrado por la API.
+
+Uso (desde la carpeta Back), sobre ./gastos.db del directorio actual:
+    python -m benchmarks.datos --usuarios 20 --categorias 8 --transacciones 5000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+CONTRASENIA = "secreto"
+DESCRIPCIONES = ["Supermercado", "Farmacia", "Colectivo", "Nafta", "Sueldo", "Alquiler", "Internet",
+                 "Restaurante", "Café", "Kiosco", "Librería", "Ferretería"]
+
+
+def generar(db, usuarios, categorias, transacciones, semilla=1, dias=730, lote=10000):
+    """
+    Carga los datos en la sesión 'db' (hace commit por lote) y devuelve
+    una lista con {"id", "nombre", "email", "categorias": [ids]} por
+    usuario, que es lo que necesitan los escenarios.
+    """
+    from app import crud, database, models, shards
+
+    azar = random.Random(semilla)
+    hashed = crud.hash_password(CONTRASENIA)
+    hasta = datetime.utcnow().replace(microsecond=0)
+    desde = hasta - timedelta(days=dias)
+    generados = []
+
+    for u in range(usuarios):
+        nombre = f"bench{u}"
+        usuario = models.Usuario(email=f"{nombre}@example.com", nombre=nombre, hashed_password=hashed)
+        db.add(usuario)
+        db.flush()
+        usuario.shard = shards.shard_nuevo(usuario.id)
+        database.usar_shard(db, usuario.shard)
+        cats = [
+            models.Categoria(nombre=f"Categoría {c}", tipo="ingreso" if c == 0 else "gasto", usuario_id=usuario.id)
+            for c in range(categorias)
+        ]
+        db.add_all(cats)
+        db.flush()
+        tipos = {c.id: c.tipo for c in cats}
+        ids = list(tipos)
+
+        for inicio in range(0, transacciones, lote):
+            filas = []
+            for _ in range(inicio, min(inicio + lote, transacciones)):
+                categoria_id = azar.choice(ids)
+                filas.append({
+                    "fecha": desde + timedelta(seconds=azar.randrange(dias * 86400)),
+                    "monto_centavos": azar.randrange(100, 20_000_000),
+                    "descripcion": f"{azar.choice(DESCRIPCIONES)} {azar.randrange(10000)}",
+                    "tipo": tipos[categoria_id],
+                    "categoria_id": categoria_id,
+                    "usuario_id": usuario.id,
+                })
+            crud.insertar_transacciones(db, usuario.id, filas)
+            db.commit()
+
+        generados.append({"id": usuario.id, "nombre": nombre, "email": usuario.email, "categorias": ids})
+        db.commit()
+    return generados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.datos")
+    parser.add_argument("--usuarios", type=int, default=20)
+    parser.add_argument("--categorias", type=int, default=8)
+    parser.add_argument("--transacciones", type=int, default=5000, help="Transacciones por usuario")
+    parser.add_argument("--semilla", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app import database, models
+
+    models.crear_db()
+    db = database.SessionLocal()
+    inicio = time.perf_counter()
+    usuarios = generar(db, args.usuarios, args.categorias, args.transacciones, args.semilla)
+    db.close()
+    print(json.dumps({
+        "usuarios": len(usuarios),
+        "transacciones": args.usuarios * args.transacciones,
+        "segundos": round(time.perf_counter() - inicio, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
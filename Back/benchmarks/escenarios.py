@@ -0,0 +1,113 @@
+"""
+Escenarios de carga para benchmarks.suite.
+
+Cada escenario es una corrutina que hace una "operación" de un cliente
+virtual (uno o más requests) a través de Cliente.pedir, que mide la
+latencia de cada request. Los clientes se loguean una vez al empezar con
+un usuario de benchmarks.datos y repiten el escenario hasta que se acaba
+el tiempo.
+"""
+import random
+import time
+from datetime import date, timedelta
+
+from .datos import CONTRASENIA
+
+
+class Medicion:
+    """Latencias (segundos) y códigos de respuesta de un escenario."""
+
+    def __init__(self):
+        self.latencias = []
+        self.codigos = {}
+        self.errores = 0
+
+    def registrar(self, latencia, codigo):
+        self.latencias.append(latencia)
+        self.codigos[codigo] = self.codigos.get(codigo, 0) + 1
+        if codigo >= 400:
+            self.errores += 1
+
+
+class Cliente:
+    def __init__(self, http, usuario, medicion, semilla):
+        self.http = http
+        self.usuario = usuario
+        self.medicion = medicion
+        self.azar = random.Random(semilla)
+        self.headers = {}
+
+    async def pedir(self, metodo, url, **kwargs):
+        inicio = time.perf_counter()
+        r = await self.http.request(metodo, url, **kwargs)
+        if self.medicion is not None:
+            self.medicion.registrar(time.perf_counter() - inicio, r.status_code)
+        return r
+
+    async def loguearse(self):
+        r = await self.pedir("POST", "/token", data={"username": self.usuario["nombre"], "password": CONTRASENIA})
+        r.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+# --- Escenarios ---
+
+async def login(cliente):
+    await cliente.loguearse()
+
+
+async def listado(cliente):
+    # Primera página y, la mitad de las veces, la siguiente con el cursor
+    params = {"limit": 50}
+    if cliente.azar.random() < 0.3:
+        params["categoria_id"] = cliente.azar.choice(cliente.usuario["categorias"])
+    r = await cliente.pedir("GET", "/transacciones/", params=params, headers=cliente.headers)
+    cursor = r.headers.get("X-Next-Cursor")
+    if cursor and cliente.azar.random() < 0.5:
+        await cliente.pedir("GET", "/transacciones/", params={**params, "cursor": cursor}, headers=cliente.headers)
+
+
+async def dashboard(cliente):
+    if cliente.azar.random() < 0.5:
+        await cliente.pedir("GET", "/dashboard/summary", headers=cliente.headers)
+    else:
+        granularidad = cliente.azar.choice(["day", "week", "month"])
+        hasta = date.today() + timedelta(days=1)
+        desde = hasta - timedelta(days={"day": 31, "week": 182, "month": 365}[granularidad])
+        await cliente.pedir("GET", "/dashboard/series", headers=cliente.headers, params={
+            "granularity": granularidad, "from": desde.isoformat(), "to": hasta.isoformat(),
+        })
+
+
+async def escritura(cliente):
+    """Alta, edición y baja de una transacción (tres requests)."""
+    categoria_id = cliente.azar.choice(cliente.usuario["categorias"][1:] or cliente.usuario["categorias"])
+    r = await cliente.pedir("POST", "/transacciones/", headers=cliente.headers, json={
+        "monto": round(cliente.azar.uniform(1, 50000), 2), "descripcion": "bench alta",
+        "tipo": "gasto", "categoria_id": categoria_id,
+    })
+    if r.status_code != 200:
+        return
+    transaccion = r.json()
+    await cliente.pedir("PUT", f"/transacciones/{transaccion['id']}", headers=cliente.headers, json={
+        "monto": round(cliente.azar.uniform(1, 50000), 2), "descripcion": "bench edición",
+        "tipo": "gasto", "categoria_id": categoria_id,
+    })
+    await cliente.pedir("DELETE", f"/transacciones/{transaccion['id']}", headers=cliente.headers)
+
+
+# Proporciones aproximadas de uso real: mayormente lecturas
+PESOS_MIXTO = [(listado, 60), (dashboard, 25), (escritura, 10), (login, 5)]
+
+async def mixto(cliente):
+    escenario = cliente.azar.choices([e for e, _ in PESOS_MIXTO], weights=[p for _, p in PESOS_MIXTO])[0]
+    await escenario(cliente)
+
+
+ESCENARIOS = {
+    "login": login,
+    "listado": listado,
+    "dashboard": dashboard,
+    "escritura": escritura,
+    "mixto": mixto,
+}
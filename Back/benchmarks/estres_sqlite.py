@@ -0,0 +1,120 @@
+"""
+Prueba de estrés de lecturas y escrituras concurrentes sobre SQLite.
+
+Varios hilos escriben transacciones (crud.create_user_transaccion) mientras
+otros leen el listado y el dashboard, cada uno con su propia sesión. Se
+cuentan los errores 'database is locked'. Corre una vez con la
+configuración vieja (journal DELETE, sin busy_timeout) y otra con la
+actual (WAL + busy_timeout), cada una en un subproceso con su base.
+
+Uso (desde la carpeta Back):
+    python -m benchmarks.estres_sqlite --escritores 8 --lectores 8 --segundos 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+CONFIGURACIONES = {
+    "anterior": {
+        "SQLITE_JOURNAL_MODE": "DELETE",
+        "SQLITE_SYNCHRONOUS": "FULL",
+        "SQLITE_BUSY_TIMEOUT_MS": "0",
+    },
+    "wal": {
+        "SQLITE_JOURNAL_MODE": "WAL",
+        "SQLITE_SYNCHRONOUS": "NORMAL",
+        "SQLITE_BUSY_TIMEOUT_MS": "5000",
+    },
+}
+
+
+def worker(args):
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="bench_estres_"))
+
+    from sqlalchemy.exc import OperationalError
+    from app import crud, database, models, schemas
+
+    models.crear_db()
+    db = database.SessionLocal()
+    usuario = crud.create_user(db, schemas.UsuarioCreate(email="estres@example.com", nombre="estres", password="x"))
+    categoria = crud.create_user_categoria(db, schemas.CategoriaCreate(nombre="Comida", tipo="gasto"), usuario.id)
+    usuario_id, categoria_id = usuario.id, categoria.id
+    db.close()
+
+    contadores = {"escrituras": 0, "lecturas": 0, "bloqueos": 0, "otros_errores": 0}
+    lock = threading.Lock()
+    fin = time.perf_counter() + args.segundos
+
+    def sumar(clave):
+        with lock:
+            contadores[clave] += 1
+
+    def escritor():
+        while time.perf_counter() < fin:
+            db = database.SessionLocal()
+            try:
+                crud.create_user_transaccion(db, schemas.TransaccionCreate(
+                    monto=1, descripcion="estres", tipo="gasto", categoria_id=categoria_id
+                ), usuario_id)
+                sumar("escrituras")
+            except OperationalError as e:
+                sumar("bloqueos" if "locked" in str(e) else "otros_errores")
+            finally:
+                db.close()
+
+    def lector():
+        while time.perf_counter() < fin:
+            db = database.SessionLocal()
+            try:
+                crud.get_transacciones(db, usuario_id, limit=50)
+                crud.get_dashboard_summary(db, usuario_id)
+                sumar("lecturas")
+            except OperationalError as e:
+                sumar("bloqueos" if "locked" in str(e) else "otros_errores")
+            finally:
+                db.close()
+
+    hilos = [threading.Thread(target=escritor) for _ in range(args.escritores)]
+    hilos += [threading.Thread(target=lector) for _ in range(args.lectores)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    contadores["escrituras_por_segundo"] = round(contadores["escrituras"] / args.segundos, 1)
+    contadores["lecturas_por_segundo"] = round(contadores["lecturas"] / args.segundos, 1)
+    print(json.dumps(contadores))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.estres_sqlite")
+    parser.add_argument("--escritores", type=int, default=8)
+    parser.add_argument("--lectores", type=int, default=8)
+    parser.add_argument("--segundos", type=float, default=10)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        return worker(args)
+
+    resultados = {}
+    for nombre, variables in CONFIGURACIONES.items():
+        salida = subprocess.run(
+            [sys.executable, "-m", "benchmarks.estres_sqlite", "--worker",
+             "--escritores", str(args.escritores), "--lectores", str(args.lectores),
+             "--segundos", str(args.segundos)],
+            env={**os.environ, **variables},
+            capture_output=True, text=True, check=True,
+        )
+        resultados[nombre] = json.loads(salida.stdout.strip().splitlines()[-1])
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == "__main__":
+    main()
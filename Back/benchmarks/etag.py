@@ -0,0 +1,81 @@
+"""
+Benchmark de los GET condicionales (ETag / If-None-Match).
+
+Carga datos sintéticos con benchmarks.datos y mide, para cada ruta de
+lectura, la mediana de latencia de un GET completo (200) contra el mismo
+GET con el ETag de la respuesta anterior (304: una lectura por PK de la
+versión de datos, sin consulta principal ni serialización).
+
+Uso (desde la carpeta Back):
+    python -m benchmarks.etag --transacciones 50000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+RUTAS = [
+    "/categorias/",
+    "/transacciones/?limit=100",
+    "/dashboard/summary",
+    "/dashboard/series?granularity=day",
+]
+
+
+async def correr(args):
+    import httpx
+    from app import database, models
+    from .datos import CONTRASENIA, generar
+
+    models.crear_db()
+    db = database.SessionLocal()
+    usuario = generar(db, 1, args.categorias, args.transacciones)[0]
+    db.close()
+
+    from app.main import app
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        r = await client.post("/token", data={"username": usuario["nombre"], "password": CONTRASENIA})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        async def mediana(ruta, extra):
+            tiempos = []
+            for _ in range(args.repeticiones):
+                inicio = time.perf_counter()
+                r = await client.get(ruta, headers={**headers, **extra})
+                tiempos.append(time.perf_counter() - inicio)
+            return round(statistics.median(tiempos) * 1000, 2), r
+
+        resultados = {}
+        for ruta in RUTAS:
+            completo_ms, r = await mediana(ruta, {})
+            condicional_ms, r304 = await mediana(ruta, {"If-None-Match": r.headers["etag"]})
+            resultados[ruta] = {
+                "200_ms": completo_ms,
+                "304_ms": condicional_ms,
+                "bytes_200": len(r.content),
+                "status_condicional": r304.status_code,
+            }
+    await database.cerrar_async_engine()
+    return {"transacciones": args.transacciones, "rutas": resultados}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.etag")
+    parser.add_argument("--transacciones", type=int, default=50_000)
+    parser.add_argument("--categorias", type=int, default=8)
+    parser.add_argument("--repeticiones", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="bench_etag_"))
+    print(json.dumps(asyncio.run(correr(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
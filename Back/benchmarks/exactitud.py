@@ -0,0 +1,80 @@
+"""
+Chequeo de exactitud de los totales con montos en centavos.
+
+Carga N transacciones con montos al azar (con centavos) en el mes actual
+y compara, como JSON, el total del mes calculado de tres formas:
+  - /dashboard/summary: lee el rollup resumenes_mensuales
+  - /dashboard/series:  suma las filas crudas de transacciones
+  - sumas parciales por lotes de las filas crudas, en orden aleatorio
+Con enteros las tres coinciden byte por byte; como referencia se muestra
+cuánto difieren las mismas sumas hechas con float.
+
+Uso (desde la carpeta Back):
+    python -m benchmarks.exactitud --filas 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+from decimal import Decimal
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.exactitud")
+    parser.add_argument("--filas", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="bench_exactitud_"))
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app import database, models
+
+    azar = random.Random(1)
+    montos = [Decimal(azar.randrange(1, 10_000_000)).scaleb(-2) for _ in range(args.filas)]
+
+    with TestClient(app) as client:
+        client.post("/usuarios/", json={"email": "exacto@example.com", "nombre": "exacto", "password": "secreto"})
+        r = client.post("/token", data={"username": "exacto", "password": "secreto"})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        categoria = client.post("/categorias/", json={"nombre": "Varios", "tipo": "gasto"}, headers=headers).json()["id"]
+        for desde in range(0, len(montos), 5000):
+            client.post("/transacciones/bulk", headers=headers, json=[
+                {"monto": str(m), "tipo": "gasto", "categoria_id": categoria} for m in montos[desde:desde + 5000]
+            ]).raise_for_status()
+
+        resumen = client.get("/dashboard/summary", headers=headers).json()
+        serie = client.get("/dashboard/series", headers=headers).json()["puntos"][-1]
+
+    db = database.SessionLocal()
+    centavos = [c for (c,) in db.query(models.Transaccion.monto_centavos)]
+    db.close()
+    azar.shuffle(centavos)
+    parciales = [sum(centavos[i:i + 977]) for i in range(0, len(centavos), 977)]
+
+    en_json = lambda valor: json.dumps({"total_gastos": valor})
+    desde_resumen = en_json(resumen["total_gastos"])
+    desde_filas = en_json(serie["total_gastos"])
+    desde_parciales = en_json(float(models.centavos_a_monto(sum(parciales))))
+
+    flotantes = [float(m) for m in montos]
+    suma_float = sum(flotantes)
+    azar.shuffle(flotantes)
+    suma_float_parcial = sum(sum(flotantes[i:i + 977]) for i in range(0, len(flotantes), 977))
+
+    print(json.dumps({
+        "filas": args.filas,
+        "esperado": en_json(float(sum(montos))),
+        "resumen_mensual": desde_resumen,
+        "filas_crudas": desde_filas,
+        "sumas_parciales": desde_parciales,
+        "coinciden": desde_resumen == desde_filas == desde_parciales == en_json(float(sum(montos))),
+        "con_float": {"suma": repr(suma_float), "suma_parcial_desordenada": repr(suma_float_parcial)},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark de la exportación en streaming (app/exportacion.py).
+
+Carga N transacciones sintéticas con la importación y las exporta en cada
+formato consumiendo el generador como lo haría la StreamingResponse.
+Reporta filas por segundo, bytes generados (y comprimidos con gzip) y el
+pico de RSS, que no debería crecer con N.
+
+Uso (desde la carpeta Back):
+    python -m benchmarks.exportacion --filas 500000
+    SQLITE_MMAP_SIZE=0 python -m benchmarks.exportacion --formatos csv ndjson
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import zlib
+
+from .importacion import generar_csv, rss_pico_mb
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.exportacion")
+    parser.add_argument("--filas", type=int, default=500_000)
+    parser.add_argument("--formatos", nargs="+", default=["csv", "ndjson", "parquet"], choices=["csv", "ndjson", "parquet"])
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="bench_exportacion_"))
+
+    from app import crud, database, exportacion, importacion, models, schemas
+
+    models.crear_db()
+    db = database.SessionLocal()
+    usuario_id = crud.create_user(db, schemas.UsuarioCreate(email="export@example.com", nombre="export", password="x")).id
+    generar_csv("resumen.csv", args.filas)
+    with open("resumen.csv", "rb") as archivo:
+        for _ in importacion.importar(db, archivo, "csv", usuario_id):
+            pass
+    db.close()
+
+    resultados = {"filas": args.filas, "rss_antes_mb": rss_pico_mb()}
+    for formato in args.formatos:
+        if formato == "parquet" and not exportacion.parquet_disponible():
+            resultados[formato] = "pyarrow no instalado"
+            continue
+        compresor = zlib.compressobj(6, zlib.DEFLATED, 31) # Mismo formato que GZipMiddleware
+        total, comprimidos = 0, 0
+        inicio = time.perf_counter()
+        for bloque in exportacion.exportar(formato, usuario_id):
+            total += len(bloque)
+            comprimidos += len(compresor.compress(bloque))
+        comprimidos += len(compresor.flush())
+        duracion = time.perf_counter() - inicio
+        resultados[formato] = {
+            "segundos": round(duracion, 2),
+            "filas_por_segundo": round(args.filas / duracion),
+            "mb": round(total / 1024 / 1024, 1),
+            "mb_gzip": round(comprimidos / 1024 / 1024, 1),
+            "rss_pico_mb": rss_pico_mb(),
+        }
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark del group commit de escrituras (app/agrupador.py).
+
+Carga datos sintéticos y corre C clientes concurrentes con el escenario
+'escritura' de benchmarks.escenarios (alta, edición y baja de una
+transacción) con GROUP_COMMIT desactivado y activado, usando el mismo
+motor que benchmarks.suite. Reporta requests por segundo y latencias de
+cada corrida y, con group commit, cuántas escrituras entraron por lote.
+
+Con SQLITE_SYNCHRONOUS=FULL cada commit hace fsync: ahí es donde más se
+nota juntar commits.
+
+Uso (desde la carpeta Back):
+    python -m benchmarks.group_commit --clientes 32
+    python -m benchmarks.group_commit --clientes 32 --synchronous FULL
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+from .escenarios import escritura
+from .suite import BACK, ObjetivoASGI, correr_escenario
+
+
+async def correr(args):
+    from app import config, crud, database, models
+    from app.agrupador import agrupador
+    from .datos import generar
+
+    models.crear_db()
+    db = database.SessionLocal()
+    usuarios = generar(db, args.usuarios, args.categorias, args.transacciones, args.semilla)
+    db.close()
+
+    resultados = {}
+    async with ObjetivoASGI() as objetivo:
+        for nombre, activado in (("sin_group_commit", False), ("con_group_commit", True)):
+            config.GROUP_COMMIT = activado
+            resultados[nombre] = await correr_escenario(objetivo, escritura, usuarios, args)
+    resultados["lotes"] = agrupador.estadisticas()
+
+    db = database.SessionLocal()
+    resultados["resumenes_consistentes"] = not crud.verificar_resumenes(db)
+    db.close()
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.group_commit")
+    parser.add_argument("--usuarios", type=int, default=20)
+    parser.add_argument("--categorias", type=int, default=8)
+    parser.add_argument("--transacciones", type=int, default=1000, help="Transacciones por usuario")
+    parser.add_argument("--clientes", type=int, default=32)
+    parser.add_argument("--segundos", type=float, default=5)
+    parser.add_argument("--calentamiento", type=float, default=1)
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--synchronous", default=None, help="PRAGMA synchronous de SQLite (NORMAL, FULL...)")
+    parser.add_argument("--ventana-ms", type=float, default=None, help="GROUP_COMMIT_VENTANA_MS")
+    parser.add_argument("--max-lote", type=int, default=None, help="GROUP_COMMIT_MAX_LOTE")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    for variable, valor in (("SQLITE_SYNCHRONOUS", args.synchronous),
+                            ("GROUP_COMMIT_VENTANA_MS", args.ventana_ms),
+                            ("GROUP_COMMIT_MAX_LOTE", args.max_lote)):
+        if valor is not None:
+            os.environ[variable] = str(valor)
+    sys.path.insert(0, BACK)
+    os.chdir(tempfile.mkdtemp(prefix="bench_group_commit_"))
+    print(json.dumps(asyncio.run(correr(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
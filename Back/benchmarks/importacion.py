@@ -0,0 +1,104 @@
+"""
+Benchmark de la importación de resúmenes bancarios (app/importacion.py).
+
+Genera un CSV (u OFX) sintético de N filas en disco, sin tenerlo en
+memoria, y lo importa con importacion.importar sobre una base temporal.
+Reporta filas por segundo y el pico de memoria (RSS) del proceso, que
+debería quedar casi igual con 10 mil o con 1 millón de filas.
+
+Ojo: el RSS también cuenta las páginas de la base que SQLite tiene en
+cache o mapeadas (hasta SQLITE_CACHE_SIZE + SQLITE_MMAP_SIZE). Para ver
+solo la memoria de la importación, correrlo con SQLITE_MMAP_SIZE=0.
+
+Uso (desde la carpeta Back):
+    python -m benchmarks.importacion --filas 1000000
+    python -m benchmarks.importacion --filas 200000 --formato ofx
+    SQLITE_MMAP_SIZE=0 SQLITE_CACHE_SIZE=-2000 python -m benchmarks.importacion
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DESCRIPCIONES = ["Supermercado", "Farmacia", "Colectivo", "Nafta", "Sueldo", "Alquiler", "Internet", "Restaurante"]
+CATEGORIAS = ["Comida", "Salud", "Transporte", "Servicios", "Sueldo", ""]
+
+
+def rss_pico_mb():
+    # En Linux ru_maxrss está en KiB
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def generar_csv(ruta, filas, semilla=1):
+    azar = random.Random(semilla)
+    inicio = datetime(2015, 1, 1)
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write("fecha;descripcion;monto;categoria\n")
+        for i in range(filas):
+            fecha = inicio + timedelta(seconds=azar.randrange(10 * 365 * 86400))
+            monto = round(azar.uniform(-50000, 50000), 2)
+            f.write(f"{fecha:%Y-%m-%d %H:%M:%S};{azar.choice(DESCRIPCIONES)} {i};{monto};{azar.choice(CATEGORIAS)}\n")
+
+
+def generar_ofx(ruta, filas, semilla=1):
+    azar = random.Random(semilla)
+    inicio = datetime(2015, 1, 1)
+    with open(ruta, "w", encoding="latin-1") as f:
+        f.write("OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n")
+        for i in range(filas):
+            fecha = inicio + timedelta(seconds=azar.randrange(10 * 365 * 86400))
+            monto = round(azar.uniform(-50000, 50000), 2)
+            f.write(f"<STMTTRN><TRNTYPE>OTHER<DTPOSTED>{fecha:%Y%m%d%H%M%S}<TRNAMT>{monto}"
+                    f"<FITID>{i}<NAME>{azar.choice(DESCRIPCIONES)} {i}</STMTTRN>\n")
+        f.write("</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.importacion")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--formato", choices=["csv", "ofx"], default="csv")
+    parser.add_argument("--lote", type=int, default=None, help="Filas por lote (por defecto IMPORT_LOTE)")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="bench_importacion_"))
+
+    from app import crud, database, importacion, models, schemas
+
+    ruta = os.path.abspath(f"resumen.{args.formato}")
+    inicio = time.perf_counter()
+    (generar_csv if args.formato == "csv" else generar_ofx)(ruta, args.filas)
+    generacion = time.perf_counter() - inicio
+
+    models.crear_db()
+    db = database.SessionLocal()
+    usuario = crud.create_user(db, schemas.UsuarioCreate(email="import@example.com", nombre="import", password="x"))
+    rss_antes = rss_pico_mb()
+
+    inicio = time.perf_counter()
+    with open(ruta, "rb") as archivo:
+        for evento in importacion.importar(db, archivo, args.formato, usuario.id, tamanio_lote=args.lote):
+            pass
+    duracion = time.perf_counter() - inicio
+    db.close()
+
+    print(json.dumps({
+        "formato": args.formato,
+        "filas": args.filas,
+        "archivo_mb": round(os.path.getsize(ruta) / 1024 / 1024, 1),
+        "generacion_segundos": round(generacion, 1),
+        "importacion_segundos": round(duracion, 1),
+        "filas_por_segundo": round(args.filas / duracion),
+        "rss_antes_mb": rss_antes,
+        "rss_pico_mb": rss_pico_mb(),
+        "resumen": {k: v for k, v in evento.items() if k != "rechazos"},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark de logins sostenidos por segundo contra POST /token.
+
+Corre la app en el mismo proceso (httpx + ASGITransport) sobre una base
+temporal, crea algunos usuarios y lanza N clientes concurrentes que se
+loguean sin parar durante unos segundos.
+
+Uso (desde la carpeta Back):
+    python -m benchmarks.login --clientes 32 --segundos 10
+    HASH_WORKERS=8 ARGON2_MEMORY_COST=65536 python -m benchmarks.login
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+async def correr(args):
+    import httpx
+    from app.main import app
+    from app import auth
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        usuarios = [f"bench{i}" for i in range(args.usuarios)]
+        for nombre in usuarios:
+            await client.post("/usuarios/", json={
+                "email": f"{nombre}@example.com", "nombre": nombre, "password": "secreto"
+            })
+
+        latencias = []
+        codigos = {}
+        fin = time.perf_counter() + args.segundos
+
+        async def cliente(n):
+            nombre = usuarios[n % len(usuarios)]
+            while time.perf_counter() < fin:
+                inicio = time.perf_counter()
+                r = await client.post("/token", data={"username": nombre, "password": "secreto"})
+                latencias.append(time.perf_counter() - inicio)
+                codigos[r.status_code] = codigos.get(r.status_code, 0) + 1
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente(n) for n in range(args.clientes)))
+        duracion = time.perf_counter() - inicio
+
+    ok = codigos.get(200, 0)
+    return {
+        "clientes": args.clientes,
+        "segundos": round(duracion, 2),
+        "logins_ok": ok,
+        "logins_por_segundo": round(ok / duracion, 1),
+        "codigos": codigos,
+        "latencia_ms": {
+            "media": round(statistics.mean(latencias) * 1000, 1) if latencias else None,
+            "p50": round(percentil(latencias, 50) * 1000, 1) if latencias else None,
+            "p95": round(percentil(latencias, 95) * 1000, 1) if latencias else None,
+            "p99": round(percentil(latencias, 99) * 1000, 1) if latencias else None,
+        },
+        "executor_hash": auth.estadisticas_hash(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.login")
+    parser.add_argument("--clientes", type=int, default=32, help="Clientes concurrentes")
+    parser.add_argument("--segundos", type=float, default=10, help="Duración de la medición")
+    parser.add_argument("--usuarios", type=int, default=8, help="Usuarios distintos a loguear")
+    args = parser.parse_args(argv)
+
+    # La app usa ./gastos.db: trabajamos en un directorio temporal
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="bench_login_"))
+    print(json.dumps(asyncio.run(correr(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark de fusión y recategorización: mover las transacciones de una
+categoría con N pedidos a PUT /transacciones/{id} contra un solo
+POST /categorias/{id}/merge?into=... o POST /transacciones/recategorizar.
+
+Corre la app en el mismo proceso (httpx + ASGITransport) sobre datos
+sintéticos (benchmarks.datos): un usuario con --transacciones repartidas
+entre sus categorías. Los PUT se miden sobre una muestra de --muestra
+transacciones y se extrapolan a toda la categoría; después se fusiona el
+resto de la categoría de una vez y se recategoriza lo que matchea una
+búsqueda de texto. Al final verifica que los resúmenes mensuales sigan
+cuadrando con las transacciones.
+
+Uso (desde la carpeta Back):
+    python -m benchmarks.recategorizar --transacciones 50000 --muestra 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from .suite import BACK
+
+
+async def correr(args):
+    import httpx
+    from app.main import app
+    from app import config, crud, database, models, shards
+    from .datos import CONTRASENIA, generar
+
+    models.crear_db()
+    db = database.SessionLocal()
+    usuario = generar(db, 1, args.categorias, args.transacciones, args.semilla)[0]
+    db.close()
+    _, origen, destino, otra = usuario["categorias"][:4]
+
+    db = shards.sesion_de_usuario(usuario["id"])
+    filas = db.query(
+        models.Transaccion.id, models.Transaccion.monto_centavos, models.Transaccion.descripcion,
+        models.Transaccion.tipo, models.Transaccion.fecha,
+    ).filter(models.Transaccion.categoria_id == origen).all()
+    db.close()
+    muestra = filas[:args.muestra]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        r = await client.post("/token", data={"username": usuario["nombre"], "password": CONTRASENIA})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        inicio = time.perf_counter()
+        for id_, centavos, descripcion, tipo, fecha in muestra:
+            r = await client.put(f"/transacciones/{id_}", headers=headers, json={
+                "monto": str(models.centavos_a_monto(centavos)), "descripcion": descripcion,
+                "tipo": tipo, "fecha": fecha.isoformat(), "categoria_id": destino,
+            })
+            r.raise_for_status()
+        individual = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        r = await client.post(f"/categorias/{origen}/merge", params={"into": destino}, headers=headers)
+        r.raise_for_status()
+        fusion = time.perf_counter() - inicio
+        fusionadas = r.json()["transacciones"]
+
+        inicio = time.perf_counter()
+        r = await client.post("/transacciones/recategorizar", headers=headers, json={
+            "categoria_id": otra, "q": args.busqueda, "categoria_origen_id": destino,
+        })
+        r.raise_for_status()
+        recategorizacion = time.perf_counter() - inicio
+        recategorizadas = r.json()["transacciones"]
+
+    consistentes = True
+    for n in range(config.SHARDS):
+        db = shards.sesion_de_shard(n)
+        consistentes = consistentes and not crud.verificar_resumenes(db)
+        db.close()
+    await database.cerrar_async_engine()
+
+    ms_por_put = individual / len(muestra) * 1000
+    ms = lambda s: round(s * 1000, 1)
+    return {
+        "transacciones": args.transacciones,
+        "en_la_categoria": len(filas),
+        "put_individual": {
+            "muestra": len(muestra), "ms_por_transaccion": round(ms_por_put, 3),
+            "segundos_estimados_categoria": round(ms_por_put * len(filas) / 1000, 2),
+        },
+        "merge": {"transacciones": fusionadas, "ms": ms(fusion)},
+        "recategorizar": {"q": args.busqueda, "transacciones": recategorizadas, "ms": ms(recategorizacion)},
+        # Contra los mismos movimientos hechos de a un PUT
+        "aceleracion_merge": round(ms_por_put * fusionadas / 1000 / fusion, 1),
+        "aceleracion_recategorizar": round(ms_por_put * recategorizadas / 1000 / recategorizacion, 1),
+        "resumenes_consistentes": consistentes,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.recategorizar")
+    parser.add_argument("--transacciones", type=int, default=50000, help="Transacciones del usuario")
+    parser.add_argument("--categorias", type=int, default=4, help="Categorías del usuario (al menos 4)")
+    parser.add_argument("--muestra", type=int, default=500, help="PUT individuales a medir")
+    parser.add_argument("--busqueda", default="supermercado", help="Texto para POST /transacciones/recategorizar")
+    parser.add_argument("--semilla", type=int, default=1)
+    args = parser.parse_args(argv)
+    if args.categorias < 4:
+        parser.error("--categorias tiene que ser al menos 4")
+
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    sys.path.insert(0, BACK)
+    os.chdir(tempfile.mkdtemp(prefix="bench_recategorizar_"))
+    print(json.dumps(asyncio.run(correr(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
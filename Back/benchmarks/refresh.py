@@ -0,0 +1,113 @@
+"""
+Benchmark del costo de renovar la sesión: POST /token (usuario y
+contraseña, verificación de Argon2) contra POST /token/refresh (refresh
+token rotativo, sin Argon2).
+
+Corre la app en el mismo proceso (httpx + ASGITransport) sobre una base
+temporal. Para cada endpoint, N clientes concurrentes piden tokens sin
+parar durante unos segundos (en refresh, cada cliente usa el refresh token
+que le devolvió el pedido anterior). Reporta pedidos por segundo, latencia
+y segundos de CPU del proceso por pedido (incluye los hilos de Argon2).
+
+Uso (desde la carpeta Back):
+    python -m benchmarks.refresh --clientes 32 --segundos 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from .login import percentil
+
+
+async def medir(pedir, clientes, segundos):
+    latencias = []
+    codigos = {}
+    fin = time.perf_counter() + segundos
+
+    async def cliente(n):
+        while time.perf_counter() < fin:
+            inicio = time.perf_counter()
+            r = await pedir(n)
+            latencias.append(time.perf_counter() - inicio)
+            codigos[r.status_code] = codigos.get(r.status_code, 0) + 1
+
+    cpu = time.process_time()
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(n) for n in range(clientes)))
+    duracion = time.perf_counter() - inicio
+    cpu = time.process_time() - cpu
+
+    ok = codigos.get(200, 0)
+    ms = lambda segundos: round(segundos * 1000, 2)
+    return {
+        "pedidos_ok": ok,
+        "pedidos_por_segundo": round(ok / duracion, 1),
+        "cpu_ms_por_pedido": ms(cpu / len(latencias)) if latencias else None,
+        "codigos": {str(k): v for k, v in sorted(codigos.items())},
+        "latencia_ms": {
+            "media": ms(statistics.mean(latencias)) if latencias else None,
+            "p50": ms(percentil(latencias, 50)) if latencias else None,
+            "p95": ms(percentil(latencias, 95)) if latencias else None,
+        },
+    }
+
+
+async def correr(args):
+    import httpx
+    from app import database, models
+    from .datos import CONTRASENIA, generar
+
+    models.crear_db()
+    db = database.SessionLocal()
+    usuarios = [u["nombre"] for u in generar(db, args.usuarios, 1, 0)]
+    db.close()
+
+    from app.main import app
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login(n):
+            return await client.post("/token", data={"username": usuarios[n % len(usuarios)], "password": CONTRASENIA})
+
+        refresh_tokens = [(await login(n)).json()["refresh_token"] for n in range(args.clientes)]
+
+        async def refresh(n):
+            r = await client.post("/token/refresh", json={"refresh_token": refresh_tokens[n]})
+            if r.status_code == 200:
+                refresh_tokens[n] = r.json()["refresh_token"]
+            return r
+
+        resultados = {
+            "token": await medir(login, args.clientes, args.segundos),
+            "refresh": await medir(refresh, args.clientes, args.segundos),
+        }
+    await database.cerrar_async_engine()
+
+    token, refresh = resultados["token"], resultados["refresh"]
+    if token["pedidos_por_segundo"] and refresh["cpu_ms_por_pedido"]:
+        resultados["refresh_vs_token"] = {
+            "pedidos_por_segundo": round(refresh["pedidos_por_segundo"] / token["pedidos_por_segundo"], 1),
+            "cpu_por_pedido": round(token["cpu_ms_por_pedido"] / refresh["cpu_ms_por_pedido"], 1),
+        }
+    return {"clientes": args.clientes, "segundos": args.segundos, **resultados}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.refresh")
+    parser.add_argument("--clientes", type=int, default=32, help="Clientes concurrentes")
+    parser.add_argument("--segundos", type=float, default=10, help="Duración de cada medición")
+    parser.add_argument("--usuarios", type=int, default=8, help="Usuarios distintos")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="bench_refresh_"))
+    print(json.dumps(asyncio.run(correr(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark de la serialización de los listados (GET /transacciones/ y
+GET /categorias/).
+
+Para cada tamaño de página compara el camino anterior (objetos del ORM,
+validación contra el response_model con serialize_response de FastAPI y
+JSONResponse) con el actual (tuplas de columnas, dicts armados en crud.py
+y ORJSONResponse). Reporta la mediana de consulta, serialización y total
+por página, y si los dos cuerpos son idénticos byte a byte.
+
+Uso (desde la carpeta Back):
+    python -m benchmarks.serializacion --transacciones 20000 --paginas 100 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+def _ruta(app, path):
+    return next(r for r in app.routes if getattr(r, "path", None) == path and "GET" in r.methods)
+
+
+async def medir(consultar, serializar, repeticiones):
+    consultas, serializaciones = [], []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        filas = consultar()
+        medio = time.perf_counter()
+        cuerpo = await serializar(filas)
+        consultas.append(medio - inicio)
+        serializaciones.append(time.perf_counter() - medio)
+    ms = lambda tiempos: round(statistics.median(tiempos) * 1000, 3)
+    totales = [c + s for c, s in zip(consultas, serializaciones)]
+    return {"consulta_ms": ms(consultas), "serializacion_ms": ms(serializaciones), "total_ms": ms(totales)}, cuerpo
+
+
+async def correr(args):
+    from fastapi.responses import ORJSONResponse
+    from fastapi.routing import serialize_response
+    from starlette.responses import JSONResponse
+
+    from app import crud, database, models
+    from app.main import app
+    from .datos import generar
+
+    models.crear_db()
+    db = database.SessionLocal()
+    usuario = generar(db, 1, args.categorias, args.transacciones)[0]
+    uid = usuario["id"]
+
+    listados = {
+        "/transacciones/": (crud.get_transacciones, crud.get_transacciones_json),
+        "/categorias/": (crud.get_categorias, crud.get_categorias_json),
+    }
+    resultados = {}
+    for path, (orm, columnas) in listados.items():
+        campo = _ruta(app, path).response_field
+
+        async def anterior(objetos):
+            contenido = await serialize_response(field=campo, response_content=objetos, is_coroutine=True)
+            return JSONResponse(contenido).body
+
+        async def actual(filas):
+            return ORJSONResponse(filas).body
+
+        for pagina in args.paginas:
+            antes, cuerpo_antes = await medir(lambda: orm(db, uid, limit=pagina), anterior, args.repeticiones)
+            despues, cuerpo_despues = await medir(lambda: columnas(db, uid, limit=pagina), actual, args.repeticiones)
+            resultados[f"{path}?limit={pagina}"] = {
+                "filas": len(json.loads(cuerpo_despues)),
+                "anterior": antes,
+                "actual": despues,
+                "aceleracion_total": round(antes["total_ms"] / despues["total_ms"], 2) if despues["total_ms"] else None,
+                "cuerpos_identicos": cuerpo_antes == cuerpo_despues,
+            }
+    db.close()
+    return {"transacciones": args.transacciones, "listados": resultados}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serializacion")
+    parser.add_argument("--transacciones", type=int, default=20_000)
+    parser.add_argument("--categorias", type=int, default=8)
+    parser.add_argument("--paginas", type=int, nargs="+", default=[100, 1000], help="Tamaños de página (limit)")
+    parser.add_argument("--repeticiones", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="bench_serializacion_"))
+    print(json.dumps(asyncio.run(correr(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
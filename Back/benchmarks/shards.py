@@ -0,0 +1,101 @@
+"""
+Benchmark de escrituras con la base repartida en shards (app/shards.py).
+
+Para cada cantidad de shards carga los mismos datos sintéticos en una
+carpeta temporal nueva y corre C clientes concurrentes con el escenario
+'escritura' de benchmarks.escenarios (alta, edición y baja de una
+transacción), con el mismo motor que benchmarks.suite. Cada cantidad corre
+en un subproceso propio porque SHARDS se lee al importar la app. Reporta
+requests por segundo y latencias, y la aceleración contra un solo shard.
+
+Cada shard es un archivo SQLite con su propio lock de escritura: con
+SQLITE_SYNCHRONOUS=FULL (un fsync por commit) es donde más se nota.
+
+Uso (desde la carpeta Back):
+    python -m benchmarks.shards --shards 1 2 4 --clientes 32
+    python -m benchmarks.shards --shards 1 2 4 --synchronous FULL
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from .escenarios import escritura
+from .suite import BACK, ObjetivoASGI, correr_escenario
+
+
+async def correr(args):
+    from app import config, crud, database, models, shards
+    from .datos import generar
+
+    models.crear_db()
+    db = database.SessionLocal()
+    usuarios = generar(db, args.usuarios, args.categorias, args.transacciones, args.semilla)
+    db.close()
+
+    async with ObjetivoASGI() as objetivo:
+        resultado = await correr_escenario(objetivo, escritura, usuarios, args)
+    resultado["usuarios_por_shard"] = {str(e["shard"]): e["usuarios"] for e in shards.estado()}
+
+    consistentes = True
+    for n in range(config.SHARDS):
+        db = shards.sesion_de_shard(n)
+        consistentes = consistentes and not crud.verificar_resumenes(db)
+        db.close()
+    resultado["resumenes_consistentes"] = consistentes
+    await database.cerrar_async_engine()
+    return resultado
+
+
+def _parametros(args):
+    return ["--usuarios", str(args.usuarios), "--categorias", str(args.categorias),
+            "--transacciones", str(args.transacciones), "--clientes", str(args.clientes),
+            "--segundos", str(args.segundos), "--calentamiento", str(args.calentamiento),
+            "--semilla", str(args.semilla)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.shards")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4], help="Cantidades de shards a comparar")
+    parser.add_argument("--usuarios", type=int, default=32)
+    parser.add_argument("--categorias", type=int, default=8)
+    parser.add_argument("--transacciones", type=int, default=500, help="Transacciones por usuario")
+    parser.add_argument("--clientes", type=int, default=32)
+    parser.add_argument("--segundos", type=float, default=5)
+    parser.add_argument("--calentamiento", type=float, default=1)
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--synchronous", default=None, help="PRAGMA synchronous de SQLite (NORMAL, FULL...)")
+    parser.add_argument("--interno", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.interno:
+        # Subproceso de una sola cantidad de shards (SHARDS ya viene en el entorno)
+        sys.path.insert(0, BACK)
+        os.chdir(tempfile.mkdtemp(prefix="bench_shards_"))
+        print(json.dumps(asyncio.run(correr(args))))
+        return
+
+    entorno = dict(os.environ)
+    entorno.setdefault("LOG_LEVEL", "ERROR")
+    if args.synchronous is not None:
+        entorno["SQLITE_SYNCHRONOUS"] = args.synchronous
+
+    resultados = {}
+    for cantidad in args.shards:
+        salida = subprocess.run(
+            [sys.executable, "-m", "benchmarks.shards", "--interno", *_parametros(args)],
+            cwd=BACK, env={**entorno, "SHARDS": str(cantidad)}, capture_output=True, text=True, check=True,
+        )
+        resultados[str(cantidad)] = json.loads(salida.stdout.strip().splitlines()[-1])
+
+    base = resultados[str(args.shards[0])]["requests_por_segundo"]
+    for resultado in resultados.values():
+        resultado["aceleracion"] = round(resultado["requests_por_segundo"] / base, 2) if base else None
+    print(json.dumps({"clientes": args.clientes, "shards": resultados}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Suite de carga reproducible de la API.
+
+Genera datos sintéticos (benchmarks.datos) en una base temporal y corre
+los escenarios de benchmarks.escenarios (login, listado, dashboard,
+escritura, mixto) con C clientes concurrentes durante S segundos cada uno,
+contra la app en el mismo proceso (httpx + ASGITransport) o contra un
+uvicorn local (subproceso, HTTP real). Reporta por escenario p50/p95/p99,
+requests por segundo y errores, en JSON.
+
+Con --baseline compara contra un resultado guardado antes (con
+--guardar-baseline) y marca como regresión los escenarios cuyo p95 sube o
+cuyo throughput baja más que --tolerancia; en ese caso sale con código 1.
+Conviene comparar siempre en la misma máquina y con los mismos parámetros.
+
+Uso (desde la carpeta Back):
+    python -m benchmarks.suite --guardar-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json
+    python -m benchmarks.suite --objetivo uvicorn --escenarios listado dashboard --clientes 32
+    DB_MODO=async python -m benchmarks.suite --baseline benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from .escenarios import ESCENARIOS, Cliente, Medicion
+from .login import percentil
+
+BACK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# --- Objetivos: la app en proceso o un uvicorn local ---
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class ObjetivoASGI:
+    nombre = "asgi"
+
+    async def __aenter__(self):
+        import httpx
+        from app.main import app
+
+        self.transport = httpx.ASGITransport(app=app)
+        return self
+
+    def cliente_http(self, limites):
+        import httpx
+        return httpx.AsyncClient(transport=self.transport, base_url="http://bench", limits=limites, timeout=60)
+
+    async def __aexit__(self, *exc):
+        # ASGITransport no corre el lifespan: cerramos el engine async a mano
+        from app import database
+        await database.cerrar_async_engine()
+
+
+class ObjetivoUvicorn:
+    nombre = "uvicorn"
+
+    def __init__(self, puerto=None):
+        self.puerto = puerto or _puerto_libre()
+        self.url = f"http://127.0.0.1:{self.puerto}"
+
+    async def __aenter__(self):
+        import httpx
+
+        # Mismo directorio de trabajo (la base generada) y el mismo entorno
+        self.proceso = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(self.puerto),
+             "--log-level", "warning", "--no-access-log"],
+            env={**os.environ, "PYTHONPATH": BACK},
+        )
+        limite = time.perf_counter() + 30
+        async with httpx.AsyncClient(base_url=self.url) as http:
+            while True:
+                try:
+                    # Cualquier respuesta sirve: con METRICAS_TOKEN definido es un 401
+                    await http.get("/metrics")
+                    return self
+                except httpx.TransportError:
+                    pass
+                if self.proceso.poll() is not None or time.perf_counter() > limite:
+                    raise RuntimeError("uvicorn no arrancó")
+                await asyncio.sleep(0.1)
+
+    def cliente_http(self, limites):
+        import httpx
+        return httpx.AsyncClient(base_url=self.url, limits=limites, timeout=60)
+
+    async def __aexit__(self, *exc):
+        self.proceso.terminate()
+        self.proceso.wait(timeout=30)
+
+
+# --- Medición ---
+
+async def correr_escenario(objetivo, escenario, usuarios, args):
+    import httpx
+
+    limites = httpx.Limits(max_connections=args.clientes, max_keepalive_connections=args.clientes)
+    async with objetivo.cliente_http(limites) as http:
+        clientes = [Cliente(http, usuarios[n % len(usuarios)], None, args.semilla + n) for n in range(args.clientes)]
+        await asyncio.gather(*(c.loguearse() for c in clientes))
+
+        async def repetir(cliente, fin):
+            while time.perf_counter() < fin:
+                await escenario(cliente)
+
+        # Calentamiento sin medir (planes de consulta, cache de usuarios, páginas de SQLite)
+        await asyncio.gather(*(repetir(c, time.perf_counter() + args.calentamiento) for c in clientes))
+
+        medicion = Medicion()
+        for cliente in clientes:
+            cliente.medicion = medicion
+        inicio = time.perf_counter()
+        await asyncio.gather(*(repetir(c, inicio + args.segundos) for c in clientes))
+        duracion = time.perf_counter() - inicio
+
+    latencias = medicion.latencias
+    ms = lambda segundos: round(segundos * 1000, 2) if segundos is not None else None
+    return {
+        "requests": len(latencias),
+        "errores": medicion.errores,
+        "codigos": {str(k): v for k, v in sorted(medicion.codigos.items())},
+        "requests_por_segundo": round(len(latencias) / duracion, 1),
+        "latencia_ms": {
+            "p50": ms(percentil(latencias, 50)),
+            "p95": ms(percentil(latencias, 95)),
+            "p99": ms(percentil(latencias, 99)),
+            "media": ms(statistics.mean(latencias)) if latencias else None,
+            "max": ms(max(latencias)) if latencias else None,
+        },
+    }
+
+
+def comparar(resultado, baseline, tolerancia):
+    """Por escenario: cociente actual/baseline y si es una regresión."""
+    comparacion = {}
+    for nombre, actual in resultado["escenarios"].items():
+        base = baseline.get("escenarios", {}).get(nombre)
+        if not base or not base["requests"] or not actual["requests"]:
+            continue
+        cocientes = {
+            p: round(actual["latencia_ms"][p] / base["latencia_ms"][p], 2)
+            for p in ("p50", "p95", "p99") if base["latencia_ms"][p]
+        }
+        cocientes["requests_por_segundo"] = round(actual["requests_por_segundo"] / base["requests_por_segundo"], 2)
+        motivos = []
+        if cocientes.get("p95", 1) > 1 + tolerancia:
+            motivos.append(f"p95 {base['latencia_ms']['p95']} -> {actual['latencia_ms']['p95']} ms")
+        if cocientes["requests_por_segundo"] < 1 - tolerancia:
+            motivos.append(f"throughput {base['requests_por_segundo']} -> {actual['requests_por_segundo']} req/s")
+        if actual["errores"] > base["errores"]:
+            motivos.append(f"errores {base['errores']} -> {actual['errores']}")
+        comparacion[nombre] = {"cociente": cocientes, "regresion": bool(motivos), "motivos": motivos}
+    return comparacion
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACK,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def correr(args):
+    from app import database, models
+    from .datos import generar
+
+    models.crear_db()
+    db = database.SessionLocal()
+    inicio = time.perf_counter()
+    usuarios = generar(db, args.usuarios, args.categorias, args.transacciones, args.semilla)
+    db.close()
+    carga = time.perf_counter() - inicio
+
+    objetivo = ObjetivoUvicorn(args.puerto) if args.objetivo == "uvicorn" else ObjetivoASGI()
+    escenarios = {}
+    async with objetivo:
+        for nombre in args.escenarios:
+            escenarios[nombre] = await correr_escenario(objetivo, ESCENARIOS[nombre], usuarios, args)
+            print(json.dumps({nombre: escenarios[nombre]}), file=sys.stderr)
+
+    return {
+        "objetivo": objetivo.nombre,
+        "parametros": {
+            "usuarios": args.usuarios, "categorias": args.categorias, "transacciones": args.transacciones,
+            "clientes": args.clientes, "segundos": args.segundos, "semilla": args.semilla,
+        },
+        "entorno": {
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "db_modo": os.environ.get("DB_MODO", "sync"),
+        },
+        "carga_datos_segundos": round(carga, 1),
+        "escenarios": escenarios,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    parser.add_argument("--objetivo", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--escenarios", nargs="+", choices=list(ESCENARIOS), default=list(ESCENARIOS))
+    parser.add_argument("--usuarios", type=int, default=20)
+    parser.add_argument("--categorias", type=int, default=8)
+    parser.add_argument("--transacciones", type=int, default=5000, help="Transacciones por usuario")
+    parser.add_argument("--clientes", type=int, default=16, help="Clientes concurrentes")
+    parser.add_argument("--segundos", type=float, default=5, help="Duración de cada escenario")
+    parser.add_argument("--calentamiento", type=float, default=1, help="Segundos sin medir antes de cada escenario")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--puerto", type=int, default=None, help="Puerto de uvicorn (por defecto, uno libre)")
+    parser.add_argument("--salida", help="Archivo donde guardar el resultado")
+    parser.add_argument("--baseline", help="Resultado anterior contra el que comparar")
+    parser.add_argument("--guardar-baseline", metavar="RUTA", help="Guardar este resultado como baseline")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Empeoramiento aceptado (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    rutas = {k: os.path.abspath(v) for k, v in vars(args).items()
+             if k in ("salida", "baseline", "guardar_baseline") and v}
+
+    # Que los logs de la app (consultas lentas) no se mezclen con el JSON
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    # La app usa ./gastos.db: trabajamos en un directorio temporal
+    sys.path.insert(0, BACK)
+    os.chdir(tempfile.mkdtemp(prefix="bench_suite_"))
+    resultado = asyncio.run(correr(args))
+
+    regresion = False
+    if "baseline" in rutas:
+        with open(rutas["baseline"], encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("parametros") != resultado["parametros"] or baseline.get("objetivo") != resultado["objetivo"]:
+            print("Ojo: el baseline se midió con otros parámetros u otro objetivo", file=sys.stderr)
+        resultado["comparacion"] = comparar(resultado, baseline, args.tolerancia)
+        regresion = any(c["regresion"] for c in resultado["comparacion"].values())
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    for clave in ("salida", "guardar_baseline"):
+        if clave in rutas:
+            with open(rutas[clave], "w", encoding="utf-8") as f:
+                f.write(texto + "\n")
+    print(texto)
+    sys.exit(1 if regresion else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark de la cache de usuarios autenticados (auth.cache_usuarios).
+
+Mide la latencia por request de GET /usuarios/me/ (que solo depende de
+get_current_user) con la cache desactivada y activada, sobre la app en el
+mismo proceso (httpx + ASGITransport) y una base temporal.
+
+Uso (desde la carpeta Back):
+    python -m benchmarks.usuario_cache --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from .login import percentil
+
+
+async def medir(client, headers, cantidad):
+    latencias = []
+    for _ in range(cantidad):
+        inicio = time.perf_counter()
+        r = await client.get("/usuarios/me/", headers=headers)
+        latencias.append(time.perf_counter() - inicio)
+        r.raise_for_status()
+    return {
+        "requests_por_segundo": round(cantidad / sum(latencias), 1),
+        "p50_ms": round(percentil(latencias, 50) * 1000, 3),
+        "p95_ms": round(percentil(latencias, 95) * 1000, 3),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 3),
+    }
+
+
+async def correr(args):
+    import httpx
+    from app.main import app
+    from app import auth
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/usuarios/", json={"email": "cache@example.com", "nombre": "cache", "password": "secreto"})
+        r = await client.post("/token", data={"username": "cache", "password": "secreto"})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        max_entradas = auth.cache_usuarios.max_entradas
+        auth.cache_usuarios.max_entradas = 0
+        auth.cache_usuarios.limpiar()
+        sin_cache = await medir(client, headers, args.requests)
+
+        auth.cache_usuarios.max_entradas = max_entradas or 1024
+        con_cache = await medir(client, headers, args.requests)
+
+    return {
+        "requests": args.requests,
+        "sin_cache": sin_cache,
+        "con_cache": con_cache,
+        "cache": auth.cache_usuarios.estadisticas(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.usuario_cache")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests por modo")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="bench_usuario_cache_"))
+    print(json.dumps(asyncio.run(correr(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
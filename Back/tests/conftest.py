@@ -0,0 +1,83 @@
+"""
+Configuración común de los tests. Cada corrida usa su propia carpeta
+temporal para las bases (nunca el gastos.db del directorio actual): las
+variables se fijan acá porque app.config las lee al importarse.
+
+Uso (desde la carpeta Back):
+    python -m pytest
+"""
+import itertools
+import json
+import os
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+_DIRECTORIO = tempfile.mkdtemp(prefix="tests_gastos_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DIRECTORIO}/gastos.db"
+os.environ["SHARD_URL"] = f"sqlite:///{_DIRECTORIO}/gastos_shard{{n}}.db"
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+CONTRASENIA = "secreto"
+_usuarios = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def base():
+    """La base temporal con todas las migraciones aplicadas."""
+    from app import models
+    models.crear_db()
+    return _DIRECTORIO
+
+
+@pytest.fixture
+def modo_async(monkeypatch):
+    """Las rutas usan AsyncSession (DB_MODO=async) en lugar de Session."""
+    from app import config
+    monkeypatch.setattr(config, "DB_MODO", "async")
+
+
+@pytest.fixture
+def cliente(base):
+    """TestClient de la app, con su lifespan (al salir cierra el engine async)."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+@pytest.fixture
+def usuario(cliente):
+    """
+    Un usuario nuevo registrado por la API, con su token y dos categorías:
+    'ingreso' y 'gasto'.
+    """
+    n = next(_usuarios)
+    nombre = f"test{n}"
+    r = cliente.post("/usuarios/", json={"email": f"{nombre}@example.com", "nombre": nombre, "password": CONTRASENIA})
+    assert r.status_code == 200, r.text
+    usuario_id = r.json()["id"]
+    r = cliente.post("/token", data={"username": nombre, "password": CONTRASENIA})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    categorias = {
+        tipo: cliente.post("/categorias/", json={"nombre": tipo.capitalize(), "tipo": tipo}, headers=headers).json()["id"]
+        for tipo in ("ingreso", "gasto")
+    }
+    return SimpleNamespace(id=usuario_id, nombre=nombre, headers=headers, **categorias)
+
+
+def cargar(cliente, usuario, filas: str):
+    """
+    Carga transacciones con fecha (la API de alta no la recibe) por
+    POST /transacciones/importar. 'filas' es un CSV sin encabezado con
+    fecha,monto,descripcion,categoria; los montos negativos son gastos.
+    """
+    r = cliente.post(
+        "/transacciones/importar", headers=usuario.headers,
+        files={"archivo": ("filas.csv", ("fecha,monto,descripcion,categoria\n" + filas).encode(), "text/csv")},
+    )
+    assert r.status_code == 200, r.text
+    resumen = json.loads(r.text.splitlines()[-1])
+    assert resumen["rechazadas"] == 0, resumen
+    return resumen
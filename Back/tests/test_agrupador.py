@@ -0,0 +1,113 @@
+"""Group commit de las escrituras (app/agrupador.py), en modo sync y async."""
+import asyncio
+import itertools
+
+import pytest
+
+from app import agrupador, config, crud, database, models, schemas, shards
+
+_usuarios = itertools.count(1)
+
+
+@pytest.fixture(params=["sync", "async"])
+def modo(request, base, monkeypatch):
+    monkeypatch.setattr(config, "DB_MODO", request.param)
+    return request.param
+
+
+@pytest.fixture
+def usuario_id(base):
+    n = next(_usuarios)
+    db = database.SessionLocal()
+    try:
+        return crud.create_user(db, schemas.UsuarioCreate(
+            email=f"agrupador{n}@example.com", nombre=f"agrupador{n}", password="x"
+        )).id
+    finally:
+        db.close()
+
+
+def _correr(*escrituras):
+    """Espera las escrituras juntas; cada posición trae su resultado o su excepción."""
+    async def todas():
+        try:
+            return await asyncio.gather(*escrituras, return_exceptions=True)
+        finally:
+            await database.cerrar_async_engine()
+    return asyncio.run(todas())
+
+
+def _categoria(db, usuario_id, nombre):
+    return crud.create_user_categoria(db, schemas.CategoriaCreate(nombre=nombre, tipo="gasto"), usuario_id).id
+
+
+def _escribe_y_falla(db, usuario_id, nombre):
+    _categoria(db, usuario_id, nombre)
+    raise ValueError(nombre)
+
+
+def _categorias(usuario_id, shard=0):
+    db = shards.sesion_de_shard(shard)
+    try:
+        return dict(db.query(models.Categoria.nombre, models.Categoria.id).filter(
+            models.Categoria.usuario_id == usuario_id
+        ))
+    finally:
+        db.close()
+
+
+def _version(usuario_id):
+    db = database.SessionLocal()
+    try:
+        return crud.get_version_datos(db, usuario_id)
+    finally:
+        db.close()
+
+
+def test_falla_solo_su_savepoint(modo, usuario_id):
+    agr = agrupador.AgrupadorEscrituras(ventana_ms=50, max_lote=10)
+    version = _version(usuario_id)
+
+    a, b, c = _correr(
+        agr.ejecutar(0, _categoria, usuario_id, "A"),
+        agr.ejecutar(0, _escribe_y_falla, usuario_id, "B"),
+        agr.ejecutar(0, _categoria, usuario_id, "C"),
+    )
+    assert isinstance(b, ValueError) and str(b) == "B"
+    # La categoría y la versión que escribió B se deshicieron; A y C se confirmaron
+    assert _categorias(usuario_id) == {"A": a, "C": c}
+    assert _version(usuario_id) == version + 2
+    assert agr.estadisticas() == {
+        "lotes": 1, "escrituras": 3, "fallidas": 1, "escrituras_por_lote": 3, "max_lote_visto": 3, "en_cola": 0,
+    }
+
+
+def test_cada_request_recibe_lo_suyo(modo, usuario_id):
+    agr = agrupador.AgrupadorEscrituras(ventana_ms=50, max_lote=2)
+    nombres = [f"Cat {n}" for n in range(5)]
+
+    ids = _correr(*[agr.ejecutar(0, _categoria, usuario_id, nombre) for nombre in nombres])
+    assert _categorias(usuario_id) == dict(zip(nombres, ids))
+    estadisticas = agr.estadisticas()
+    assert (estadisticas["lotes"], estadisticas["max_lote_visto"]) == (3, 2)
+
+
+def test_una_cola_por_shard(modo, usuario_id, monkeypatch):
+    monkeypatch.setattr(config, "SHARDS", 3)
+    models.crear_db()
+    agr = agrupador.AgrupadorEscrituras(ventana_ms=50, max_lote=10)
+    try:
+        a, b, c = _correr(
+            agr.ejecutar(0, _categoria, usuario_id, "A"),
+            agr.ejecutar(2, _categoria, usuario_id, "B"),
+            agr.ejecutar(2, _escribe_y_falla, usuario_id, "C"),
+        )
+        assert set(agr._colas) == {0, 2}
+        # Un lote por shard, cada uno confirmado en su archivo
+        assert (agr.estadisticas()["lotes"], agr.estadisticas()["max_lote_visto"]) == (2, 2)
+        assert _categorias(usuario_id, 0) == {"A": a}
+        assert _categorias(usuario_id, 2) == {"B": b}
+        assert isinstance(c, ValueError)
+    finally:
+        # El usuario está en el shard 0: lo escrito en el 2 sobra
+        shards.limpiar_huerfanos(3)
@@ -0,0 +1,129 @@
+"""Analítica (app/analitica.py): tendencias, variación por categoría, anomalías y proyección."""
+from datetime import date
+
+from app import analitica
+
+COMIDA, AUTO = 1, 2
+NOMBRES = {COMIDA: "Comida", AUTO: "Auto"}
+
+
+def _libro(*movimientos):
+    """Libro a partir de (fecha, monto, categoria_id): los montos negativos son gastos."""
+    filas = sorted(
+        ((fecha - date(1970, 1, 1)).days, round(monto * 100), categoria, id_)
+        for id_, (fecha, monto, categoria) in enumerate(movimientos, start=1)
+    )
+    return analitica.Libro(filas, NOMBRES)
+
+
+def _mensual(meses, dia, monto, categoria, anio=2025):
+    return [(date(anio, mes, dia), monto, categoria) for mes in meses]
+
+
+def test_tendencias_y_promedios_moviles():
+    # Sueldo fijo y gastos que suben 100 por mes de enero a junio
+    libro = _libro(
+        *_mensual(range(1, 7), 1, 1000, 0),
+        *[(date(2025, mes, 10), -100 * mes, COMIDA) for mes in range(1, 7)],
+    )
+    r = analitica.tendencias(libro, 3, date(2025, 6, 15))
+    assert (r.desde, r.hasta) == (date(2025, 4, 1), date(2025, 6, 1))
+    assert [(p.periodo.month, p.total_ingresos, p.total_gastos, p.balance) for p in r.puntos] == [
+        (4, 1000, 400, 600), (5, 1000, 500, 500), (6, 1000, 600, 400),
+    ]
+    abril, _, junio = r.puntos
+    # Los promedios que piden meses anteriores al primero con datos quedan en None
+    assert (abril.promedio_gastos.meses_3, abril.promedio_gastos.meses_6) == (300, None)
+    assert (junio.promedio_gastos.meses_3, junio.promedio_gastos.meses_6, junio.promedio_gastos.meses_12) == (500, 350, None)
+    assert (junio.promedio_balance.meses_3, junio.promedio_balance.meses_6) == (500, 650)
+    # Pendiente sin el mes en curso
+    assert (r.tendencia_ingresos, r.tendencia_gastos) == (0, 100)
+
+    # Un solo mes completo: sin tendencia
+    r = analitica.tendencias(libro, 2, date(2025, 6, 15))
+    assert (r.tendencia_ingresos, r.tendencia_gastos) == (None, None)
+    vacio = analitica.tendencias(_libro(), 2, date(2025, 6, 15))
+    assert [p.total_gastos for p in vacio.puntos] == [0, 0]
+    assert vacio.puntos[-1].promedio_gastos.meses_3 is None
+
+
+def test_variacion_por_categoria():
+    libro = _libro(
+        (date(2025, 5, 3), -500, COMIDA),
+        (date(2025, 6, 3), -600, COMIDA),
+        (date(2025, 6, 4), -50, AUTO),
+        (date(2025, 6, 5), 2000, 0), # Los ingresos no cuentan
+    )
+    r = analitica.categorias(libro, 2, date(2025, 6, 15))
+    mayo, junio = r.puntos
+    assert [(c.nombre, c.total, c.anterior) for c in mayo.categorias] == [("Comida", 500, 0)]
+    # De mayor a menor total; sin mes anterior no hay variación porcentual
+    assert [(c.categoria_id, c.total, c.anterior, c.diferencia, c.variacion_pct) for c in junio.categorias] == [
+        (COMIDA, 600, 500, 100, 20.0), (AUTO, 50, 0, 50, None),
+    ]
+
+
+def test_anomalias():
+    libro = _libro(
+        *_mensual(range(1, 6), 10, -100, COMIDA),
+        (date(2025, 6, 10), -1000, COMIDA),
+        # Dos meses de historia no alcanzan para marcar a Auto
+        *_mensual(range(4, 7), 10, -20, AUTO),
+        (date(2025, 6, 11), -900, AUTO),
+    )
+    r = analitica.anomalias(libro, 3, 3.0, date(2025, 6, 15))
+    assert r.desde == date(2025, 4, 1)
+    # Desvío 0: la escala es el 10% del promedio
+    assert [(m.periodo, m.nombre, m.total, m.promedio, m.desvio, m.puntaje) for m in r.meses] == [
+        (date(2025, 6, 1), "Comida", 1000, 100, 0, 90.0),
+    ]
+    # Contra la mediana (100) de los seis gastos de Comida; Auto tiene menos de cinco
+    assert [(t.id, t.fecha, t.monto, t.mediana_categoria, t.puntaje) for t in r.transacciones] == [
+        (6, date(2025, 6, 10), 1000, 100, 90.0),
+    ]
+
+    # Un umbral más alto no marca nada y sin historial no hay anomalías
+    assert analitica.anomalias(libro, 3, 100.0, date(2025, 6, 15)).meses == []
+    assert analitica.anomalias(_libro(), 3, 3.0, date(2025, 6, 15)).transacciones == []
+
+
+def test_proyeccion_por_dia_del_mes():
+    libro = _libro(
+        (date(2024, 12, 20), -6000, COMIDA), # Fuera de los últimos seis meses completos
+        *_mensual(range(1, 7), 1, 1000, 0),
+        *_mensual(range(1, 7), 20, -300, COMIDA),
+        (date(2025, 5, 15), -120, COMIDA),
+        # El 31 solo existe en enero, marzo y mayo: (90 + 90) / 3
+        (date(2025, 1, 31), -90, AUTO),
+        (date(2025, 3, 31), -90, AUTO),
+        (date(2025, 7, 1), 1000, 0),
+        (date(2025, 7, 5), -50, COMIDA),
+        (date(2025, 7, 25), -999, COMIDA), # Posterior a hoy: no cuenta como real
+    )
+    r = analitica.proyeccion(libro, date(2025, 7, 10))
+    assert (r.periodo, r.dias_transcurridos, r.dias_del_mes, r.meses_de_historia) == (date(2025, 7, 1), 10, 31, 6)
+    assert (r.ingresos_a_la_fecha, r.gastos_a_la_fecha, r.balance_a_la_fecha) == (1000, 50, 950)
+    # Faltan el 20 (300), el 15 (120 / 6) y el 31 (60); el sueldo del 1 ya entró
+    assert (r.ingresos_proyectados, r.gastos_proyectados, r.balance_proyectado) == (1000, 430, 570)
+
+    # Sin meses completos se proyecta lo real
+    r = analitica.proyeccion(_libro((date(2025, 7, 2), -10, COMIDA)), date(2025, 7, 10))
+    assert (r.meses_de_historia, r.gastos_proyectados) == (0, 10)
+
+
+def test_endpoint_y_cache(cliente, usuario):
+    def proyeccion():
+        r = cliente.get("/analytics/proyeccion", headers=usuario.headers)
+        assert r.status_code == 200
+        return r.json()["gastos_a_la_fecha"]
+
+    cargas = analitica.cache.cargas
+    cuerpo = {"monto": 25, "descripcion": "hoy", "tipo": "gasto", "categoria_id": usuario.gasto}
+    cliente.post("/transacciones/", headers=usuario.headers, json=cuerpo)
+    assert proyeccion() == 25
+    assert proyeccion() == 25
+    # El segundo pedido reusa el Libro; un alta cambia la versión y lo recarga
+    assert analitica.cache.cargas == cargas + 1
+    cliente.post("/transacciones/", headers=usuario.headers, json={**cuerpo, "monto": 10.5})
+    assert proyeccion() == 35.5
+    assert analitica.cache.cargas == cargas + 2
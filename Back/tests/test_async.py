@@ -0,0 +1,71 @@
+"""Las rutas con DB_MODO=async (AsyncSession sobre aiosqlite)."""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app import database
+
+
+def _conexiones_en_uso():
+    return database.async_engine.pool.checkedout()
+
+
+def test_respuestas_con_error_devuelven_la_conexion(modo_async, cliente, usuario):
+    r = cliente.get("/transacciones/", headers=usuario.headers)
+    assert r.status_code == 200
+    r = cliente.get("/transacciones/", headers={**usuario.headers, "If-None-Match": r.headers["etag"]})
+    assert r.status_code == 304
+    r = cliente.put("/transacciones/999999", headers=usuario.headers, json={
+        "monto": 1, "descripcion": "no existe", "tipo": "gasto", "categoria_id": usuario.gasto,
+    })
+    assert r.status_code == 404
+    r = cliente.get("/transacciones/", headers={"Authorization": "Bearer invalido"})
+    assert r.status_code == 401
+    assert _conexiones_en_uso() == 0
+
+
+def test_get_sesion_cierra_la_sesion_si_la_ruta_falla(modo_async, base):
+    async def correr():
+        sesiones = database.get_sesion()
+        db = await sesiones.__anext__()
+        await db.execute(text("SELECT 1"))
+        # Lo que hace FastAPI cuando la ruta lanza una HTTPException
+        with pytest.raises(HTTPException):
+            await sesiones.athrow(HTTPException(status_code=404))
+        en_uso = _conexiones_en_uso()
+        await database.cerrar_async_engine()
+        return en_uso
+
+    assert asyncio.run(correr()) == 0
+
+
+def test_crud_y_dashboard(modo_async, cliente, usuario):
+    h = usuario.headers
+    sueldo = cliente.post("/transacciones/", headers=h, json={
+        "monto": "1000.50", "descripcion": "Sueldo", "tipo": "ingreso", "categoria_id": usuario.ingreso,
+    }).json()
+    compra = cliente.post("/transacciones/", headers=h, json={
+        "monto": "250.25", "descripcion": "Supermercado", "tipo": "gasto", "categoria_id": usuario.gasto,
+    }).json()
+    assert {t["id"] for t in cliente.get("/transacciones/", headers=h).json()} == {sueldo["id"], compra["id"]}
+
+    r = cliente.put(f"/transacciones/{compra['id']}", headers=h, json={
+        "monto": "300", "descripcion": "Supermercado", "tipo": "gasto", "categoria_id": usuario.gasto,
+    })
+    assert r.status_code == 200 and r.json()["monto"] == 300
+
+    resumen = cliente.get("/dashboard/summary", headers=h).json()
+    assert resumen["total_ingresos"] == 1000.5
+    assert resumen["total_gastos"] == 300
+    assert resumen["balance"] == 700.5
+    assert resumen["gastos_por_categoria"] == [{"name": "Gasto", "value": 300}]
+    puntos = cliente.get("/dashboard/series", headers=h).json()["puntos"]
+    assert puntos[-1]["total_gastos"] == 300
+
+    assert cliente.delete(f"/transacciones/{compra['id']}", headers=h).status_code == 204
+    assert cliente.get("/dashboard/summary", headers=h).json()["total_gastos"] == 0
+    assert cliente.delete(f"/categorias/{usuario.gasto}", headers=h).status_code == 204
+    assert [c["id"] for c in cliente.get("/categorias/", headers=h).json()] == [usuario.ingreso]
+    assert _conexiones_en_uso() == 0
@@ -0,0 +1,42 @@
+"""Contadores del executor de Argon2 (auth._ejecutar_hash)."""
+import asyncio
+import threading
+
+import pytest
+
+from app import auth
+
+
+def test_contadores_del_executor_de_hash():
+    empezo, seguir = threading.Event(), threading.Event()
+
+    def lento():
+        empezo.set()
+        seguir.wait(5)
+
+    def falla():
+        raise ValueError("hash inválido")
+
+    async def correr():
+        antes = auth.estadisticas_hash()
+        # El request deja de esperar, pero el hash sigue ocupando el executor
+        tarea = asyncio.create_task(auth._ejecutar_hash(lento))
+        await asyncio.to_thread(empezo.wait, 5)
+        tarea.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tarea
+        cancelado = auth.estadisticas_hash()
+        seguir.set()
+        for _ in range(500):
+            if auth.estadisticas_hash()["pendientes"] == antes["pendientes"]:
+                break
+            await asyncio.sleep(0.01)
+        with pytest.raises(ValueError):
+            await auth._ejecutar_hash(falla)
+        return antes, cancelado, auth.estadisticas_hash()
+
+    antes, cancelado, despues = asyncio.run(correr())
+    assert cancelado["pendientes"] == antes["pendientes"] + 1
+    assert despues["pendientes"] == antes["pendientes"]
+    # Solo cuenta el que terminó bien, no el que falló
+    assert despues["completadas"] == antes["completadas"] + 1
@@ -0,0 +1,61 @@
+"""POST /transacciones/bulk: errores por ítem y un solo commit para los válidos."""
+from app import config, crud, shards
+from conftest import CONTRASENIA
+
+
+def _item(categoria_id, monto=10, tipo="gasto"):
+    return {"monto": monto, "descripcion": "bulk", "tipo": tipo, "categoria_id": categoria_id}
+
+
+def _categoria_ajena(cliente):
+    r = cliente.post("/usuarios/", json={"email": "ajeno_bulk@example.com", "nombre": "ajeno_bulk", "password": CONTRASENIA})
+    assert r.status_code == 200
+    token = cliente.post("/token", data={"username": "ajeno_bulk", "password": CONTRASENIA}).json()["access_token"]
+    return cliente.post(
+        "/categorias/", headers={"Authorization": f"Bearer {token}"}, json={"nombre": "Ajena", "tipo": "gasto"}
+    ).json()["id"]
+
+
+def test_errores_por_item(cliente, usuario):
+    ajena = _categoria_ajena(cliente)
+    r = cliente.post("/transacciones/bulk", headers=usuario.headers, json=[
+        _item(usuario.gasto, 12.5),
+        _item(ajena),
+        _item(999999999),
+        _item(usuario.ingreso, 100, "ingreso"),
+    ])
+    assert r.status_code == 200
+    resultado = r.json()
+    assert resultado["creadas"] == 2
+    # Una posición por ítem: el id creado o None
+    assert resultado["ids"][1:3] == [None, None] and None not in (resultado["ids"][0], resultado["ids"][3])
+    assert resultado["errores"] == [
+        {"indice": 1, "detalle": "Categoría no encontrada o no pertenece al usuario"},
+        {"indice": 2, "detalle": "Categoría no encontrada o no pertenece al usuario"},
+    ]
+
+    guardadas = {t["id"]: t["monto"] for t in cliente.get("/transacciones/", headers=usuario.headers).json()}
+    assert guardadas == {resultado["ids"][0]: 12.5, resultado["ids"][3]: 100}
+    db = shards.sesion_de_usuario(usuario.id)
+    try:
+        assert crud.verificar_resumenes(db, usuario.id) == []
+    finally:
+        db.close()
+
+
+def test_todos_invalidos(cliente, usuario):
+    r = cliente.post("/transacciones/bulk", headers=usuario.headers, json=[_item(999999999)])
+    assert r.json() == {
+        "creadas": 0, "ids": [None],
+        "errores": [{"indice": 0, "detalle": "Categoría no encontrada o no pertenece al usuario"}],
+    }
+    assert cliente.get("/transacciones/", headers=usuario.headers).json() == []
+
+
+def test_pedido_invalido(cliente, usuario):
+    # Un ítem mal formado rechaza el pedido entero, sin guardar nada
+    r = cliente.post("/transacciones/bulk", headers=usuario.headers, json=[_item(usuario.gasto), _item(usuario.gasto, "1.234")])
+    assert r.status_code == 422
+    r = cliente.post("/transacciones/bulk", headers=usuario.headers, json=[_item(usuario.gasto)] * (config.BULK_MAX_ITEMS + 1))
+    assert r.status_code == 422
+    assert cliente.get("/transacciones/", headers=usuario.headers).json() == []
@@ -0,0 +1,68 @@
+"""GET /transacciones/search sobre el índice FTS5 de las descripciones."""
+import pytest
+
+from app import crud
+from conftest import CONTRASENIA, cargar
+
+
+def _buscar(cliente, usuario, q, **params):
+    return cliente.get("/transacciones/search", headers=usuario.headers, params={"q": q, **params})
+
+
+def _descripciones(cliente, usuario, q, **params):
+    r = _buscar(cliente, usuario, q, **params)
+    assert r.status_code == 200, r.text
+    return sorted(t["descripcion"] for t in r.json())
+
+
+def test_consulta_escapada():
+    # Cada palabra va entre comillas: AND, OR, NOT, *, : y " no son operadores
+    assert crud._consulta_fts('super "AND" OR* usuario_id:3', 7) == (
+        'descripcion : ("super"* "AND"* "OR"* "usuario_id"* "3"*) AND usuario_id : "7"'
+    )
+    with pytest.raises(ValueError):
+        crud._consulta_fts('"*" : ()', 7)
+
+
+@pytest.mark.parametrize("q", ['cafe" OR "1', "NOT cafe", "super*", "descripcion:cafe", "(cafe", "usuario_id : 1"])
+def test_caracteres_especiales_no_rompen(cliente, usuario, q):
+    assert _buscar(cliente, usuario, q).status_code == 200
+
+
+def test_prefijos_acentos_y_filtros(cliente, usuario):
+    cargar(cliente, usuario, (
+        "2025-01-05,-150,Supermercado Día,Gasto\n"
+        "2025-01-06,-3.50,Café con leche,Gasto\n"
+        "2025-02-01,-900,Super grande,Gasto\n"
+        "2025-02-02,200,Devolución súper,Ingreso\n"
+    ))
+    assert _descripciones(cliente, usuario, "super") == ["Devolución súper", "Super grande", "Supermercado Día"]
+    assert _descripciones(cliente, usuario, "CAFE") == ["Café con leche"]
+    # Todas las palabras tienen que estar
+    assert _descripciones(cliente, usuario, "cafe leche") == ["Café con leche"]
+    assert _descripciones(cliente, usuario, "cafe super") == []
+
+    assert _descripciones(cliente, usuario, "super", tipo="gasto", monto_min=200) == ["Super grande"]
+    assert _descripciones(cliente, usuario, "super", **{"from": "2025-02-01", "to": "2025-02-02"}) == ["Super grande"]
+    assert _buscar(cliente, usuario, "¿?").status_code == 400
+
+
+def test_solo_del_usuario_y_al_dia(cliente, usuario):
+    cliente.post("/usuarios/", json={"email": "otro_fts@example.com", "nombre": "otro_fts", "password": CONTRASENIA})
+    token = cliente.post("/token", data={"username": "otro_fts", "password": CONTRASENIA}).json()["access_token"]
+    otro = {"Authorization": f"Bearer {token}"}
+    categoria = cliente.post("/categorias/", headers=otro, json={"nombre": "G", "tipo": "gasto"}).json()["id"]
+    cliente.post("/transacciones/", headers=otro, json={
+        "monto": 1, "descripcion": "Farmacia ajena", "tipo": "gasto", "categoria_id": categoria,
+    })
+
+    cuerpo = {"monto": 1, "descripcion": "Farmacia", "tipo": "gasto", "categoria_id": usuario.gasto}
+    id_ = cliente.post("/transacciones/", headers=usuario.headers, json=cuerpo).json()["id"]
+    assert _descripciones(cliente, usuario, "farmacia") == ["Farmacia"]
+
+    # Los triggers mantienen el índice con cada edición y baja
+    cliente.put(f"/transacciones/{id_}", headers=usuario.headers, json={**cuerpo, "descripcion": "Kiosco"})
+    assert _descripciones(cliente, usuario, "farmacia") == []
+    assert _descripciones(cliente, usuario, "kiosco") == ["Kiosco"]
+    cliente.delete(f"/transacciones/{id_}", headers=usuario.headers)
+    assert _descripciones(cliente, usuario, "kiosco") == []
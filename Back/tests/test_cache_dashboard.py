@@ -0,0 +1,99 @@
+"""Cache del resumen del dashboard (app/cache_dashboard.py): invalidación al confirmar y single-flight."""
+import asyncio
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from app import cache_dashboard, database
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """Una cache vacía en lugar de la del proceso."""
+    nueva = cache_dashboard.CacheDashboard(cache_dashboard.CacheMemoria(100, 60))
+    monkeypatch.setattr(cache_dashboard, "cache", nueva)
+    return nueva
+
+
+def _guardar(cache, usuario_id, *periodos):
+    for periodo in periodos:
+        cache.backend.guardar(usuario_id, periodo, f"resumen {periodo}")
+
+
+def _cacheados(cache, usuario_id, *periodos):
+    return [p for p in periodos if cache.backend.obtener(usuario_id, p) is not None]
+
+
+def test_invalida_recien_al_confirmar(base, cache):
+    _guardar(cache, 7, (2025, 1), (2025, 2))
+    db = database.SessionLocal()
+    try:
+        db.execute(text("SELECT 1"))
+        cache_dashboard.invalidar_al_confirmar(db, 7, [date(2025, 1, 15)])
+        assert _cacheados(cache, 7, (2025, 1), (2025, 2)) == [(2025, 1), (2025, 2)]
+        db.commit()
+        # Solo el período que cambió
+        assert _cacheados(cache, 7, (2025, 1), (2025, 2)) == [(2025, 2)]
+
+        # Un rollback descarta las marcas
+        _guardar(cache, 7, (2025, 1))
+        db.execute(text("SELECT 1"))
+        cache_dashboard.invalidar_al_confirmar(db, 7, [date(2025, 1, 1)])
+        db.rollback()
+        db.execute(text("SELECT 1"))
+        db.commit()
+        assert _cacheados(cache, 7, (2025, 1), (2025, 2)) == [(2025, 1), (2025, 2)]
+
+        # Sin fechas se borran todos los períodos del usuario
+        db.execute(text("SELECT 1"))
+        cache_dashboard.invalidar_al_confirmar(db, 7, [date(2025, 1, 1)])
+        cache_dashboard.invalidar_al_confirmar(db, 7)
+        db.commit()
+        assert _cacheados(cache, 7, (2025, 1), (2025, 2)) == []
+    finally:
+        db.close()
+
+
+def test_resumen_cacheado_hasta_el_alta(cliente, usuario, cache):
+    def resumen():
+        r = cliente.get("/dashboard/summary", headers=usuario.headers)
+        assert r.status_code == 200
+        return r.json()["total_gastos"]
+
+    assert resumen() == 0
+    assert resumen() == 0
+    assert (cache.misses, cache.hits) == (1, 1)
+    cliente.post("/transacciones/", headers=usuario.headers, json={
+        "monto": 25, "descripcion": "nueva", "tipo": "gasto", "categoria_id": usuario.gasto,
+    })
+    # El commit del alta invalidó el mes: se vuelve a calcular
+    assert resumen() == 25
+    assert (cache.misses, cache.hits, cache.invalidaciones) == (2, 1, 1)
+
+
+def test_un_solo_calculo_y_sin_datos_viejos(cache):
+    calculos = []
+
+    async def calcular():
+        calculos.append(1)
+        await asyncio.sleep(0.01)
+        return "resumen"
+
+    async def invalida_mientras_calcula():
+        cache.invalidar(4)
+        return "viejo"
+
+    async def correr():
+        juntos = await asyncio.gather(*[cache.obtener(3, (2025, 1), calcular) for _ in range(5)])
+        viejo = await cache.obtener(4, (2025, 1), invalida_mientras_calcula)
+        return juntos, viejo
+
+    juntos, viejo = asyncio.run(correr())
+    assert juntos == ["resumen"] * 5
+    # Un cálculo para los cinco pedidos concurrentes (y otro para el usuario 4)
+    assert (len(calculos), cache.esperas, cache.misses) == (1, 4, 2)
+    assert cache.backend.obtener(3, (2025, 1)) == "resumen"
+    # Empezó antes de una invalidación de ese usuario: se devuelve pero no se guarda
+    assert viejo == "viejo"
+    assert cache.backend.obtener(4, (2025, 1)) is None
@@ -0,0 +1,53 @@
+import datetime
+
+from app import crud, database, models, schemas
+
+
+def test_borrar_categoria_borra_sus_resumenes(base):
+    db = database.SessionLocal()
+    try:
+        usuario = crud.create_user(db, schemas.UsuarioCreate(
+            email="categorias@example.com", nombre="categorias", password="x"
+        ))
+        categoria = crud.create_user_categoria(db, schemas.CategoriaCreate(nombre="Temporal", tipo="gasto"), usuario.id)
+        transaccion = crud.create_user_transaccion(db, schemas.TransaccionCreate(
+            monto=10, descripcion="única", tipo="gasto", categoria_id=categoria.id
+        ), usuario.id)
+        # La baja deja el resumen del mes en cero
+        crud.delete_transaccion(db, transaccion.id, usuario.id)
+
+        assert crud.delete_categoria(db, categoria.id, usuario.id) is not None
+        assert db.query(models.ResumenMensual).filter(
+            models.ResumenMensual.categoria_id == categoria.id
+        ).count() == 0
+        assert crud.verificar_resumenes(db, usuario.id) == []
+    finally:
+        db.close()
+
+
+def test_transacciones_sin_categoria_suman_en_un_resumen(base):
+    # La API siempre pide categoría, pero la columna admite NULL (datos
+    # viejos): el upsert de los resúmenes tiene que juntarlas en una fila
+    db = database.SessionLocal()
+    try:
+        usuario = crud.create_user(db, schemas.UsuarioCreate(
+            email="sincategoria@example.com", nombre="sincategoria", password="x"
+        ))
+        for centavos in (100, 200, 300):
+            transaccion = models.Transaccion(
+                monto_centavos=centavos, fecha=datetime.datetime(2025, 10, 1),
+                descripcion="suelta", tipo="gasto", categoria_id=None, usuario_id=usuario.id
+            )
+            db.add(transaccion)
+            db.flush()
+            crud._sumar_al_resumen(db, transaccion, 1)
+        db.commit()
+
+        resumenes = db.query(models.ResumenMensual).filter(
+            models.ResumenMensual.usuario_id == usuario.id,
+            models.ResumenMensual.categoria_id.is_(None)
+        ).all()
+        assert [(r.total_centavos, r.cantidad) for r in resumenes] == [(600, 3)]
+        assert crud.verificar_resumenes(db, usuario.id) == []
+    finally:
+        db.close()
@@ -0,0 +1,78 @@
+"""
+Escritores y lectores concurrentes sobre la base temporal con la
+configuración por defecto (WAL + busy_timeout), como
+benchmarks/estres_sqlite.py pero con una cantidad fija de escrituras:
+falla con cualquier 'database is locked' o si al final no están todas
+las filas o los resúmenes no cuadran.
+"""
+import threading
+
+from sqlalchemy import func, text
+
+from app import crud, database, models, schemas
+
+ESCRITORES = 8
+LECTORES = 8
+ESCRITURAS_POR_HILO = 50
+
+
+def test_escritores_y_lectores_concurrentes(base):
+    db = database.SessionLocal()
+    usuario = crud.create_user(db, schemas.UsuarioCreate(email="estres@example.com", nombre="estres", password="x"))
+    categoria = crud.create_user_categoria(db, schemas.CategoriaCreate(nombre="Comida", tipo="gasto"), usuario.id)
+    usuario_id, categoria_id = usuario.id, categoria.id
+    assert db.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+    db.close()
+
+    errores = []
+    terminaron = threading.Event()
+
+    def escritor(n):
+        try:
+            for i in range(ESCRITURAS_POR_HILO):
+                db = database.SessionLocal()
+                try:
+                    crud.create_user_transaccion(db, schemas.TransaccionCreate(
+                        monto=f"{n + 1}.{i:02d}", descripcion=f"estres {n}", tipo="gasto", categoria_id=categoria_id
+                    ), usuario_id)
+                finally:
+                    db.close()
+        except Exception as e:
+            errores.append(e)
+
+    def lector():
+        try:
+            while not terminaron.is_set():
+                db = database.SessionLocal()
+                try:
+                    crud.get_transacciones(db, usuario_id, limit=50)
+                    crud.get_dashboard_summary(db, usuario_id)
+                finally:
+                    db.close()
+        except Exception as e:
+            errores.append(e)
+
+    escritores = [threading.Thread(target=escritor, args=(n,)) for n in range(ESCRITORES)]
+    lectores = [threading.Thread(target=lector) for _ in range(LECTORES)]
+    for h in escritores + lectores:
+        h.start()
+    for h in escritores:
+        h.join()
+    terminaron.set()
+    for h in lectores:
+        h.join()
+
+    assert errores == []
+
+    db = database.SessionLocal()
+    try:
+        cantidad, centavos = db.query(
+            func.count(models.Transaccion.id), func.sum(models.Transaccion.monto_centavos)
+        ).filter(models.Transaccion.usuario_id == usuario_id).one()
+        assert cantidad == ESCRITORES * ESCRITURAS_POR_HILO
+        assert centavos == sum(
+            (n + 1) * 100 + i for n in range(ESCRITORES) for i in range(ESCRITURAS_POR_HILO)
+        )
+        assert crud.verificar_resumenes(db, usuario_id) == []
+    finally:
+        db.close()
@@ -0,0 +1,80 @@
+"""GET /transacciones/export en CSV, NDJSON y Parquet."""
+import csv
+import io
+import json
+from decimal import Decimal
+
+import pytest
+
+from app import config, exportacion
+from conftest import cargar
+
+FILAS = (
+    "2025-02-10,-12.50,\"Súper, \"\"chino\"\"\",Gasto\n"
+    "2025-01-05,1000,Sueldo,Ingreso\n"
+    "2025-03-01,-0.10,Café,Comida\n"
+)
+
+
+def _exportar(cliente, usuario, **params):
+    return cliente.get("/transacciones/export", headers=usuario.headers, params=params)
+
+
+def test_csv(cliente, usuario):
+    cargar(cliente, usuario, FILAS)
+    r = _exportar(cliente, usuario)
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/csv")
+    assert r.headers["content-disposition"] == 'attachment; filename="transacciones.csv"'
+    filas = list(csv.reader(io.StringIO(r.text)))
+    assert filas[0] == ["id", "fecha", "monto", "descripcion", "tipo", "categoria_id", "categoria"]
+    # De la más vieja a la más nueva, montos con dos decimales exactos
+    assert [(f[1], f[2], f[3], f[4], f[6]) for f in filas[1:]] == [
+        ("2025-01-05T00:00:00", "1000.00", "Sueldo", "ingreso", "Ingreso"),
+        ("2025-02-10T00:00:00", "12.50", 'Súper, "chino"', "gasto", "Gasto"),
+        ("2025-03-01T00:00:00", "0.10", "Café", "gasto", "Comida"),
+    ]
+
+
+def test_rango_y_vacio(cliente, usuario):
+    cargar(cliente, usuario, FILAS)
+    filas = list(csv.reader(io.StringIO(_exportar(cliente, usuario, **{"from": "2025-02-01", "to": "2025-03-01"}).text)))
+    assert [f[3] for f in filas[1:]] == ['Súper, "chino"']
+    # Sin filas en el rango sale solo el encabezado
+    assert _exportar(cliente, usuario, **{"from": "2030-01-01"}).text.splitlines() == [
+        "id,fecha,monto,descripcion,tipo,categoria_id,categoria"
+    ]
+    assert _exportar(cliente, usuario, **{"from": "2025-02-01", "to": "2025-01-01"}).status_code == 400
+    assert _exportar(cliente, usuario, format="xlsx").status_code == 422
+
+
+def test_ndjson(cliente, usuario, monkeypatch):
+    monkeypatch.setattr(config, "EXPORT_LOTE", 2)
+    cargar(cliente, usuario, FILAS)
+    r = _exportar(cliente, usuario, format="ndjson")
+    assert r.headers["content-type"] == "application/x-ndjson"
+    # UTF-8 directo, sin escapes \uXXXX
+    assert "Café" in r.text
+    filas = [json.loads(linea) for linea in r.text.splitlines()]
+    assert [(f["fecha"], f["monto"], f["categoria"]) for f in filas] == [
+        ("2025-01-05T00:00:00", 1000.0, "Ingreso"), ("2025-02-10T00:00:00", 12.5, "Gasto"), ("2025-03-01T00:00:00", 0.1, "Comida"),
+    ]
+
+
+def test_parquet(cliente, usuario, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(config, "EXPORT_LOTE", 2)
+    cargar(cliente, usuario, FILAS)
+    r = _exportar(cliente, usuario, format="parquet")
+    assert r.headers["content-type"] == "application/vnd.apache.parquet"
+    archivo = pq.ParquetFile(io.BytesIO(r.content))
+    # Un row group por lote leído de la base
+    assert archivo.num_row_groups == 2
+    tabla = archivo.read()
+    assert tabla.column("monto").to_pylist() == [Decimal("1000.00"), Decimal("12.50"), Decimal("0.10")]
+    assert tabla.column("descripcion").to_pylist() == ["Sueldo", 'Súper, "chino"', "Café"]
+
+
+def test_parquet_sin_pyarrow(cliente, usuario, monkeypatch):
+    monkeypatch.setattr(exportacion, "parquet_disponible", lambda: False)
+    r = _exportar(cliente, usuario, format="parquet")
+    assert r.status_code == 501
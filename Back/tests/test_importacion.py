@@ -0,0 +1,172 @@
+"""Importación de resúmenes bancarios (app/importacion.py)."""
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app import crud, database, importacion, models, schemas
+
+_usuarios = iter(range(1, 1000))
+
+
+@pytest.fixture
+def db(base):
+    sesion = database.SessionLocal()
+    yield sesion
+    sesion.close()
+
+
+@pytest.fixture
+def usuario_id(db):
+    n = next(_usuarios)
+    return crud.create_user(db, schemas.UsuarioCreate(
+        email=f"importar{n}@example.com", nombre=f"importar{n}", password="x"
+    )).id
+
+
+def _importar(db, usuario_id, contenido: str, formato="csv", **opciones):
+    return list(importacion.importar(db, io.BytesIO(contenido.encode()), formato, usuario_id, **opciones))
+
+
+def _transacciones(db, usuario_id):
+    return db.query(models.Transaccion).filter(models.Transaccion.usuario_id == usuario_id).order_by(
+        models.Transaccion.id
+    ).all()
+
+
+def _ofx(*movimientos):
+    # SGML como lo bajan los bancos: tags sin cerrar salvo los agregados
+    cuerpo = "".join(
+        f"<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>{fecha}<TRNAMT>{monto}<FITID>{fitid}<NAME>{nombre}</STMTTRN>\n"
+        for fecha, monto, fitid, nombre in movimientos
+    )
+    return f"OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n{cuerpo}</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n"
+
+
+@pytest.mark.parametrize("texto, monto", [
+    ("1234.56", Decimal("1234.56")),
+    ("-1,234.56", Decimal("-1234.56")),
+    ("1.234,56", Decimal("1234.56")),
+    ("$ 10", Decimal("10")),
+    ("10,5", Decimal("10.5")),
+])
+def test_parsear_monto(texto, monto):
+    assert importacion.parsear_monto(texto) == monto
+
+
+@pytest.mark.parametrize("texto, fecha", [
+    ("2025-03-01", datetime(2025, 3, 1)),
+    ("2025-03-01T12:00:00-03:00", datetime(2025, 3, 1, 15)),
+    ("01/03/2025", datetime(2025, 3, 1)),
+    ("20250301120000.000[-3:ART]", datetime(2025, 3, 1, 12)),
+])
+def test_parsear_fecha(texto, fecha):
+    assert importacion.parsear_fecha(texto) == fecha
+
+
+def test_csv_y_rechazos(db, usuario_id):
+    eventos = _importar(db, usuario_id, (
+        "fecha;monto;descripcion;categoria\n"
+        "2025-03-01;-1.234,50;Súper;Comida\n"
+        "2025-03-02;50000;Sueldo;\n"
+        "ayer;10;x;\n"
+        "2025-03-03;diez;x;\n"
+        "2025-03-04;1.234;x;\n"
+        "2025-03-04;1,234;x;\n"
+        "2025-03-05;1.50;x;\n"
+    ))
+    final = eventos[-1]
+    assert (final["procesadas"], final["importadas"], final["rechazadas"]) == (7, 3, 4)
+    assert [r["motivo"] for r in final["rechazos"]] == [
+        "Fecha inválida", "Monto inválido", "Monto con más de dos decimales", "Monto con más de dos decimales",
+    ]
+    assert [r["linea"] for r in final["rechazos"]] == [4, 5, 6, 7]
+    assert sorted(final["categorias_creadas"]) == ["Comida", "Sin categoría"]
+
+    filas = [(t.monto_centavos, t.tipo, t.descripcion) for t in _transacciones(db, usuario_id)]
+    assert filas == [(123450, "gasto", "Súper"), (5000000, "ingreso", "Sueldo"), (150, "ingreso", "x")]
+    assert crud.verificar_resumenes(db, usuario_id) == []
+
+
+def test_categoria_desconocida_sin_crear(db, usuario_id):
+    final = _importar(db, usuario_id, "fecha,monto,categoria\n2025-03-01,-10,Nueva\n", crear_categorias=False)[-1]
+    assert final["importadas"] == 0
+    assert final["rechazos"] == [{"linea": 2, "motivo": "Categoría desconocida: Nueva"}]
+
+
+def test_duplicados_csv(db, usuario_id):
+    contenido = (
+        "fecha,monto,descripcion,tipo\n"
+        "2025-03-01,100,Compra,gasto\n"
+        "2025-03-01,100,Compra,gasto\n"
+    )
+    # Dos compras iguales el mismo día: en un CSV no hay id para saber si son la misma
+    assert _importar(db, usuario_id, contenido)[-1]["importadas"] == 2
+    # Volver a importar el archivo no agrega nada; una tercera fila igual sí
+    final = _importar(db, usuario_id, contenido + "2025-03-01,100,Compra,gasto\n")[-1]
+    assert (final["importadas"], final["duplicadas"]) == (1, 2)
+    # La devolución de esa compra (mismo monto, otro tipo) no es un duplicado
+    final = _importar(db, usuario_id, "fecha,monto,descripcion,tipo\n2025-03-01,100,Compra,ingreso\n")[-1]
+    assert (final["importadas"], final["duplicadas"]) == (1, 0)
+    assert len(_transacciones(db, usuario_id)) == 4
+
+
+def test_ofx_duplicados_por_fitid(db, usuario_id):
+    contenido = _ofx(
+        ("20250301", "-25.00", "A1", "CAFE"),
+        ("20250301", "-25.00", "A2", "CAFE"),
+        ("20250301", "-25.00", "A2", "CAFE"),
+        ("20250302120000[-3:ART]", "1500.10", "A3", "SUELDO"),
+    )
+    final = _importar(db, usuario_id, contenido, formato="ofx")[-1]
+    assert (final["procesadas"], final["importadas"], final["duplicadas"]) == (4, 3, 1)
+    filas = [(t.fecha, t.monto_centavos, t.tipo, t.descripcion) for t in _transacciones(db, usuario_id)]
+    assert filas == [
+        (datetime(2025, 3, 1), 2500, "gasto", "CAFE"),
+        (datetime(2025, 3, 1), 2500, "gasto", "CAFE"),
+        (datetime(2025, 3, 2, 12), 150010, "ingreso", "SUELDO"),
+    ]
+
+    final = _importar(db, usuario_id, contenido, formato="ofx")[-1]
+    assert (final["importadas"], final["duplicadas"]) == (0, 4)
+
+
+def test_ofx_leido_de_a_bloques():
+    contenido = _ofx(*[("20250301", f"-{n}.00", f"F{n}", f"MOV {n}") for n in range(1, 40)]).encode()
+    movimientos = list(importacion.leer_ofx(io.BytesIO(contenido), tamanio_bloque=7))
+    assert len(movimientos) == 39
+    assert movimientos[-1] == (39, {
+        "TRNTYPE": "DEBIT", "DTPOSTED": "20250301", "TRNAMT": "-39.00", "FITID": "F39", "NAME": "MOV 39",
+    })
+
+
+def test_un_commit_por_lote(db, usuario_id):
+    contenido = "fecha,monto\n" + "".join(f"2025-03-{d:02d},-{d}\n" for d in range(1, 6))
+    eventos = importacion.importar(db, io.BytesIO(contenido.encode()), "csv", usuario_id, tamanio_lote=2)
+
+    assert next(eventos)["importadas"] == 2
+    # El primer lote ya está confirmado: otra sesión lo ve
+    otra = database.SessionLocal()
+    try:
+        assert len(_transacciones(otra, usuario_id)) == 2
+    finally:
+        otra.close()
+    resto = list(eventos)
+    assert [e["evento"] for e in resto] == ["progreso", "progreso", "resumen"]
+    assert [e["importadas"] for e in resto] == [4, 5, 5]
+
+
+def test_ruta_sin_gzip(cliente, usuario):
+    contenido = "fecha,monto,descripcion\n" + "".join(f"2025-03-01,-{n},Mov {n}\n" for n in range(1, 300))
+    r = cliente.post(
+        "/transacciones/importar",
+        headers={**usuario.headers, "Accept-Encoding": "gzip"},
+        files={"archivo": ("resumen.csv", contenido.encode(), "text/csv")},
+    )
+    assert r.status_code == 200
+    # El progreso tiene que llegar línea por línea, sin el buffer de gzip
+    assert "content-encoding" not in r.headers
+    eventos = [json.loads(linea) for linea in r.text.splitlines()]
+    assert eventos[-1]["evento"] == "resumen" and eventos[-1]["importadas"] == 299
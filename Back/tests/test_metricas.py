@@ -0,0 +1,31 @@
+"""Acceso a GET /metrics (metricas.autorizar)."""
+from fastapi.testclient import TestClient
+
+from app import config
+from app.main import app
+
+
+def test_sin_token_solo_pedidos_locales(cliente, monkeypatch):
+    monkeypatch.setattr(config, "METRICAS_TOKEN", None)
+    r = cliente.get("/metrics")
+    assert r.status_code == 403
+    with TestClient(app, client=("127.0.0.1", 50000)) as local:
+        r = local.get("/metrics")
+    assert r.status_code == 200 and "gastos_" in r.text
+
+
+def test_con_token(cliente, monkeypatch):
+    monkeypatch.setattr(config, "METRICAS_TOKEN", "secreto-de-metricas")
+    assert cliente.get("/metrics").status_code == 401
+    assert cliente.get("/metrics", headers={"Authorization": "Bearer otro"}).status_code == 401
+    r = cliente.get("/metrics", headers={"Authorization": "Bearer secreto-de-metricas"})
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain")
+    # El token reemplaza al chequeo de origen: desde la misma máquina también se pide
+    with TestClient(app, client=("127.0.0.1", 50000)) as local:
+        assert local.get("/metrics").status_code == 401
+
+
+def test_desactivadas(cliente, monkeypatch):
+    monkeypatch.setattr(config, "METRICAS", False)
+    with TestClient(app, client=("127.0.0.1", 50000)) as local:
+        assert local.get("/metrics").status_code == 404
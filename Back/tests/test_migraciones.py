@@ -0,0 +1,80 @@
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import Session
+
+from app import crud, migraciones, models
+
+# Tablas tal como las creaba la versión anterior a las migraciones
+_ESQUEMA_VIEJO = [
+    "CREATE TABLE usuarios (id INTEGER PRIMARY KEY, email VARCHAR NOT NULL, nombre VARCHAR,"
+    " hashed_password VARCHAR NOT NULL)",
+    "CREATE TABLE categorias (id INTEGER PRIMARY KEY, nombre VARCHAR NOT NULL, tipo VARCHAR NOT NULL,"
+    " usuario_id INTEGER REFERENCES usuarios (id))",
+    "CREATE TABLE transacciones (id INTEGER PRIMARY KEY, monto FLOAT NOT NULL, fecha DATETIME,"
+    " descripcion VARCHAR, tipo VARCHAR NOT NULL, categoria_id INTEGER REFERENCES categorias (id),"
+    " usuario_id INTEGER REFERENCES usuarios (id))",
+]
+
+
+def test_base_anterior_a_las_migraciones(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/vieja.db")
+    with engine.begin() as conn:
+        for sentencia in _ESQUEMA_VIEJO:
+            conn.exec_driver_sql(sentencia)
+        conn.exec_driver_sql("INSERT INTO usuarios VALUES (1, 'vieja@example.com', 'vieja', 'x')")
+        conn.exec_driver_sql("INSERT INTO categorias VALUES (1, 'Comida', 'gasto', 1)")
+        conn.exec_driver_sql(
+            "INSERT INTO transacciones VALUES (1, 10.5, '2025-10-03 12:00:00', 'a', 'gasto', 1, 1),"
+            " (2, 0.285, '2025-10-04 12:00:00', 'b', 'gasto', 1, 1),"
+            " (3, 3, '2025-10-05 12:00:00', 'c', 'gasto', 1, 1)"
+        )
+
+    assert migraciones.aplicar(engine) == [version for version, _, _ in migraciones.MIGRACIONES]
+
+    db = Session(bind=engine)
+    try:
+        resumen = db.query(models.ResumenMensual).one()
+        assert (resumen.anio, resumen.mes, resumen.categoria_id) == (2025, 10, 1)
+        assert (resumen.total_centavos, resumen.cantidad) == (1050 + 29 + 300, 3)
+        assert crud.verificar_resumenes(db, 1) == []
+    finally:
+        db.close()
+    engine.dispose()
+
+
+def _esquema(engine):
+    """Columnas, claves e índices de cada tabla de la aplicación."""
+    inspector = inspect(engine)
+    esquema = {}
+    for tabla in inspector.get_table_names():
+        if tabla == "migraciones" or tabla.startswith("transacciones_fts"):
+            continue
+        esquema[tabla] = {
+            "columnas": {(c["name"], c["nullable"]) for c in inspector.get_columns(tabla)},
+            "pk": tuple(inspector.get_pk_constraint(tabla)["constrained_columns"]),
+            "fks": {
+                (tuple(fk["constrained_columns"]), fk["referred_table"]) for fk in inspector.get_foreign_keys(tabla)
+            },
+            "unicos": {tuple(u["column_names"]) for u in inspector.get_unique_constraints(tabla)},
+        }
+    # La reflexión no ve los índices funcionales: se compara su CREATE INDEX
+    with engine.connect() as conn:
+        for tabla, sql in conn.exec_driver_sql(
+            "SELECT tbl_name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+        ):
+            if tabla in esquema:
+                sql = " ".join(sql.replace("IF NOT EXISTS ", "").split())
+                esquema[tabla].setdefault("indices", set()).add(sql)
+    return esquema
+
+
+def test_migraciones_llegan_al_esquema_de_models(tmp_path):
+    # Las migraciones no usan models.py: aplicadas sobre una base vacía
+    # tienen que dejar lo mismo que declara
+    migrada = create_engine(f"sqlite:///{tmp_path}/migrada.db")
+    migraciones.aplicar(migrada)
+    declarada = create_engine(f"sqlite:///{tmp_path}/declarada.db")
+    models.Base.metadata.create_all(bind=declarada)
+
+    assert _esquema(migrada) == _esquema(declarada)
+    migrada.dispose()
+    declarada.dispose()
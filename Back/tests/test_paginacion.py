@@ -0,0 +1,73 @@
+"""Paginación por cursor (keyset) de transacciones y categorías."""
+from datetime import datetime
+
+import pytest
+
+from app import crud
+from conftest import cargar
+
+
+def _paginas(cliente, usuario, ruta, limit):
+    """Recorre todas las páginas siguiendo X-Next-Cursor; devuelve los ids de cada una."""
+    paginas, params = [], {"limit": limit}
+    while True:
+        r = cliente.get(ruta, headers=usuario.headers, params=params)
+        assert r.status_code == 200
+        paginas.append([fila["id"] for fila in r.json()])
+        if "x-next-cursor" not in r.headers:
+            return paginas
+        params = {"limit": limit, "cursor": r.headers["x-next-cursor"]}
+
+
+def test_cursor_ida_y_vuelta():
+    cursor = crud.codificar_cursor(datetime(2025, 1, 2, 3, 4, 5), 7)
+    assert "=" not in cursor
+    assert crud.decodificar_cursor(cursor) == ["2025-01-02T03:04:05", 7]
+
+
+@pytest.mark.parametrize("cursor", ["%%%", "bm8gZXMganNvbg", "e30"]) # inválido, 'no es json', '{}'
+def test_cursor_invalido(cursor):
+    with pytest.raises(ValueError, match="Cursor inválido"):
+        crud.decodificar_cursor(cursor)
+
+
+def test_transacciones_por_fecha_e_id(cliente, usuario):
+    # Dos transacciones con la misma fecha: el id desempata
+    cargar(cliente, usuario, (
+        "2025-01-01,-1,a,Gasto\n"
+        "2025-01-03,-2,b,Gasto\n"
+        "2025-01-02,-3,c,Gasto\n"
+        "2025-01-02,-4,d,Gasto\n"
+        "2025-01-05,-5,e,Gasto\n"
+    ))
+    todas = [t["id"] for t in cliente.get("/transacciones/", headers=usuario.headers).json()]
+    paginas = _paginas(cliente, usuario, "/transacciones/", limit=2)
+    assert [len(p) for p in paginas] == [2, 2, 1]
+    assert sum(paginas, []) == todas
+
+    # Un alta entre página y página no corre las siguientes (con OFFSET se repetiría una fila)
+    r = cliente.get("/transacciones/", headers=usuario.headers, params={"limit": 2})
+    cliente.post("/transacciones/", headers=usuario.headers, json={
+        "monto": 9, "descripcion": "nueva", "tipo": "gasto", "categoria_id": usuario.gasto,
+    })
+    r = cliente.get("/transacciones/", headers=usuario.headers, params={"limit": 2, "cursor": r.headers["x-next-cursor"]})
+    assert [t["id"] for t in r.json()] == todas[2:4]
+
+
+def test_categorias(cliente, usuario):
+    cliente.post("/categorias/", headers=usuario.headers, json={"nombre": "Otra", "tipo": "gasto"})
+    paginas = _paginas(cliente, usuario, "/categorias/", limit=1)
+    # La última página llena trae cursor; la siguiente viene vacía
+    assert [len(p) for p in paginas] == [1, 1, 1, 0]
+    assert sum(paginas, []) == sorted(sum(paginas, []))
+
+
+@pytest.mark.parametrize("ruta, cursor", [
+    ("/transacciones/", "%%%"),
+    ("/transacciones/", crud.codificar_cursor(5)),  # un cursor de categorías
+    ("/categorias/", crud.codificar_cursor("5")),
+    ("/categorias/", crud.codificar_cursor(datetime(2025, 1, 1), 5)),
+])
+def test_cursor_invalido_es_400(cliente, usuario, ruta, cursor):
+    r = cliente.get(ruta, headers=usuario.headers, params={"cursor": cursor})
+    assert r.status_code == 400 and r.json()["detail"] == "Cursor inválido"
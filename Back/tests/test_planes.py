@@ -0,0 +1,160 @@
+"""
+Planes de consulta (EXPLAIN QUERY PLAN) de cada camino de acceso de crud.py.
+
+Una base SQLite en memoria con las migraciones aplicadas y algunos datos:
+cada caso corre una función de crud.py capturando el SQL que emite y falla
+si alguna sentencia recorre completa ("SCAN <tabla>") una tabla vigilada.
+Sin ANALYZE: con tan pocas filas las estadísticas harían preferir un SCAN,
+que no es lo que pasa con tablas de tamaño real.
+"""
+import datetime
+import re
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud, migraciones, schemas
+
+
+# Tablas de la aplicación que nunca deberían recorrerse completas
+TABLAS_VIGILADAS = {"usuarios", "categorias", "transacciones", "resumenes_mensuales", "refresh_tokens", "ids_movidos"}
+
+_SCAN = re.compile(r"^SCAN (\w+)")
+
+
+@pytest.fixture(scope="module")
+def engine():
+    motor = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    migraciones.aplicar(motor)
+    yield motor
+    motor.dispose()
+
+
+@pytest.fixture(scope="module")
+def db(engine):
+    sesion = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield sesion
+    sesion.close()
+
+
+@pytest.fixture(scope="module")
+def datos(db):
+    """Dos usuarios con algunas categorías y transacciones; los casos usan el segundo."""
+    for n in (1, 2):
+        usuario = crud.create_user(db, schemas.UsuarioCreate(
+            email=f"plan{n}@example.com", nombre=f"plan{n}", password="plan"
+        ))
+        gasto = crud.create_user_categoria(db, schemas.CategoriaCreate(nombre="Comida", tipo="gasto"), usuario.id)
+        ingreso = crud.create_user_categoria(db, schemas.CategoriaCreate(nombre="Sueldo", tipo="ingreso"), usuario.id)
+        for i in range(5):
+            crud.create_user_transaccion(db, schemas.TransaccionCreate(
+                monto=10 + i, descripcion=f"compra {i}", tipo="gasto", categoria_id=gasto.id
+            ), usuario.id)
+        crud.create_user_transaccion(db, schemas.TransaccionCreate(
+            monto=1000, descripcion="sueldo", tipo="ingreso", categoria_id=ingreso.id
+        ), usuario.id)
+    hoy = datetime.date.today()
+    return SimpleNamespace(
+        usuario=usuario, uid=usuario.id, gasto=gasto.id, ingreso=ingreso.id,
+        desde=hoy.replace(day=1), hasta=hoy + datetime.timedelta(days=1),
+        vence=datetime.datetime.utcnow() + datetime.timedelta(days=1),
+        cursor=crud.codificar_cursor(datetime.datetime.utcnow(), 10 ** 9),
+    )
+
+
+def _gasto(d, monto=1):
+    return schemas.TransaccionCreate(monto=monto, descripcion="plan", tipo="gasto", categoria_id=d.gasto)
+
+
+def _categoria_nueva(db, d):
+    return crud.create_user_categoria(db, schemas.CategoriaCreate(nombre="Plan", tipo="gasto"), d.uid).id
+
+
+# (nombre, función(db, datos)): un caso por camino de acceso
+CASOS = [
+    ("get_user", lambda db, d: crud.get_user(db, d.uid)),
+    ("get_user_by_email", lambda db, d: crud.get_user_by_email(db, d.usuario.email)),
+    ("get_user_by_email_or_username", lambda db, d: crud.get_user_by_email_or_username(db, d.usuario.nombre)),
+    ("get_usuario_detalle", lambda db, d: crud.get_usuario_detalle(db, d.uid, {"transacciones", "categorias", "conteos"})),
+    ("create_user", lambda db, d: crud.create_user(db, schemas.UsuarioCreate(
+        email="plan3@example.com", nombre="plan3", password="plan"), hashed_password="x")),
+    ("update_user_password_hash", lambda db, d: crud.update_user_password_hash(db, crud.get_user(db, d.uid), "x")),
+    ("get_version_datos", lambda db, d: crud.get_version_datos(db, d.uid)),
+    ("crear_refresh_token", lambda db, d: crud.crear_refresh_token(db, d.uid, "0" * 64, "plan", d.vence)),
+    ("get_refresh_token", lambda db, d: crud.get_refresh_token(db, "0" * 64)),
+    ("rotar_refresh_token", lambda db, d: crud.rotar_refresh_token(db, 1, d.uid, "plan", "1" * 64, d.vence)),
+    ("revocar_familia_refresh", lambda db, d: crud.revocar_familia_refresh(db, "plan")),
+    ("create_user_categoria", _categoria_nueva),
+    ("get_categorias", lambda db, d: crud.get_categorias(db, d.uid, skip=0, limit=10)),
+    ("get_categorias (cursor)", lambda db, d: crud.get_categorias(db, d.uid, limit=10, cursor=crud.codificar_cursor(0))),
+    ("get_categorias_json", lambda db, d: crud.get_categorias_json(db, d.uid, skip=0, limit=10)),
+    ("get_categoria", lambda db, d: crud.get_categoria(db, d.gasto, d.uid)),
+    ("update_categoria", lambda db, d: crud.update_categoria(
+        db, d.gasto, schemas.CategoriaCreate(nombre="Comida", tipo="gasto"), d.uid)),
+    ("delete_categoria (en uso)", lambda db, d: crud.delete_categoria(db, d.gasto, d.uid)),
+    ("delete_categoria (borrada)", lambda db, d: crud.delete_categoria(db, _categoria_nueva(db, d), d.uid)),
+    ("merge_categoria", lambda db, d: crud.merge_categoria(db, _categoria_nueva(db, d), d.gasto, d.uid)),
+    ("get_id_movido", lambda db, d: crud.get_id_movido(db, d.uid, "transacciones", 1)),
+    ("get_transacciones", lambda db, d: crud.get_transacciones(db, d.uid, skip=0, limit=10)),
+    ("get_transacciones (cursor)", lambda db, d: crud.get_transacciones(db, d.uid, limit=10, cursor=d.cursor)),
+    ("get_transacciones_json (cursor)", lambda db, d: crud.get_transacciones_json(db, d.uid, limit=10, cursor=d.cursor)),
+    ("exportar_transacciones", lambda db, d: list(crud.exportar_transacciones(db, d.uid))),
+    ("exportar_transacciones (fechas)", lambda db, d: list(crud.exportar_transacciones(db, d.uid, d.desde, d.hasta))),
+    ("get_transaccion", lambda db, d: crud.get_transaccion(db, 1, d.uid)),
+    ("create_user_transaccion", lambda db, d: crud.create_user_transaccion(db, _gasto(d), d.uid)),
+    ("create_user_transacciones_bulk", lambda db, d: crud.create_user_transacciones_bulk(db, [
+        _gasto(d), schemas.TransaccionCreate(monto=2, descripcion="plan", tipo="ingreso", categoria_id=d.ingreso),
+    ], d.uid)),
+    ("update_transaccion", lambda db, d: crud.update_transaccion(
+        db, crud.get_transacciones(db, d.uid, limit=1)[0].id, _gasto(d, 2), d.uid)),
+    ("recategorizar_transacciones", lambda db, d: crud.recategorizar_transacciones(
+        db, d.uid, d.gasto, desde=d.desde, q="compra", categoria_origen_id=d.ingreso)),
+    ("recategorizar_transacciones (fechas)", lambda db, d: crud.recategorizar_transacciones(
+        db, d.uid, d.gasto, desde=d.desde, hasta=d.hasta, tipo="gasto")),
+    ("delete_transaccion", lambda db, d: crud.delete_transaccion(db, crud.get_transacciones(db, d.uid, limit=1)[0].id, d.uid)),
+    ("buscar_transacciones", lambda db, d: crud.buscar_transacciones(db, d.uid, "comp", desde=d.desde, tipo="gasto")),
+    ("get_dashboard_summary", lambda db, d: crud.get_dashboard_summary(db, d.uid)),
+    ("get_dashboard_series", lambda db, d: crud.get_dashboard_series(db, d.uid, d.desde, d.hasta, "day")),
+    ("get_libro", lambda db, d: crud.get_libro(db, d.uid)),
+    ("reconstruir_resumenes", lambda db, d: crud.reconstruir_resumenes(db, d.uid)),
+    ("verificar_resumenes", lambda db, d: crud.verificar_resumenes(db, d.uid)),
+]
+
+
+def _sentencias(engine, funcion):
+    """Corre funcion() y devuelve las (sentencia, parámetros) que emitió."""
+    capturadas = []
+
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "INSERT")):
+            # Un executemany (altas masivas, upserts de resúmenes y
+            # versiones) usa el mismo plan para cada juego de parámetros:
+            # basta el primero. Con RETURNING, SQLite los corre de a uno
+            # y cada llamada ya trae un solo juego.
+            if executemany and parameters and isinstance(parameters[0], (tuple, list, dict)):
+                parameters = parameters[0]
+            capturadas.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capturar)
+    try:
+        funcion()
+    finally:
+        event.remove(engine, "before_cursor_execute", capturar)
+    return capturadas
+
+
+@pytest.mark.parametrize("caso", [caso for _, caso in CASOS], ids=[nombre for nombre, _ in CASOS])
+def test_usa_indices(engine, db, datos, caso):
+    sentencias = _sentencias(engine, lambda: caso(db, datos))
+    assert sentencias
+
+    recorridos = []
+    for statement, parameters in sentencias:
+        for fila in db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters):
+            m = _SCAN.match(fila[-1])
+            if m and m.group(1) in TABLAS_VIGILADAS:
+                recorridos.append((fila[-1], " ".join(statement.split())))
+    assert recorridos == []
@@ -0,0 +1,95 @@
+"""Fusión de categorías y recategorización masiva."""
+import datetime
+
+from app import crud, database, models
+
+
+def _transaccion(cliente, usuario, categoria_id, monto, descripcion="compra", tipo="gasto"):
+    r = cliente.post("/transacciones/", headers=usuario.headers, json={
+        "monto": monto, "descripcion": descripcion, "tipo": tipo, "categoria_id": categoria_id,
+    })
+    assert r.status_code == 200, r.text
+    return r.json()["id"]
+
+
+def _categoria(cliente, usuario, nombre, tipo="gasto"):
+    return cliente.post("/categorias/", headers=usuario.headers, json={"nombre": nombre, "tipo": tipo}).json()["id"]
+
+
+def _categorias(cliente, usuario):
+    return {c["id"] for c in cliente.get("/categorias/", headers=usuario.headers).json()}
+
+
+def _verificar(usuario):
+    db = database.SessionLocal()
+    try:
+        return crud.verificar_resumenes(db, usuario.id)
+    finally:
+        db.close()
+
+
+def test_merge(cliente, usuario):
+    comida = _categoria(cliente, usuario, "Comida")
+    for monto in ("10", "20.50", "30"):
+        _transaccion(cliente, usuario, comida, monto)
+    _transaccion(cliente, usuario, usuario.gasto, "5")
+
+    r = cliente.post(f"/categorias/{comida}/merge", params={"into": usuario.gasto}, headers=usuario.headers)
+    assert r.status_code == 200, r.text
+    assert r.json() == {"categoria_id": usuario.gasto, "transacciones": 3}
+    assert _categorias(cliente, usuario) == {usuario.ingreso, usuario.gasto}
+
+    resumen = cliente.get("/dashboard/summary", headers=usuario.headers).json()
+    assert [(c["name"], c["value"]) for c in resumen["gastos_por_categoria"]] == [("Gasto", 65.5)]
+    assert _verificar(usuario) == []
+
+
+def test_recategorizar_por_fechas(cliente, usuario):
+    viejas = [_transaccion(cliente, usuario, usuario.gasto, "10") for _ in range(2)]
+    _transaccion(cliente, usuario, usuario.gasto, "7")
+    # Dos en enero de 2025; los resúmenes se recalculan para la fecha nueva
+    db = database.SessionLocal()
+    try:
+        db.query(models.Transaccion).filter(models.Transaccion.id.in_(viejas)).update(
+            {models.Transaccion.fecha: datetime.datetime(2025, 1, 15)}, synchronize_session=False
+        )
+        db.commit()
+        crud.reconstruir_resumenes(db, usuario.id)
+    finally:
+        db.close()
+    otros = _categoria(cliente, usuario, "Otros")
+
+    r = cliente.post("/transacciones/recategorizar", headers=usuario.headers, json={
+        "categoria_id": otros, "desde": "2025-01-01", "hasta": "2025-02-01",
+    })
+    assert r.status_code == 200, r.text
+    assert r.json()["transacciones"] == 2
+    movidas = [t["id"] for t in cliente.get("/transacciones/", headers=usuario.headers).json() if t["categoria_id"] == otros]
+    assert sorted(movidas) == sorted(viejas)
+    assert _verificar(usuario) == []
+
+
+def test_no_mezcla_tipos(cliente, usuario):
+    _transaccion(cliente, usuario, usuario.gasto, "10")
+    _transaccion(cliente, usuario, usuario.ingreso, "100", tipo="ingreso")
+    # Una categoría de gastos con un ingreso cargado adentro
+    mixta = _categoria(cliente, usuario, "Mixta")
+    _transaccion(cliente, usuario, mixta, "3", tipo="ingreso")
+    otra = _categoria(cliente, usuario, "Otra")
+
+    r = cliente.post(f"/categorias/{usuario.gasto}/merge", params={"into": usuario.ingreso}, headers=usuario.headers)
+    assert r.status_code == 400
+    r = cliente.post(f"/categorias/{mixta}/merge", params={"into": otra}, headers=usuario.headers)
+    assert r.status_code == 400
+    r = cliente.post("/transacciones/recategorizar", headers=usuario.headers, json={
+        "categoria_id": usuario.ingreso, "categoria_origen_id": usuario.gasto,
+    })
+    assert r.status_code == 400
+
+    # Nada se movió ni se borró
+    categorias = {t["categoria_id"] for t in cliente.get("/transacciones/", headers=usuario.headers).json()}
+    assert categorias == {usuario.gasto, usuario.ingreso, mixta}
+    assert _categorias(cliente, usuario) == {usuario.ingreso, usuario.gasto, mixta, otra}
+    resumen = cliente.get("/dashboard/summary", headers=usuario.headers).json()
+    assert [c["name"] for c in resumen["gastos_por_categoria"]] == ["Gasto"]
+    assert _verificar(usuario) == []
@@ -0,0 +1,117 @@
+"""Refresh tokens: POST /token/refresh, POST /token/revoke y sus funciones de crud.py."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import auth, crud, database, models
+from conftest import CONTRASENIA
+
+
+@pytest.fixture(params=["sync", "async"])
+def modo(request):
+    if request.param == "async":
+        request.getfixturevalue("modo_async")
+    return request.param
+
+
+def _login(cliente, usuario):
+    r = cliente.post("/token", data={"username": usuario.nombre, "password": CONTRASENIA})
+    assert r.status_code == 200
+    return r.json()["refresh_token"]
+
+
+def _refrescar(cliente, refresh_token):
+    return cliente.post("/token/refresh", json={"refresh_token": refresh_token})
+
+
+def _vigentes(usuario_id):
+    db = database.SessionLocal()
+    try:
+        return db.query(models.RefreshToken).filter(
+            models.RefreshToken.usuario_id == usuario_id, models.RefreshToken.revocado_en.is_(None)
+        ).count()
+    finally:
+        db.close()
+
+
+def test_rotacion(modo, cliente, usuario):
+    primero = _login(cliente, usuario)
+    r = _refrescar(cliente, primero)
+    assert r.status_code == 200
+    datos = r.json()
+    assert datos["refresh_token"] != primero and datos["expires_in"] == auth.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    # El token de acceso nuevo sirve
+    headers = {"Authorization": f"Bearer {datos['access_token']}"}
+    assert cliente.get("/categorias/", headers=headers).status_code == 200
+    # Y el refresh nuevo también, una vez
+    assert _refrescar(cliente, datos["refresh_token"]).status_code == 200
+
+
+def test_reuso_revoca_la_familia(modo, cliente, usuario):
+    otra_sesion = _login(cliente, usuario)
+    primero = _login(cliente, usuario)
+    segundo = _refrescar(cliente, primero).json()["refresh_token"]
+
+    # Alguien presenta el token ya rotado: se revoca la familia entera
+    r = _refrescar(cliente, primero)
+    assert r.status_code == 401 and r.headers["www-authenticate"] == "Bearer"
+    assert _refrescar(cliente, segundo).status_code == 401
+    # Las sesiones de los otros logins (el del fixture y otra_sesion) siguen vivas
+    assert _vigentes(usuario.id) == 2
+    assert _refrescar(cliente, otra_sesion).status_code == 200
+
+
+def test_revocar(modo, cliente, usuario):
+    refresh_token = _login(cliente, usuario)
+    siguiente = _refrescar(cliente, refresh_token).json()["refresh_token"]
+    # Revocar con cualquier token de la familia cierra la sesión
+    assert cliente.post("/token/revoke", json={"refresh_token": refresh_token}).status_code == 204
+    assert _refrescar(cliente, siguiente).status_code == 401
+    # Un token desconocido no revela nada: también 204
+    assert cliente.post("/token/revoke", json={"refresh_token": "no-existe"}).status_code == 204
+
+
+def test_vencido_o_ajeno(modo, cliente, usuario):
+    refresh_token = _login(cliente, usuario)
+    db = database.SessionLocal()
+    try:
+        db.query(models.RefreshToken).filter(
+            models.RefreshToken.token_hash == auth.hash_refresh_token(refresh_token)
+        ).update({models.RefreshToken.vence_en: datetime.utcnow() - timedelta(seconds=1)})
+        db.commit()
+    finally:
+        db.close()
+    assert _refrescar(cliente, refresh_token).status_code == 401
+
+    # Tokens que no emitimos: uno inventado, uno no ASCII y un token de acceso (JWT)
+    acceso = usuario.headers["Authorization"].split()[1]
+    for ajeno in ("x" * 43, "tökën", acceso):
+        r = _refrescar(cliente, ajeno)
+        assert r.status_code == 401 and r.json()["detail"] == "Refresh token inválido o vencido"
+
+
+def test_crud_rotar_y_limpiar_vencidos(base, usuario):
+    db = database.SessionLocal()
+    try:
+        ayer = datetime.utcnow() - timedelta(days=1)
+        crud.crear_refresh_token(db, usuario.id, auth.hash_refresh_token("vencido"), "f" * 32, ayer)
+        _, hash_vigente, vence_en = auth.nuevo_refresh_token()
+        # Crear otro borra los vencidos del usuario
+        crud.crear_refresh_token(db, usuario.id, hash_vigente, "f" * 32, vence_en)
+        assert crud.get_refresh_token(db, auth.hash_refresh_token("vencido")) is None
+
+        registro = crud.get_refresh_token(db, hash_vigente)
+        assert (registro.usuario_id, registro.email, registro.revocado_en) == (
+            usuario.id, f"{usuario.nombre}@example.com", None
+        )
+        _, hash_nuevo, vence_en = auth.nuevo_refresh_token()
+        assert crud.rotar_refresh_token(db, registro.id, usuario.id, registro.familia, hash_nuevo, vence_en)
+        # Un segundo rotado del mismo token (dos requests a la vez) no crea otro
+        _, hash_otro, vence_en = auth.nuevo_refresh_token()
+        assert not crud.rotar_refresh_token(db, registro.id, usuario.id, registro.familia, hash_otro, vence_en)
+        assert crud.get_refresh_token(db, hash_otro) is None
+
+        assert crud.revocar_familia_refresh(db, "f" * 32) == 1
+        assert crud.revocar_familia_refresh(db, "f" * 32) == 0
+    finally:
+        db.close()
@@ -0,0 +1,42 @@
+"""GET /dashboard/series: buckets de día, semana y mes en una sola consulta."""
+from conftest import cargar
+
+FILAS = (
+    "2025-01-05,1000,Sueldo,Ingreso\n"
+    "2025-01-10,-100.10,Súper,Gasto\n"
+    "2025-01-20,-50,Almuerzo,Comida\n"
+    "2025-03-01,-10,Café,Gasto\n"
+)
+
+
+def _series(cliente, usuario, **params):
+    return cliente.get("/dashboard/series", headers=usuario.headers, params=params)
+
+
+def test_por_mes(cliente, usuario):
+    cargar(cliente, usuario, FILAS)
+    r = _series(cliente, usuario, **{"from": "2025-01-01", "to": "2025-04-01"})
+    assert r.status_code == 200
+    puntos = r.json()["puntos"]
+    # También los meses sin movimientos, para los gráficos
+    assert [p["periodo"] for p in puntos] == ["2025-01-01", "2025-02-01", "2025-03-01"]
+    enero, febrero, marzo = puntos
+    assert (enero["total_ingresos"], enero["total_gastos"], enero["balance"]) == (1000, 150.1, 849.9)
+    assert sorted((c["name"], c["value"]) for c in enero["gastos_por_categoria"]) == [("Comida", 50), ("Gasto", 100.1)]
+    assert (febrero["total_gastos"], febrero["gastos_por_categoria"]) == (0, [])
+    assert (marzo["total_gastos"], marzo["balance"]) == (10, -10)
+
+
+def test_por_semana_y_dia(cliente, usuario):
+    cargar(cliente, usuario, FILAS)
+    # Semanas de lunes a domingo: 2025-01-06 y 2025-01-13
+    puntos = _series(cliente, usuario, granularity="week", **{"from": "2025-01-08", "to": "2025-01-20"}).json()["puntos"]
+    assert [(p["periodo"], p["total_gastos"]) for p in puntos] == [("2025-01-06", 100.1), ("2025-01-13", 0)]
+    # 'to' es exclusivo
+    puntos = _series(cliente, usuario, granularity="day", **{"from": "2025-01-10", "to": "2025-01-12"}).json()["puntos"]
+    assert [(p["periodo"], p["total_gastos"]) for p in puntos] == [("2025-01-10", 100.1), ("2025-01-11", 0)]
+
+
+def test_parametros_invalidos(cliente, usuario):
+    assert _series(cliente, usuario, **{"from": "2025-02-01", "to": "2025-02-01"}).status_code == 400
+    assert _series(cliente, usuario, granularity="year").status_code == 422
@@ -0,0 +1,142 @@
+"""Shards por usuario (app/shards.py) con SHARDS=3."""
+import pytest
+from sqlalchemy import inspect
+
+from app import config, crud, database, models, shards
+
+
+@pytest.fixture
+def tres_shards(base, monkeypatch):
+    """SHARDS=3 con las migraciones aplicadas; al terminar todos vuelven al shard 0."""
+    monkeypatch.setattr(config, "SHARDS", 3)
+    models.crear_db()
+    yield
+    shards.rebalancear(1)
+
+
+def _shard(usuario_id):
+    db = database.SessionLocal()
+    try:
+        return db.query(models.Usuario.shard).filter(models.Usuario.id == usuario_id).scalar()
+    finally:
+        db.close()
+
+
+def _contar(shard, modelo, usuario_id):
+    db = shards.sesion_de_shard(shard)
+    try:
+        return db.query(modelo).filter(modelo.usuario_id == usuario_id).count()
+    finally:
+        db.close()
+
+
+def _verificar(usuario_id):
+    db = shards.sesion_de_usuario(usuario_id)
+    try:
+        return crud.verificar_resumenes(db, usuario_id)
+    finally:
+        db.close()
+
+
+def test_sesion_enrutada(tres_shards):
+    db = database.SessionLocal()
+    try:
+        assert db.get_bind(inspect(models.Transaccion)) is database.engine
+        database.usar_shard(db, 2)
+        assert db.get_bind(inspect(models.Transaccion)) is database.engine_shard(2)
+        assert db.get_bind(inspect(models.Categoria)) is database.engine_shard(2)
+        # El directorio queda siempre en la base principal
+        assert db.get_bind(inspect(models.Usuario)) is database.engine
+        assert db.get_bind(inspect(models.RefreshToken)) is database.engine
+    finally:
+        db.close()
+
+
+def test_usuarios_nuevos_y_sus_datos(tres_shards, cliente, usuario):
+    assert _shard(usuario.id) == usuario.id % 3
+    r = cliente.post("/transacciones/", headers=usuario.headers, json={
+        "monto": 10, "descripcion": "en su shard", "tipo": "gasto", "categoria_id": usuario.gasto,
+    })
+    assert r.status_code == 200
+    for n in range(3):
+        assert _contar(n, models.Transaccion, usuario.id) == (1 if n == usuario.id % 3 else 0)
+
+
+def test_mover_usuario(tres_shards, cliente, usuario):
+    h = usuario.headers
+    viejas = [
+        cliente.post("/transacciones/", headers=h, json={
+            "monto": monto, "descripcion": "compra", "tipo": "gasto", "categoria_id": usuario.gasto,
+        }).json()["id"]
+        for monto in (10, 20, 30)
+    ]
+    origen = _shard(usuario.id)
+    destino = (origen + 1) % 3
+
+    assert shards.mover_usuario(usuario.id, destino) == 3
+    assert _shard(usuario.id) == destino
+    assert _contar(origen, models.Transaccion, usuario.id) == 0
+    assert _contar(origen, models.Categoria, usuario.id) == 0
+    assert _verificar(usuario.id) == []
+
+    # Ids nuevos, mayores que todos los viejos y en el mismo orden
+    nuevas = sorted(t["id"] for t in cliente.get("/transacciones/", headers=h).json())
+    assert min(nuevas) > max(viejas)
+    categorias = {c["nombre"]: c["id"] for c in cliente.get("/categorias/", headers=h).json()}
+    assert categorias["Gasto"] not in (usuario.gasto, usuario.ingreso)
+
+    # Los ids viejos redirigen (308 repite método y cuerpo) al id nuevo
+    cuerpo = {"monto": 15, "descripcion": "editada", "tipo": "gasto", "categoria_id": categorias["Gasto"]}
+    r = cliente.put(f"/transacciones/{viejas[0]}", headers=h, json=cuerpo, follow_redirects=False)
+    assert r.status_code == 308
+    assert r.headers["location"].endswith(f"/transacciones/{nuevas[0]}")
+    r = cliente.put(f"/transacciones/{viejas[0]}", headers=h, json=cuerpo)
+    assert r.status_code == 200 and r.json()["id"] == nuevas[0]
+    r = cliente.post(f"/categorias/{usuario.gasto}/merge", params={"into": 1}, headers=h, follow_redirects=False)
+    assert r.status_code == 308
+    assert r.headers["location"].endswith(f"/categorias/{categorias['Gasto']}/merge?into=1")
+    assert cliente.put("/transacciones/999999999", headers=h, json=cuerpo).status_code == 404
+
+    # Otro movimiento: los ids de hace dos movimientos llevan directo a los actuales
+    otro = (destino + 1) % 3
+    assert shards.mover_usuario(usuario.id, otro) == 3
+    actuales = sorted(t["id"] for t in cliente.get("/transacciones/", headers=h).json())
+    r = cliente.delete(f"/transacciones/{viejas[1]}", headers=h, follow_redirects=False)
+    assert r.headers["location"].endswith(f"/transacciones/{actuales[1]}")
+    assert cliente.delete(f"/transacciones/{nuevas[2]}", headers=h).status_code == 204
+    assert len(cliente.get("/transacciones/", headers=h).json()) == 2
+    assert _verificar(usuario.id) == []
+
+
+def test_limpiar_huerfanos(tres_shards, cliente, usuario):
+    actual = _shard(usuario.id)
+    otro = (actual + 1) % 3
+    # Restos de un movimiento cortado en otro shard
+    db = shards.sesion_de_shard(otro)
+    try:
+        db.add(models.Categoria(nombre="Resto", tipo="gasto", usuario_id=usuario.id))
+        db.commit()
+    finally:
+        db.close()
+
+    limpiados = shards.limpiar_huerfanos()
+    assert limpiados[otro] >= 1
+    assert _contar(otro, models.Categoria, usuario.id) == 0
+    assert _contar(actual, models.Categoria, usuario.id) == 2
+
+
+def test_rebalancear(tres_shards, cliente, usuario):
+    # Todos al shard 0, como si SHARDS acabara de pasar de 1 a 3
+    shards.rebalancear(1)
+    assert _shard(usuario.id) == 0
+
+    plan = shards.rebalancear(3, simular=True)
+    assert (usuario.id, 0, usuario.id % 3) in plan or usuario.id % 3 == 0
+    assert all(destino == u % 3 and origen != destino for u, origen, destino in plan)
+    assert _shard(usuario.id) == 0
+
+    assert shards.rebalancear(3) == plan
+    assert _shard(usuario.id) == usuario.id % 3
+    assert shards.rebalancear(3) == []
+    assert len(cliente.get("/categorias/", headers=usuario.headers).json()) == 2
+    assert _verificar(usuario.id) == []
@@ -0,0 +1,37 @@
+"""Autenticación de GET /dashboard/stream con tickets (EventSource)."""
+import logging
+
+from app import config, registro
+
+
+def test_ticket_solo_sirve_para_el_stream(cliente, usuario, monkeypatch):
+    r = cliente.post("/dashboard/stream/ticket", headers=usuario.headers)
+    assert r.status_code == 200, r.text
+    assert r.json()["expires_in"] == config.STREAM_TICKET_SEGUNDOS
+    ticket = r.json()["ticket"]
+
+    # No reemplaza al token de acceso en las demás rutas
+    r = cliente.get("/usuarios/me/", headers={"Authorization": f"Bearer {ticket}"})
+    assert r.status_code == 401
+    # Y el token de acceso ya no se acepta en la URL
+    token = usuario.headers["Authorization"].split()[1]
+    assert cliente.get("/dashboard/stream", params={"token": token}).status_code == 401
+    assert cliente.get("/dashboard/stream", params={"ticket": token}).status_code == 401
+
+    monkeypatch.setattr(config, "STREAM_TICKET_SEGUNDOS", -1)
+    vencido = cliente.post("/dashboard/stream/ticket", headers=usuario.headers).json()["ticket"]
+    assert cliente.get("/dashboard/stream", params={"ticket": vencido}).status_code == 401
+
+
+def test_log_de_acceso_sin_query_string():
+    registro.configurar()
+    registro.configurar()
+    acceso = logging.getLogger("uvicorn.access")
+    assert sum(isinstance(f, registro.SinQueryString) for f in acceso.filters) == 1
+
+    record = logging.makeLogRecord({
+        "msg": '%s - "%s %s HTTP/%s" %d',
+        "args": ("127.0.0.1:5000", "GET", "/dashboard/stream?ticket=secreto", "1.1", 200),
+    })
+    assert acceso.filter(record)
+    assert record.getMessage() == '127.0.0.1:5000 - "GET /dashboard/stream HTTP/1.1" 200'
@@ -0,0 +1,50 @@
+"""GET /usuarios/me/: perfil liviano por defecto y partes extra con ?include=."""
+from sqlalchemy import event
+
+from app import database
+
+
+def _me(cliente, usuario, include=None):
+    return cliente.get("/usuarios/me/", headers=usuario.headers, params={"include": include} if include else None)
+
+
+def _transaccion(cliente, usuario):
+    r = cliente.post("/transacciones/", headers=usuario.headers, json={
+        "monto": 5, "descripcion": "algo", "tipo": "gasto", "categoria_id": usuario.gasto,
+    })
+    assert r.status_code == 200
+
+
+def test_perfil_sin_relaciones(cliente, usuario):
+    _transaccion(cliente, usuario)
+    sentencias = []
+
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    event.listen(database.engine, "before_cursor_execute", capturar)
+    try:
+        r = _me(cliente, usuario)
+    finally:
+        event.remove(database.engine, "before_cursor_execute", capturar)
+    assert r.status_code == 200
+    assert r.json() == {"id": usuario.id, "email": f"{usuario.nombre}@example.com", "nombre": usuario.nombre, "moneda": "ARS"}
+    # Ni las transacciones ni las categorías se leen
+    assert not [s for s in sentencias if "transacciones" in s or "categorias" in s]
+
+
+def test_include(cliente, usuario):
+    _transaccion(cliente, usuario)
+    _transaccion(cliente, usuario)
+
+    r = _me(cliente, usuario, "conteos")
+    assert r.json()["conteos"] == {"transacciones": 2, "categorias": 2}
+    assert "transacciones" not in r.json() and "categorias" not in r.json()
+
+    datos = _me(cliente, usuario, "transacciones, categorias").json()
+    assert [t["monto"] for t in datos["transacciones"]] == [5, 5]
+    assert sorted(c["nombre"] for c in datos["categorias"]) == ["Gasto", "Ingreso"]
+    assert "conteos" not in datos
+
+    r = _me(cliente, usuario, "conteos,password")
+    assert r.status_code == 400 and "categorias, conteos, transacciones" in r.json()["detail"]
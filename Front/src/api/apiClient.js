@@ -3,8 +3,28 @@ import axios from 'axios';
 // Crea una instancia de Axios con la URL base de tu API
 const apiClient = axios.create({
   baseURL: 'http://127.0.0.1:8000', // La URL de tu backend FastAPI
+  // 304 (Not Modified) no es un error: lo resuelve el interceptor de respuestas
+  validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
 });
 
+// --- Cache de GET con ETag ---
+// Guardamos la última respuesta de cada GET que trae ETag. En el próximo
+// pedido a la misma URL mandamos If-None-Match: si los datos no cambiaron,
+// el backend responde 304 sin cuerpo y usamos la respuesta guardada.
+const MAX_RESPUESTAS_CACHEADAS = 100;
+const respuestasCacheadas = new Map();
+
+// El token es parte de la clave: cada usuario tiene sus propias entradas
+const claveCache = (config) => `${config.headers.Authorization ?? ''} ${apiClient.getUri(config)}`;
+
+const guardarRespuesta = (clave, respuesta) => {
+  respuestasCacheadas.delete(clave); // Al reinsertarla queda como la más reciente
+  respuestasCacheadas.set(clave, respuesta);
+  if (respuestasCacheadas.size > MAX_RESPUESTAS_CACHEADAS) {
+    respuestasCacheadas.delete(respuestasCacheadas.keys().next().value);
+  }
+};
+
 // Toma el token del localStorage y lo pone en la cabecera 'Authorization'.
 apiClient.interceptors.request.use(
   (config) => {
@@ -12,6 +32,15 @@ apiClient.interceptors.request.use(
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
+    if (config.method === 'get') {
+      config.claveCache = claveCache(config);
+      const guardada = respuestasCacheadas.get(config.claveCache);
+      if (guardada && !config.sinValidador) {
+        config.headers['If-None-Match'] = guardada.etag;
+      } else {
+        delete config.headers['If-None-Match'];
+      }
+    }
     return config;
   },
   (error) => {
@@ -19,4 +48,130 @@ apiClient.interceptors.request.use(
   }
 );
 
-export default apiClient;
\ No newline at end of file
+// --- Renovación del token de acceso ---
+// El token de acceso dura poco. Cuando un pedido vuelve con 401, cambiamos
+// el refresh token por uno nuevo en /token/refresh (sin pedir la
+// contraseña) y repetimos el pedido una vez. Los 401 simultáneos comparten
+// una sola renovación: el backend acepta cada refresh token una única vez
+// y si lo recibe dos veces cierra la sesión.
+let renovacionEnCurso = null;
+
+export const guardarTokens = ({ access_token, refresh_token }) => {
+  localStorage.setItem('access_token', access_token);
+  if (refresh_token) {
+    localStorage.setItem('refresh_token', refresh_token);
+  }
+  window.dispatchEvent(new CustomEvent('tokens-renovados', { detail: access_token }));
+};
+
+const renovarToken = () => {
+  if (!renovacionEnCurso) {
+    const refreshToken = localStorage.getItem('refresh_token');
+    renovacionEnCurso = (refreshToken
+      ? apiClient.post('/token/refresh', { refresh_token: refreshToken }, { sinRenovar: true })
+      : Promise.reject(new Error('Sin refresh token'))
+    )
+      .then((response) => {
+        guardarTokens(response.data);
+        return response.data.access_token;
+      })
+      .catch((error) => {
+        // Vencido o revocado: hay que volver a loguearse
+        localStorage.removeItem('refresh_token');
+        window.dispatchEvent(new Event('sesion-expirada'));
+        throw error;
+      })
+      .finally(() => {
+        renovacionEnCurso = null;
+      });
+  }
+  return renovacionEnCurso;
+};
+
+const esPedidoDeToken = (config) => config.url === '/token' || config.url?.startsWith('/token/');
+
+// Completa los 304 con la respuesta guardada y guarda las nuevas.
+apiClient.interceptors.response.use((response) => {
+  const { config } = response;
+  if (!config.claveCache) {
+    return response;
+  }
+  if (response.status === 304) {
+    const guardada = respuestasCacheadas.get(config.claveCache);
+    if (!guardada) {
+      // Se descartó mientras tanto: pedimos de nuevo sin validador
+      return apiClient.request({ ...config, sinValidador: true });
+    }
+    return { ...response, status: 200, data: guardada.data, headers: guardada.headers };
+  }
+  const etag = response.headers.etag;
+  if (etag) {
+    guardarRespuesta(config.claveCache, { etag, data: response.data, headers: response.headers });
+  }
+  return response;
+}, async (error) => {
+  const { config, response } = error;
+  if (response?.status !== 401 || !config || config.sinRenovar || esPedidoDeToken(config)) {
+    throw error;
+  }
+  await renovarToken();
+  // El interceptor de pedidos toma el token nuevo del localStorage
+  return apiClient.request({ ...config, sinRenovar: true });
+});
+
+// --- Eventos del servidor (Server-Sent Events) ---
+// Abre un EventSource a 'ruta' y llama a manejadores[evento] con los datos
+// de cada evento. EventSource no manda headers: antes de cada conexión
+// pedimos un ticket de pocos segundos (POST <ruta>/ticket, que renueva el
+// token si hace falta) y va en ?ticket=, así el token de acceso no queda en
+// la URL. Ante cortes de red EventSource reconecta solo; si el servidor la
+// cierra (por ejemplo, 401 con el ticket vencido) volvemos a abrir con un
+// ticket nuevo y espera creciente. Devuelve una función que cierra la conexión.
+export const conectarEventos = (ruta, manejadores) => {
+  let fuente = null;
+  let cerrada = false;
+  let espera = 1000;
+  let reintento = null;
+
+  const reintentar = () => {
+    if (!cerrada) {
+      reintento = setTimeout(abrir, espera);
+      espera = Math.min(espera * 2, 30000);
+    }
+  };
+
+  const abrir = () => {
+    apiClient.post(`${ruta}/ticket`)
+      .then(({ data }) => {
+        if (cerrada) {
+          return;
+        }
+        const url = new URL(ruta, apiClient.defaults.baseURL);
+        url.searchParams.set('ticket', data.ticket);
+        fuente = new EventSource(url);
+        Object.entries(manejadores).forEach(([evento, manejador]) => {
+          fuente.addEventListener(evento, (e) => {
+            espera = 1000;
+            manejador(JSON.parse(e.data));
+          });
+        });
+        fuente.onerror = () => {
+          if (!cerrada && fuente.readyState === EventSource.CLOSED) {
+            reintentar();
+          }
+        };
+      })
+      .catch(reintentar);
+  };
+
+  if (typeof EventSource !== 'undefined') {
+    abrir();
+  }
+  return () => {
+    cerrada = true;
+    clearTimeout(reintento);
+    fuente?.close();
+  };
+};
+
+export default apiClient;
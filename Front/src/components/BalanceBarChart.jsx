@@ -6,21 +6,39 @@ import {
 import { Typography, Paper, Box } from '@mui/material'; 
 import { useTheme } from '@mui/material/styles';
 
-function BalanceBarChart({ ingresos, gastos }) {
+// Convierte el 'periodo' (YYYY-MM-DD) de /dashboard/series en una etiqueta corta
+const etiquetaPeriodo = (periodo, granularidad) => {
+    const [anio, mes, dia] = periodo.split('-').map(Number);
+    const fecha = new Date(anio, mes - 1, dia); // Fecha local, sin corrimiento de zona horaria
+    if (granularidad === 'month') {
+        return fecha.toLocaleDateString('es-AR', { month: 'short', year: '2-digit' });
+    }
+    return fecha.toLocaleDateString('es-AR', { day: '2-digit', month: 'short' });
+};
+
+// Si recibe 'series' (respuesta de /dashboard/series) muestra una barra por período;
+// si no, muestra solo los totales 'ingresos' y 'gastos' del mes actual.
+function BalanceBarChart({ ingresos, gastos, series, titulo }) {
     const theme = useTheme();
 
-    const data = [
-        {
-            name: 'Balance Mensual',
-            Ingresos: ingresos,
-            Gastos: gastos,
-        },
-    ];
+    const data = series
+        ? series.puntos.map(p => ({
+            name: etiquetaPeriodo(p.periodo, series.granularidad),
+            Ingresos: p.total_ingresos,
+            Gastos: p.total_gastos,
+        }))
+        : [
+            {
+                name: 'Balance Mensual',
+                Ingresos: ingresos,
+                Gastos: gastos,
+            },
+        ];
 
     return (
         <Paper sx={{ p: 2, height: 400, width: '100%' }}>
             <Typography variant="h6" gutterBottom align="center">
-                Ingresos vs. Gastos (Mes Actual)
+                {titulo ?? 'Ingresos vs. Gastos (Mes Actual)'}
             </Typography>
 
             <ResponsiveContainer width="100%" height="85%">
@@ -1,14 +1,31 @@
-import React from 'react';
+import React, { useEffect, useRef } from 'react';
 import { 
   List, ListItem, ListItemText, Typography, Paper, 
-  IconButton, Box 
+  IconButton, Box, CircularProgress 
 } from '@mui/material';
 import EditIcon from '@mui/icons-material/Edit';
 import DeleteIcon from '@mui/icons-material/Delete';
 
-// Recibe las props 'onDelete' y 'onEdit' desde la página padre
-function TransactionList({ transactions, onDelete, onEdit }) {
-  
+// Recibe las props 'onDelete' y 'onEdit' desde la página padre.
+// Con 'hasMore' y 'onLoadMore' hace scroll infinito: cuando el final de la
+// lista entra en pantalla, pide la página siguiente.
+function TransactionList({ transactions, onDelete, onEdit, hasMore = false, loadingMore = false, onLoadMore }) {
+  const sentinelRef = useRef(null);
+
+  useEffect(() => {
+    const sentinel = sentinelRef.current;
+    if (!sentinel || !hasMore || !onLoadMore) return;
+
+    const observer = new IntersectionObserver((entries) => {
+      if (entries[0].isIntersecting) {
+        onLoadMore();
+      }
+    }, { rootMargin: '200px' }); // Empezamos a cargar un poco antes de llegar al final
+
+    observer.observe(sentinel);
+    return () => observer.disconnect();
+  }, [hasMore, onLoadMore]);
+
   if (transactions.length === 0) {
     return <Typography>No hay transacciones registradas.</Typography>;
   }
@@ -69,6 +86,13 @@ function TransactionList({ transactions, onDelete, onEdit }) {
           </ListItem>
         ))}
       </List>
+
+      {/* Marcador del final de la lista para el scroll infinito */}
+      {hasMore && (
+        <Box ref={sentinelRef} sx={{ display: 'flex', justifyContent: 'center', py: 2 }}>
+          {loadingMore && <CircularProgress size={24} />}
+        </Box>
+      )}
     </Paper>
   );
 }
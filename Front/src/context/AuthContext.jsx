@@ -1,5 +1,5 @@
 import React, { createContext, useState, useContext, useEffect } from 'react';
-import apiClient from '../api/apiClient';
+import apiClient, { guardarTokens } from '../api/apiClient';
 import { useNavigate } from 'react-router-dom';
 
 // 1. Crear el Contexto
@@ -23,6 +23,23 @@ export const AuthProvider = ({ children }) => {
     }
   }, [token]);
 
+  // apiClient renueva el token solo: mantenemos el estado al día y, si la
+  // sesión venció del todo, volvemos al login
+  useEffect(() => {
+    const alRenovar = (event) => setToken(event.detail);
+    const alExpirar = () => {
+      setToken(null);
+      setUser(null);
+      navigate('/login');
+    };
+    window.addEventListener('tokens-renovados', alRenovar);
+    window.addEventListener('sesion-expirada', alExpirar);
+    return () => {
+      window.removeEventListener('tokens-renovados', alRenovar);
+      window.removeEventListener('sesion-expirada', alExpirar);
+    };
+  }, [navigate]);
+
   const login = async (usernameOrEmail, password) => { 
     try {
       const formData = new URLSearchParams();
@@ -32,8 +49,8 @@ export const AuthProvider = ({ children }) => {
 
       const response = await apiClient.post('/token', formData);
       
-      const { access_token } = response.data;
-      setToken(access_token);
+      guardarTokens(response.data);
+      setToken(response.data.access_token);
       
       navigate('/transacciones');
     } catch (error) {
@@ -43,6 +60,12 @@ export const AuthProvider = ({ children }) => {
   };
 
   const logout = () => {
+    // Revocamos la sesión en el backend; si falla, igual salimos
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (refreshToken) {
+      localStorage.removeItem('refresh_token');
+      apiClient.post('/token/revoke', { refresh_token: refreshToken }).catch(() => {});
+    }
     setToken(null);
     setUser(null);
     navigate('/login'); // Redirige al login
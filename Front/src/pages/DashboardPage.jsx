@@ -1,13 +1,42 @@
 import React, { useState, useEffect, useCallback } from 'react'; // Importa useCallback
 // Importa Skeleton, Alert, Button y Divider
 import { Container, Typography, CircularProgress, Box, Skeleton, Alert, Button, Divider } from '@mui/material'; 
-import apiClient from '../api/apiClient';
+import apiClient, { conectarEventos } from '../api/apiClient';
 import BalanceDisplay from '../components/BalanceDisplay';
 import CategoryPieChart from '../components/CategoryPieChart';
 import BalanceBarChart from '../components/BalanceBarChart';
 
+// Rango de los últimos 12 meses (incluye el actual) en formato YYYY-MM-DD
+const rangoUltimosMeses = (meses = 12) => {
+  const hoy = new Date();
+  const formatear = (d) => `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-01`;
+  const desde = new Date(hoy.getFullYear(), hoy.getMonth() - (meses - 1), 1);
+  const hasta = new Date(hoy.getFullYear(), hoy.getMonth() + 1, 1);
+  return { from: formatear(desde), to: formatear(hasta) };
+};
+
+// Aplica al resumen un evento 'cambios' de /dashboard/stream: trae solo los
+// totales que cambiaron y las categorías nuevas, modificadas o sin gastos
+const aplicarCambios = (resumen, cambios) => {
+  if (!resumen) {
+    return resumen;
+  }
+  const { periodos, categorias = [], categorias_borradas = [], ...totales } = cambios;
+  const modificadas = new Map(categorias.map((c) => [c.name, c]));
+  const gastos = resumen.gastos_por_categoria
+    .filter((c) => !categorias_borradas.includes(c.name))
+    .map((c) => modificadas.get(c.name) ?? c);
+  const nuevas = categorias.filter((c) => !resumen.gastos_por_categoria.some((g) => g.name === c.name));
+  return { ...resumen, ...totales, gastos_por_categoria: [...gastos, ...nuevas] };
+};
+
+// ¿Alguno de los meses cambiados ('AAAA-MM', o null = todos) cae en el rango del gráfico?
+const tocaElRango = (periodos, rango) =>
+  periodos === null || periodos.some((p) => `${p}-01` >= rango.from && `${p}-01` < rango.to);
+
 function DashboardPage() {
   const [summary, setSummary] = useState(null);
+  const [series, setSeries] = useState(null); // Serie mensual para el gráfico de barras
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null); // Nuevo estado para el error
 
@@ -16,8 +45,15 @@ function DashboardPage() {
     try {
       setLoading(true);
       setError(null); // Limpiamos errores anteriores
-      const response = await apiClient.get('/dashboard/summary');
-      setSummary(response.data);
+      // Pedimos el resumen del mes y la serie anual en paralelo
+      const [summaryResponse, seriesResponse] = await Promise.all([
+        apiClient.get('/dashboard/summary'),
+        apiClient.get('/dashboard/series', {
+          params: { ...rangoUltimosMeses(12), granularity: 'month' },
+        }),
+      ]);
+      setSummary(summaryResponse.data);
+      setSeries(seriesResponse.data);
     } catch (err) {
       console.error("Error al cargar el resumen:", err);
       setError("No se pudo cargar el resumen del dashboard. Intenta de nuevo."); // Guardamos el mensaje de error
@@ -31,6 +67,25 @@ function DashboardPage() {
     fetchSummary();
   }, [fetchSummary]); // Ahora useEffect depende de fetchSummary
 
+  // En lugar de volver a pedir el resumen, el backend avisa cada cambio por
+  // /dashboard/stream: aplicamos el delta y, si cambió algún mes del
+  // gráfico, pedimos de nuevo la serie (con ETag)
+  useEffect(() => {
+    const cerrar = conectarEventos('/dashboard/stream', {
+      resumen: ({ periodo, ...resumen }) => setSummary(resumen),
+      cambios: (cambios) => {
+        setSummary((actual) => aplicarCambios(actual, cambios));
+        const rango = rangoUltimosMeses(12);
+        if (tocaElRango(cambios.periodos, rango)) {
+          apiClient.get('/dashboard/series', { params: { ...rango, granularity: 'month' } })
+            .then((response) => setSeries(response.data))
+            .catch((err) => console.error("Error al actualizar la serie:", err));
+        }
+      },
+    });
+    return cerrar;
+  }, []);
+
   // --- 1. Estado de Carga Mejorado con Skeletons ---
   if (loading) {
     return (
@@ -106,6 +161,8 @@ function DashboardPage() {
           <BalanceBarChart 
             ingresos={summary?.total_ingresos ?? 0}
             gastos={summary?.total_gastos ?? 0}
+            series={series}
+            titulo="Ingresos vs. Gastos (Últimos 12 meses)"
           />
         </Box>
       </Box>
@@ -5,8 +5,14 @@ import TransactionForm from '../components/TransactionForm';
 import TransactionList from '../components/TransactionList'; 
 import TransactionEditModal from '../components/TransactionEditModal'; // Importa el Modal
 
+// Cantidad de transacciones por página (scroll infinito)
+const PAGE_SIZE = 50;
+
 function TransactionsPage() {
   const [transactions, setTransactions] = useState([]);
+  // Cursor opaco que devuelve el backend en 'X-Next-Cursor' (null = no hay más páginas)
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   
   // --- Estado para manejar el Modal ---
   const [isModalOpen, setIsModalOpen] = useState(false);
@@ -14,16 +20,34 @@ function TransactionsPage() {
   const [editingTransaction, setEditingTransaction] = useState(null); 
   // ----------------------------------------
 
-  // (RF-005) Función para LEER todas las transacciones
+  // (RF-005) Función para LEER la primera página de transacciones
   const fetchTransactions = async () => {
     try {
-      const response = await apiClient.get('/transacciones/');
+      const response = await apiClient.get('/transacciones/', { params: { limit: PAGE_SIZE } });
       setTransactions(response.data); // Guardamos la lista en el estado
+      setNextCursor(response.headers['x-next-cursor'] ?? null);
     } catch (error) {
       console.error("Error al cargar transacciones:", error);
     }
   };
 
+  // Trae la página siguiente usando el cursor y la agrega al final de la lista
+  const fetchMoreTransactions = async () => {
+    if (!nextCursor || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      const response = await apiClient.get('/transacciones/', {
+        params: { limit: PAGE_SIZE, cursor: nextCursor },
+      });
+      setTransactions(prev => [...prev, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] ?? null);
+    } catch (error) {
+      console.error("Error al cargar más transacciones:", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // Cargar las transacciones cuando la página se abre por primera vez
   useEffect(() => {
     fetchTransactions();
@@ -79,6 +103,9 @@ function TransactionsPage() {
         transactions={transactions} 
         onDelete={handleDelete}
         onEdit={handleOpenEditModal} // Le pasamos la función de editar
+        hasMore={nextCursor !== null}
+        loadingMore={loadingMore}
+        onLoadMore={fetchMoreTransactions}
       />
 
       {/* Renderiza el Modal (solo si hay una transacción para editar) */}